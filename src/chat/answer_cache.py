@@ -0,0 +1,145 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import cast
+from uuid import uuid4
+
+import numpy as np
+from numpy.typing import NDArray
+
+from src.common.redis import RedisClient
+from src.sources.generation import get_source_generations
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheableQuestion:
+    model: str
+    source_names: list[str]
+    question: str
+    embedding: list[float]
+
+
+class AnswerCache:
+    """Semantic cache of answers to single-turn questions.
+
+    Entries are grouped per model and source set, and matched by cosine
+    similarity of the question embedding. Groups are keyed by the sync
+    generation of each source, so entries answered from older documents are
+    never read again and expire with their group.
+
+    Each group keeps a sorted set of entry IDs by expiry time, which bounds
+    the entries a lookup compares and decides which are evicted first, the
+    embeddings packed as float32, and the answers, of which only the best
+    match is read.
+    """
+
+    key_prefix = "answer_cache:"
+
+    def __init__(
+        self,
+        *,
+        redis_client: RedisClient,
+        similarity_threshold: float,
+        ttl: int,
+        max_entries: int,
+    ):
+        self.redis_client = redis_client
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _get_key(self, question: CacheableQuestion) -> str:
+        generations = get_source_generations(
+            self.redis_client, sorted(question.source_names)
+        )
+        group_hash = hashlib.sha256(json.dumps(generations).encode()).hexdigest()
+        return f"{self.key_prefix}{question.model}:{group_hash}"
+
+    def _encode_embedding(self, embedding: list[float]) -> str:
+        # Base64, since the shared client decodes responses as text
+        return base64.b64encode(
+            np.asarray(embedding, dtype=np.float32).tobytes()
+        ).decode()
+
+    def _decode_embedding(self, value: str) -> NDArray[np.float32]:
+        return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+
+    def lookup(self, question: CacheableQuestion) -> str | None:
+        """Return the cached answer most similar to the question, if any."""
+        key = self._get_key(question)
+        entry_ids = self.redis_client.zrevrangebyscore(
+            f"{key}:ids", "+inf", f"({time.time()}", start=0, num=self.max_entries
+        )
+        if not entry_ids:
+            return None
+
+        values = cast(
+            list[str | None],
+            self.redis_client.hmget(f"{key}:embeddings", entry_ids),
+        )
+        entries = [
+            (entry_id, self._decode_embedding(value))
+            for entry_id, value in zip(entry_ids, values)
+            if value
+        ]
+        if not entries:
+            return None
+
+        matrix = np.stack([embedding for _, embedding in entries])
+        query = np.array(question.embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        similarities = (matrix @ query) / np.where(norms == 0, 1, norms)
+
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        entry = cast(
+            str | None, self.redis_client.hget(f"{key}:entries", entries[best][0])
+        )
+        if entry is None:
+            return None
+
+        logger.debug(
+            f"Answer cache hit with similarity {similarities[best]:.3f} for {key}"
+        )
+        return json.loads(entry)["answer"]
+
+    def store(self, question: CacheableQuestion, answer: str) -> None:
+        """Cache an answer against the current generation of its sources."""
+        key = self._get_key(question)
+        ids_key = f"{key}:ids"
+        now = time.time()
+
+        # Expired entries have the lowest scores, followed by the oldest ones
+        pipeline = self.redis_client.pipeline()
+        pipeline.zcard(ids_key)
+        pipeline.zcount(ids_key, "-inf", now)
+        entry_count, expired_count = pipeline.execute()
+        evict_count = max(expired_count, entry_count - self.max_entries + 1)
+        evicted = (
+            cast(list[str], self.redis_client.zrange(ids_key, 0, evict_count - 1))
+            if evict_count > 0
+            else []
+        )
+
+        entry_id = str(uuid4())
+        entry = {"question": question.question, "answer": answer, "created_at": now}
+        pipeline = self.redis_client.pipeline()
+        if evicted:
+            pipeline.zrem(ids_key, *evicted)
+            pipeline.hdel(f"{key}:embeddings", *evicted)
+            pipeline.hdel(f"{key}:entries", *evicted)
+        pipeline.zadd(ids_key, {entry_id: now + self.ttl})
+        pipeline.hset(
+            f"{key}:embeddings", entry_id, self._encode_embedding(question.embedding)
+        )
+        pipeline.hset(f"{key}:entries", entry_id, json.dumps(entry))
+        for group_key in (ids_key, f"{key}:embeddings", f"{key}:entries"):
+            pipeline.expire(group_key, self.ttl)
+        pipeline.execute()
@@ -0,0 +1,136 @@
+import json
+from dataclasses import dataclass
+
+import tiktoken
+
+from src.chat.tokens import count_tokens
+from src.document_store.schemas import Document
+
+MIN_CHUNK_OVERLAP_CHARS = 20
+
+
+@dataclass
+class PackedChunk:
+    doc_ids: list[str]
+    url: str
+    content: str
+
+
+def merge_overlapping_text(
+    first: str, second: str, min_overlap: int = MIN_CHUNK_OVERLAP_CHARS
+) -> str | None:
+    """Merge two chunks if the end of 'first' overlaps the start of 'second'."""
+    if len(first) < min_overlap or len(second) < min_overlap:
+        return None
+
+    if second in first:
+        return first
+
+    anchor = second[:min_overlap]
+    position = first.find(anchor, max(0, len(first) - len(second)))
+    while position != -1:
+        if second.startswith(first[position:]):
+            return first + second[len(first) - position :]
+        position = first.find(anchor, position + 1)
+
+    return None
+
+
+def merge_adjacent_chunks(documents: list[Document]) -> list[PackedChunk]:
+    """Merge overlapping chunks from the same URL, preserving rank order."""
+    chunks: list[PackedChunk] = []
+
+    for doc in documents:
+        chunk = PackedChunk(doc_ids=[doc.id], url=doc.url, content=doc.content)
+        position = len(chunks)
+
+        merged = True
+        while merged:
+            merged = False
+            for index, existing in enumerate(chunks):
+                if existing.url != chunk.url:
+                    continue
+
+                content = merge_overlapping_text(
+                    existing.content, chunk.content
+                ) or merge_overlapping_text(chunk.content, existing.content)
+                if content is None:
+                    continue
+
+                chunks.pop(index)
+                chunk = PackedChunk(
+                    doc_ids=existing.doc_ids + chunk.doc_ids,
+                    url=chunk.url,
+                    content=content,
+                )
+                position = min(position, index)
+                merged = True
+                break
+
+        chunks.insert(min(position, len(chunks)), chunk)
+
+    return chunks
+
+
+class ContextPacker:
+    """Packs retrieved documents into tool message content within token budgets.
+
+    A packer lives for a single conversation so documents returned by earlier
+    tool calls are not repeated and the total retrieved context stays bounded.
+    Server-side conversations seed it with the documents retrieved in earlier
+    turns.
+
+    ``min_score`` is compared against the reciprocal rank fusion score of the
+    hybrid search, not a similarity: a document ranked first by both searches
+    scores ``2 / 61`` (about 0.033) and one found by a single search at most
+    ``1 / 60``.
+    """
+
+    def __init__(
+        self,
+        *,
+        encoding: tiktoken.Encoding,
+        call_token_budget: int,
+        conversation_token_budget: int,
+        min_score: float | None = None,
+        seen_doc_ids: set[str] | None = None,
+    ):
+        self.encoding = encoding
+        self.call_token_budget = call_token_budget
+        self.conversation_token_budget = conversation_token_budget
+        self.min_score = min_score
+        self.seen_doc_ids: set[str] = set(seen_doc_ids or ())
+        self.tokens_used = 0
+
+    def _is_candidate(self, doc: Document) -> bool:
+        if doc.id in self.seen_doc_ids:
+            return False
+
+        if self.min_score is not None and doc.score is not None:
+            return doc.score >= self.min_score
+
+        return True
+
+    def pack(self, documents: list[Document]) -> str:
+        candidates = [doc for doc in documents if self._is_candidate(doc)]
+        budget = min(
+            self.call_token_budget,
+            self.conversation_token_budget - self.tokens_used,
+        )
+
+        packed: list[dict[str, str]] = []
+        call_tokens = 0
+
+        for chunk in merge_adjacent_chunks(candidates):
+            entry = {"url": chunk.url, "content": chunk.content}
+            tokens = count_tokens(self.encoding, json.dumps(entry))
+            if call_tokens + tokens > budget:
+                continue
+
+            packed.append(entry)
+            call_tokens += tokens
+            self.seen_doc_ids.update(chunk.doc_ids)
+
+        self.tokens_used += call_tokens
+
+        return json.dumps(packed)
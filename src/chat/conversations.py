@@ -0,0 +1,98 @@
+from typing import Literal
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from src.common.current_datetime import get_current_datetime
+from src.common.exceptions import ResourceNotFoundException, ResourceType
+from src.common.redis import RedisClient
+from src.chat.schemas import ChatMessage, Conversation
+
+
+class StoredMessage(BaseModel):
+    role: Literal["user", "assistant"]
+    content: str
+    # Token count cache, keyed by the encoding it was counted with
+    encoding: str
+    tokens: int
+
+
+class ConversationStore:
+    """Keeps conversation history in Redis so clients only send new messages.
+
+    Each conversation has a metadata hash, a list of messages with cached
+    token counts and a set of the document chunk IDs retrieved so far. All
+    keys share a TTL that is refreshed on every turn.
+    """
+
+    key_prefix = "conversation:"
+
+    def __init__(self, redis_client: RedisClient, ttl: int):
+        self.redis_client = redis_client
+        self.ttl = ttl
+
+    def _get_keys(self, conversation_id: str) -> tuple[str, str, str]:
+        key = f"{self.key_prefix}{conversation_id}"
+        return key, f"{key}:messages", f"{key}:retrieved"
+
+    def create_conversation(self) -> str:
+        conversation_id = str(uuid4())
+        key, _, _ = self._get_keys(conversation_id)
+        self.redis_client.hset(
+            key, mapping={"created_at": get_current_datetime().isoformat()}
+        )
+        self.redis_client.expire(key, self.ttl)
+        return conversation_id
+
+    def validate_conversation(self, conversation_id: str) -> None:
+        key, _, _ = self._get_keys(conversation_id)
+        if not self.redis_client.exists(key):
+            raise ResourceNotFoundException(ResourceType.CONVERSATION, conversation_id)
+
+    def get_messages(self, conversation_id: str) -> list[StoredMessage]:
+        self.validate_conversation(conversation_id)
+        _, messages_key, _ = self._get_keys(conversation_id)
+        return [
+            StoredMessage.model_validate_json(message)
+            for message in self.redis_client.lrange(messages_key, 0, -1)
+        ]
+
+    def get_retrieved_doc_ids(self, conversation_id: str) -> set[str]:
+        self.validate_conversation(conversation_id)
+        _, _, retrieved_key = self._get_keys(conversation_id)
+        return set(self.redis_client.smembers(retrieved_key))
+
+    def append_turn(
+        self,
+        conversation_id: str,
+        messages: list[StoredMessage],
+        retrieved_doc_ids: set[str],
+    ) -> None:
+        keys = self._get_keys(conversation_id)
+        _, messages_key, retrieved_key = keys
+
+        pipeline = self.redis_client.pipeline()
+        if messages:
+            pipeline.rpush(
+                messages_key, *[message.model_dump_json() for message in messages]
+            )
+        if retrieved_doc_ids:
+            pipeline.sadd(retrieved_key, *retrieved_doc_ids)
+        for key in keys:
+            pipeline.expire(key, self.ttl)
+        pipeline.execute()
+
+    def get_conversation(self, conversation_id: str) -> Conversation:
+        messages = self.get_messages(conversation_id)
+        return Conversation(
+            id=conversation_id,
+            messages=[
+                ChatMessage(role=message.role, content=message.content)
+                for message in messages
+            ],
+            retrieved_doc_ids=sorted(self.get_retrieved_doc_ids(conversation_id)),
+        )
+
+    def delete_conversation(self, conversation_id: str) -> None:
+        self.validate_conversation(conversation_id)
+        self.redis_client.delete(*self._get_keys(conversation_id))
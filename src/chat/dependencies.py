@@ -1,18 +1,53 @@
 from fastapi import Depends
 from openai import OpenAI
+from src.chat.answer_cache import AnswerCache
+from src.chat.conversations import ConversationStore
+from src.chat.history import HistorySummarizer
 from src.chat.service import ChatService
 from src.chat.tools.definitions import TOOL_DEFINITIONS
 from src.llm_providers.client import get_chat_openai_client
+from src.common.redis import RedisClient, get_redis_client
 from src.config import Settings, get_settings
-from src.sources.dependencies import get_source_service
+from src.sources.dependencies import get_source_router, get_source_service
+from src.sources.routing import SourceRouter
 from src.sources.service import SourceService
 
 
+def get_conversation_store(
+    redis_client: RedisClient = Depends(get_redis_client),
+    settings: Settings = Depends(get_settings),
+) -> ConversationStore:
+    return ConversationStore(redis_client, ttl=settings.CONVERSATION_TTL)
+
+
 def get_chat_service(
     source_service: SourceService = Depends(get_source_service),
     settings: Settings = Depends(get_settings),
     openai_client: OpenAI = Depends(get_chat_openai_client),
+    redis_client: RedisClient = Depends(get_redis_client),
+    source_router: SourceRouter = Depends(get_source_router),
+    conversation_store: ConversationStore = Depends(get_conversation_store),
 ) -> ChatService:
+    answer_cache = (
+        AnswerCache(
+            redis_client=redis_client,
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            ttl=settings.ANSWER_CACHE_TTL,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+        )
+        if settings.ANSWER_CACHE_ENABLED
+        else None
+    )
+    history_summarizer = (
+        HistorySummarizer(
+            redis_client=redis_client,
+            openai_client=openai_client,
+            ttl=settings.CHAT_HISTORY_SUMMARY_TTL,
+        )
+        if settings.CHAT_HISTORY_SUMMARY_ENABLED
+        else None
+    )
+
     return ChatService(
         source_service=source_service,
         openai_client=openai_client,
@@ -21,6 +56,23 @@ def get_chat_service(
         base_system_prompt=settings.BASE_SYSTEM_PROMPT,
         tool_definitions=TOOL_DEFINITIONS,
         chat_history_limit=settings.CHAT_HISTORY_LIMIT,
+        chat_history_max_tokens=settings.CHAT_HISTORY_MAX_TOKENS,
         max_iterations=settings.MAX_CHAT_ITERATIONS,
         retrieval_top_k=settings.RETRIEVAL_TOP_K,
+        retrieval_max_tokens=settings.RETRIEVAL_MAX_TOKENS,
+        retrieval_conversation_max_tokens=settings.RETRIEVAL_CONVERSATION_MAX_TOKENS,
+        retrieval_min_score=settings.RETRIEVAL_MIN_SCORE,
+        tool_call_concurrency=settings.TOOL_CALL_CONCURRENCY,
+        answer_cache=answer_cache,
+        history_summarizer=history_summarizer,
+        speculative_retrieval=settings.SPECULATIVE_RETRIEVAL_ENABLED,
+        speculative_max_sources=settings.SPECULATIVE_RETRIEVAL_MAX_SOURCES,
+        speculative_min_overlap=settings.SPECULATIVE_RETRIEVAL_MIN_OVERLAP,
+        source_router=source_router if settings.SOURCE_ROUTING_ENABLED else None,
+        routing_max_sources=settings.SOURCE_ROUTING_MAX_SOURCES,
+        conversation_store=conversation_store,
+        deadline_seconds=settings.CHAT_DEADLINE,
+        max_deadline_seconds=settings.CHAT_DEADLINE_MAX,
+        deadline_answer_reserve=settings.CHAT_DEADLINE_ANSWER_RESERVE,
+        deadline_min_retrieval=settings.CHAT_DEADLINE_MIN_RETRIEVAL,
     )
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+
+import tiktoken
+from openai import APIError, OpenAI
+from redis.exceptions import RedisError
+
+from src.chat.schemas import ChatMessage
+from src.chat.tokens import count_tokens
+from src.common.deadline import Deadline
+from src.common.redis import RedisClient
+from src.llm_providers.client import with_deadline
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-message overhead of the chat message format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """
+Summarize the conversation below between a user and an assistant so it can replace the original messages as context for later turns.
+Keep the user's goals, key facts, decisions and any unresolved questions. Omit pleasantries.
+Respond with the summary only.
+"""
+
+
+def count_message_tokens(encoding: tiktoken.Encoding, message: ChatMessage) -> int:
+    return count_tokens(encoding, message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_chat_history(
+    messages: list[ChatMessage],
+    *,
+    encoding: tiktoken.Encoding,
+    max_messages: int,
+    max_tokens: int,
+    token_counts: list[int | None] | None = None,
+) -> tuple[list[ChatMessage], list[ChatMessage]]:
+    """Keep the newest messages within the message and token limits.
+
+    'token_counts' optionally provides cached counts aligned with 'messages'.
+    Returns the kept messages and the older messages that were dropped, both
+    in their original order.
+    """
+    kept_count = 0
+    tokens = 0
+
+    for index in reversed(range(max(0, len(messages) - max_messages), len(messages))):
+        cached_count = token_counts[index] if token_counts else None
+        tokens += (
+            cached_count
+            if cached_count is not None
+            else count_message_tokens(encoding, messages[index])
+        )
+        if tokens > max_tokens:
+            break
+        kept_count += 1
+
+    split = len(messages) - kept_count
+    return messages[split:], messages[:split]
+
+
+class HistorySummarizer:
+    """Compresses dropped chat history into a rolling summary cached in Redis.
+
+    Summaries are keyed by a hash chain over the summarized messages, so a
+    later turn of the same conversation reuses the longest summarized prefix
+    and only the newly dropped messages are sent to the model.
+    """
+
+    key_prefix = "chat_summary:"
+
+    def __init__(
+        self,
+        *,
+        redis_client: RedisClient,
+        openai_client: OpenAI,
+        ttl: int,
+    ):
+        self.redis_client = redis_client
+        self.openai_client = openai_client
+        self.ttl = ttl
+
+    def _get_prefix_keys(self, messages: list[ChatMessage]) -> list[str]:
+        keys: list[str] = []
+        digest = ""
+        for message in messages:
+            digest = hashlib.sha256(
+                f"{digest}\n{message.role}\n{message.content}".encode()
+            ).hexdigest()
+            keys.append(f"{self.key_prefix}{digest}")
+        return keys
+
+    def summarize(
+        self,
+        messages: list[ChatMessage],
+        model: str,
+        deadline: Deadline | None = None,
+    ) -> str | None:
+        """Return a summary of the messages, or None if it can't be produced,
+        in which case the truncated history is used alone."""
+        prefix_keys = self._get_prefix_keys(messages)
+        try:
+            cached_summaries = self.redis_client.mget(prefix_keys)
+        except RedisError:
+            logger.exception("Failed to read cached chat history summaries")
+            cached_summaries = [None] * len(messages)
+
+        previous_summary: str | None = None
+        start = 0
+        for index in reversed(range(len(messages))):
+            if cached_summaries[index]:
+                previous_summary = cached_summaries[index]
+                start = index + 1
+                break
+
+        if previous_summary is not None and start == len(messages):
+            return previous_summary
+
+        try:
+            summary = self._generate_summary(
+                previous_summary, messages[start:], model, deadline
+            )
+        except APIError:
+            logger.exception("Failed to summarize chat history")
+            return None
+
+        try:
+            self.redis_client.set(prefix_keys[-1], summary, ex=self.ttl)
+        except RedisError:
+            logger.exception("Failed to cache chat history summary")
+
+        return summary
+
+    def _generate_summary(
+        self,
+        previous_summary: str | None,
+        messages: list[ChatMessage],
+        model: str,
+        deadline: Deadline | None,
+    ) -> str:
+        transcript = "\n\n".join(
+            f"{message.role}: {message.content}" for message in messages
+        )
+        if previous_summary:
+            transcript = (
+                f"Summary of earlier messages: {previous_summary}\n\n{transcript}"
+            )
+
+        openai_client = with_deadline(self.openai_client, deadline)
+        response = openai_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": transcript},
+            ],
+        )
+
+        return response.choices[0].message.content or ""
@@ -1,3 +1,5 @@
+import json
+
 from src.sources.metadata.schemas import SourceMetadata
 
 
@@ -9,6 +11,16 @@ def get_system_prompt(
     sources: list[SourceMetadata],
     max_attempts: int,
 ) -> str:
+    # Sources come last and are rendered deterministically so the prompt
+    # prefix is identical across requests, allowing provider prompt caching.
+    available_sources = json.dumps(
+        [
+            {"name": source.name, "description": source.description}
+            for source in sorted(sources, key=lambda source: source.name)
+        ],
+        indent=2,
+    )
+
     return f"""
 {base_prompt}
 
@@ -25,15 +37,9 @@ def get_system_prompt(
    - If the initial searches are insufficient, try refining the queries or exploring additional sources.
 
 3. **Sources**  
-   - Available sources are listed below. Each source has a `name` and a brief `description`.  
+   - Available sources are listed at the end of these instructions. Each source has a `name` and a brief `description`.  
    - Prioritize sources in order of relevance to the user's query.  
 
-   **Available Sources**:  
-   {[
-       {"name": source.name, "description": source.description}
-       for source in sources
-   ]}
-
 4. **Information Synthesis**  
    - Read and combine information from the relevant sources to formulate your answer.  
    - Respond in a concise, clear, and factual manner, using your best judgment and the highest-quality sources available.
@@ -54,4 +60,7 @@ def get_system_prompt(
 8. **Fallback Behavior**  
    - If you cannot find sufficient information after exhausting all {max_attempts} attempts, respond with:  
      "I'm sorry, but I don't have the information you're looking for."
+
+**Available Sources**:
+{available_sources}
 """
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, status
+from fastapi.responses import StreamingResponse
 
-from src.chat.dependencies import get_chat_service
-from src.chat.schemas import ChatResponse, CreateChatRequest
+from src.chat.conversations import ConversationStore
+from src.chat.dependencies import get_chat_service, get_conversation_store
+from src.chat.schemas import ChatResponse, Conversation, CreateChatRequest
 from src.chat.service import ChatService
 from src.common.exceptions import ResourceType, resource_not_found_response
 
 
+DEADLINE_HEADER_DESCRIPTION = (
+    "Seconds the request may take, overriding the default up to the configured maximum"
+)
+
+
 router = APIRouter(
     prefix="/chat",
     tags=[
@@ -16,6 +23,67 @@ router = APIRouter(
 
 @router.post("", responses={**resource_not_found_response(ResourceType.MODEL)})
 def chat(
-    chat_input: CreateChatRequest, chat_service: ChatService = Depends(get_chat_service)
+    chat_input: CreateChatRequest,
+    x_chat_deadline: float | None = Header(
+        default=None, gt=0, description=DEADLINE_HEADER_DESCRIPTION
+    ),
+    chat_service: ChatService = Depends(get_chat_service),
 ) -> ChatResponse:
-    return chat_service.generate_response(chat_input)
+    return chat_service.generate_response(chat_input, x_chat_deadline)
+
+
+@router.post(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Tool activity and answer tokens streamed as server-sent events",
+            "content": {"text/event-stream": {}},
+        },
+        **resource_not_found_response(ResourceType.MODEL),
+    },
+)
+def chat_stream(
+    chat_input: CreateChatRequest,
+    x_chat_deadline: float | None = Header(
+        default=None, gt=0, description=DEADLINE_HEADER_DESCRIPTION
+    ),
+    chat_service: ChatService = Depends(get_chat_service),
+) -> StreamingResponse:
+    events = chat_service.stream_response(chat_input, x_chat_deadline)
+    return StreamingResponse(
+        (event.to_sse() for event in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/conversations", status_code=status.HTTP_201_CREATED)
+def create_conversation(
+    conversation_store: ConversationStore = Depends(get_conversation_store),
+) -> Conversation:
+    conversation_id = conversation_store.create_conversation()
+    return conversation_store.get_conversation(conversation_id)
+
+
+@router.get(
+    "/conversations/{conversation_id}",
+    responses={**resource_not_found_response(ResourceType.CONVERSATION)},
+)
+def get_conversation(
+    conversation_id: str,
+    conversation_store: ConversationStore = Depends(get_conversation_store),
+) -> Conversation:
+    return conversation_store.get_conversation(conversation_id)
+
+
+@router.delete(
+    "/conversations/{conversation_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={**resource_not_found_response(ResourceType.CONVERSATION)},
+)
+def delete_conversation(
+    conversation_id: str,
+    conversation_store: ConversationStore = Depends(get_conversation_store),
+):
+    conversation_store.delete_conversation(conversation_id)
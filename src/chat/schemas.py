@@ -1,5 +1,6 @@
-from typing import Literal
-from pydantic import BaseModel
+import json
+from typing import Any, Literal
+from pydantic import BaseModel, Field
 
 from src.config import get_settings
 
@@ -15,7 +16,26 @@ class CreateChatRequest(BaseModel):
     sources: list[str] | None = None
     model: str = settings.DEFAULT_CHAT_MODEL
     messages: list[ChatMessage]
+    conversation_id: str | None = Field(
+        default=None,
+        description="Continue a server-side conversation. Only new messages need to be sent.",
+    )
 
 
 class ChatResponse(BaseModel):
     message: str | None
+    conversation_id: str | None = None
+
+
+class Conversation(BaseModel):
+    id: str
+    messages: list[ChatMessage]
+    retrieved_doc_ids: list[str]
+
+
+class ChatStreamEvent(BaseModel):
+    event: Literal["tool_call_start", "tool_call_end", "token", "done", "error"]
+    data: dict[str, Any]
+
+    def to_sse(self) -> str:
+        return f"event: {self.event}\ndata: {json.dumps(self.data)}\n\n"
@@ -1,24 +1,78 @@
 import json
-from openai import APIError, OpenAI, pydantic_function_tool
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator
+from redis.exceptions import RedisError
+from openai import (
+    APIError,
+    APITimeoutError,
+    Omit,
+    OpenAI,
+    Stream,
+    omit,
+    pydantic_function_tool,
+)
 from openai.types.chat import (
+    ChatCompletionChunk,
     ChatCompletionMessageParam,
     ChatCompletionSystemMessageParam,
     ChatCompletionUserMessageParam,
     ChatCompletionAssistantMessageParam,
     ChatCompletionToolMessageParam,
     ChatCompletionMessageToolCall,
+    ChatCompletionMessageToolCallParam,
+    ChatCompletionToolChoiceOptionParam,
 )
 
+from src.chat.answer_cache import AnswerCache, CacheableQuestion
+from src.chat.context import ContextPacker
+from src.chat.conversations import ConversationStore, StoredMessage
 from src.chat.exceptions import ChatException
+from src.chat.history import (
+    HistorySummarizer,
+    count_message_tokens,
+    truncate_chat_history,
+)
 from src.chat.prompts import get_system_prompt
-from src.chat.schemas import ChatResponse, CreateChatRequest
+from src.chat.speculative import SpeculativeRetrieval
+from src.chat.schemas import (
+    ChatMessage,
+    ChatResponse,
+    ChatStreamEvent,
+    CreateChatRequest,
+)
 from src.chat.tools.definitions import ToolDefinition
+from src.chat.tokens import get_token_encoding
 from src.chat.tools.schamas import RetrieveDocuments
-from src.common.exceptions import KnownException
+from src.common.deadline import Deadline
+from src.common.exceptions import KnownException, ResourceNotFoundException
+from src.document_store.schemas import Document
+from src.llm_providers.client import with_deadline
 from src.llm_providers.exceptions import handle_openai_client_error
 from src.sources.metadata.schemas import SourceMetadata
+from src.sources.routing import SourceRouter
 from src.sources.service import SourceService
 
+logger = logging.getLogger(__name__)
+
+NO_ANSWER_MESSAGE = "I'm sorry, but I don't have the information you're looking for."
+RETRIEVAL_SKIPPED_MESSAGE = (
+    "Retrieval was skipped because the time limit for this request was reached. "
+    "Answer using the information already retrieved."
+)
+
+
+@dataclass
+class ChatContext:
+    messages: list[ChatCompletionMessageParam]
+    context_packer: ContextPacker
+    sources: list[SourceMetadata]
+    question_embedding: list[float] | None = None
+    # Sources ranked by the source router, most relevant first
+    ranked_source_names: list[str] | None = None
+    deadline: Deadline | None = None
+
 
 class ChatService:
     def __init__(
@@ -31,8 +85,25 @@ class ChatService:
         base_system_prompt: str,
         tool_definitions: list[ToolDefinition],
         chat_history_limit: int,
+        chat_history_max_tokens: int,
         max_iterations: int,
         retrieval_top_k: int,
+        retrieval_max_tokens: int,
+        retrieval_conversation_max_tokens: int,
+        retrieval_min_score: float | None = None,
+        tool_call_concurrency: int = 1,
+        answer_cache: AnswerCache | None = None,
+        history_summarizer: HistorySummarizer | None = None,
+        speculative_retrieval: bool = False,
+        speculative_max_sources: int = 3,
+        speculative_min_overlap: float = 0.5,
+        source_router: SourceRouter | None = None,
+        routing_max_sources: int = 5,
+        conversation_store: ConversationStore | None = None,
+        deadline_seconds: float | None = None,
+        max_deadline_seconds: float | None = None,
+        deadline_answer_reserve: float = 0.0,
+        deadline_min_retrieval: float = 0.0,
     ):
         self.chat_client = openai_client
         self.source_service = source_service
@@ -40,8 +111,25 @@ class ChatService:
         self.project_description = project_description
         self.base_system_prompt = base_system_prompt
         self.chat_history_limit = chat_history_limit
+        self.chat_history_max_tokens = chat_history_max_tokens
         self.max_iterations = max_iterations
         self.retrieval_top_k = retrieval_top_k
+        self.retrieval_max_tokens = retrieval_max_tokens
+        self.retrieval_conversation_max_tokens = retrieval_conversation_max_tokens
+        self.retrieval_min_score = retrieval_min_score
+        self.tool_call_concurrency = tool_call_concurrency
+        self.answer_cache = answer_cache
+        self.history_summarizer = history_summarizer
+        self.speculative_retrieval = speculative_retrieval
+        self.speculative_max_sources = speculative_max_sources
+        self.speculative_min_overlap = speculative_min_overlap
+        self.source_router = source_router
+        self.routing_max_sources = routing_max_sources
+        self.conversation_store = conversation_store
+        self.deadline_seconds = deadline_seconds
+        self.max_deadline_seconds = max_deadline_seconds
+        self.deadline_answer_reserve = deadline_answer_reserve
+        self.deadline_min_retrieval = deadline_min_retrieval
         self.tools = [
             pydantic_function_tool(
                 model=tool.model,
@@ -55,10 +143,18 @@ class ChatService:
         self, source_names: list[str] | None = None
     ) -> list[SourceMetadata]:
         """Retrieve and validate sources."""
+        catalogue = {
+            source.name: source for source in self.source_service.get_catalogue()
+        }
+
         if not source_names:
-            sources = self.source_service.list_sources()
+            sources = list(catalogue.values())
         else:
-            sources = [self.source_service.get_source(name) for name in source_names]
+            # Fall back to the metadata store for sources not yet in the catalogue
+            sources = [
+                catalogue.get(name) or self.source_service.get_source(name)
+                for name in sorted(set(source_names))
+            ]
 
         if not sources:
             raise ChatException("No sources found.")
@@ -78,90 +174,653 @@ class ChatService:
             ChatCompletionUserMessageParam(role="user", content=user_message),
         ]
 
-    def _handle_tool_call(
+    def _start_deadline(self, deadline_seconds: float | None) -> Deadline | None:
+        """Start the request deadline, capping any override at the maximum."""
+        seconds = deadline_seconds or self.deadline_seconds
+        if seconds is None:
+            return None
+
+        if self.max_deadline_seconds is not None:
+            seconds = min(seconds, self.max_deadline_seconds)
+        return Deadline.after(seconds)
+
+    def _get_retrieval_deadline(self, context: ChatContext) -> Deadline | None:
+        """Retrieval has to finish early enough to leave time for the answer."""
+        if context.deadline is None:
+            return None
+
+        return context.deadline.reserve(self.deadline_answer_reserve)
+
+    def _can_retrieve(self, context: ChatContext) -> bool:
+        retrieval_deadline = self._get_retrieval_deadline(context)
+        return (
+            retrieval_deadline is None
+            or retrieval_deadline.remaining() >= self.deadline_min_retrieval
+        )
+
+    def _get_tool_choice(
+        self, context: ChatContext
+    ) -> ChatCompletionToolChoiceOptionParam | Omit:
+        # Without time left to retrieve, the model has to answer from what it has
+        return omit if self._can_retrieve(context) else "none"
+
+    def _get_chat_client(self, context: ChatContext) -> OpenAI:
+        return with_deadline(self.chat_client, context.deadline)
+
+    def _search_source(
+        self, source_name: str, query: str, deadline: Deadline | None = None
+    ) -> list[Document]:
+        return self.source_service.search_source(
+            source_name=source_name,
+            semantic_query=query,
+            full_text_query=query,
+            top_k=self.retrieval_top_k,
+            deadline=deadline,
+        )
+
+    def _start_speculative_retrieval(
+        self, chat_input: CreateChatRequest, context: ChatContext
+    ) -> SpeculativeRetrieval | None:
+        """Start searching for the raw question alongside the first completion."""
+        if not self.speculative_retrieval or not self._can_retrieve(context):
+            return None
+
+        if context.ranked_source_names:
+            source_names = context.ranked_source_names[: self.speculative_max_sources]
+        elif len(context.sources) <= self.speculative_max_sources:
+            source_names = [source.name for source in context.sources]
+        else:
+            return None
+
+        retrieval_deadline = self._get_retrieval_deadline(context)
+        return SpeculativeRetrieval(
+            query=chat_input.messages[-1].content,
+            source_names=source_names,
+            search=lambda source_name, query: self._search_source(
+                source_name, query, retrieval_deadline
+            ),
+            min_overlap=self.speculative_min_overlap,
+        )
+
+    def _retrieve_documents(
         self,
-        tool_call: ChatCompletionMessageToolCall,
-    ) -> ChatCompletionToolMessageParam:
-        """Handle a tool call and append the result to messages."""
-        if tool_call.function.name != "retrieve_documents":
-            raise ValueError(f"Unknown tool call: {tool_call.function.name}")
+        function_name: str,
+        arguments: str,
+        speculation: SpeculativeRetrieval | None = None,
+        default_source: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> tuple[RetrieveDocuments, list[Document] | None]:
+        """Run the retrieval tool and return its input with the documents found.
+
+        No documents are returned if the retrieval deadline leaves too little
+        time to search, or if the search runs past it.
+        """
+        if function_name != "retrieve_documents":
+            raise ValueError(f"Unknown tool call: {function_name}")
 
-        args = json.loads(tool_call.function.arguments)
+        args = json.loads(arguments)
         source_input = RetrieveDocuments(**args)
-        documents = self.source_service.search_source(
-            source_name=source_input.source_name,
-            semantic_query=source_input.semantic_query,
-            full_text_query=source_input.full_text_query,
-            top_k=self.retrieval_top_k,
+
+        # Redirect searches for unknown sources to the best routed source
+        if default_source and source_input.source_name not in {
+            source.name for source in self.source_service.get_catalogue()
+        }:
+            source_input = source_input.model_copy(
+                update={"source_name": default_source}
+            )
+
+        if deadline is not None and deadline.remaining() < self.deadline_min_retrieval:
+            return source_input, None
+
+        documents = (
+            speculation.match(source_input.source_name, source_input.semantic_query)
+            if speculation
+            else None
         )
+        if documents is None:
+            try:
+                documents = self.source_service.search_source(
+                    source_name=source_input.source_name,
+                    semantic_query=source_input.semantic_query,
+                    full_text_query=source_input.full_text_query,
+                    top_k=self.retrieval_top_k,
+                    deadline=deadline,
+                )
+            except (TimeoutError, APITimeoutError):
+                logger.warning(
+                    f"Retrieval from source {source_input.source_name} exceeded the request deadline"
+                )
+                return source_input, None
 
-        content = json.dumps(
-            [{"url": doc.url, "content": doc.content} for doc in documents]
+        return source_input, documents
+
+    def _retrieve_all(
+        self,
+        calls: list[tuple[str, str]],
+        speculation: SpeculativeRetrieval | None = None,
+        default_source: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[tuple[RetrieveDocuments, list[Document] | None]]:
+        """Run retrievals for a turn's tool calls concurrently, preserving order."""
+
+        def retrieve(
+            call: tuple[str, str],
+        ) -> tuple[RetrieveDocuments, list[Document] | None]:
+            function_name, arguments = call
+            return self._retrieve_documents(
+                function_name, arguments, speculation, default_source, deadline
+            )
+
+        if len(calls) <= 1 or self.tool_call_concurrency <= 1:
+            return [retrieve(call) for call in calls]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.tool_call_concurrency, len(calls))
+        ) as executor:
+            return list(executor.map(retrieve, calls))
+
+    def _handle_tool_calls(
+        self,
+        tool_calls: list[ChatCompletionMessageToolCall],
+        context_packer: ContextPacker,
+        speculation: SpeculativeRetrieval | None = None,
+        default_source: str | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[ChatCompletionToolMessageParam]:
+        """Handle a turn's tool calls and return their results in call order."""
+        results = self._retrieve_all(
+            [
+                (tool_call.function.name, tool_call.function.arguments)
+                for tool_call in tool_calls
+            ],
+            speculation,
+            default_source,
+            deadline,
         )
 
-        return ChatCompletionToolMessageParam(
-            tool_call_id=tool_call.id,
-            content=content,
-            role="tool",
+        # Packing is sequential so earlier calls take precedence for the budget
+        return [
+            ChatCompletionToolMessageParam(
+                tool_call_id=tool_call.id,
+                content=self._get_tool_content(context_packer, documents),
+                role="tool",
+            )
+            for tool_call, (_, documents) in zip(tool_calls, results)
+        ]
+
+    def _get_tool_content(
+        self, context_packer: ContextPacker, documents: list[Document] | None
+    ) -> str:
+        if documents is None:
+            return RETRIEVAL_SKIPPED_MESSAGE
+        return context_packer.pack(documents)
+
+    def _get_cacheable_question(
+        self, chat_input: CreateChatRequest, context: ChatContext
+    ) -> CacheableQuestion | None:
+        """Only single-turn questions are answered from the cache."""
+        if (
+            self.answer_cache is None
+            or len(chat_input.messages) != 1
+            or context.question_embedding is None
+        ):
+            return None
+
+        return CacheableQuestion(
+            model=chat_input.model,
+            source_names=[source.name for source in context.sources],
+            question=chat_input.messages[0].content,
+            embedding=context.question_embedding,
         )
 
-    def generate_response(self, chat_input: CreateChatRequest) -> ChatResponse:
-        """Generate a response based on chat input."""
+    def _route_sources(
+        self,
+        chat_input: CreateChatRequest,
+        sources: list[SourceMetadata],
+        question_embedding: list[float] | None,
+    ) -> tuple[list[SourceMetadata], list[str] | None]:
+        """Rank sources for the question, pruning them if none were requested.
+
+        Sources without a routing profile are always kept.
+        """
+        if self.source_router is None or question_embedding is None:
+            return sources, None
+
+        ranked = self.source_router.rank(
+            question_embedding, [source.name for source in sources]
+        )
+        ranked_names = [name for name, _ in ranked]
+        if chat_input.sources or len(sources) <= self.routing_max_sources:
+            return sources, ranked_names
+
+        pruned = set(ranked_names[self.routing_max_sources :])
+        return [source for source in sources if source.name not in pruned], ranked_names
+
+    def _get_cached_answer(self, question: CacheableQuestion | None) -> str | None:
+        if self.answer_cache is None or question is None:
+            return None
+
         try:
-            # Initialize chat context
-            sources = self._get_sources(chat_input.sources)
-            system_prompt = get_system_prompt(
-                project_name=self.project_name,
-                project_description=self.project_description,
-                base_prompt=self.base_system_prompt,
-                sources=sources,
-                max_attempts=self.max_iterations,
+            return self.answer_cache.lookup(question)
+        except RedisError:
+            logger.exception("Failed to read from answer cache")
+            return None
+
+    def _cache_answer(self, question: CacheableQuestion | None, answer: str) -> None:
+        if self.answer_cache is None or question is None:
+            return
+
+        try:
+            self.answer_cache.store(question, answer)
+        except RedisError:
+            logger.exception("Failed to write to answer cache")
+
+    def _load_conversation(
+        self, chat_input: CreateChatRequest
+    ) -> tuple[CreateChatRequest, list[int | None] | None]:
+        """Prepend stored history for server-side conversations.
+
+        Returns the request with its full message history, along with cached
+        token counts for the stored messages.
+        """
+        if self.conversation_store is None or chat_input.conversation_id is None:
+            return chat_input, None
+
+        stored_messages = self.conversation_store.get_messages(
+            chat_input.conversation_id
+        )
+        encoding = get_token_encoding(chat_input.model)
+
+        messages = [
+            ChatMessage(role=message.role, content=message.content)
+            for message in stored_messages
+        ]
+        token_counts: list[int | None] = [
+            message.tokens if message.encoding == encoding.name else None
+            for message in stored_messages
+        ]
+
+        return (
+            chat_input.model_copy(
+                update={"messages": [*messages, *chat_input.messages]}
+            ),
+            [*token_counts, *([None] * len(chat_input.messages))],
+        )
+
+    def _save_turn(
+        self, chat_input: CreateChatRequest, context: ChatContext, answer: str
+    ) -> None:
+        """Store the new messages and answer of a server-side conversation turn."""
+        if self.conversation_store is None or chat_input.conversation_id is None:
+            return
+
+        encoding = get_token_encoding(chat_input.model)
+        new_messages = [
+            *chat_input.messages,
+            ChatMessage(role="assistant", content=answer),
+        ]
+        self.conversation_store.append_turn(
+            chat_input.conversation_id,
+            [
+                StoredMessage(
+                    role=message.role,
+                    content=message.content,
+                    encoding=encoding.name,
+                    tokens=count_message_tokens(encoding, message),
+                )
+                for message in new_messages
+            ],
+            context.context_packer.seen_doc_ids,
+        )
+
+    def _prepare_conversation(
+        self,
+        chat_input: CreateChatRequest,
+        token_counts: list[int | None] | None = None,
+        deadline: Deadline | None = None,
+    ) -> ChatContext:
+        """Build the initial messages and retrieval state for a chat request."""
+        sources = self._get_sources(chat_input.sources)
+
+        needs_embedding = self.source_router is not None or (
+            self.answer_cache is not None and len(chat_input.messages) == 1
+        )
+        question_embedding = (
+            self.source_service.embed_queries(
+                [chat_input.messages[-1].content], deadline
+            )[0]
+            if needs_embedding
+            else None
+        )
+
+        sources, ranked_source_names = self._route_sources(
+            chat_input, sources, question_embedding
+        )
+        system_prompt = get_system_prompt(
+            project_name=self.project_name,
+            project_description=self.project_description,
+            base_prompt=self.base_system_prompt,
+            sources=sources,
+            max_attempts=self.max_iterations,
+        )
+
+        # Prepare chat history within the message and token limits
+        encoding = get_token_encoding(chat_input.model)
+        history, dropped = truncate_chat_history(
+            chat_input.messages[:-1],
+            encoding=encoding,
+            max_messages=self.chat_history_limit - 1,
+            max_tokens=self.chat_history_max_tokens,
+            token_counts=token_counts[:-1] if token_counts else None,
+        )
+
+        chat_history: list[ChatCompletionMessageParam] = []
+        summary = (
+            self.history_summarizer.summarize(dropped, chat_input.model, deadline)
+            if dropped and self.history_summarizer is not None
+            else None
+        )
+        if summary is not None:
+            chat_history.append(
+                ChatCompletionSystemMessageParam(
+                    role="system",
+                    content=f"Summary of the earlier conversation:\n{summary}",
+                )
             )
 
-            # Prepare chat history
-            chat_history: list[ChatCompletionMessageParam] = [
-                (
-                    ChatCompletionUserMessageParam(role="user", content=msg.content)
-                    if msg.role == "user"
-                    else ChatCompletionAssistantMessageParam(
-                        role="assistant", content=msg.content
-                    )
+        chat_history.extend(
+            (
+                ChatCompletionUserMessageParam(role="user", content=msg.content)
+                if msg.role == "user"
+                else ChatCompletionAssistantMessageParam(
+                    role="assistant", content=msg.content
                 )
-                for msg in chat_input.messages[-self.chat_history_limit : -1]
-            ]
+            )
+            for msg in history
+        )
+
+        messages = self._create_chat_messages(
+            system_prompt, chat_history, chat_input.messages[-1].content
+        )
+
+        seen_doc_ids = (
+            self.conversation_store.get_retrieved_doc_ids(chat_input.conversation_id)
+            if self.conversation_store is not None
+            and chat_input.conversation_id is not None
+            else None
+        )
+        context_packer = ContextPacker(
+            encoding=encoding,
+            call_token_budget=self.retrieval_max_tokens,
+            conversation_token_budget=self.retrieval_conversation_max_tokens,
+            min_score=self.retrieval_min_score,
+            seen_doc_ids=seen_doc_ids,
+        )
 
-            messages = self._create_chat_messages(
-                system_prompt, chat_history, chat_input.messages[-1].content
+        return ChatContext(
+            messages=messages,
+            context_packer=context_packer,
+            sources=sources,
+            question_embedding=question_embedding,
+            ranked_source_names=ranked_source_names,
+            deadline=deadline,
+        )
+
+    def _complete_turn(
+        self, chat_input: CreateChatRequest, context: ChatContext, answer: str
+    ) -> ChatResponse:
+        self._save_turn(chat_input, context, answer)
+        return ChatResponse(message=answer, conversation_id=chat_input.conversation_id)
+
+    def generate_response(
+        self, chat_input: CreateChatRequest, deadline_seconds: float | None = None
+    ) -> ChatResponse:
+        """Generate a response based on chat input.
+
+        As the request deadline approaches, further retrieval is skipped and the
+        model is asked to answer from the documents gathered so far.
+        """
+        try:
+            deadline = self._start_deadline(deadline_seconds)
+            full_input, token_counts = self._load_conversation(chat_input)
+            context = self._prepare_conversation(full_input, token_counts, deadline)
+            messages = context.messages
+            default_source = (
+                context.ranked_source_names[0] if context.ranked_source_names else None
             )
 
+            cacheable_question = self._get_cacheable_question(full_input, context)
+            cached_answer = self._get_cached_answer(cacheable_question)
+            if cached_answer:
+                return self._complete_turn(chat_input, context, cached_answer)
+
+            speculation = self._start_speculative_retrieval(full_input, context)
+
             # Generate response
+            try:
+                for _ in range(self.max_iterations):
+                    response = self._get_chat_client(context).chat.completions.create(
+                        model=chat_input.model,
+                        messages=messages,
+                        tools=self.tools,
+                        tool_choice=self._get_tool_choice(context),
+                    )
+
+                    message = response.choices[0].message
+                    messages.append(message)  # type: ignore
+
+                    if message.tool_calls:
+                        messages.extend(
+                            self._handle_tool_calls(
+                                message.tool_calls,  # type: ignore
+                                context.context_packer,
+                                speculation,
+                                default_source,
+                                self._get_retrieval_deadline(context),
+                            )
+                        )
+                        # Prefetched results only apply to the first round
+                        if speculation:
+                            speculation.close()
+                            speculation = None
+                    elif message.content:
+                        self._cache_answer(cacheable_question, message.content)
+                        return self._complete_turn(chat_input, context, message.content)
+                    else:
+                        raise ValueError(
+                            "No response content or tool call found in completion."
+                        )
+            finally:
+                if speculation:
+                    speculation.close()
+
+            return self._complete_turn(chat_input, context, NO_ANSWER_MESSAGE)
+
+        except ChatException as e:
+            raise KnownException(str(e))
+        except APIError as e:
+            handle_openai_client_error(e, chat_input.model)
+            raise e
+
+    def stream_response(
+        self, chat_input: CreateChatRequest, deadline_seconds: float | None = None
+    ) -> Iterator[ChatStreamEvent]:
+        """Stream tool activity and answer tokens as they are produced.
+
+        Sources are validated before the stream is returned so that unknown
+        sources still surface as regular HTTP errors.
+        """
+        try:
+            deadline = self._start_deadline(deadline_seconds)
+            full_input, token_counts = self._load_conversation(chat_input)
+            context = self._prepare_conversation(full_input, token_counts, deadline)
+        except ChatException as e:
+            raise KnownException(str(e))
+        except APIError as e:
+            handle_openai_client_error(e, chat_input.model)
+            raise e
+
+        return self._run_stream(chat_input, full_input, context)
+
+    def _complete_stream(
+        self, chat_input: CreateChatRequest, context: ChatContext, answer: str
+    ) -> ChatStreamEvent:
+        self._save_turn(chat_input, context, answer)
+        return ChatStreamEvent(
+            event="done",
+            data={"message": answer, "conversation_id": chat_input.conversation_id},
+        )
+
+    def _run_stream(
+        self,
+        chat_input: CreateChatRequest,
+        full_input: CreateChatRequest,
+        context: ChatContext,
+    ) -> Iterator[ChatStreamEvent]:
+        model = chat_input.model
+        messages = context.messages
+        default_source = (
+            context.ranked_source_names[0] if context.ranked_source_names else None
+        )
+        speculation: SpeculativeRetrieval | None = None
+
+        try:
+            cacheable_question = self._get_cacheable_question(full_input, context)
+            cached_answer = self._get_cached_answer(cacheable_question)
+            if cached_answer:
+                yield self._complete_stream(chat_input, context, cached_answer)
+                return
+
+            speculation = self._start_speculative_retrieval(full_input, context)
+
             for _ in range(self.max_iterations):
-                response = self.chat_client.chat.completions.create(
-                    model=chat_input.model,
+                stream: Stream[ChatCompletionChunk] = self._get_chat_client(
+                    context
+                ).chat.completions.create(
+                    model=model,
                     messages=messages,
                     tools=self.tools,
+                    tool_choice=self._get_tool_choice(context),
+                    stream=True,
                 )
 
-                message = response.choices[0].message
-                messages.append(message)  # type: ignore
-
-                if message.tool_calls:
-                    for tool_call in message.tool_calls:
-                        tool_response = self._handle_tool_call(tool_call)  # type: ignore
-                        messages.append(tool_response)
-                elif message.content:
-                    return ChatResponse(message=message.content)
-                else:
-                    raise ValueError(
-                        "No response content or tool call found in completion."
+                content = ""
+                tool_calls: dict[int, ChatCompletionMessageToolCallParam] = {}
+
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+
+                    delta = chunk.choices[0].delta
+
+                    if delta.content:
+                        content += delta.content
+                        yield ChatStreamEvent(
+                            event="token", data={"content": delta.content}
+                        )
+
+                    for tool_call_delta in delta.tool_calls or []:
+                        tool_call = tool_calls.setdefault(
+                            tool_call_delta.index,
+                            ChatCompletionMessageToolCallParam(
+                                id="",
+                                type="function",
+                                function={"name": "", "arguments": ""},
+                            ),
+                        )
+                        if tool_call_delta.id:
+                            tool_call["id"] = tool_call_delta.id
+                        if tool_call_delta.function:
+                            if tool_call_delta.function.name:
+                                tool_call["function"]["name"] += (
+                                    tool_call_delta.function.name
+                                )
+                            if tool_call_delta.function.arguments:
+                                tool_call["function"]["arguments"] += (
+                                    tool_call_delta.function.arguments
+                                )
+
+                if not tool_calls:
+                    if not content:
+                        raise ValueError(
+                            "No response content or tool call found in completion."
+                        )
+                    self._cache_answer(cacheable_question, content)
+                    yield self._complete_stream(chat_input, context, content)
+                    return
+
+                ordered_tool_calls = [tool_calls[index] for index in sorted(tool_calls)]
+                messages.append(
+                    ChatCompletionAssistantMessageParam(
+                        role="assistant",
+                        content=content or None,
+                        tool_calls=ordered_tool_calls,
                     )
+                )
 
-            return ChatResponse(
-                message="I'm sorry, but I don't have the information you're looking for."
-            )
+                for tool_call in ordered_tool_calls:
+                    yield ChatStreamEvent(
+                        event="tool_call_start",
+                        data={
+                            "id": tool_call["id"],
+                            "name": tool_call["function"]["name"],
+                        },
+                    )
+
+                results = self._retrieve_all(
+                    [
+                        (
+                            tool_call["function"]["name"],
+                            tool_call["function"]["arguments"],
+                        )
+                        for tool_call in ordered_tool_calls
+                    ],
+                    speculation,
+                    default_source,
+                    self._get_retrieval_deadline(context),
+                )
+                if speculation:
+                    speculation.close()
+                    speculation = None
+
+                for tool_call, (source_input, documents) in zip(
+                    ordered_tool_calls, results
+                ):
+                    messages.append(
+                        ChatCompletionToolMessageParam(
+                            tool_call_id=tool_call["id"],
+                            content=self._get_tool_content(
+                                context.context_packer, documents
+                            ),
+                            role="tool",
+                        )
+                    )
+                    yield ChatStreamEvent(
+                        event="tool_call_end",
+                        data={
+                            "id": tool_call["id"],
+                            "source": source_input.source_name,
+                            "urls": list(
+                                dict.fromkeys(doc.url for doc in documents or [])
+                            ),
+                        },
+                    )
+
+            yield self._complete_stream(chat_input, context, NO_ANSWER_MESSAGE)
 
-        except ChatException as e:
-            raise KnownException(str(e))
         except APIError as e:
-            handle_openai_client_error(e, chat_input.model)
-            raise e
+            # The response has already started, so errors are reported in-stream
+            try:
+                handle_openai_client_error(e, model)
+            except (KnownException, ResourceNotFoundException) as known:
+                yield ChatStreamEvent(event="error", data={"message": str(known)})
+        except (KnownException, ResourceNotFoundException) as e:
+            yield ChatStreamEvent(event="error", data={"message": str(e)})
+        except Exception:
+            logger.exception("Failed to stream chat response")
+            yield ChatStreamEvent(
+                event="error", data={"message": "An unexpected error occurred"}
+            )
+        finally:
+            if speculation:
+                speculation.close()
@@ -0,0 +1,60 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from src.document_store.schemas import Document
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def query_overlap(first: str, second: str) -> float:
+    """Jaccard similarity of the lowercased word sets of two queries."""
+    first_words = set(WORD_PATTERN.findall(first.lower()))
+    second_words = set(WORD_PATTERN.findall(second.lower()))
+    if not first_words or not second_words:
+        return 0.0
+
+    return len(first_words & second_words) / len(first_words | second_words)
+
+
+class SpeculativeRetrieval:
+    """Searches sources for the raw user question while the model is deciding
+    what to retrieve, so a matching tool call can reuse the results.
+    """
+
+    def __init__(
+        self,
+        *,
+        query: str,
+        source_names: list[str],
+        search: Callable[[str, str], list[Document]],
+        min_overlap: float,
+    ):
+        self.query = query
+        self.min_overlap = min_overlap
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(source_names)))
+        self._futures = {
+            source_name: self._executor.submit(search, source_name, query)
+            for source_name in source_names
+        }
+
+    def match(self, source_name: str, semantic_query: str) -> list[Document] | None:
+        """Return prefetched documents if the requested search is close enough."""
+        future = self._futures.get(source_name)
+        if (
+            future is None
+            or query_overlap(self.query, semantic_query) < self.min_overlap
+        ):
+            return None
+
+        try:
+            return future.result()
+        except Exception:
+            logger.exception(f"Speculative retrieval failed for source {source_name}")
+            return None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
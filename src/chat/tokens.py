@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+import tiktoken
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache
+def get_token_encoding(model: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoding for a model, falling back to a default encoding."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+def count_tokens(encoding: tiktoken.Encoding, text: str) -> int:
+    return len(encoding.encode(text, disallowed_special=()))
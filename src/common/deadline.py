@@ -0,0 +1,30 @@
+import time
+
+
+class Deadline:
+    """A wall-clock point by which a request has to complete.
+
+    Uses a monotonic clock so it can be shared across threads and passed down
+    to the calls made while handling the request.
+    """
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def remaining_ms(self) -> int:
+        # Backends treat a zero timeout as "no timeout", so never go below 1ms
+        return max(int(self.remaining() * 1000), 1)
+
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """Return a deadline that expires `seconds` earlier than this one."""
+        return Deadline(self.expires_at - seconds)
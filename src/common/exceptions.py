@@ -15,6 +15,7 @@ class ResourceType(str, Enum):
     SOURCE = "Source"
     TASK = "Task"
     MODEL = "Model"
+    CONVERSATION = "Conversation"
 
 
 # Exceptions
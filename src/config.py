@@ -52,19 +52,49 @@ class Settings(BaseSettings):
     POSTGRES_MAX_OVERFLOW: int = 10
     POSTGRES_POOL_RECYCLE: int = 1800
 
-    DOCUMENT_STORE_BACKEND: Literal["postgres", "redis"] = "postgres"
+    DOCUMENT_STORE_BACKEND: Literal["postgres", "redis", "local"] = "postgres"
     DOCUMENT_STORE_NAMESPACE: str = "document_store"
+    LOCAL_DOCUMENT_STORE_PATH: str = "data/document_store"
 
     SOURCE_METADATA_BACKEND: Literal["postgres", "redis"] = "postgres"
     SOURCE_METADATA_NAMESPACE: str = "source_metadata"
 
+    # Search Settings
+    BATCH_SEARCH_MAX_QUERIES: int = 1000
+    BATCH_SEARCH_CONCURRENCY: int = 8
+
     # Chat Settings
     BASE_SYSTEM_PROMPT: str = (
         "You are an AI assistant specialized in retrieving and synthesizing technical information to provide relevant answers to queries."
     )
     CHAT_HISTORY_LIMIT: int = 20
+    CHAT_HISTORY_MAX_TOKENS: int = 8000
+    CHAT_HISTORY_SUMMARY_ENABLED: bool = False
+    CHAT_HISTORY_SUMMARY_TTL: int = 86400  # Seconds
+    CONVERSATION_TTL: int = 604800  # Seconds
     MAX_CHAT_ITERATIONS: int = 5
+    CHAT_DEADLINE: float | None = None  # Seconds, or no deadline unless set per request
+    CHAT_DEADLINE_MAX: float = 120.0  # Upper bound for the X-Chat-Deadline header
+    CHAT_DEADLINE_ANSWER_RESERVE: float = 15.0  # Seconds kept for the final answer
+    CHAT_DEADLINE_MIN_RETRIEVAL: float = 2.0  # Seconds needed to start a retrieval
     RETRIEVAL_TOP_K: int = 10
+    RETRIEVAL_MAX_TOKENS: int = 4000
+    RETRIEVAL_CONVERSATION_MAX_TOKENS: int = 16000
+    RETRIEVAL_MIN_SCORE: float | None = None  # RRF score, at most 2/61 (~0.033)
+    TOOL_CALL_CONCURRENCY: int = 4
+    SOURCE_ROUTING_ENABLED: bool = False
+    SOURCE_ROUTING_MAX_SOURCES: int = 5
+    SOURCE_ROUTING_PROFILE_TTL: int = 300  # Seconds
+    SOURCE_PROFILE_REPRESENTATIVES: int = 8
+    SOURCE_PROFILE_SAMPLE_SIZE: int = 2000
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = False
+    SPECULATIVE_RETRIEVAL_MAX_SOURCES: int = 3
+    SPECULATIVE_RETRIEVAL_MIN_OVERLAP: float = 0.5
+    SOURCE_CATALOGUE_TTL: int = 60  # Seconds
+    ANSWER_CACHE_ENABLED: bool = False
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL: int = 86400  # Seconds
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000  # Per model and source set
 
     # Model Settings
     DEFAULT_CHAT_MODEL: str = "gpt-4o"
@@ -74,12 +104,34 @@ class Settings(BaseSettings):
     # GitHub
     GITHUB_TOKEN: str | None = None
     GITHUB_API_VERSION: str = "2022-11-28"
+    # Seconds the text of a PDF is kept to skip it while its blob is unchanged
+    GITHUB_PDF_TEXT_CACHE_TTL: int = 2592000
 
     # Document Processing
     DOCUMENT_UUID_NAMESPACE: str = "ee747eb2-fd0f-4650-9785-a2e9ae036ff2"
     CHUNK_SIZE: int = 512
     CHUNK_OVERLAP: int = 50
     DOCUMENT_SYNC_BATCH_SIZE: int = 500
+    HTTP_CACHE_ENABLED: bool = False
+    HTTP_CACHE_BACKEND: Literal["redis", "local"] = "redis"
+    HTTP_CACHE_PATH: str = "data/http_cache"
+    HTTP_CACHE_TTL: int = 604800  # Seconds an entry is kept for revalidation
+    HTTP_CACHE_MAX_ENTRY_SIZE: int = 10 * 1024 * 1024  # Bytes
+    WEB_CRAWL_STATE_TTL: int = 86400  # Seconds an interrupted crawl can resume
+    SYNC_SHARDS: int = 1  # Parallel shard tasks per sync, 1 to disable
+    # Seconds between full syncs of sources that can sync incrementally, 0 to
+    # always sync fully
+    INCREMENTAL_SYNC_FULL_INTERVAL: int = 86400
+    # "streams" hands documents to separate embed and write consumers. With the
+    # local document store, the write consumers have to share its data directory
+    # on a local filesystem, where its file locks hold across processes
+    INGEST_MODE: Literal["inline", "streams"] = "inline"
+    INGEST_MAX_STREAM_LENGTH: int = 10000  # Documents waiting to be embedded
+    # Seconds a sync waits for the consumers to make progress before failing
+    INGEST_STALL_TIMEOUT: int = 600
+    INGEST_EMBED_BATCH_SIZE: int = 100
+    INGEST_EMBED_REQUESTS_PER_MINUTE: int | None = None  # Per embed consumer
+    INGEST_WRITE_BATCH_SIZE: int = 500
 
     # OpenTelemetry Settings
     OTEL_ENABLED: bool = False
@@ -1,17 +1,39 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import AsyncGenerator
 
 from src.config import Settings
 from src.connectors.base.config import BaseConnectorConfig
+from src.connectors.common.http_cache import HttpCache
 from src.connectors.common.schemas import ExtractedDocument
+from src.connectors.common.sharding import Shard
 
 
 class BaseConnector(ABC):
     """Base class for all connectors"""
 
-    def __init__(self, settings: Settings, config: BaseConnectorConfig):
+    # Whether `extract` can be limited to a `Shard` of the work
+    supports_sharding: bool = False
+    # Whether `extract` can be limited to items updated `since` a time, with
+    # each document's `parent_id` identifying the item it was extracted from
+    supports_incremental_sync: bool = False
+
+    def __init__(
+        self,
+        settings: Settings,
+        config: BaseConnectorConfig,
+        http_cache: HttpCache | None = None,
+        shard: Shard | None = None,
+        since: datetime | None = None,
+        source_name: str | None = None,
+    ):
         self.settings = settings
         self.config = config
+        self.http_cache = http_cache
+        self.shard = shard
+        self.since = since
+        # Name of the source being synced, for connectors that keep state
+        self.source_name = source_name
 
     @abstractmethod
     def extract(self) -> AsyncGenerator[ExtractedDocument, None]:
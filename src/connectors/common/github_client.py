@@ -1,15 +1,25 @@
 import asyncio
+import json
 import logging
 import time
 from types import TracebackType
-from typing import Any, Type
-from aiohttp import ClientError, ClientSession
+from typing import IO, Any, Type
+from aiohttp import ClientError, ClientResponse, ClientSession
+from yarl import URL
 
+from src.connectors.common.http_cache import HttpCache
 from src.connectors.exceptions import ConnectorException
 
 
 logger = logging.getLogger(__name__)
 
+GRAPHQL_URL = "https://api.github.com/graphql"
+# Response headers kept with cached responses, since pagination depends on them
+CACHED_RESPONSE_HEADERS = ("Link",)
+# Returns file contents as is, rather than base64 encoded in JSON
+RAW_MEDIA_TYPE = "application/vnd.github.raw+json"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # Bytes
+
 
 class GitHubClient:
     def __init__(
@@ -19,18 +29,22 @@ class GitHubClient:
         user_agent: str,
         github_api_version: str,
         github_token: str | None,
+        http_cache: HttpCache | None = None,
     ):
         if not github_token:
             raise ConnectorException("GITHUB_TOKEN is required to access GitHub API")
 
-        self.session: ClientSession = ClientSession(
-            headers={
-                "Accept": "application/vnd.github+json",
-                "X-GitHub-Api-Version": github_api_version,
-                "User-Agent": user_agent,
-                "Authorization": f"Bearer {github_token}",
-            }
-        )
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": github_api_version,
+            "User-Agent": user_agent,
+            "Authorization": f"Bearer {github_token}",
+        }
+        self.session: ClientSession = ClientSession(headers=headers)
+        self.http_cache = http_cache
+        # Responses depend on the token and API version, so cached ones are
+        # only reused for the same headers
+        self.cache_headers = headers
         self.semaphore = asyncio.Semaphore(concurrent_requests)
         self.rate_limit_event = asyncio.Event()
         self.rate_limit_event.set()
@@ -62,53 +76,62 @@ class GitHubClient:
         method: str,
         url: str,
         params: dict[str, str] | None = None,
+        json_body: Any | None = None,
         max_attempts: int = 5,
         retry_backoff: float = 60,
     ) -> tuple[Any | None, dict[str, str] | None]:
+        """Send a request, returning the decoded JSON body and the headers.
+
+        With an HTTP cache, GET requests are sent with the validators of the
+        cached response, and a 304, which doesn't count against the rate
+        limit, is answered with the cached body.
+        """
+        cache_url = str(URL(url).update_query(params)) if params else url
+        cached = None
+        request_headers: dict[str, str] = {}
+        if self.http_cache and method == "GET":
+            cached = self.http_cache.lookup(cache_url, self.cache_headers)
+            if cached and self.http_cache.is_fresh(cached):
+                return json.loads(self.http_cache.use(cached)), dict(cached.headers)
+            request_headers = self.http_cache.get_conditional_headers(cached)
+
         retry_count = 0
         while retry_count < max_attempts:
             await self.rate_limit_event.wait()  # Wait until rate limit is lifted
             async with self.semaphore:
                 try:
                     async with self.session.request(
-                        method, url, params=params
+                        method,
+                        url,
+                        params=params,
+                        json=json_body,
+                        headers=request_headers,
                     ) as response:
                         if response.status in (429, 403):
-                            # Handle rate limiting
-                            self.rate_limit_event.clear()  # Prevent other requests
-                            retry_after = response.headers.get("Retry-After")
-                            rate_limit_remaining = response.headers.get(
-                                "X-RateLimit-Remaining"
+                            await self._wait_for_rate_limit(
+                                response, retry_count, retry_backoff
                             )
-                            rate_limit_reset = response.headers.get("X-RateLimit-Reset")
-                            if retry_after:
-                                wait_time = int(retry_after)
-                            elif rate_limit_remaining == "0" and rate_limit_reset:
-                                current_time = int(time.time())
-                                reset_time = int(rate_limit_reset)
-                                wait_time = reset_time - current_time
-                                # Reset time has passed
-                                if wait_time < 0:
-                                    wait_time = 0
-                            else:
-                                # Exponential backoff
-                                wait_time = retry_backoff * (2**retry_count)
-
-                            logger.warning(
-                                f"Rate limit exceeded. Waiting for {wait_time} seconds."
-                            )
-                            await asyncio.sleep(wait_time)
-                            self.rate_limit_event.set()
                             retry_count += 1
                             continue
-                        elif response.status == 404:
-                            raise ConnectorException(f"Resource not found at {url}")
-                        elif response.status == 401:
-                            raise ConnectorException(
-                                f"GITHUB_TOKEN is not authorized to access {url}"
+                        self._check_access(response, url)
+                        if response.status == 304 and self.http_cache and cached:
+                            body = self.http_cache.revalidate(
+                                cached, response.headers, self.cache_headers
                             )
+                            return json.loads(body), {
+                                **dict(response.headers),
+                                **cached.headers,
+                            }
                         response.raise_for_status()
                         data = await response.json()
+                        if self.http_cache and method == "GET":
+                            self.http_cache.store(
+                                cache_url,
+                                response.headers,
+                                json.dumps(data).encode(),
+                                self.cache_headers,
+                                keep_headers=CACHED_RESPONSE_HEADERS,
+                            )
                         return data, dict(response.headers)
                 except ConnectorException as e:
                     raise e
@@ -124,3 +147,131 @@ class GitHubClient:
 
         logger.error(f"Failed to make request to {url} after {max_attempts} attempts.")
         return None, None
+
+    async def download(
+        self,
+        url: str,
+        file: IO[bytes],
+        *,
+        accept: str = RAW_MEDIA_TYPE,
+        max_attempts: int = 5,
+        retry_backoff: float = 60,
+    ) -> bool:
+        """Stream the body of a GET request into `file`.
+
+        The body is written in chunks, so large files are never held in memory
+        whole. Returns whether the download succeeded.
+        """
+        retry_count = 0
+        while retry_count < max_attempts:
+            await self.rate_limit_event.wait()  # Wait until rate limit is lifted
+            async with self.semaphore:
+                try:
+                    async with self.session.get(
+                        url, headers={"Accept": accept}
+                    ) as response:
+                        if response.status in (429, 403):
+                            await self._wait_for_rate_limit(
+                                response, retry_count, retry_backoff
+                            )
+                            retry_count += 1
+                            continue
+                        self._check_access(response, url)
+                        response.raise_for_status()
+
+                        file.seek(0)
+                        file.truncate()
+                        async for chunk in response.content.iter_chunked(
+                            DOWNLOAD_CHUNK_SIZE
+                        ):
+                            file.write(chunk)
+                        file.seek(0)
+                        return True
+                except ConnectorException as e:
+                    raise e
+                except ClientError:
+                    logger.exception("HTTP request failed")
+                    retry_count += 1
+                    wait_time = retry_backoff * (2**retry_count)
+                    logger.warning(f"Retrying in {wait_time} seconds...")
+                    await asyncio.sleep(wait_time)
+                except Exception:
+                    logger.exception("Unexpected error")
+                    raise ConnectorException(f"Unexpected error when fetching {url}")
+
+        logger.error(f"Failed to download {url} after {max_attempts} attempts.")
+        return False
+
+    async def _wait_for_rate_limit(
+        self, response: ClientResponse, retry_count: int, retry_backoff: float
+    ) -> None:
+        self.rate_limit_event.clear()  # Prevent other requests
+        retry_after = response.headers.get("Retry-After")
+        rate_limit_remaining = response.headers.get("X-RateLimit-Remaining")
+        rate_limit_reset = response.headers.get("X-RateLimit-Reset")
+        if retry_after:
+            wait_time = int(retry_after)
+        elif rate_limit_remaining == "0" and rate_limit_reset:
+            current_time = int(time.time())
+            reset_time = int(rate_limit_reset)
+            wait_time = reset_time - current_time
+            # Reset time has passed
+            if wait_time < 0:
+                wait_time = 0
+        else:
+            # Exponential backoff
+            wait_time = retry_backoff * (2**retry_count)
+
+        logger.warning(f"Rate limit exceeded. Waiting for {wait_time} seconds.")
+        await asyncio.sleep(wait_time)
+        self.rate_limit_event.set()
+
+    def _check_access(self, response: ClientResponse, url: str) -> None:
+        if response.status == 404:
+            raise ConnectorException(f"Resource not found at {url}")
+        elif response.status == 401:
+            raise ConnectorException(f"GITHUB_TOKEN is not authorized to access {url}")
+
+    async def graphql(
+        self,
+        query: str,
+        variables: dict[str, Any],
+        max_attempts: int = 5,
+    ) -> dict[str, Any]:
+        """Run a GraphQL query, returning its `data`.
+
+        GitHub reports an exhausted GraphQL rate limit in the response body
+        rather than with a 403, so those queries are retried here once the
+        limit resets.
+        """
+        for _ in range(max_attempts):
+            data, headers = await self.request(
+                "POST", GRAPHQL_URL, json_body={"query": query, "variables": variables}
+            )
+            if data is None:
+                break
+
+            errors = data.get("errors") or []
+            if any(error.get("type") == "RATE_LIMITED" for error in errors):
+                self.rate_limit_event.clear()
+                rate_limit_reset = (headers or {}).get("X-RateLimit-Reset")
+                wait_time = (
+                    max(int(rate_limit_reset) - int(time.time()), 0)
+                    if rate_limit_reset
+                    else 60
+                )
+                logger.warning(
+                    f"GraphQL rate limit exceeded. Waiting for {wait_time} seconds."
+                )
+                await asyncio.sleep(wait_time)
+                self.rate_limit_event.set()
+                continue
+
+            if errors:
+                messages = "; ".join(error.get("message", "") for error in errors)
+                raise ConnectorException(f"GitHub GraphQL query failed: {messages}")
+            return data["data"]
+
+        raise ConnectorException(
+            f"Failed to run GitHub GraphQL query after {max_attempts} attempts"
+        )
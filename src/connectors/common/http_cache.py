@@ -0,0 +1,321 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Mapping
+
+from aiohttp import ClientSession
+from pydantic import BaseModel, computed_field
+from redis import ConnectionPool, Redis
+
+from src.common.redis import RedisClient
+from src.config import Settings
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_KEY_PREFIX = "http_cache"
+
+
+class HttpCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class CachedResponse(BaseModel):
+    url: str
+    etag: str | None = None
+    last_modified: str | None = None
+    # Wall-clock time until which the body can be used without revalidating
+    fresh_until: float | None = None
+    # Response headers that callers need along with the body
+    headers: dict[str, str] = {}
+    body: bytes = b""
+
+    def to_bytes(self) -> bytes:
+        # The JSON header never contains a raw newline, so it delimits the body
+        return self.model_dump_json(exclude={"body"}).encode() + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResponse":
+        header, _, body = data.partition(b"\n")
+        return cls(**json.loads(header), body=body)
+
+
+class HttpCacheStorage(ABC):
+    """Stores serialized responses under a cache key for a fixed TTL."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        pass
+
+
+class RedisHttpCacheStorage(HttpCacheStorage):
+    def __init__(self, redis_client: RedisClient, ttl: int):
+        # Bodies are raw bytes, which the shared client would try to decode
+        pool = redis_client.connection_pool
+        self.client = Redis(
+            connection_pool=ConnectionPool(
+                connection_class=pool.connection_class,
+                **{**pool.connection_kwargs, "decode_responses": False},
+            )
+        )
+        self.ttl = ttl
+
+    def _get_key(self, key: str) -> str:
+        return f"{HTTP_CACHE_KEY_PREFIX}:{key}"
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self._get_key(key))  # type: ignore[return-value]
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(self._get_key(key), value, ex=self.ttl)
+
+
+class LocalHttpCacheStorage(HttpCacheStorage):
+    def __init__(self, data_dir: str, ttl: int):
+        self.data_dir = Path(data_dir)
+        self.ttl = ttl
+
+    def _get_path(self, key: str) -> Path:
+        return self.data_dir / key[:2] / key
+
+    def get(self, key: str) -> bytes | None:
+        path = self._get_path(key)
+        try:
+            if path.stat().st_mtime + self.ttl < time.time():
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self._get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(value)
+        os.replace(tmp_path, path)
+
+
+def get_freshness_lifetime(headers: Mapping[str, str]) -> float | None:
+    """Seconds a response can be reused without revalidating.
+
+    Returns None when the response must not be stored at all.
+    """
+    directives: dict[str, str] = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+
+    age = _parse_int(headers.get("Age")) or 0
+    max_age = _parse_int(directives.get("max-age"))
+    if max_age is not None:
+        return max(max_age - age, 0)
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            date = headers.get("Date")
+            now = parsedate_to_datetime(date).timestamp() if date else time.time()
+            return max(parsedate_to_datetime(expires).timestamp() - now - age, 0)
+        except (TypeError, ValueError):
+            # Invalid dates mean the response is already stale
+            return 0.0
+
+    return 0.0
+
+
+def _parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class HttpCache:
+    """Private HTTP cache shared by the connectors of a sync.
+
+    Responses are reused while fresh and revalidated with `If-None-Match` /
+    `If-Modified-Since` once stale, so an unchanged resource is answered with
+    a 304 instead of being downloaded again.
+    """
+
+    def __init__(self, storage: HttpCacheStorage, max_entry_size: int):
+        self.storage = storage
+        self.max_entry_size = max_entry_size
+        self.stats = HttpCacheStats()
+
+    def _get_cache_key(self, url: str, headers: Mapping[str, str] | None) -> str:
+        # Request headers (auth, accept) can change the response, so they
+        # are part of the key
+        request = [url, sorted((headers or {}).items())]
+        return hashlib.sha256(json.dumps(request).encode()).hexdigest()
+
+    def lookup(
+        self, url: str, headers: Mapping[str, str] | None = None
+    ) -> CachedResponse | None:
+        try:
+            data = self.storage.get(self._get_cache_key(url, headers))
+            return CachedResponse.from_bytes(data) if data else None
+        except Exception:
+            # A broken cache only costs a full request
+            logger.exception(f"Failed to read cached response for {url}")
+            return None
+
+    def is_fresh(self, cached: CachedResponse) -> bool:
+        return cached.fresh_until is not None and cached.fresh_until > time.time()
+
+    def get_conditional_headers(self, cached: CachedResponse | None) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def use(self, cached: CachedResponse) -> bytes:
+        """Record a fresh hit and return the cached body."""
+        self.stats.hits += 1
+        self.stats.bytes_saved += len(cached.body)
+        return cached.body
+
+    def record_miss(self) -> None:
+        self.stats.misses += 1
+
+    def revalidate(
+        self,
+        cached: CachedResponse,
+        response_headers: Mapping[str, str],
+        headers: Mapping[str, str] | None = None,
+    ) -> bytes:
+        """Record a 304 and return the cached body with refreshed metadata."""
+        lifetime = get_freshness_lifetime(response_headers)
+        if lifetime is not None:
+            refreshed = cached.model_copy(
+                update={
+                    "etag": response_headers.get("ETag", cached.etag),
+                    "last_modified": response_headers.get(
+                        "Last-Modified", cached.last_modified
+                    ),
+                    "fresh_until": time.time() + lifetime,
+                }
+            )
+            self._save(refreshed, headers)
+        return self.use(cached)
+
+    def store(
+        self,
+        url: str,
+        response_headers: Mapping[str, str],
+        body: bytes,
+        headers: Mapping[str, str] | None = None,
+        keep_headers: tuple[str, ...] = (),
+    ) -> None:
+        """Record a miss and store the response if it can be reused.
+
+        The response headers named in `keep_headers` are stored with the body.
+        """
+        self.record_miss()
+
+        lifetime = get_freshness_lifetime(response_headers)
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        if lifetime is None or len(body) > self.max_entry_size:
+            return
+        # Without validators a stale entry could never be reused
+        if not lifetime and not etag and not last_modified:
+            return
+
+        cached = CachedResponse(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            fresh_until=time.time() + lifetime,
+            headers={
+                name: response_headers[name]
+                for name in keep_headers
+                if name in response_headers
+            },
+            body=body,
+        )
+        self._save(cached, headers)
+
+    def _save(self, cached: CachedResponse, headers: Mapping[str, str] | None) -> None:
+        try:
+            self.storage.set(
+                self._get_cache_key(cached.url, headers), cached.to_bytes()
+            )
+        except Exception:
+            logger.exception(f"Failed to cache response for {cached.url}")
+
+
+async def cached_get(
+    session: ClientSession,
+    url: str,
+    http_cache: HttpCache | None,
+    *,
+    headers: Mapping[str, str] | None = None,
+    **kwargs: Any,
+) -> tuple[int, bytes]:
+    """Send a GET request through the cache and return the status and body.
+
+    A 304 for a cached entry is returned as a 200 with the cached body. The
+    body is only read for successful responses.
+    """
+    if http_cache is None:
+        async with session.get(url, headers=headers, **kwargs) as response:
+            body = await response.read() if response.ok else b""
+            return response.status, body
+
+    cached = http_cache.lookup(url, headers)
+    if cached and http_cache.is_fresh(cached):
+        return 200, http_cache.use(cached)
+
+    request_headers = {**(headers or {}), **http_cache.get_conditional_headers(cached)}
+    async with session.get(url, headers=request_headers, **kwargs) as response:
+        if response.status == 304 and cached:
+            return 200, http_cache.revalidate(cached, response.headers, headers)
+        if not response.ok:
+            return response.status, b""
+
+        body = await response.read()
+        if response.status == 200:
+            http_cache.store(url, response.headers, body, headers)
+        return response.status, body
+
+
+def get_http_cache(redis_client: RedisClient, settings: Settings) -> HttpCache | None:
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+
+    storage: HttpCacheStorage
+    if settings.HTTP_CACHE_BACKEND == "local":
+        storage = LocalHttpCacheStorage(
+            settings.HTTP_CACHE_PATH, settings.HTTP_CACHE_TTL
+        )
+    else:
+        storage = RedisHttpCacheStorage(redis_client, settings.HTTP_CACHE_TTL)
+
+    return HttpCache(storage, max_entry_size=settings.HTTP_CACHE_MAX_ENTRY_SIZE)
@@ -0,0 +1,135 @@
+import re
+from urllib.parse import urljoin
+
+import html2text
+from bs4.dammit import UnicodeDammit
+from lxml import etree
+
+from src.connectors.common.schemas import MarkdownPage
+
+UNWANTED_TAGS = frozenset(
+    [
+        "nav",
+        "header",
+        "footer",
+        "script",
+        "style",
+        "aside",
+        "iframe",
+        "noscript",
+        "svg",
+        "img",
+        "form",
+        "button",
+        "input",
+        "textarea",
+        "select",
+        "video",
+        "audio",
+    ]
+)
+
+SERIALIZED_CHARS = re.compile(r"([&<>])")
+ENTITY_NAMES = {"&": "amp", "<": "lt", ">": "gt"}
+
+
+def _handle_text(converter: html2text.HTML2Text, text: str) -> None:
+    # html2text gets these characters as entity references when it parses
+    # serialized HTML, and doesn't escape them, so feed them the same way
+    for part in SERIALIZED_CHARS.split(text):
+        if part in ENTITY_NAMES:
+            converter.handle_entityref(ENTITY_NAMES[part])
+        elif part:
+            converter.handle_data(part)
+
+
+def _handle_element(
+    converter: html2text.HTML2Text, element: etree._Element, tail: bool = True
+) -> None:
+    # Comments and processing instructions have a non-string tag
+    if isinstance(element.tag, str) and element.tag not in UNWANTED_TAGS:
+        converter.handle_starttag(element.tag, list(element.attrib.items()))
+        if element.text:
+            _handle_text(converter, element.text)
+        for child in element:
+            _handle_element(converter, child)
+        converter.handle_endtag(element.tag)
+
+    if tail and element.tail:
+        _handle_text(converter, element.tail)
+
+
+def html_to_markdown(element: etree._Element) -> str:
+    """Convert an element to markdown, skipping `UNWANTED_TAGS`.
+
+    Walks the parsed tree and drives html2text's handlers directly, instead
+    of serializing the element for html2text to parse again.
+    """
+    converter = html2text.HTML2Text(bodywidth=html2text.config.BODY_WIDTH)
+    converter.start = True
+    _handle_element(converter, element, tail=False)
+    markdown = converter.optwrap(converter.finish())
+    if converter.pad_tables:
+        return html2text.pad_tables_in_text(markdown)
+    return markdown
+
+
+def _parse_html(content: bytes) -> etree._Element | None:
+    markup = UnicodeDammit(content, is_html=True).unicode_markup
+    if markup is None:
+        return None
+    # The page is already decoded, so the parser must not switch encoding when
+    # it finds a charset declaration
+    parser = etree.HTMLParser(encoding="utf-8")
+    return etree.fromstring(markup.encode("utf-8"), parser=parser)
+
+
+def _build_markdown_page(url: str, root: etree._Element | None) -> MarkdownPage:
+    if root is None:
+        # Documents without any elements have nothing to walk
+        return MarkdownPage(url=url, title=url, content=html2text.html2text(""))
+
+    title_element = root.find(".//title")
+    title = title_element.text if title_element is not None else None
+
+    main_content = root.find(".//main")
+    if main_content is None:
+        main_content = root.find(".//body")
+    content_to_process = main_content if main_content is not None else root
+
+    return MarkdownPage(
+        url=url, title=title or url, content=html_to_markdown(content_to_process)
+    )
+
+
+def _get_links(url: str, root: etree._Element | None) -> list[str]:
+    if root is None:
+        return []
+
+    base_element = root.find(".//base[@href]")
+    base_url = (
+        urljoin(url, base_element.get("href")) if base_element is not None else url
+    )
+
+    links: list[str] = []
+    for anchor in root.iter("a"):
+        href = (anchor.get("href") or "").strip()
+        if href and "nofollow" not in (anchor.get("rel") or "").lower().split():
+            links.append(urljoin(base_url, href))
+    return links
+
+
+def extract_markdown_page(url: str, content: bytes) -> MarkdownPage:
+    return _build_markdown_page(url, _parse_html(content))
+
+
+def extract_markdown_page_with_links(
+    url: str, content: bytes
+) -> tuple[MarkdownPage, list[str]]:
+    """Extract a page along with the absolute URLs of the links it contains.
+
+    Links are taken from the whole document, including the navigation that is
+    left out of the markdown, and links marked `rel="nofollow"` are skipped.
+    """
+    root = _parse_html(content)
+    return _build_markdown_page(url, root), _get_links(url, root)
@@ -11,3 +11,5 @@ class ExtractedDocument(BaseModel):
     url: str
     title: str
     content: str
+    # The item, such as an issue, that the document was extracted from
+    parent_id: str | None = None
@@ -0,0 +1,19 @@
+import hashlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of `count` disjoint parts of a connector's work.
+
+    Connectors that support sharding still enumerate all of their work units,
+    which is cheap, but only fetch and process the ones the shard owns.
+    """
+
+    index: int
+    count: int
+
+    def owns(self, key: str) -> bool:
+        """Whether the work unit identified by `key` belongs to this shard."""
+        digest = hashlib.sha256(key.encode()).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index
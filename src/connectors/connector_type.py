@@ -7,3 +7,4 @@ class ConnectorType(str, Enum):
     GITHUB_README = "github_readme"
     GITHUB_PDF = "github_pdf"
     REST_API = "rest_api"
+    WEB_CRAWL = "web_crawl"
@@ -18,6 +18,7 @@ def chunk_github_issue(
             content=chunk,
             title=issue.title,
             url=issue.url,
+            parent_id=issue.id,
         )
         docs.append(doc)
 
@@ -29,6 +30,7 @@ def chunk_github_issue(
                 content=chunk,
                 title=issue.title,
                 url=comment.url,
+                parent_id=issue.id,
             )
             docs.append(doc)
 
@@ -1,7 +1,10 @@
+from datetime import datetime
 from typing import AsyncGenerator
 
 from src.config import Settings
 from src.connectors.base.connector import BaseConnector
+from src.connectors.common.http_cache import HttpCache
+from src.connectors.common.sharding import Shard
 from src.connectors.common.github_client import GitHubClient
 from src.connectors.common.schemas import ExtractedDocument
 from src.connectors.github_issues.chunker import chunk_github_issue
@@ -11,9 +14,19 @@ from src.connectors.github_issues.fetcher import GitHubIssuesFetcher
 
 class GithubIssuesConnector(BaseConnector):
     config: GithubIssuesConfig
+    supports_sharding = True
+    supports_incremental_sync = True
 
-    def __init__(self, settings: Settings, config: GithubIssuesConfig):
-        super().__init__(settings, config)
+    def __init__(
+        self,
+        settings: Settings,
+        config: GithubIssuesConfig,
+        http_cache: HttpCache | None = None,
+        shard: Shard | None = None,
+        since: datetime | None = None,
+        source_name: str | None = None,
+    ):
+        super().__init__(settings, config, http_cache, shard, since, source_name)
 
     async def extract(self) -> AsyncGenerator[ExtractedDocument, None]:
         async with GitHubClient(
@@ -21,6 +34,7 @@ class GithubIssuesConnector(BaseConnector):
             user_agent=self.settings.USER_AGENT,
             github_api_version=self.settings.GITHUB_API_VERSION,
             github_token=self.settings.GITHUB_TOKEN,
+            http_cache=self.http_cache,
         ) as github_client:
             issues_fetcher = GitHubIssuesFetcher(github_client=github_client)
 
@@ -31,6 +45,8 @@ class GithubIssuesConnector(BaseConnector):
                 include_labels=self.config.include_labels,
                 exclude_labels=self.config.exclude_labels,
                 issue_age_limit=self.config.issue_age_limit,
+                shard=self.shard,
+                updated_since=self.since,
             ):
                 chunks = chunk_github_issue(
                     issue=issue,
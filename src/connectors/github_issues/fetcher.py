@@ -4,10 +4,70 @@ import logging
 from typing import Any, AsyncGenerator
 
 from src.connectors.common.github_client import GitHubClient
+from src.connectors.common.sharding import Shard
 from src.connectors.github_issues.schemas import GithubIssue, GithubIssueComment
 
 logger = logging.getLogger(__name__)
 
+ISSUES_PER_PAGE = 100
+# Comments fetched along with each issue, beyond which they are fetched over REST
+COMMENTS_PER_ISSUE = 50
+
+# `None` queries issues in every state
+ISSUE_STATES: dict[str, list[str] | None] = {
+    "open": ["OPEN"],
+    "closed": ["CLOSED"],
+    "all": None,
+}
+
+ISSUES_QUERY = """
+query (
+  $owner: String!
+  $name: String!
+  $first: Int!
+  $commentsFirst: Int!
+  $states: [IssueState!]
+  $labels: [String!]
+  $since: DateTime
+  $after: String
+) {
+  repository(owner: $owner, name: $name) {
+    issues(
+      first: $first
+      after: $after
+      states: $states
+      orderBy: {field: UPDATED_AT, direction: DESC}
+      filterBy: {labels: $labels, since: $since}
+    ) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {
+        databaseId
+        number
+        url
+        title
+        body
+        labels(first: 100) {
+          nodes {
+            name
+          }
+        }
+        comments(first: $commentsFirst) {
+          totalCount
+          nodes {
+            databaseId
+            url
+            body
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
 
 class GitHubIssuesFetcher:
     def __init__(
@@ -64,74 +124,96 @@ class GitHubIssuesFetcher:
         include_labels: list[str] | None = None,
         exclude_labels: list[str] | None = None,
         issue_age_limit: int | None = None,
+        shard: Shard | None = None,
+        updated_since: datetime | None = None,
     ) -> AsyncGenerator[GithubIssue, None]:
+        """Yield the issues of a repository, newest updates first.
+
+        Issues are queried over GraphQL in pages of `ISSUES_PER_PAGE`, along
+        with their labels and first `COMMENTS_PER_ISSUE` comments. Only issues
+        with more comments than that need further requests, which fetch their
+        comments over REST. With a `shard`, all issues are listed but only the
+        ones the shard owns are yielded. With `updated_since`, only issues
+        updated since then are queried.
+        """
         logger.info(f"Fetching issues from repo: {repo_owner}/{repo_name}")
 
-        url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/issues"
-
-        params: dict[str, str] | None = {
-            "per_page": "100",
-            "state": state,
-            "sort": "updated",
-            "direction": "desc",
+        variables: dict[str, Any] = {
+            "owner": repo_owner,
+            "name": repo_name,
+            "first": ISSUES_PER_PAGE,
+            "commentsFirst": COMMENTS_PER_ISSUE,
+            "states": ISSUE_STATES.get(state),
+            "labels": include_labels or None,
+            "since": None,
+            "after": None,
         }
 
+        since: datetime | None = None
         if issue_age_limit:
             cutoff_datetime = datetime.now(timezone.utc) - timedelta(
                 days=issue_age_limit
             )
-            cutoff_str = cutoff_datetime.strftime("%Y-%m-%d")
-            assert params is not None, "params should not be None"
-            params["since"] = cutoff_str
+            since = cutoff_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
+        if updated_since and (since is None or updated_since > since):
+            since = updated_since
+        if since:
+            variables["since"] = since.astimezone(timezone.utc).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            )
 
-        async def process_item(item: Any) -> GithubIssue | None:
-            # Skip pull requests
-            if "pull_request" in item:
+        async def process_node(node: Any) -> GithubIssue | None:
+            issue_id = str(node["databaseId"])
+            if shard and not shard.owns(issue_id):
                 return None
 
-            labels = [label["name"] for label in item.get("labels", [])]
+            labels = [label["name"] for label in node["labels"]["nodes"]]
             if include_labels and not any(label in include_labels for label in labels):
                 return None
 
             if exclude_labels and any(label in exclude_labels for label in labels):
                 return None
 
-            comments_count = item.get("comments", 0)
-            comments: list[GithubIssueComment] = []
-            if comments_count > 0:
-                comments = await self.fetch_comments(item["comments_url"])
+            comment_nodes = node["comments"]["nodes"]
+            if node["comments"]["totalCount"] > len(comment_nodes):
+                comments = await self.fetch_comments(
+                    f"https://api.github.com/repos/{repo_owner}/{repo_name}"
+                    f"/issues/{node['number']}/comments"
+                )
+            else:
+                comments = [
+                    GithubIssueComment(
+                        id=str(comment["databaseId"]),
+                        url=comment["url"],
+                        body=comment["body"] or "",
+                    )
+                    for comment in comment_nodes
+                ]
 
             return GithubIssue(
-                id=str(item["id"]),
-                url=item["html_url"],
-                title=item["title"],
-                body=item["body"] or "",
+                id=issue_id,
+                url=node["url"],
+                title=node["title"],
+                body=node["body"] or "",
                 comments=comments,
             )
 
         while True:
-            data, headers = await self.client.request("GET", url, params=params)
-            if not data:
+            data = await self.client.graphql(ISSUES_QUERY, variables)
+            repository = data.get("repository")
+            if not repository:
                 break
+            issues = repository["issues"]
 
-            tasks = [asyncio.create_task(process_item(item)) for item in data]
+            tasks = [
+                asyncio.create_task(process_node(node)) for node in issues["nodes"]
+            ]
             for task in asyncio.as_completed(tasks):
                 issue = await task
                 if issue:
                     yield issue
 
-            if not headers:
-                break
-
-            # Check for 'next' link in headers
-            link_header = headers.get("Link")
-            if link_header:
-                links = self.client.parse_link_header(link_header)
-                next_url = links.get("next")
-                if next_url:
-                    url = next_url
-                    params = None  # Params are included in the next_url
-                else:
-                    break
-            else:
+            page_info = issues["pageInfo"]
+            if not page_info["hasNextPage"]:
                 break
+            variables["after"] = page_info["endCursor"]
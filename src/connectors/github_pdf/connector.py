@@ -1,39 +1,65 @@
+from datetime import datetime
 from typing import AsyncGenerator
 
+from src.common.redis import create_redis_client
 from src.config import Settings
 from src.connectors.base.connector import BaseConnector
+from src.connectors.common.http_cache import HttpCache
+from src.connectors.common.sharding import Shard
 from src.connectors.common.github_client import GitHubClient
 from src.connectors.common.schemas import ExtractedDocument
 from src.connectors.github_pdf.config import GithubPdfConfig
 from src.connectors.github_pdf.fetcher import GitHubPdfFetcher
 from src.connectors.github_pdf.chunker import chunk_pdf_document
+from src.connectors.github_pdf.text_cache import PdfTextCache
 
 
 class GithubPdfConnector(BaseConnector):
     config: GithubPdfConfig
+    supports_sharding = True
 
-    def __init__(self, settings: Settings, config: GithubPdfConfig):
-        super().__init__(settings, config)
+    def __init__(
+        self,
+        settings: Settings,
+        config: GithubPdfConfig,
+        http_cache: HttpCache | None = None,
+        shard: Shard | None = None,
+        since: datetime | None = None,
+        source_name: str | None = None,
+    ):
+        super().__init__(settings, config, http_cache, shard, since, source_name)
 
     async def extract(self) -> AsyncGenerator[ExtractedDocument, None]:
-        async with GitHubClient(
-            concurrent_requests=1,
-            user_agent=self.settings.USER_AGENT,
-            github_api_version=self.settings.GITHUB_API_VERSION,
-            github_token=self.settings.GITHUB_TOKEN,
-        ) as github_client:
-            pdf_fetcher = GitHubPdfFetcher(github_client=github_client)
-
-            async for pdf_doc in pdf_fetcher.fetch_pdfs(
-                repo_owner=self.config.repo_owner,
-                repo_name=self.config.repo_name,
-                ref=self.config.ref,
-                path_filter=self.config.path_filter,
-            ):
-                chunks = chunk_pdf_document(
-                    pdf_doc=pdf_doc,
-                    chunk_size=self.settings.CHUNK_SIZE,
-                    chunk_overlap=self.settings.CHUNK_OVERLAP,
+        redis_client = create_redis_client(self.settings.REDIS_URL)
+        try:
+            async with GitHubClient(
+                concurrent_requests=self.settings.MAX_CONCURRENT_REQUESTS,
+                user_agent=self.settings.USER_AGENT,
+                github_api_version=self.settings.GITHUB_API_VERSION,
+                github_token=self.settings.GITHUB_TOKEN,
+                http_cache=self.http_cache,
+            ) as github_client:
+                pdf_fetcher = GitHubPdfFetcher(
+                    github_client=github_client,
+                    text_cache=PdfTextCache(
+                        redis_client, self.settings.GITHUB_PDF_TEXT_CACHE_TTL
+                    ),
+                    concurrent_pdfs=self.settings.MAX_CONCURRENT_REQUESTS,
                 )
-                for chunk in chunks:
-                    yield chunk
+
+                async for pdf_doc in pdf_fetcher.fetch_pdfs(
+                    repo_owner=self.config.repo_owner,
+                    repo_name=self.config.repo_name,
+                    ref=self.config.ref,
+                    path_filter=self.config.path_filter,
+                    shard=self.shard,
+                ):
+                    chunks = chunk_pdf_document(
+                        pdf_doc=pdf_doc,
+                        chunk_size=self.settings.CHUNK_SIZE,
+                        chunk_overlap=self.settings.CHUNK_OVERLAP,
+                    )
+                    for chunk in chunks:
+                        yield chunk
+        finally:
+            redis_client.close()
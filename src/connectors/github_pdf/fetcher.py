@@ -1,13 +1,16 @@
-import base64
+import asyncio
 import logging
-from typing import AsyncGenerator
-from io import BytesIO
+import tempfile
+from collections import deque
+from typing import IO, AsyncGenerator, Any
 
 from pypdf import PdfReader
 
 from src.connectors.exceptions import ConnectorException
 from src.connectors.common.github_client import GitHubClient
+from src.connectors.common.sharding import Shard
 from src.connectors.github_pdf.schemas import PdfDocument
+from src.connectors.github_pdf.text_cache import PdfTextCache
 
 
 logger = logging.getLogger(__name__)
@@ -18,8 +21,12 @@ class GitHubPdfFetcher:
         self,
         *,
         github_client: GitHubClient,
+        text_cache: PdfTextCache | None = None,
+        concurrent_pdfs: int = 4,
     ):
         self.client = github_client
+        self.text_cache = text_cache
+        self.concurrent_pdfs = concurrent_pdfs
 
     async def fetch_pdfs(
         self,
@@ -27,6 +34,7 @@ class GitHubPdfFetcher:
         repo_name: str,
         ref: str | None = None,
         path_filter: str | None = None,
+        shard: Shard | None = None,
     ) -> AsyncGenerator[PdfDocument, None]:
         """
         Traverse the entire repository tree and yield all PDF files.
@@ -36,6 +44,7 @@ class GitHubPdfFetcher:
             repo_name: GitHub repository name
             ref: Optional branch/tag/commit ref (defaults to default branch)
             path_filter: Optional path prefix filter (e.g., "docs/" to only index PDFs in docs folder)
+            shard: Optional shard of the PDF files to fetch, by path
         """
         # Get the tree recursively
         tree_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/git/trees"
@@ -91,65 +100,85 @@ class GitHubPdfFetcher:
 
         logger.info(f"Found {len(pdf_files)} PDF files in {repo_owner}/{repo_name}")
 
-        # Fetch and process each PDF
-        for pdf_file in pdf_files:
-            path = pdf_file["path"]
-            logger.info(f"Processing PDF: {path}")
-
-            # Use the blobs API to get the file content
-            blob_url = pdf_file["url"]
-            blob_data, _ = await self.client.request("GET", blob_url)
-
-            if not blob_data:
-                logger.warning(f"Failed to fetch blob for {path}, skipping")
-                continue
+        if shard:
+            pdf_files = [item for item in pdf_files if shard.owns(item["path"])]
 
-            content_b64 = blob_data.get("content")
-            encoding = blob_data.get("encoding")
-
-            if encoding == "base64":
-                try:
-                    # Decode the base64 content
-                    decoded_bytes = base64.b64decode(content_b64)
-
-                    # Extract text from PDF
-                    text_content = self._extract_text_from_pdf(decoded_bytes, path)
-
-                    if not text_content or not text_content.strip():
-                        logger.warning(f"No text content extracted from {path}, skipping")
-                        continue
+        # Fetch and process PDFs concurrently, yielding them in tree order
+        tasks: deque[asyncio.Task[PdfDocument | None]] = deque()
+        try:
+            for pdf_file in pdf_files:
+                tasks.append(
+                    asyncio.create_task(
+                        self._fetch_pdf(pdf_file, repo_owner, repo_name, ref)
+                    )
+                )
+                if len(tasks) >= self.concurrent_pdfs:
+                    pdf_doc = await tasks.popleft()
+                    if pdf_doc:
+                        yield pdf_doc
+
+            while tasks:
+                pdf_doc = await tasks.popleft()
+                if pdf_doc:
+                    yield pdf_doc
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_pdf(
+        self, pdf_file: dict[str, Any], repo_owner: str, repo_name: str, ref: str
+    ) -> PdfDocument | None:
+        path = pdf_file["path"]
+        sha = pdf_file.get("sha")
+
+        text_content = self.text_cache.get(sha) if self.text_cache and sha else None
+        if text_content is None:
+            logger.info(f"Processing PDF: {path}")
+            try:
+                with tempfile.TemporaryFile() as file:
+                    # Stream the raw file rather than base64 encoded JSON
+                    if not await self.client.download(pdf_file["url"], file):
+                        logger.warning(f"Failed to fetch blob for {path}, skipping")
+                        return None
+                    # Parsing is CPU-bound, so it runs off the event loop to
+                    # let other downloads progress
+                    text_content = await asyncio.to_thread(
+                        self._extract_text_from_pdf, file, path
+                    )
+            except Exception as e:
+                logger.error(f"Failed to process PDF {path}: {e}")
+                return None
 
-                    # Create the HTML URL for the PDF
-                    html_url = f"https://github.com/{repo_owner}/{repo_name}/blob/{ref}/{path}"
+            if self.text_cache and sha:
+                self.text_cache.set(sha, text_content)
+        else:
+            logger.info(f"Using text of unchanged PDF: {path}")
 
-                    pdf_doc = PdfDocument(
-                        path=path,
-                        url=html_url,
-                        content=text_content,
-                    )
+        if not text_content.strip():
+            logger.warning(f"No text content extracted from {path}, skipping")
+            return None
 
-                    yield pdf_doc
+        # Create the HTML URL for the PDF
+        html_url = f"https://github.com/{repo_owner}/{repo_name}/blob/{ref}/{path}"
 
-                except Exception as e:
-                    logger.error(f"Failed to process PDF {path}: {e}")
-                    continue
-            else:
-                logger.warning(f"Unexpected encoding '{encoding}' for PDF {path}, skipping")
-                continue
+        return PdfDocument(
+            path=path,
+            url=html_url,
+            content=text_content,
+        )
 
-    def _extract_text_from_pdf(self, pdf_bytes: bytes, path: str) -> str:
+    def _extract_text_from_pdf(self, pdf_file: IO[bytes], path: str) -> str:
         """
-        Extract text content from PDF bytes.
+        Extract text content from a PDF file.
 
         Args:
-            pdf_bytes: The PDF file content as bytes
+            pdf_file: The PDF file, opened for reading
             path: The file path (for logging)
 
         Returns:
             Extracted text content
         """
         try:
-            pdf_file = BytesIO(pdf_bytes)
             pdf_reader = PdfReader(pdf_file)
 
             text_parts = []
@@ -0,0 +1,25 @@
+from src.common.redis import RedisClient
+
+PDF_TEXT_CACHE_KEY_PREFIX = "github_pdf_text"
+
+
+class PdfTextCache:
+    """Text extracted from PDF blobs, keyed by their git SHA.
+
+    A blob's SHA is the hash of its content, so an entry is valid for as long
+    as it is kept, and a PDF that hasn't changed since the last sync is
+    neither downloaded nor parsed again.
+    """
+
+    def __init__(self, redis_client: RedisClient, ttl: int):
+        self.redis_client = redis_client
+        self.ttl = ttl
+
+    def _get_key(self, sha: str) -> str:
+        return f"{PDF_TEXT_CACHE_KEY_PREFIX}:{sha}"
+
+    def get(self, sha: str) -> str | None:
+        return self.redis_client.get(self._get_key(sha))
+
+    def set(self, sha: str, text: str) -> None:
+        self.redis_client.set(self._get_key(sha), text, ex=self.ttl)
@@ -1,6 +1,9 @@
+from datetime import datetime
 from typing import AsyncGenerator
 from src.config import Settings
 from src.connectors.base.connector import BaseConnector
+from src.connectors.common.http_cache import HttpCache
+from src.connectors.common.sharding import Shard
 from src.connectors.common.chunker import chunk_markdown_page
 from src.connectors.common.github_client import GitHubClient
 from src.connectors.common.schemas import ExtractedDocument
@@ -11,8 +14,16 @@ from src.connectors.github_readme.fetcher import GitHubReadmeFetcher
 class GithubReadmeConnector(BaseConnector):
     config: GithubReadmeConfig
 
-    def __init__(self, settings: Settings, config: GithubReadmeConfig):
-        super().__init__(settings, config)
+    def __init__(
+        self,
+        settings: Settings,
+        config: GithubReadmeConfig,
+        http_cache: HttpCache | None = None,
+        shard: Shard | None = None,
+        since: datetime | None = None,
+        source_name: str | None = None,
+    ):
+        super().__init__(settings, config, http_cache, shard, since, source_name)
 
     async def extract(self) -> AsyncGenerator[ExtractedDocument, None]:
         async with GitHubClient(
@@ -20,6 +31,7 @@ class GithubReadmeConnector(BaseConnector):
             user_agent=self.settings.USER_AGENT,
             github_api_version=self.settings.GITHUB_API_VERSION,
             github_token=self.settings.GITHUB_TOKEN,
+            http_cache=self.http_cache,
         ) as github_client:
             readme_fetcher = GitHubReadmeFetcher(github_client=github_client)
 
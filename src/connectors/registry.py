@@ -9,12 +9,14 @@ from src.connectors.github_issues.config import GithubIssuesConfig
 from src.connectors.github_readme.config import GithubReadmeConfig
 from src.connectors.github_pdf.config import GithubPdfConfig
 from src.connectors.rest_api.config import RestApiConfig
+from src.connectors.web_crawl.config import WebCrawlConfig
 from src.connectors.base.connector import BaseConnector
 from src.connectors.sitemap.connector import SitemapConnector
 from src.connectors.github_issues.connector import GithubIssuesConnector
 from src.connectors.github_readme.connector import GithubReadmeConnector
 from src.connectors.github_pdf.connector import GithubPdfConnector
 from src.connectors.rest_api.connector import RestApiConnector
+from src.connectors.web_crawl.connector import WebCrawlConnector
 
 
 ConnectorConfig = Annotated[
@@ -24,6 +26,7 @@ ConnectorConfig = Annotated[
         GithubReadmeConfig,
         GithubPdfConfig,
         RestApiConfig,
+        WebCrawlConfig,
     ],
     Field(discriminator="type"),
 ]
@@ -58,6 +61,10 @@ CONNECTOR_REGISTRY: ConnectorRegistryType = {
         config_schema=RestApiConfig,
         connector_class=RestApiConnector,
     ),
+    ConnectorType.WEB_CRAWL: ConnectorRegistryEntry(
+        config_schema=WebCrawlConfig,
+        connector_class=WebCrawlConnector,
+    ),
 }
 
 ConfigClassType = Type[
@@ -67,6 +74,7 @@ ConfigClassType = Type[
         GithubReadmeConfig,
         GithubPdfConfig,
         RestApiConfig,
+        WebCrawlConfig,
     ]
 ]
 
@@ -1,7 +1,10 @@
+from datetime import datetime
 from typing import AsyncGenerator
 
 from src.config import Settings
 from src.connectors.base.connector import BaseConnector
+from src.connectors.common.http_cache import HttpCache
+from src.connectors.common.sharding import Shard
 from src.connectors.common.schemas import ExtractedDocument
 from src.connectors.rest_api.config import RestApiConfig
 from src.connectors.rest_api.chunker import chunk_rest_api_document
@@ -13,8 +16,16 @@ class RestApiConnector(BaseConnector):
 
     config: RestApiConfig
 
-    def __init__(self, settings: Settings, config: RestApiConfig):
-        super().__init__(settings, config)
+    def __init__(
+        self,
+        settings: Settings,
+        config: RestApiConfig,
+        http_cache: HttpCache | None = None,
+        shard: Shard | None = None,
+        since: datetime | None = None,
+        source_name: str | None = None,
+    ):
+        super().__init__(settings, config, http_cache, shard, since, source_name)
 
     async def extract(self) -> AsyncGenerator[ExtractedDocument, None]:
         """
@@ -32,6 +43,7 @@ class RestApiConnector(BaseConnector):
         fetcher = RestApiFetcher(
             config=self.config,
             user_agent=self.settings.USER_AGENT,
+            http_cache=self.http_cache,
         )
 
         async for rest_api_doc in fetcher.fetch_documents():
@@ -4,6 +4,7 @@ from typing import Any, AsyncGenerator
 
 import aiohttp
 
+from src.connectors.common.http_cache import HttpCache, cached_get
 from src.connectors.exceptions import ConnectorException
 from src.connectors.rest_api.config import RestApiConfig
 from src.connectors.rest_api.schemas import RestApiDocument
@@ -14,9 +15,15 @@ logger = logging.getLogger(__name__)
 class RestApiFetcher:
     """Fetches data from REST API endpoints."""
 
-    def __init__(self, config: RestApiConfig, user_agent: str):
+    def __init__(
+        self,
+        config: RestApiConfig,
+        user_agent: str,
+        http_cache: HttpCache | None = None,
+    ):
         self.config = config
         self.user_agent = user_agent
+        self.http_cache = http_cache
 
     def _extract_nested_value(self, data: Any, path: str) -> Any:
         """Extract value from nested dictionary using dot notation path.
@@ -115,7 +122,12 @@ class RestApiFetcher:
             metadata = {
                 k: v
                 for k, v in item.items()
-                if k not in [self.config.title_field, self.config.content_field, self.config.url_field]
+                if k
+                not in [
+                    self.config.title_field,
+                    self.config.content_field,
+                    self.config.url_field,
+                ]
             }
 
             documents.append(
@@ -154,13 +166,19 @@ class RestApiFetcher:
                 )
 
                 if self.config.method == "GET":
-                    async with session.get(
+                    status, content = await cached_get(
+                        session,
                         self.config.url,
+                        self.http_cache,
                         headers=headers,
                         timeout=aiohttp.ClientTimeout(total=self.config.timeout),
-                    ) as response:
-                        response.raise_for_status()
-                        response_data = await response.json()
+                    )
+                    if status >= 400:
+                        raise ConnectorException(
+                            f"Failed to fetch data from {self.config.url}: "
+                            f"HTTP {status}"
+                        )
+                    response_data = json.loads(content)
                 elif self.config.method == "POST":
                     async with session.post(
                         self.config.url,
@@ -171,7 +189,9 @@ class RestApiFetcher:
                         response.raise_for_status()
                         response_data = await response.json()
                 else:
-                    raise ConnectorException(f"Unsupported HTTP method: {self.config.method}")
+                    raise ConnectorException(
+                        f"Unsupported HTTP method: {self.config.method}"
+                    )
 
                 logger.info(f"Successfully fetched data from {self.config.url}")
 
@@ -183,6 +203,8 @@ class RestApiFetcher:
                 for doc in documents:
                     yield doc
 
+        except ConnectorException:
+            raise
         except aiohttp.ClientError as e:
             raise ConnectorException(
                 f"Failed to fetch data from {self.config.url}: {str(e)}"
@@ -1,8 +1,11 @@
 import logging
+from datetime import datetime
 from typing import AsyncIterator
 
 from src.config import Settings
+from src.connectors.common.http_cache import HttpCache
 from src.connectors.common.schemas import ExtractedDocument
+from src.connectors.common.sharding import Shard
 from src.connectors.exceptions import ConnectorException
 from src.connectors.registry import ConnectorConfig, get_connector_class
 
@@ -10,16 +13,53 @@ logger = logging.getLogger(__name__)
 
 
 class ConnectorService:
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        http_cache: HttpCache | None = None,
+        source_name: str | None = None,
+    ):
         self.settings = settings
+        self.http_cache = http_cache
+        self.source_name = source_name
+
+    def supports_sharding(self, connector_config: ConnectorConfig) -> bool:
+        try:
+            return get_connector_class(connector_config.type).supports_sharding
+        except ValueError as e:
+            raise ConnectorException("Unsupported connector type.") from e
+
+    def supports_incremental_sync(self, connector_config: ConnectorConfig) -> bool:
+        try:
+            return get_connector_class(connector_config.type).supports_incremental_sync
+        except ValueError as e:
+            raise ConnectorException("Unsupported connector type.") from e
 
     async def extract_documents(
         self,
         connector_config: ConnectorConfig,
+        shard: Shard | None = None,
+        since: datetime | None = None,
     ) -> AsyncIterator[ExtractedDocument]:
         try:
             connector_class = get_connector_class(connector_config.type)
-            connector = connector_class(self.settings, connector_config)
+            if shard and not connector_class.supports_sharding:
+                raise ConnectorException(
+                    f"The {connector_config.type} connector does not support sharding."
+                )
+            if since and not connector_class.supports_incremental_sync:
+                raise ConnectorException(
+                    f"The {connector_config.type} connector does not support "
+                    "incremental syncs."
+                )
+            connector = connector_class(
+                self.settings,
+                connector_config,
+                self.http_cache,
+                shard,
+                since,
+                self.source_name,
+            )
             async for doc in connector.extract():
                 yield doc
         except ValueError as e:
@@ -1,7 +1,10 @@
 import logging
+from datetime import datetime
 from typing import AsyncGenerator
 from src.config import Settings
 from src.connectors.base.connector import BaseConnector
+from src.connectors.common.http_cache import HttpCache
+from src.connectors.common.sharding import Shard
 from src.connectors.common.chunker import chunk_markdown_page
 from src.connectors.common.schemas import ExtractedDocument
 from src.connectors.sitemap.config import SitemapConfig
@@ -12,19 +15,30 @@ logger = logging.getLogger(__name__)
 
 class SitemapConnector(BaseConnector):
     config: SitemapConfig
+    supports_sharding = True
 
-    def __init__(self, settings: Settings, config: SitemapConfig):
-        super().__init__(settings, config)
+    def __init__(
+        self,
+        settings: Settings,
+        config: SitemapConfig,
+        http_cache: HttpCache | None = None,
+        shard: Shard | None = None,
+        since: datetime | None = None,
+        source_name: str | None = None,
+    ):
+        super().__init__(settings, config, http_cache, shard, since, source_name)
 
     async def extract(self) -> AsyncGenerator[ExtractedDocument, None]:
         async with SitemapCrawler(
             concurrent_requests=self.settings.MAX_CONCURRENT_REQUESTS,
             user_agent=self.settings.USER_AGENT,
+            http_cache=self.http_cache,
         ) as client:
             async for page in client.fetch_sitemap_pages(
                 sitemap_url=self.config.sitemap_url,
                 include_pattern=self.config.include_pattern,
                 exclude_pattern=self.config.exclude_pattern,
+                shard=self.shard,
             ):
                 chunks = chunk_markdown_page(
                     page_data=page,
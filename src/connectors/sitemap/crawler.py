@@ -1,63 +1,96 @@
 import logging
 from types import TracebackType
-from typing import AsyncGenerator, Type
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Type,
+)
 import asyncio
-from aiohttp import ClientSession
-from bs4 import BeautifulSoup
+import time
+from aiohttp import ClientError, ClientSession, TCPConnector
+from pydantic import BaseModel
 import re
-import html2text
 from urllib.parse import urlparse, urljoin
 from urllib.robotparser import RobotFileParser
 
 from src.connectors.exceptions import ConnectorException
+from src.connectors.common.http_cache import HttpCache, cached_get
+from src.connectors.common.markdown import extract_markdown_page_with_links
 from src.connectors.common.schemas import MarkdownPage
+from src.connectors.common.sharding import Shard
+from src.connectors.sitemap.parser import SitemapParser
+from src.connectors.sitemap.scheduler import HostScheduler
+from src.connectors.sitemap.schemas import SitemapEntry
 
 
 logger = logging.getLogger(__name__)
 
-UNWANTED_TAGS = [
-    "nav",
-    "header",
-    "footer",
-    "script",
-    "style",
-    "aside",
-    "iframe",
-    "noscript",
-    "svg",
-    "img",
-    "form",
-    "button",
-    "input",
-    "textarea",
-    "select",
-    "video",
-    "audio",
-]
+SITEMAP_CHUNK_SIZE = 64 * 1024
+SITEMAP_QUEUE_SIZE = 1000
+# Sitemaps fetched at once, on top of the page requests. Streamed sitemaps wait
+# for their entries to be consumed by page fetches, so they get connections of
+# their own rather than competing with pages
+MAX_CONCURRENT_SITEMAPS = 2
+MAX_FETCH_ATTEMPTS = 5
+# URLs that may be queued, in flight or waiting to retry, per worker
+PENDING_URLS_PER_WORKER = 4
+ROBOTS_TXT_TTL = 3600  # Seconds
+# Longer Crawl-delays are capped so a single host can't stall a sync
+MAX_CRAWL_DELAY = 60.0
+DNS_CACHE_TTL = 300  # Seconds
+# Appended to page URLs to key their extracted pages in the HTTP cache, apart
+# from raw responses. Fragments are never sent, so no request has this key.
+EXTRACTED_PAGE_CACHE_FRAGMENT = "#extracted-page"
 
 
-def extract_markdown_page(url: str, content: bytes) -> MarkdownPage:
-    soup = BeautifulSoup(content, "html.parser")
-    title = soup.title.string if soup.title and soup.title.string else url
+class RetryableFetchError(Exception):
+    pass
 
-    main_content = soup.main or soup.body
 
-    content_to_process = main_content if main_content else soup
-    for unwanted in content_to_process.find_all(UNWANTED_TAGS):
-        unwanted.decompose()
+class ExtractedPage(BaseModel):
+    page: MarkdownPage
+    links: list[str]
 
-    markdown_content = html2text.html2text(str(content_to_process))
 
-    return MarkdownPage(url=url, title=title, content=markdown_content)
+def get_retry_backoff(attempt: int) -> int:
+    """Seconds to wait after a failed attempt, doubling from 1 second."""
+    return 2 ** (attempt - 1)
 
 
 class SitemapCrawler:
-    def __init__(self, *, concurrent_requests: int, user_agent: str):
+    def __init__(
+        self,
+        *,
+        concurrent_requests: int,
+        user_agent: str,
+        http_cache: HttpCache | None = None,
+        max_host_concurrency: int | None = None,
+    ):
         self.user_agent = user_agent
+        self.http_cache = http_cache
+        max_host_concurrency = max_host_concurrency or concurrent_requests
         self.session: ClientSession = ClientSession(
-            headers={"User-Agent": self.user_agent}
+            headers={"User-Agent": self.user_agent},
+            connector=TCPConnector(
+                limit=concurrent_requests + MAX_CONCURRENT_SITEMAPS,
+                limit_per_host=max_host_concurrency + MAX_CONCURRENT_SITEMAPS,
+                ttl_dns_cache=DNS_CACHE_TTL,
+            ),
         )
         self.concurrent_requests = concurrent_requests
+        # Shared by page requests across all hosts
+        self.semaphore = asyncio.Semaphore(concurrent_requests)
+        self.sitemap_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SITEMAPS)
+        self.scheduler = HostScheduler(
+            max_host_concurrency=max_host_concurrency,
+            congestion_errors=(RetryableFetchError, ClientError, asyncio.TimeoutError),
+        )
+        self.robots_parsers: dict[str, tuple[float, RobotFileParser]] = {}
+        self.robots_locks: dict[str, asyncio.Lock] = {}
 
     async def __aenter__(self):
         return self
@@ -91,124 +124,373 @@ class SitemapCrawler:
             )
             return ""
 
-    async def setup_robots_parser(self, sitemap_url: str) -> RobotFileParser:
-        parsed_url = urlparse(sitemap_url)
-        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    async def get_robots_parser(self, url: str) -> RobotFileParser:
+        """Return the robots.txt rules for the host of `url`.
 
-        robots_parser = RobotFileParser()
-        robots_content = await self.fetch_robots_txt(base_url)
-        robots_parser.parse(robots_content.splitlines())
-        return robots_parser
+        Rules are fetched once per host and reused for `ROBOTS_TXT_TTL`
+        seconds. Loading them also applies the host's Crawl-delay.
+        """
+        parsed_url = urlparse(url)
+        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
 
-    async def parse_sitemap(self, sitemap_url: str) -> list[str]:
-        async with self.session.get(sitemap_url) as response:
+        async with self.robots_locks.setdefault(base_url, asyncio.Lock()):
+            cached = self.robots_parsers.get(base_url)
+            if cached and time.monotonic() - cached[0] < ROBOTS_TXT_TTL:
+                return cached[1]
+
+            robots_parser = RobotFileParser()
+            robots_content = await self.fetch_robots_txt(base_url)
+            robots_parser.parse(robots_content.splitlines())
+            self.robots_parsers[base_url] = (time.monotonic(), robots_parser)
+            self.scheduler.set_interval(base_url, self._get_crawl_delay(robots_parser))
+            return robots_parser
+
+    def _get_crawl_delay(self, robots_parser: RobotFileParser) -> float:
+        delay = float(robots_parser.crawl_delay(self.user_agent) or 0)
+        request_rate = robots_parser.request_rate(self.user_agent)
+        if request_rate and request_rate.requests:
+            delay = max(delay, request_rate.seconds / request_rate.requests)
+        if delay > MAX_CRAWL_DELAY:
+            logger.warning(
+                f"Crawl-delay of {delay}s exceeds the maximum, using {MAX_CRAWL_DELAY}s"
+            )
+        return min(delay, MAX_CRAWL_DELAY)
+
+    async def _stream_sitemap(
+        self, sitemap_url: str
+    ) -> AsyncGenerator[tuple[bool, SitemapEntry], None]:
+        """Yield the entries of a single sitemap as it downloads.
+
+        Each entry is paired with whether the sitemap is an index, in which
+        case the entry points to a nested sitemap rather than a page.
+        """
+        parser = SitemapParser()
+        async for chunk in self._iter_sitemap_chunks(sitemap_url):
+            for entry in parser.feed(chunk):
+                yield bool(parser.is_index), entry
+        for entry in parser.close():
+            yield bool(parser.is_index), entry
+
+    async def _iter_sitemap_chunks(
+        self, sitemap_url: str
+    ) -> AsyncGenerator[bytes, None]:
+        """Yield the raw body of a sitemap, going through the HTTP cache if set."""
+        http_cache = self.http_cache
+        cached = http_cache.lookup(sitemap_url) if http_cache else None
+        if http_cache and cached and http_cache.is_fresh(cached):
+            yield http_cache.use(cached)
+            return
+
+        headers = http_cache.get_conditional_headers(cached) if http_cache else {}
+        async with self.session.get(sitemap_url, headers=headers) as response:
             if response.status == 404:
                 raise ConnectorException(f"Sitemap not found at {sitemap_url}")
 
-            response.raise_for_status()
+            if http_cache and cached and response.status == 304:
+                yield http_cache.revalidate(cached, response.headers)
+                return
 
-            sitemap_xml = await response.text()
-            soup = BeautifulSoup(sitemap_xml, "xml")
+            response.raise_for_status()
 
-            # Check if this is a sitemap index (contains references to other sitemaps)
-            if soup.find("sitemapindex"):
-                logger.info(f"Found sitemap index at {sitemap_url}, parsing nested sitemaps...")
-                nested_sitemap_urls = [loc.text for loc in soup.find_all("loc")]
+            # Keep a copy of the body for the cache unless it grows too large
+            body: bytearray | None = bytearray() if http_cache else None
+            async for chunk in response.content.iter_chunked(SITEMAP_CHUNK_SIZE):
+                if http_cache and body is not None:
+                    body.extend(chunk)
+                    if len(body) > http_cache.max_entry_size:
+                        body = None
+                yield chunk
+
+            if http_cache and body is not None:
+                http_cache.store(sitemap_url, response.headers, bytes(body))
+            elif http_cache:
+                http_cache.record_miss()
+
+    async def iter_sitemap(
+        self, sitemap_url: str
+    ) -> AsyncGenerator[SitemapEntry, None]:
+        """Stream page entries from a sitemap, following sitemap indexes.
+
+        Nested sitemaps are fetched concurrently, up to `MAX_CONCURRENT_SITEMAPS`
+        at a time, and their entries are yielded as they are parsed, so the order across
+        nested sitemaps is not preserved.
+        """
+        queue: asyncio.Queue[SitemapEntry | Exception | None] = asyncio.Queue(
+            maxsize=SITEMAP_QUEUE_SIZE
+        )
+        tasks: set[asyncio.Task[None]] = set()
+        seen = {sitemap_url}
+        active = 0
 
-                # Recursively parse each nested sitemap
-                all_urls = []
-                for nested_url in nested_sitemap_urls:
-                    nested_urls = await self.parse_sitemap(nested_url)
-                    all_urls.extend(nested_urls)
+        async def crawl(url: str) -> None:
+            try:
+                async with self.sitemap_semaphore:
+                    # A sitemap waits on the queue while its entries are
+                    # fetched, so it is paced like other requests to the host
+                    # but doesn't hold one of the host's page slots
+                    await self.scheduler.pace(url)
+                    async for is_index, entry in self._stream_sitemap(url):
+                        if not is_index:
+                            await queue.put(entry)
+                        elif entry.loc not in seen:
+                            seen.add(entry.loc)
+                            start(entry.loc)
+            except Exception as e:
+                await queue.put(e)
+            # Marks this sitemap as done
+            await queue.put(None)
+
+        def start(url: str) -> None:
+            nonlocal active
+            active += 1
+            task = asyncio.create_task(crawl(url))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        start(sitemap_url)
+        try:
+            while active:
+                item = await queue.get()
+                if item is None:
+                    active -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in list(tasks):
+                task.cancel()
 
-                logger.info(f"Extracted {len(all_urls)} total URLs from sitemap index")
-                return all_urls
+    async def parse_sitemap(self, sitemap_url: str) -> list[str]:
+        return [entry.loc async for entry in self.iter_sitemap(sitemap_url)]
+
+    def _extract_page(self, url: str, content: bytes) -> ExtractedPage:
+        page, links = extract_markdown_page_with_links(url, content)
+        return ExtractedPage(page=page, links=links)
+
+    def _use_page(self, extracted: ExtractedPage) -> MarkdownPage:
+        return extracted.page
+
+    async def _fetch_extracted_page(self, url: str) -> tuple[int, ExtractedPage | None]:
+        """Fetch and extract a page, returning the status and the page.
+
+        With an HTTP cache, the extracted page is cached in place of the HTML,
+        so a fresh entry or a 304 skips both the download and the parse.
+        """
+        http_cache = self.http_cache
+        if http_cache is None:
+            status, content = await cached_get(self.session, url, None)
+            return status, self._extract_page(url, content) if status == 200 else None
+
+        cache_url = f"{url}{EXTRACTED_PAGE_CACHE_FRAGMENT}"
+        cached = http_cache.lookup(cache_url)
+        if cached and http_cache.is_fresh(cached):
+            return 200, ExtractedPage.model_validate_json(http_cache.use(cached))
+
+        headers = http_cache.get_conditional_headers(cached)
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304 and cached:
+                body = http_cache.revalidate(cached, response.headers)
+                return 200, ExtractedPage.model_validate_json(body)
+            if response.status != 200:
+                return response.status, None
+            content = await response.read()
+
+        extracted = self._extract_page(url, content)
+        http_cache.store(
+            cache_url, response.headers, extracted.model_dump_json().encode()
+        )
+        return 200, extracted
 
-            # Regular sitemap with page URLs
-            urls = [loc.text for loc in soup.find_all("loc")]
-            return urls
+    async def _attempt_fetch(self, url: str) -> MarkdownPage | None:
+        """Make a single attempt at fetching a page.
 
-    async def fetch_page(
-        self, url: str, robots_parser: RobotFileParser
-    ) -> MarkdownPage | None:
-        if not robots_parser.can_fetch(self.user_agent, url):
-            logger.warning(f"URL {url} is disallowed by robots.txt")
-            return None
+        Raises `RetryableFetchError` for failures worth retrying.
+        """
+        try:
+            status, extracted = await self._fetch_extracted_page(url)
+            if extracted:
+                return self._use_page(extracted)
+            elif status == 404:
+                logger.error(f"Page not found at {url}")
+                return None
+            elif status == 429:
+                raise RetryableFetchError(f"Rate limit exceeded when fetching {url}")
+            elif status >= 400:
+                raise RetryableFetchError(f"Error fetching {url}: status {status}")
+            else:
+                return None
+        except RetryableFetchError:
+            raise
+        except Exception as e:
+            logger.exception(f"Error fetching {url}")
+            raise RetryableFetchError(f"Error fetching {url}") from e
+
+    async def fetch_pages(
+        self,
+        urls: AsyncIterator[str],
+        on_done: Callable[[str], Awaitable[None]] | None = None,
+    ) -> AsyncGenerator[MarkdownPage, None]:
+        """Fetch pages with a fixed pool of workers, yielding them as they finish.
+
+        The number of URLs taken from `urls` but not yet finished is capped, and
+        finished pages wait in a bounded queue, so memory stays constant however
+        many URLs there are. Failed attempts are retried after a backoff without
+        occupying a worker or a semaphore slot in the meantime.
+
+        Each URL is checked against the robots.txt of its own host, and requests
+        are paced by the host scheduler. `on_done` is called once for each URL
+        when it is finished with, whether or not a page was fetched.
+        """
+        max_pending = self.concurrent_requests * PENDING_URLS_PER_WORKER
+        capacity = asyncio.Semaphore(max_pending)
+        url_queue: asyncio.Queue[tuple[str, int]] = asyncio.Queue()
+        # None marks the end of the crawl
+        page_queue: asyncio.Queue[MarkdownPage | None] = asyncio.Queue(
+            maxsize=self.concurrent_requests
+        )
+        pending = 0
+        producing = True
+        producer_error: Exception | None = None
+        worker_error: Exception | None = None
+        tasks: set[asyncio.Task[None]] = set()
+
+        def spawn(coro: Coroutine[Any, Any, None]) -> None:
+            task = asyncio.create_task(coro)
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        async def finish_url(url: str) -> None:
+            nonlocal pending
+            if on_done:
+                await on_done(url)
+            pending -= 1
+            capacity.release()
+            if not producing and pending == 0:
+                await page_queue.put(None)
+
+        async def produce() -> None:
+            nonlocal pending, producing, producer_error
+            try:
+                async for url in urls:
+                    await capacity.acquire()
+                    pending += 1
+                    url_queue.put_nowait((url, 1))
+            except Exception as e:
+                producer_error = e
+            producing = False
+            if pending == 0:
+                await page_queue.put(None)
+
+        async def retry(url: str, attempt: int, backoff: float) -> None:
+            await asyncio.sleep(backoff)
+            url_queue.put_nowait((url, attempt))
+
+        async def process(url: str, attempt: int) -> None:
+            page: MarkdownPage | None = None
+
+            robots_parser = await self.get_robots_parser(url)
+            if not robots_parser.can_fetch(self.user_agent, url):
+                logger.warning(f"URL {url} is disallowed by robots.txt")
+            else:
+                try:
+                    async with self.scheduler.slot(url), self.semaphore:
+                        page = await self._attempt_fetch(url)
+                except RetryableFetchError as e:
+                    if attempt < MAX_FETCH_ATTEMPTS:
+                        backoff = get_retry_backoff(attempt)
+                        logger.warning(f"{e}. Retrying in {backoff} seconds...")
+                        spawn(retry(url, attempt + 1, backoff))
+                        return
+                    logger.error(
+                        f"Failed to fetch {url} after {MAX_FETCH_ATTEMPTS} attempts."
+                    )
 
-        max_attempts = 5
-        retry_count = 0
-        backoff = 1  # 1 second
+            if page:
+                await page_queue.put(page)
+            await finish_url(url)
 
-        while retry_count < max_attempts:
+        async def work() -> None:
+            nonlocal worker_error
             try:
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        return extract_markdown_page(url, content)
-                    elif response.status == 404:
-                        logger.error(f"Page not found at {url}")
-                        return None
-                    elif response.status == 429:
-                        logger.warning(
-                            f"Rate limit exceeded when fetching {url}. Retrying in {backoff} seconds..."
-                        )
-                        await asyncio.sleep(backoff)
-                        backoff *= 2
-                        retry_count += 1
-                    else:
-                        response.raise_for_status()
-            except Exception:
-                logger.exception(
-                    f"Error fetching {url}. Retrying in {backoff} seconds..."
-                )
-                await asyncio.sleep(backoff)
-                backoff *= 2
-                retry_count += 1
-        logger.error(f"Failed to fetch {url} after {max_attempts} attempts.")
-        return None
+                while True:
+                    url, attempt = await url_queue.get()
+                    await process(url, attempt)
+            except Exception as e:
+                # The URL would never be finished, so the crawl ends with the
+                # error instead of waiting for it
+                worker_error = e
+                await page_queue.put(None)
+
+        spawn(produce())
+        for _ in range(self.concurrent_requests):
+            spawn(work())
+
+        try:
+            while (page := await page_queue.get()) is not None:
+                yield page
+
+            if worker_error:
+                raise worker_error
+            if producer_error:
+                raise producer_error
+        finally:
+            for task in list(tasks):
+                task.cancel()
 
     async def fetch_sitemap_pages(
         self,
         sitemap_url: str,
         include_pattern: str | None = None,
         exclude_pattern: str | None = None,
+        shard: Shard | None = None,
     ) -> AsyncGenerator[MarkdownPage, None]:
+        """Fetch the pages listed in a sitemap, filtered by the URL patterns.
+
+        With a `shard`, the whole sitemap is still parsed but only the pages
+        owned by the shard are fetched.
+        """
         logger.info(f"Fetching pages from sitemap: {sitemap_url}")
 
-        urls = await self.parse_sitemap(sitemap_url)
+        include_regex = re.compile(include_pattern) if include_pattern else None
+        exclude_regex = re.compile(exclude_pattern) if exclude_pattern else None
+
+        # Applies the Crawl-delay of the sitemap host before fetching sitemaps
+        await self.get_robots_parser(sitemap_url)
 
-        if not urls:
-            raise ConnectorException(f"No URLs found in the sitemap at {sitemap_url}")
+        async def iter_urls() -> AsyncGenerator[str, None]:
+            num_urls = 0
+            num_included = 0
+            num_fetched = 0
 
-        if include_pattern:
-            include_regex = re.compile(include_pattern)
-            urls = [url for url in urls if include_regex.search(url)]
+            # Pages are fetched while the sitemap is still being parsed
+            async for entry in self.iter_sitemap(sitemap_url):
+                num_urls += 1
+                if include_regex and not include_regex.search(entry.loc):
+                    continue
+                num_included += 1
+                if exclude_regex and exclude_regex.search(entry.loc):
+                    continue
 
-            if not urls:
+                num_fetched += 1
+                if shard and not shard.owns(entry.loc):
+                    continue
+                yield entry.loc
+
+            if not num_urls:
                 raise ConnectorException(
-                    f"No URLs from the sitemap matched the include pattern {include_pattern}"
+                    f"No URLs found in the sitemap at {sitemap_url}"
                 )
 
-        if exclude_pattern:
-            exclude_regex = re.compile(exclude_pattern)
-            urls = [url for url in urls if not exclude_regex.search(url)]
+            if not num_included:
+                raise ConnectorException(
+                    f"No URLs from the sitemap matched the include pattern {include_pattern}"
+                )
 
-            if not urls:
+            if not num_fetched:
                 raise ConnectorException(
                     f"All URLs from the sitemap matched the exclude pattern {exclude_pattern}"
                 )
 
-        robots_parser = await self.setup_robots_parser(sitemap_url)
-
-        semaphore = asyncio.Semaphore(self.concurrent_requests)
-
-        async def fetch_with_semaphore(url: str):
-            async with semaphore:
-                return await self.fetch_page(url, robots_parser)
-
-        tasks = [asyncio.create_task(fetch_with_semaphore(url)) for url in urls]
-
-        for task in asyncio.as_completed(tasks):
-            markdown_page = await task
-            if markdown_page:
-                yield markdown_page
+        async for page in self.fetch_pages(iter_urls()):
+            yield page
@@ -0,0 +1,74 @@
+import zlib
+from lxml import etree
+
+from src.connectors.sitemap.schemas import SitemapEntry
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapParser:
+    """Incremental sitemap parser that keeps memory bounded.
+
+    Chunks are fed as they are downloaded and `<url>`/`<sitemap>` entries are
+    returned as soon as they are complete. Parsed elements are discarded so
+    the tree never holds more than the entry being read. Gzipped sitemaps
+    are detected from their magic bytes and decompressed on the fly.
+    """
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(
+            events=("start", "end"), recover=True, resolve_entities=False
+        )
+        self._decompressor: "zlib._Decompress | None" = None
+        self._started = False
+        # Set once the root element is seen
+        self.is_index: bool | None = None
+
+    def feed(self, chunk: bytes) -> list[SitemapEntry]:
+        if not self._started:
+            self._started = True
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if self._decompressor:
+            chunk = self._decompressor.decompress(chunk)
+
+        self._parser.feed(chunk)
+        return self._read_entries()
+
+    def close(self) -> list[SitemapEntry]:
+        if self._decompressor:
+            self._parser.feed(self._decompressor.flush())
+
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            # Raised for empty documents, which simply have no entries
+            pass
+        return self._read_entries()
+
+    def _read_entries(self) -> list[SitemapEntry]:
+        entries: list[SitemapEntry] = []
+
+        for event, element in self._parser.read_events():
+            tag = etree.QName(element).localname
+
+            if event == "start":
+                if self.is_index is None:
+                    self.is_index = tag == "sitemapindex"
+                continue
+
+            if tag not in ("url", "sitemap"):
+                continue
+
+            loc = (element.findtext("{*}loc") or "").strip()
+            lastmod = (element.findtext("{*}lastmod") or "").strip()
+            if loc:
+                entries.append(SitemapEntry(loc=loc, lastmod=lastmod or None))
+
+            # Drop the parsed entry and its predecessors from the tree
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+        return entries
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Type
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+INITIAL_HOST_CONCURRENCY = 2
+# Concurrency is halved on congestion, at most once per smoothed latency
+DECREASE_FACTOR = 0.5
+# Smoothed latency above this multiple of the fastest response means the host
+# is slowing down under our load
+LATENCY_TOLERANCE = 2.0
+# Floor for the fastest response, so cached responses don't set the bar
+MIN_BASELINE_LATENCY = 0.1
+LATENCY_SMOOTHING = 0.2
+MAX_HOST_PAUSE = 60.0
+
+
+class HostLimiter:
+    """Adaptive concurrency limit and request spacing for a single host.
+
+    The limit grows by about one request per round trip while responses are
+    fast and successful, and is cut multiplicatively on errors, rate limits
+    or rising latency (AIMD). Requests are also spaced at least `interval`
+    seconds apart to honour robots.txt `Crawl-delay`.
+    """
+
+    def __init__(self, *, max_concurrency: int, interval: float = 0.0):
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(INITIAL_HOST_CONCURRENCY, max_concurrency))
+        self.interval = interval
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.min_latency: float | None = None
+        self.latency: float | None = None
+        self.last_decrease = 0.0
+        self.consecutive_failures = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """Take a request slot and return how long to wait before sending."""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            now = time.monotonic()
+            start_at = max(now, self.next_start)
+            self.next_start = start_at + self.interval
+            return start_at - now
+
+    async def release(self, latency: float | None, congested: bool) -> None:
+        """Release a request slot, adapting the limit to how the request went.
+
+        `latency` is None for requests that neither succeeded nor signalled
+        congestion, which leave the limit unchanged.
+        """
+        async with self.condition:
+            self.in_flight -= 1
+            if congested:
+                self.consecutive_failures += 1
+                self._decrease()
+                # Give the host a moment to recover before the next request
+                pause = min(2.0 ** (self.consecutive_failures - 1), MAX_HOST_PAUSE)
+                self.next_start = max(self.next_start, time.monotonic() + pause)
+            elif latency is not None:
+                self.consecutive_failures = 0
+                if self._record_latency(latency):
+                    self._decrease()
+                else:
+                    self.limit = min(
+                        self.limit + 1 / self.limit, float(self.max_concurrency)
+                    )
+            self.condition.notify_all()
+
+    def _record_latency(self, latency: float) -> bool:
+        """Update the latency estimates and return whether the host is slow."""
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+        baseline = max(self.min_latency, MIN_BASELINE_LATENCY)
+        return self.latency > LATENCY_TOLERANCE * baseline
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        # Requests already in flight when the limit was cut report the same
+        # congestion, so only react once per round trip
+        if now - self.last_decrease < (self.latency or 0.0):
+            return
+        self.last_decrease = now
+        self.limit = max(self.limit * DECREASE_FACTOR, 1.0)
+
+
+class HostScheduler:
+    """Hands out request slots per host, each with its own `HostLimiter`."""
+
+    def __init__(
+        self,
+        *,
+        max_host_concurrency: int,
+        congestion_errors: tuple[Type[BaseException], ...],
+    ):
+        self.max_host_concurrency = max_host_concurrency
+        self.congestion_errors = congestion_errors
+        self.limiters: dict[str, HostLimiter] = {}
+
+    def get_limiter(self, url: str) -> HostLimiter:
+        host = urlparse(url).netloc
+        if host not in self.limiters:
+            self.limiters[host] = HostLimiter(max_concurrency=self.max_host_concurrency)
+        return self.limiters[host]
+
+    def set_interval(self, url: str, interval: float) -> None:
+        """Space the requests to the host of `url` at least `interval` apart."""
+        limiter = self.get_limiter(url)
+        if limiter.interval != interval:
+            logger.info(f"Spacing requests to {urlparse(url).netloc} by {interval}s")
+            limiter.interval = interval
+
+    async def pace(self, url: str) -> None:
+        """Wait for the turn of a request to the host of `url` without keeping
+        a slot, for requests held open long after they start, like streamed
+        sitemaps."""
+        limiter = self.get_limiter(url)
+        delay = await limiter.acquire()
+        await limiter.release(None, congested=False)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, url: str, track_latency: bool = True) -> AsyncIterator[None]:
+        """Wait for a request slot on the host of `url`.
+
+        Exceptions of one of the `congestion_errors` types raised in the block
+        count as congestion. Otherwise the duration of the block counts as
+        latency, unless `track_latency` is False for requests whose duration
+        doesn't reflect the host.
+        """
+        limiter = self.get_limiter(url)
+        delay = await limiter.acquire()
+        latency: float | None = None
+        congested = False
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            started_at = time.monotonic()
+            yield
+            if track_latency:
+                latency = time.monotonic() - started_at
+        except self.congestion_errors:
+            congested = True
+            raise
+        finally:
+            await limiter.release(latency, congested)
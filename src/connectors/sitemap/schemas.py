@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class SitemapEntry(BaseModel):
+    loc: str
+    lastmod: str | None = None
@@ -0,0 +1,26 @@
+from typing import Literal
+
+from pydantic import Field, field_validator
+
+from src.connectors.base.config import BaseConnectorConfig
+from src.connectors.connector_type import ConnectorType
+from src.connectors.sitemap.config import validate_regex
+
+
+class WebCrawlConfig(BaseConnectorConfig):
+    type: Literal[ConnectorType.WEB_CRAWL]
+    start_urls: list[str] = Field(min_length=1)
+    # Number of links followed away from a start URL
+    max_depth: int = Field(default=3, ge=0)
+    max_pages: int | None = Field(default=None, ge=1)
+    # Defaults to the hosts of the start URLs, subdomains included
+    allowed_domains: list[str] | None = None
+    # Only pages matching the include pattern are indexed, but all pages in
+    # scope are crawled for links. Pages matching the exclude pattern are not
+    # crawled at all.
+    include_pattern: str | None = None
+    exclude_pattern: str | None = None
+
+    _validate_regex = field_validator("include_pattern", "exclude_pattern")(
+        validate_regex
+    )
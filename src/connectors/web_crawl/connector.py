@@ -0,0 +1,70 @@
+import hashlib
+import logging
+from datetime import datetime
+from typing import AsyncGenerator
+
+from src.common.redis import create_redis_client
+from src.config import Settings
+from src.connectors.base.connector import BaseConnector
+from src.connectors.common.chunker import chunk_markdown_page
+from src.connectors.common.http_cache import HttpCache
+from src.connectors.common.schemas import ExtractedDocument
+from src.connectors.common.sharding import Shard
+from src.connectors.web_crawl.config import WebCrawlConfig
+from src.connectors.web_crawl.crawler import WebCrawler
+from src.connectors.web_crawl.frontier import CrawlFrontier
+
+logger = logging.getLogger(__name__)
+
+
+class WebCrawlConnector(BaseConnector):
+    config: WebCrawlConfig
+
+    def __init__(
+        self,
+        settings: Settings,
+        config: WebCrawlConfig,
+        http_cache: HttpCache | None = None,
+        shard: Shard | None = None,
+        since: datetime | None = None,
+        source_name: str | None = None,
+    ):
+        super().__init__(settings, config, http_cache, shard, since, source_name)
+
+    def _get_crawl_id(self) -> str:
+        # Crawl state is only resumed by a sync of the same source with the
+        # same configuration
+        config_hash = hashlib.sha256(self.config.model_dump_json().encode()).hexdigest()
+        return f"{self.source_name}:{config_hash}" if self.source_name else config_hash
+
+    async def extract(self) -> AsyncGenerator[ExtractedDocument, None]:
+        redis_client = create_redis_client(self.settings.REDIS_URL)
+        frontier = CrawlFrontier(
+            redis_client,
+            crawl_id=self._get_crawl_id(),
+            ttl=self.settings.WEB_CRAWL_STATE_TTL,
+        )
+        try:
+            async with WebCrawler(
+                frontier=frontier,
+                concurrent_requests=self.settings.MAX_CONCURRENT_REQUESTS,
+                user_agent=self.settings.USER_AGENT,
+                http_cache=self.http_cache,
+            ) as client:
+                async for page in client.crawl(
+                    self.config.start_urls,
+                    max_depth=self.config.max_depth,
+                    max_pages=self.config.max_pages,
+                    allowed_domains=self.config.allowed_domains,
+                    include_pattern=self.config.include_pattern,
+                    exclude_pattern=self.config.exclude_pattern,
+                ):
+                    chunks = chunk_markdown_page(
+                        page_data=page,
+                        chunk_size=self.settings.CHUNK_SIZE,
+                        chunk_overlap=self.settings.CHUNK_OVERLAP,
+                    )
+                    for chunk in chunks:
+                        yield chunk
+        finally:
+            redis_client.close()
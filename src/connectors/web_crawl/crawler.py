@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import re
+from contextlib import aclosing
+from typing import AsyncGenerator
+from urllib.parse import urlsplit
+
+from src.connectors.common.schemas import MarkdownPage
+from src.connectors.exceptions import ConnectorException
+from src.connectors.sitemap.crawler import ExtractedPage, SitemapCrawler
+from src.connectors.web_crawl.frontier import CrawlFrontier, normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Links to these are never followed, since they can't be converted to markdown
+NON_HTML_EXTENSIONS = frozenset(
+    [
+        ".7z",
+        ".avi",
+        ".css",
+        ".csv",
+        ".doc",
+        ".docx",
+        ".exe",
+        ".gif",
+        ".gz",
+        ".ico",
+        ".jpeg",
+        ".jpg",
+        ".js",
+        ".json",
+        ".mov",
+        ".mp3",
+        ".mp4",
+        ".pdf",
+        ".png",
+        ".ppt",
+        ".pptx",
+        ".rar",
+        ".svg",
+        ".tar",
+        ".tgz",
+        ".wav",
+        ".webm",
+        ".webp",
+        ".woff",
+        ".woff2",
+        ".xls",
+        ".xlsx",
+        ".xml",
+        ".zip",
+    ]
+)
+
+
+def is_html_url(url: str) -> bool:
+    path = urlsplit(url).path.lower()
+    last_segment = path.rsplit("/", 1)[-1]
+    if "." not in last_segment:
+        return True
+    return f".{last_segment.rsplit('.', 1)[-1]}" not in NON_HTML_EXTENSIONS
+
+
+def is_allowed_host(url: str, allowed_domains: list[str]) -> bool:
+    """Whether the host of `url` is one of the domains or a subdomain of one."""
+    host = urlsplit(url).hostname or ""
+    return any(
+        host == domain or host.endswith(f".{domain}") for domain in allowed_domains
+    )
+
+
+class WebCrawler(SitemapCrawler):
+    """Crawls a site by following links from a set of start URLs.
+
+    Pages are fetched with the same workers, robots.txt handling and per-host
+    pacing as sitemap pages. The URLs still to crawl and those already seen are
+    kept in a `CrawlFrontier`.
+    """
+
+    def __init__(self, *, frontier: CrawlFrontier, **kwargs):
+        super().__init__(**kwargs)
+        self.frontier = frontier
+        # Links and depth of the URLs currently being fetched
+        self.links: dict[str, list[str]] = {}
+        self.depths: dict[str, int] = {}
+
+    def _use_page(self, extracted: ExtractedPage) -> MarkdownPage:
+        self.links[extracted.page.url] = extracted.links
+        return extracted.page
+
+    async def crawl(
+        self,
+        start_urls: list[str],
+        *,
+        max_depth: int,
+        max_pages: int | None = None,
+        allowed_domains: list[str] | None = None,
+        include_pattern: str | None = None,
+        exclude_pattern: str | None = None,
+    ) -> AsyncGenerator[MarkdownPage, None]:
+        include_regex = re.compile(include_pattern) if include_pattern else None
+        exclude_regex = re.compile(exclude_pattern) if exclude_pattern else None
+
+        seeds = [url for url in map(normalize_url, start_urls) if url]
+        if not seeds:
+            raise ConnectorException("None of the start URLs can be crawled")
+
+        seed_hosts = [urlsplit(url).hostname for url in seeds]
+        domains = [
+            domain.lower().strip(".")
+            for domain in allowed_domains or [host for host in seed_hosts if host]
+        ]
+
+        def get_links_to_follow(url: str) -> list[str]:
+            links: list[str] = []
+            for link in self.links.pop(url, []):
+                normalized = normalize_url(link)
+                if (
+                    normalized
+                    and is_allowed_host(normalized, domains)
+                    and is_html_url(normalized)
+                    and not (exclude_regex and exclude_regex.search(normalized))
+                ):
+                    links.append(normalized)
+            return links
+
+        # The frontier's Redis calls are made in a thread, off the event loop
+        if await asyncio.to_thread(self.frontier.start, seeds):
+            logger.info(f"Resuming interrupted crawl from {seeds[0]}")
+        else:
+            logger.info(f"Starting crawl from {seeds[0]}")
+
+        # Set whenever a URL is finished with and may have queued new links
+        progress = asyncio.Event()
+
+        def finish_url(url: str, depth: int, links: list[str]) -> None:
+            if depth < max_depth:
+                self.frontier.add(links, depth + 1)
+            # Completed after its links are queued, so they aren't lost if the
+            # crawl is interrupted in between
+            self.frontier.complete(url, depth)
+
+        async def on_done(url: str) -> None:
+            depth = self.depths[url]
+            links = get_links_to_follow(url)
+            await asyncio.to_thread(finish_url, url, depth, links)
+            # Only in progress until its links are queued
+            del self.depths[url]
+            progress.set()
+
+        async def iter_urls() -> AsyncGenerator[str, None]:
+            while True:
+                progress.clear()
+                # Checked before the queue, since URLs in progress can queue
+                # links while it is being read
+                idle = not self.depths
+                entry = await asyncio.to_thread(self.frontier.pop)
+                if entry:
+                    url, depth = entry
+                    self.depths[url] = depth
+                    yield url
+                elif idle:
+                    return
+                else:
+                    # Pages still being fetched may add more URLs
+                    await progress.wait()
+
+        num_pages = 0
+        async with aclosing(self.fetch_pages(iter_urls(), on_done)) as pages:
+            async for page in pages:
+                if include_regex and not include_regex.search(page.url):
+                    continue
+                num_pages += 1
+                yield page
+                if max_pages and num_pages >= max_pages:
+                    logger.info(f"Reached the maximum of {max_pages} pages")
+                    break
+
+        await asyncio.to_thread(self.frontier.clear)
+        logger.info(f"Crawled {num_pages} pages from {seeds[0]}")
+
+        if not num_pages:
+            raise ConnectorException(f"No pages could be crawled from {seeds[0]}")
@@ -0,0 +1,120 @@
+import logging
+from typing import cast
+from urllib.parse import urlsplit, urlunsplit
+
+from src.common.redis import RedisClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str | None:
+    """Normalize a URL for deduplication, or return None if it can't be crawled.
+
+    Lowercases the scheme and host, drops default ports, credentials and
+    fragments, and gives empty paths a trailing slash.
+    """
+    try:
+        parsed = urlsplit(url.strip())
+        port = parsed.port
+    except ValueError:
+        return None
+
+    scheme = parsed.scheme.lower()
+    host = parsed.hostname
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    return urlunsplit((scheme, netloc, parsed.path or "/", parsed.query, ""))
+
+
+class CrawlFrontier:
+    """Queue of URLs to crawl and set of URLs seen so far, kept in Redis.
+
+    Keeping them out of the worker keeps its memory flat however large the
+    crawl gets, and lets an interrupted crawl resume. URLs taken from the queue
+    are tracked until completed, so none are lost if the worker stops.
+    """
+
+    def __init__(self, redis_client: RedisClient, crawl_id: str, ttl: int):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        key = f"web_crawl:{crawl_id}"
+        self.queue_key = f"{key}:queue"
+        self.seen_key = f"{key}:seen"
+        self.processing_key = f"{key}:processing"
+        self.done_key = f"{key}:done"
+
+    def start(self, urls: list[str]) -> bool:
+        """Seed a new crawl, or resume an interrupted one.
+
+        Returns whether an interrupted crawl was resumed. Its finished and
+        in-progress URLs are queued again, since the sync needs every page.
+        """
+        if not self.redis_client.exists(self.seen_key):
+            self.add(urls, depth=0)
+            return False
+
+        interrupted: dict[str, str] = {
+            **cast(dict[str, str], self.redis_client.hgetall(self.done_key)),
+            **cast(dict[str, str], self.redis_client.hgetall(self.processing_key)),
+        }
+        pipeline = self.redis_client.pipeline()
+        pipeline.delete(self.processing_key, self.done_key)
+        if interrupted:
+            # Ahead of the queued URLs, to keep the crawl breadth-first
+            pipeline.lpush(
+                self.queue_key,
+                *[f"{depth} {url}" for url, depth in interrupted.items()],
+            )
+        pipeline.execute()
+        logger.info(f"Resuming crawl with {len(interrupted)} URLs to refetch")
+        return True
+
+    def add(self, urls: list[str], depth: int) -> int:
+        """Queue the URLs that haven't been seen before, returning how many."""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return 0
+
+        pipeline = self.redis_client.pipeline()
+        for url in urls:
+            pipeline.sadd(self.seen_key, url)
+        results = pipeline.execute()
+
+        new_urls = [url for url, added in zip(urls, results) if added]
+        if new_urls:
+            pipeline.rpush(self.queue_key, *[f"{depth} {url}" for url in new_urls])
+        pipeline.expire(self.seen_key, self.ttl)
+        pipeline.expire(self.queue_key, self.ttl)
+        pipeline.execute()
+        return len(new_urls)
+
+    def pop(self) -> tuple[str, int] | None:
+        """Take the next URL and its depth from the queue, if there is one."""
+        entry = self.redis_client.lpop(self.queue_key)
+        if entry is None:
+            return None
+
+        depth, url = entry.split(" ", 1)  # type: ignore[union-attr]
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(self.processing_key, url, depth)
+        pipeline.expire(self.processing_key, self.ttl)
+        pipeline.execute()
+        return url, int(depth)
+
+    def complete(self, url: str, depth: int) -> None:
+        pipeline = self.redis_client.pipeline()
+        pipeline.hdel(self.processing_key, url)
+        pipeline.hset(self.done_key, url, str(depth))
+        pipeline.expire(self.done_key, self.ttl)
+        pipeline.execute()
+
+    def clear(self) -> None:
+        self.redis_client.delete(
+            self.queue_key, self.seen_key, self.processing_key, self.done_key
+        )
@@ -4,6 +4,7 @@ from src.common.postgres import get_postgres_engine
 from src.common.redis import RedisClient
 from src.config import Settings
 from src.document_store.base import DocumentStoreBackend
+from src.document_store.local.store import LocalDocumentStore
 from src.document_store.postgres.store import PostgresDocumentStore
 from src.document_store.redis.store import RedisDocumentStore
 
@@ -28,6 +29,14 @@ def get_document_store_backend(
             embedding_model=settings.EMBEDDING_MODEL,
             embedding_dimensions=settings.EMBEDDING_DIMENSIONS,
         )
+    elif settings.DOCUMENT_STORE_BACKEND == "local":
+        return LocalDocumentStore(
+            data_dir=settings.LOCAL_DOCUMENT_STORE_PATH,
+            namespace=settings.DOCUMENT_STORE_NAMESPACE,
+            openai_client=openai_client,
+            embedding_model=settings.EMBEDDING_MODEL,
+            embedding_dimensions=settings.EMBEDDING_DIMENSIONS,
+        )
     else:
         raise ValueError(
             f"Unsupported document store backend: {settings.DOCUMENT_STORE_BACKEND}"
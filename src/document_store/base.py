@@ -1,11 +1,28 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
-from src.document_store.schemas import Document
+from src.common.deadline import Deadline
+from src.document_store.schemas import Document, DocumentFilter
 
 
 class DocumentStoreBackend(ABC):
-    @abstractmethod
     def add_documents(self, source_name: str, documents: list[Document]) -> None:
+        self.add_embedded_documents(
+            source_name, documents, self.embed_documents(documents)
+        )
+
+    @abstractmethod
+    def embed_documents(self, documents: list[Document]) -> list[list[float]]:
+        pass
+
+    @abstractmethod
+    def add_embedded_documents(
+        self,
+        source_name: str,
+        documents: list[Document],
+        embeddings: list[list[float]],
+    ) -> None:
+        """Store documents along with embeddings from `embed_documents`."""
         pass
 
     @abstractmethod
@@ -26,8 +43,28 @@ class DocumentStoreBackend(ABC):
     def delete_documents(self, source_name: str, doc_ids: list[str]) -> None:
         pass
 
+    @abstractmethod
+    def embed_queries(
+        self, queries: list[str], deadline: Deadline | None = None
+    ) -> list[list[float]]:
+        pass
+
+    @abstractmethod
+    def iter_embeddings(
+        self, source_name: str, batch_size: int
+    ) -> Iterator[list[list[float]]]:
+        pass
+
     @abstractmethod
     def hybrid_search(
-        self, *, source_name: str, semantic_query: str, full_text_query: str, top_k: int
+        self,
+        *,
+        source_name: str,
+        semantic_query: str,
+        full_text_query: str,
+        top_k: int,
+        query_embedding: list[float] | None = None,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ) -> list[Document]:
         pass
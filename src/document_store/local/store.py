@@ -0,0 +1,527 @@
+from contextlib import contextmanager
+from datetime import datetime
+import fcntl
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterator
+import numpy as np
+from numpy.typing import NDArray
+from openai import OpenAI
+
+from src.common.deadline import Deadline
+from src.document_store.schemas import Document, DocumentFilter
+from src.document_store.base import DocumentStoreBackend
+from src.document_store.ranking import reciprocal_rank_fusion
+from src.llm_providers.client import with_deadline
+
+
+class LocalDocumentStore(DocumentStoreBackend):
+    """Embedded document store that needs no external services.
+
+    Document text lives in SQLite with an FTS5 index for BM25 search, and
+    embeddings are appended to a float32 matrix file per source which is
+    memory-mapped and searched with NumPy.
+
+    Writes to the vector file of a source take an exclusive file lock, held
+    until the rows referencing the vectors are committed, so that processes
+    sharing the data directory never assign the same vector indices. Searches
+    take the lock shared while loading the vectors and their indices.
+
+    The rowid of the document referencing each vector is cached alongside the
+    memory-mapped vectors, so unfiltered searches don't scan the documents of
+    the source. Both are dropped under the exclusive lock whenever the source
+    is written, and re-mapped when another process changed the vector file.
+    """
+
+    def __init__(
+        self,
+        *,
+        data_dir: str,
+        namespace: str,
+        openai_client: OpenAI,
+        embedding_model: str,
+        embedding_dimensions: int,
+    ):
+        self.data_dir = data_dir
+        self.vectors_dir = os.path.join(self.data_dir, "vectors")
+        self.db_path = os.path.join(self.data_dir, f"{namespace}.db")
+        self.openai_client = openai_client
+        self.embedding_client = openai_client.embeddings
+        self.embedding_model = embedding_model
+        self.embedding_dimensions = embedding_dimensions
+        self.row_size = self.embedding_dimensions * np.dtype(np.float32).itemsize
+        self._vectors_lock = threading.Lock()
+        self._vectors_cache: dict[str, tuple[tuple[int, int], NDArray[np.float32]]] = {}
+        self._vector_rows_cache: dict[
+            str, tuple[NDArray[np.float32], NDArray[np.int64], NDArray[np.int64]]
+        ] = {}
+
+        os.makedirs(self.vectors_dir, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    rowid INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    created_at_ts REAL NOT NULL,
+                    vector_index INTEGER NOT NULL,
+                    UNIQUE (source, id)
+                );
+                CREATE INDEX IF NOT EXISTS documents_vector_idx
+                    ON documents (source, vector_index);
+                CREATE INDEX IF NOT EXISTS documents_url_idx
+                    ON documents (source, url);
+                CREATE INDEX IF NOT EXISTS documents_created_at_idx
+                    ON documents (source, created_at_ts);
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts
+                    USING fts5(title, content);
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _get_vectors_path(self, source_name: str) -> str:
+        return os.path.join(self.vectors_dir, f"{source_name}.f32")
+
+    @contextmanager
+    def _lock_vectors(self, source_name: str, shared: bool = False) -> Iterator[None]:
+        """Lock the vector file of a source across threads and processes."""
+        lock_path = f"{self._get_vectors_path(source_name)}.lock"
+        with open(lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+
+    def _load_vectors(self, source_name: str) -> NDArray[np.float32] | None:
+        """Memory-map the vectors of a source, re-mapping when the file changes."""
+        path = self._get_vectors_path(source_name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        num_rows = stat.st_size // self.row_size
+        if num_rows == 0:
+            return None
+
+        # Compaction replaces the file, possibly with one of the same size
+        version = (stat.st_ino, stat.st_size)
+        with self._vectors_lock:
+            cached = self._vectors_cache.get(source_name)
+            if cached and cached[0] == version:
+                return cached[1]
+
+            vectors: NDArray[np.float32] = np.memmap(
+                path,
+                dtype=np.float32,
+                mode="r",
+                shape=(num_rows, self.embedding_dimensions),
+            )
+            self._vectors_cache[source_name] = (version, vectors)
+            return vectors
+
+    def _clear_vectors_cache(self, source_name: str) -> None:
+        """Drop the cached vectors of a source and the rows referencing them.
+
+        Must be called with the vectors of the source locked exclusively.
+        """
+        with self._vectors_lock:
+            self._vectors_cache.pop(source_name, None)
+            self._vector_rows_cache.pop(source_name, None)
+
+    def _load_vector_rows(
+        self,
+        conn: sqlite3.Connection,
+        source_name: str,
+        vectors: NDArray[np.float32],
+        filter_clause: str = "",
+        filter_params: list[str | float] | None = None,
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+        """Return the rowids of the documents of a source and their vector indices.
+
+        Only vectors referenced by a document are returned, so that vectors left
+        over by an interrupted write never displace results. Unfiltered rows are
+        cached for as long as the given vectors are. Must be called with the
+        vectors of the source locked.
+        """
+        if not filter_clause:
+            with self._vectors_lock:
+                cached = self._vector_rows_cache.get(source_name)
+                if cached and cached[0] is vectors:
+                    return cached[1], cached[2]
+
+        rows = conn.execute(
+            f"""
+            SELECT d.rowid, d.vector_index FROM documents d
+            WHERE d.source = ?{filter_clause}
+            """,
+            (source_name, *(filter_params or [])),
+        ).fetchall()
+        rows = [row for row in rows if row[1] < len(vectors)]
+        row_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        vector_indices = np.array([row[1] for row in rows], dtype=np.int64)
+
+        if not filter_clause:
+            with self._vectors_lock:
+                self._vector_rows_cache[source_name] = (
+                    vectors,
+                    row_ids,
+                    vector_indices,
+                )
+        return row_ids, vector_indices
+
+    def _build_filter_clause(
+        self, filters: DocumentFilter | None
+    ) -> tuple[str, list[str | float]]:
+        clauses: list[str] = []
+        params: list[str | float] = []
+
+        if filters and filters.url_prefix:
+            # substr() keeps the comparison literal, unlike LIKE wildcards
+            clauses.append("substr(d.url, 1, ?) = ?")
+            params.extend([len(filters.url_prefix), filters.url_prefix])
+        if filters and filters.created_after:
+            clauses.append("d.created_at_ts >= ?")
+            params.append(filters.created_after.timestamp())
+        if filters and filters.created_before:
+            clauses.append("d.created_at_ts < ?")
+            params.append(filters.created_before.timestamp())
+
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def _map_document(self, row: tuple[str, str, str, str, str]) -> Document:
+        return Document(
+            id=row[0],
+            title=row[1],
+            content=row[2],
+            url=row[3],
+            created_at=datetime.fromisoformat(row[4]),
+        )
+
+    def embed_documents(self, documents: list[Document]) -> list[list[float]]:
+        embeddings_result = self.embedding_client.create(
+            input=[doc.content for doc in documents],
+            model=self.embedding_model,
+            dimensions=self.embedding_dimensions,
+        )
+        return [embedding_data.embedding for embedding_data in embeddings_result.data]
+
+    def add_embedded_documents(
+        self,
+        source_name: str,
+        documents: list[Document],
+        embeddings: list[list[float]],
+    ) -> None:
+        vectors = np.array(embeddings, dtype=np.float32)
+
+        path = self._get_vectors_path(source_name)
+        with self._lock_vectors(source_name):
+            with open(path, "ab") as vectors_file:
+                size = vectors_file.tell()
+                vectors_file.write(vectors.tobytes())
+
+            try:
+                self._insert_documents(
+                    source_name, documents, start_index=size // self.row_size
+                )
+            except Exception:
+                # Drop the vectors that no row references
+                os.truncate(path, size)
+                raise
+            finally:
+                self._clear_vectors_cache(source_name)
+
+    def _insert_documents(
+        self, source_name: str, documents: list[Document], start_index: int
+    ) -> None:
+        with self._connect() as conn:
+            for offset, doc in enumerate(documents):
+                cursor = conn.execute(
+                    """
+                    INSERT INTO documents (
+                        id, source, title, content, url,
+                        created_at, created_at_ts, vector_index
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        doc.id,
+                        source_name,
+                        doc.title,
+                        doc.content,
+                        doc.url,
+                        doc.created_at.isoformat(),
+                        doc.created_at.timestamp(),
+                        start_index + offset,
+                    ),
+                )
+                conn.execute(
+                    "INSERT INTO documents_fts (rowid, title, content) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, doc.title, doc.content),
+                )
+
+    def get_documents(
+        self, source_name: str, limit: int, offset: int
+    ) -> list[Document]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, title, content, url, created_at FROM documents
+                WHERE source = ? ORDER BY rowid LIMIT ? OFFSET ?
+                """,
+                (source_name, limit, offset),
+            ).fetchall()
+            return [self._map_document(row) for row in rows]
+
+    def get_document_ids(self, source_name: str) -> list[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id FROM documents WHERE source = ?", (source_name,)
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def delete_all_documents(self, source_name: str) -> None:
+        with self._lock_vectors(source_name):
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    DELETE FROM documents_fts WHERE rowid IN
+                        (SELECT rowid FROM documents WHERE source = ?)
+                    """,
+                    (source_name,),
+                )
+                conn.execute("DELETE FROM documents WHERE source = ?", (source_name,))
+
+            self._clear_vectors_cache(source_name)
+            try:
+                os.remove(self._get_vectors_path(source_name))
+            except FileNotFoundError:
+                pass
+
+    def delete_documents(self, source_name: str, doc_ids: list[str]) -> None:
+        if not doc_ids:
+            return
+
+        with self._lock_vectors(source_name), self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE delete_ids (id TEXT PRIMARY KEY)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO delete_ids (id) VALUES (?)",
+                [(doc_id,) for doc_id in doc_ids],
+            )
+            conn.execute(
+                """
+                DELETE FROM documents_fts WHERE rowid IN (
+                    SELECT rowid FROM documents
+                    WHERE source = ? AND id IN (SELECT id FROM delete_ids)
+                )
+                """,
+                (source_name,),
+            )
+            conn.execute(
+                """
+                DELETE FROM documents
+                WHERE source = ? AND id IN (SELECT id FROM delete_ids)
+                """,
+                (source_name,),
+            )
+            self._compact_vectors(conn, source_name)
+
+    def _compact_vectors(self, conn: sqlite3.Connection, source_name: str) -> None:
+        """Rewrite the vector file so it only holds rows of remaining documents.
+
+        Must be called with the vectors of the source locked.
+        """
+        vectors = self._load_vectors(source_name)
+        if vectors is None:
+            return
+
+        rows = conn.execute(
+            """
+            SELECT rowid, vector_index FROM documents
+            WHERE source = ? ORDER BY vector_index
+            """,
+            (source_name,),
+        ).fetchall()
+        vector_indices = np.array([row[1] for row in rows], dtype=np.int64)
+
+        path = self._get_vectors_path(source_name)
+        tmp_path = f"{path}.tmp"
+        np.ascontiguousarray(vectors[vector_indices]).tofile(tmp_path)
+
+        conn.executemany(
+            "UPDATE documents SET vector_index = ? WHERE rowid = ?",
+            [(new_index, row[0]) for new_index, row in enumerate(rows)],
+        )
+        # The file is swapped once the new indices are committed, and readers
+        # wait on the lock for both
+        conn.commit()
+        os.replace(tmp_path, path)
+        self._clear_vectors_cache(source_name)
+
+    def iter_embeddings(
+        self, source_name: str, batch_size: int
+    ) -> Iterator[list[list[float]]]:
+        with self._lock_vectors(source_name, shared=True):
+            vectors = self._load_vectors(source_name)
+            if vectors is None:
+                return
+
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT vector_index FROM documents WHERE source = ? ORDER BY vector_index",
+                    (source_name,),
+                ).fetchall()
+
+        indices = [row[0] for row in rows]
+        for start in range(0, len(indices), batch_size):
+            yield vectors[indices[start : start + batch_size]].tolist()
+
+    def embed_queries(
+        self, queries: list[str], deadline: Deadline | None = None
+    ) -> list[list[float]]:
+        openai_client = with_deadline(self.openai_client, deadline)
+        embeddings_result = openai_client.embeddings.create(
+            input=queries,
+            model=self.embedding_model,
+            dimensions=self.embedding_dimensions,
+        )
+        return [embedding_data.embedding for embedding_data in embeddings_result.data]
+
+    def semantic_search(
+        self,
+        source_name: str,
+        query: str,
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[Document]:
+        openai_client = with_deadline(self.openai_client, deadline)
+        query_embedding = (
+            openai_client.embeddings.create(
+                input=query,
+                model=self.embedding_model,
+                dimensions=self.embedding_dimensions,
+            )
+            .data[0]
+            .embedding
+        )
+        return self.semantic_search_by_vector(
+            source_name, query_embedding, top_k, filters, deadline
+        )
+
+    def semantic_search_by_vector(
+        self,
+        source_name: str,
+        query_embedding: list[float],
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[Document]:
+        filter_clause, filter_params = self._build_filter_clause(filters)
+        with self._lock_vectors(source_name, shared=True):
+            vectors = self._load_vectors(source_name)
+            if vectors is None:
+                return []
+
+            with self._connect() as conn:
+                row_ids, vector_indices = self._load_vector_rows(
+                    conn, source_name, vectors, filter_clause, filter_params
+                )
+
+        if not len(row_ids):
+            return []
+        vectors = vectors[vector_indices]
+
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+        similarities = (vectors @ query_vector) / np.maximum(norms, 1e-12)
+
+        k = min(top_k, len(similarities))
+        top_indices = np.argpartition(-similarities, k - 1)[:k]
+        top_indices = top_indices[np.argsort(-similarities[top_indices])]
+        # Rows are looked up by rowid, which compaction doesn't change
+        ranked_row_ids = [int(row_id) for row_id in row_ids[top_indices]]
+
+        placeholders = ", ".join("?" for _ in ranked_row_ids)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT rowid, id, title, content, url, created_at
+                FROM documents
+                WHERE rowid IN ({placeholders})
+                """,
+                ranked_row_ids,
+            ).fetchall()
+
+        docs_by_row_id = {row[0]: self._map_document(row[1:]) for row in rows}
+        return [docs_by_row_id[i] for i in ranked_row_ids if i in docs_by_row_id]
+
+    def full_text_search(
+        self,
+        source_name: str,
+        query: str,
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[Document]:
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+
+        match_query = " OR ".join(f'"{term}"' for term in terms)
+        filter_clause, filter_params = self._build_filter_clause(filters)
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT d.id, d.title, d.content, d.url, d.created_at
+                FROM documents_fts
+                JOIN documents d ON d.rowid = documents_fts.rowid
+                WHERE documents_fts MATCH ? AND d.source = ?{filter_clause}
+                ORDER BY bm25(documents_fts)
+                LIMIT ?
+                """,
+                (match_query, source_name, *filter_params, top_k),
+            ).fetchall()
+            return [self._map_document(row) for row in rows]
+
+    def hybrid_search(
+        self,
+        *,
+        source_name: str,
+        semantic_query: str,
+        full_text_query: str,
+        top_k: int,
+        query_embedding: list[float] | None = None,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[Document]:
+        if query_embedding is not None:
+            semantic_results = self.semantic_search_by_vector(
+                source_name, query_embedding, top_k, filters=filters, deadline=deadline
+            )
+        else:
+            semantic_results = self.semantic_search(
+                source_name, semantic_query, top_k, filters=filters, deadline=deadline
+            )
+        text_results = self.full_text_search(
+            source_name, full_text_query, top_k, filters=filters, deadline=deadline
+        )
+        return reciprocal_rank_fusion([semantic_results, text_results], top_k)
@@ -48,6 +48,13 @@ class DocumentStoreModel(Base):
             "fts_vector",
             postgresql_using="gin",
         ),
+        Index(
+            "source_url_prefix_idx",
+            "source",
+            "url",
+            postgresql_ops={"url": "text_pattern_ops"},
+        ),
+        Index("source_created_at_idx", "source", "created_at"),
         {"extend_existing": True},
     )
 
@@ -1,13 +1,18 @@
-from sqlalchemy import Engine, text, func
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.exc import SQLAlchemyError
+from contextlib import contextmanager
+from sqlalchemy import Engine, select, text, func
+from sqlalchemy.orm import Query, Session, sessionmaker
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from psycopg2.errors import QueryCanceled
 import numpy as np
+from typing import Iterator
 from openai import OpenAI
 
-from src.document_store.schemas import Document
+from src.common.deadline import Deadline
+from src.document_store.schemas import Document, DocumentFilter
 from src.document_store.base import DocumentStoreBackend
 from src.document_store.postgres.model import DocumentStoreModel, Base
 from src.document_store.ranking import reciprocal_rank_fusion
+from src.llm_providers.client import with_deadline
 
 
 class PostgresDocumentStore(DocumentStoreBackend):
@@ -21,6 +26,7 @@ class PostgresDocumentStore(DocumentStoreBackend):
     ):
         self.engine = engine
         self.Session = sessionmaker(bind=self.engine)
+        self.openai_client = openai_client
         self.embedding_client = openai_client.embeddings
         self.embedding_model = embedding_model
         self.embedding_dimensions = embedding_dimensions
@@ -29,6 +35,9 @@ class PostgresDocumentStore(DocumentStoreBackend):
         with self.engine.begin() as conn:
             conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
             Base.metadata.create_all(conn)
+            # create_all skips indexes added to an existing table
+            for index in DocumentStoreModel.__table__.indexes:
+                index.create(conn, checkfirst=True)
 
     def _map_document(self, doc: DocumentStoreModel) -> Document:
         return Document(
@@ -39,12 +48,53 @@ class PostgresDocumentStore(DocumentStoreBackend):
             created_at=doc.created_at,
         )
 
-    def add_documents(self, source_name: str, documents: list[Document]) -> None:
+    @contextmanager
+    def _search_session(self, deadline: Deadline | None) -> Iterator[Session]:
+        """Open a session whose statements are cancelled at the deadline."""
+        with self.Session() as session:
+            if deadline is not None:
+                # SET does not accept bind parameters, the value is always an int
+                session.execute(
+                    text(f"SET LOCAL statement_timeout = {deadline.remaining_ms()}")
+                )
+            try:
+                yield session
+            except OperationalError as e:
+                if isinstance(e.orig, QueryCanceled):
+                    raise TimeoutError("Search exceeded the request deadline") from e
+                raise
+
+    def _apply_filters(
+        self, query: Query[DocumentStoreModel], filters: DocumentFilter | None
+    ) -> Query[DocumentStoreModel]:
+        if not filters:
+            return query
+
+        if filters.url_prefix:
+            query = query.filter(
+                self.DocumentModel.url.startswith(filters.url_prefix, autoescape=True)
+            )
+        if filters.created_after:
+            query = query.filter(self.DocumentModel.created_at >= filters.created_after)
+        if filters.created_before:
+            query = query.filter(self.DocumentModel.created_at < filters.created_before)
+
+        return query
+
+    def embed_documents(self, documents: list[Document]) -> list[list[float]]:
         embeddings_result = self.embedding_client.create(
             input=[doc.content for doc in documents],
             model=self.embedding_model,
             dimensions=self.embedding_dimensions,
         )
+        return [embedding_data.embedding for embedding_data in embeddings_result.data]
+
+    def add_embedded_documents(
+        self,
+        source_name: str,
+        documents: list[Document],
+        embeddings: list[list[float]],
+    ) -> None:
 
         docs_to_add = [
             self.DocumentModel(
@@ -54,9 +104,9 @@ class PostgresDocumentStore(DocumentStoreBackend):
                 title=doc.title,
                 url=doc.url,
                 created_at=doc.created_at,
-                embedding=np.array(embedding_data.embedding, dtype=np.float32).tolist(),
+                embedding=np.array(embedding, dtype=np.float32).tolist(),
             )
-            for doc, embedding_data in zip(documents, embeddings_result.data)
+            for doc, embedding in zip(documents, embeddings)
         ]
 
         with self.Session() as session:
@@ -99,11 +149,40 @@ class PostgresDocumentStore(DocumentStoreBackend):
             ).delete(synchronize_session=False)
             session.commit()
 
+    def iter_embeddings(
+        self, source_name: str, batch_size: int
+    ) -> Iterator[list[list[float]]]:
+        with self.Session() as session:
+            result = session.execute(
+                select(self.DocumentModel.embedding)
+                .where(self.DocumentModel.source == source_name)
+                .execution_options(yield_per=batch_size)
+            )
+            for partition in result.partitions():
+                yield [np.asarray(row[0]).tolist() for row in partition]
+
+    def embed_queries(
+        self, queries: list[str], deadline: Deadline | None = None
+    ) -> list[list[float]]:
+        openai_client = with_deadline(self.openai_client, deadline)
+        embeddings_result = openai_client.embeddings.create(
+            input=queries,
+            model=self.embedding_model,
+            dimensions=self.embedding_dimensions,
+        )
+        return [embedding_data.embedding for embedding_data in embeddings_result.data]
+
     def semantic_search(
-        self, source_name: str, query: str, top_k: int
+        self,
+        source_name: str,
+        query: str,
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ) -> list[Document]:
+        openai_client = with_deadline(self.openai_client, deadline)
         query_embedding = (
-            self.embedding_client.create(
+            openai_client.embeddings.create(
                 input=query,
                 model=self.embedding_model,
                 dimensions=self.embedding_dimensions,
@@ -111,11 +190,22 @@ class PostgresDocumentStore(DocumentStoreBackend):
             .data[0]
             .embedding
         )
+        return self.semantic_search_by_vector(
+            source_name, query_embedding, top_k, filters, deadline
+        )
 
-        with self.Session() as session:
+    def semantic_search_by_vector(
+        self,
+        source_name: str,
+        query_embedding: list[float],
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[Document]:
+        with self._search_session(deadline) as session:
+            query = session.query(self.DocumentModel).filter_by(source=source_name)
             results = (
-                session.query(self.DocumentModel)
-                .filter_by(source=source_name)
+                self._apply_filters(query, filters)
                 .order_by(self.DocumentModel.embedding.cosine_distance(query_embedding))  # type: ignore
                 .limit(top_k)
                 .all()
@@ -123,16 +213,21 @@ class PostgresDocumentStore(DocumentStoreBackend):
             return [self._map_document(doc) for doc in results]
 
     def full_text_search(
-        self, source_name: str, query: str, top_k: int
+        self,
+        source_name: str,
+        query: str,
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ) -> list[Document]:
-        with self.Session() as session:
+        with self._search_session(deadline) as session:
             ts_query = func.websearch_to_tsquery("english", query)
+            text_query = session.query(self.DocumentModel).filter(
+                self.DocumentModel.source == source_name,
+                self.DocumentModel.fts_vector.op("@@")(ts_query),  # type: ignore
+            )
             results = (
-                session.query(self.DocumentModel)
-                .filter(
-                    self.DocumentModel.source == source_name,
-                    self.DocumentModel.fts_vector.op("@@")(ts_query),  # type: ignore
-                )
+                self._apply_filters(text_query, filters)
                 .order_by(func.ts_rank(self.DocumentModel.fts_vector, ts_query).desc())  # type: ignore
                 .limit(top_k)
                 .all()
@@ -140,8 +235,25 @@ class PostgresDocumentStore(DocumentStoreBackend):
             return [self._map_document(doc) for doc in results]
 
     def hybrid_search(
-        self, *, source_name: str, semantic_query: str, full_text_query: str, top_k: int
+        self,
+        *,
+        source_name: str,
+        semantic_query: str,
+        full_text_query: str,
+        top_k: int,
+        query_embedding: list[float] | None = None,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ) -> list[Document]:
-        semantic_results = self.semantic_search(source_name, semantic_query, top_k)
-        text_results = self.full_text_search(source_name, full_text_query, top_k)
+        if query_embedding is not None:
+            semantic_results = self.semantic_search_by_vector(
+                source_name, query_embedding, top_k, filters=filters, deadline=deadline
+            )
+        else:
+            semantic_results = self.semantic_search(
+                source_name, semantic_query, top_k, filters=filters, deadline=deadline
+            )
+        text_results = self.full_text_search(
+            source_name, full_text_query, top_k, filters=filters, deadline=deadline
+        )
         return reciprocal_rank_fusion([semantic_results, text_results], top_k)
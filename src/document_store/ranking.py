@@ -14,4 +14,7 @@ def reciprocal_rank_fusion(
 
     id_to_doc = {doc.id: doc for docs in ranked_lists for doc in docs}
 
-    return [id_to_doc[doc_id] for doc_id in top_doc_ids]
+    return [
+        id_to_doc[doc_id].model_copy(update={"score": scores[doc_id]})
+        for doc_id in top_doc_ids
+    ]
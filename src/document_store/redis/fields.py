@@ -9,6 +9,7 @@ def get_index_schema_fields(embedding_dimensions: int) -> dict[str, Any]:
             {"name": "content", "type": "text"},
             {"name": "url", "type": "tag"},
             {"name": "created_at", "type": "tag"},
+            {"name": "created_at_ts", "type": "numeric"},
             {"name": "title", "type": "text"},
             {
                 "name": "embedding",
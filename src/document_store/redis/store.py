@@ -1,22 +1,29 @@
 from datetime import datetime
 import re
 import numpy as np
-from typing import Any
+from typing import Any, Iterator
 from openai import OpenAI
 from redisvl.index import SearchIndex  # type: ignore
 from redisvl.schema import IndexSchema  # type: ignore
 from redisvl.query import VectorQuery  # type: ignore
-from redisvl.query.filter import Tag  # type: ignore
+from redisvl.utils.token_escaper import TokenEscaper  # type: ignore
+from redis import ConnectionPool, Redis
+from redis.commands.search.field import NumericField
 from redis.commands.search.query import Query
 
 from src.common.redis import RedisClient
-from src.document_store.schemas import Document
+from src.common.deadline import Deadline
+from src.document_store.schemas import Document, DocumentFilter
 from src.document_store.base import DocumentStoreBackend
 from src.document_store.redis.fields import (
     DOCUMENT_FIELDS,
     get_index_schema_fields,
 )
 from src.document_store.ranking import reciprocal_rank_fusion
+from src.llm_providers.client import with_deadline
+
+# Documents updated per pipeline when backfilling a new index field
+BACKFILL_BATCH_SIZE = 1000
 
 
 class RedisDocumentStore(DocumentStoreBackend):
@@ -30,6 +37,7 @@ class RedisDocumentStore(DocumentStoreBackend):
         embedding_dimensions: int,
     ) -> None:
         self.client = redis_client
+        self.openai_client = openai_client
         self.embedding_client = openai_client.embeddings
         self.embedding_model = embedding_model
         self.embedding_dimensions = embedding_dimensions
@@ -48,6 +56,62 @@ class RedisDocumentStore(DocumentStoreBackend):
         self.index = SearchIndex(index_schema).set_client(self.client)  # type: ignore
         if not self.index.exists():
             self.index.create()
+        else:
+            self._add_missing_index_fields()
+
+    def _add_missing_index_fields(self) -> None:
+        """Add fields introduced after the index was first created.
+
+        The fields are backfilled for the documents already stored, so filters
+        on them don't leave those documents out.
+        """
+        ft = self.client.ft(self.index_name)
+        existing_fields = {attribute[1] for attribute in ft.info()["attributes"]}
+        if "created_at_ts" not in existing_fields:
+            ft.alter_schema_add([NumericField("created_at_ts")])
+            self._backfill_created_at_ts()
+
+    def _backfill_created_at_ts(self) -> None:
+        keys: list[str] = list(
+            self.client.scan_iter(f"{self.index_prefix}:*", count=BACKFILL_BATCH_SIZE)
+        )
+        for start in range(0, len(keys), BACKFILL_BATCH_SIZE):
+            batch = keys[start : start + BACKFILL_BATCH_SIZE]
+            pipeline = self.client.pipeline(transaction=False)
+            for key in batch:
+                pipeline.hget(key, "created_at")
+            created_ats = pipeline.execute()
+
+            for key, created_at in zip(batch, created_ats):
+                if created_at:
+                    pipeline.hset(
+                        key,
+                        "created_at_ts",
+                        datetime.fromisoformat(created_at).timestamp(),
+                    )
+            pipeline.execute()
+
+    def _build_filter_query(
+        self, source_name: str, filters: DocumentFilter | None
+    ) -> str:
+        escaper = TokenEscaper()
+        clauses = [f"@source:{{{escaper.escape(source_name)}}}"]
+
+        if filters and filters.url_prefix:
+            clauses.append(f"@url:{{{escaper.escape(filters.url_prefix)}*}}")
+
+        if filters and (filters.created_after or filters.created_before):
+            lower = (
+                filters.created_after.timestamp() if filters.created_after else "-inf"
+            )
+            upper = (
+                f"({filters.created_before.timestamp()}"
+                if filters.created_before
+                else "+inf"
+            )
+            clauses.append(f"@created_at_ts:[{lower} {upper}]")
+
+        return " ".join(clauses)
 
     def _get_source_key(self, source_name: str) -> str:
         return f"{self.index_prefix}:{source_name}"
@@ -70,12 +134,20 @@ class RedisDocumentStore(DocumentStoreBackend):
             created_at=datetime.fromisoformat(doc["created_at"]),
         )
 
-    def add_documents(self, source_name: str, documents: list[Document]) -> None:
+    def embed_documents(self, documents: list[Document]) -> list[list[float]]:
         embeddings_result = self.embedding_client.create(
             input=[doc.content for doc in documents],
             model=self.embedding_model,
             dimensions=self.embedding_dimensions,
         )
+        return [embedding_data.embedding for embedding_data in embeddings_result.data]
+
+    def add_embedded_documents(
+        self,
+        source_name: str,
+        documents: list[Document],
+        embeddings: list[list[float]],
+    ) -> None:
 
         data: list[dict[str, Any]] = [
             {
@@ -85,11 +157,10 @@ class RedisDocumentStore(DocumentStoreBackend):
                 "title": doc.title,
                 "url": doc.url,
                 "created_at": doc.created_at.isoformat(),
-                "embedding": np.array(
-                    embedding_data.embedding, dtype=np.float32
-                ).tobytes(),
+                "created_at_ts": doc.created_at.timestamp(),
+                "embedding": np.array(embedding, dtype=np.float32).tobytes(),
             }
-            for doc, embedding_data in zip(documents, embeddings_result.data)
+            for doc, embedding in zip(documents, embeddings)
         ]
 
         self.index.load(id_field="id", data=data)  # type: ignore
@@ -135,11 +206,56 @@ class RedisDocumentStore(DocumentStoreBackend):
         if keys:
             self.index.drop_keys(keys)
 
+    def iter_embeddings(
+        self, source_name: str, batch_size: int
+    ) -> Iterator[list[list[float]]]:
+        # Embeddings are stored as raw float32 bytes, which the shared
+        # client would try to decode, so read them through a binary client.
+        pool = self.client.connection_pool
+        binary_client = Redis(
+            connection_pool=ConnectionPool(
+                connection_class=pool.connection_class,
+                **{**pool.connection_kwargs, "decode_responses": False},
+            )
+        )
+        source_key = self._get_source_key(source_name)
+
+        try:
+            keys = list(self.client.scan_iter(f"{source_key}:*"))
+            for start in range(0, len(keys), batch_size):
+                pipeline = binary_client.pipeline(transaction=False)
+                for key in keys[start : start + batch_size]:
+                    pipeline.hget(key, "embedding")
+                yield [
+                    np.frombuffer(value, dtype=np.float32).tolist()
+                    for value in pipeline.execute()
+                    if value is not None
+                ]
+        finally:
+            binary_client.connection_pool.disconnect()
+
+    def embed_queries(
+        self, queries: list[str], deadline: Deadline | None = None
+    ) -> list[list[float]]:
+        openai_client = with_deadline(self.openai_client, deadline)
+        embeddings_result = openai_client.embeddings.create(
+            input=queries,
+            model=self.embedding_model,
+            dimensions=self.embedding_dimensions,
+        )
+        return [embedding_data.embedding for embedding_data in embeddings_result.data]
+
     def semantic_search(
-        self, source_name: str, query: str, top_k: int
+        self,
+        source_name: str,
+        query: str,
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ) -> list[Document]:
+        openai_client = with_deadline(self.openai_client, deadline)
         query_embedding = (
-            self.embedding_client.create(
+            openai_client.embeddings.create(
                 input=query,
                 model=self.embedding_model,
                 dimensions=self.embedding_dimensions,
@@ -147,22 +263,39 @@ class RedisDocumentStore(DocumentStoreBackend):
             .data[0]
             .embedding
         )
+        return self.semantic_search_by_vector(
+            source_name, query_embedding, top_k, filters, deadline
+        )
 
-        source_filter = Tag("source") == source_name  # type: ignore
-
+    def semantic_search_by_vector(
+        self,
+        source_name: str,
+        query_embedding: list[float],
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[Document]:
         vector_query = VectorQuery(
             vector=query_embedding,
             vector_field_name="embedding",
             return_fields=self.document_fields,
             num_results=top_k,
-            filter_expression=source_filter,  # type: ignore
+            filter_expression=self._build_filter_query(source_name, filters),
         )
+        if deadline is not None:
+            # RediSearch returns the results found so far when the timeout hits
+            vector_query.timeout(deadline.remaining_ms())
 
         search_results = self.index.query(vector_query)
         return [self._map_document(source_name, doc) for doc in search_results]
 
     def full_text_search(
-        self, source_name: str, query: str, top_k: int
+        self,
+        source_name: str,
+        query: str,
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ) -> list[Document]:
         def escape_special_characters(text: str) -> str:
             special_chars = r'.,<>{}\[\]"\'\:;!@#$%^&*()\-\+=~'
@@ -170,9 +303,10 @@ class RedisDocumentStore(DocumentStoreBackend):
             return pattern.sub(r"\\\1", text)
 
         escaped_terms = [escape_special_characters(term) for term in query.split()]
-        formatted_query_terms = " | ".join(escaped_terms)
-        formatted_source_name = escape_special_characters(source_name)
-        formatted_query = f"@source:{{{formatted_source_name}}} {formatted_query_terms}"
+        formatted_query = self._build_filter_query(source_name, filters)
+        # An empty group isn't valid query syntax
+        if escaped_terms:
+            formatted_query += f" ({' | '.join(escaped_terms)})"
 
         query_obj = (  # type: ignore
             Query(formatted_query)  # type: ignore
@@ -180,14 +314,33 @@ class RedisDocumentStore(DocumentStoreBackend):
             .scorer("BM25")
             .return_fields(*self.document_fields)
         )
+        if deadline is not None:
+            query_obj.timeout(deadline.remaining_ms())
 
         ft = self.client.ft(f"{self.index_name}")
         search_results = ft.search(query_obj)  # type: ignore
         return [self._map_document(source_name, doc) for doc in search_results.docs]
 
     def hybrid_search(
-        self, *, source_name: str, semantic_query: str, full_text_query: str, top_k: int
+        self,
+        *,
+        source_name: str,
+        semantic_query: str,
+        full_text_query: str,
+        top_k: int,
+        query_embedding: list[float] | None = None,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ) -> list[Document]:
-        semantic_results = self.semantic_search(source_name, semantic_query, top_k)
-        text_results = self.full_text_search(source_name, full_text_query, top_k)
+        if query_embedding is not None:
+            semantic_results = self.semantic_search_by_vector(
+                source_name, query_embedding, top_k, filters=filters, deadline=deadline
+            )
+        else:
+            semantic_results = self.semantic_search(
+                source_name, semantic_query, top_k, filters=filters, deadline=deadline
+            )
+        text_results = self.full_text_search(
+            source_name, full_text_query, top_k, filters=filters, deadline=deadline
+        )
         return reciprocal_rank_fusion([semantic_results, text_results], top_k)
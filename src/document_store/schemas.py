@@ -1,5 +1,5 @@
-from datetime import datetime
-from pydantic import BaseModel
+from datetime import datetime, timezone
+from pydantic import BaseModel, field_validator
 
 
 class Document(BaseModel):
@@ -8,3 +8,16 @@ class Document(BaseModel):
     title: str
     url: str
     created_at: datetime
+    score: float | None = None
+
+
+class DocumentFilter(BaseModel):
+    url_prefix: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    @field_validator("created_after", "created_before")
+    def default_to_utc(cls, value: datetime | None):
+        if value and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
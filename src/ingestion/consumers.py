@@ -0,0 +1,260 @@
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any
+
+from src.common.redis import RedisClient
+from src.document_store.base import DocumentStoreBackend
+from src.document_store.schemas import Document
+from src.ingestion.streams import (
+    CHUNKS_STREAM,
+    EMBED_GROUP,
+    EMBEDDED_STREAM,
+    INGEST_SYNC_KEY_PREFIX,
+    WRITE_GROUP,
+    IngestionStreams,
+)
+
+logger = logging.getLogger(__name__)
+
+BLOCK_TIME = 5000  # Milliseconds to wait for new messages
+# Messages unacknowledged for this long are claimed from consumers that died
+CLAIM_IDLE_TIME = 300_000  # Milliseconds
+# Deliveries after which a message is given up on, failing its sync
+MAX_DELIVERIES = 5
+
+Message = tuple[str, dict[str, str]]
+
+# Acknowledges embedded documents and forwards them to the write stream. Only
+# messages this consumer still owned are forwarded, so a message claimed by
+# another consumer in the meantime isn't written twice.
+FORWARD_SCRIPT = """
+local forwarded = 0
+for i = 2, #ARGV, 5 do
+    if redis.call('XACK', KEYS[1], ARGV[1], ARGV[i]) == 1 then
+        redis.call('XADD', KEYS[2], '*', 'sync_id', ARGV[i + 1],
+            'source', ARGV[i + 2], 'document', ARGV[i + 3],
+            'embedding', ARGV[i + 4])
+        redis.call('XDEL', KEYS[1], ARGV[i])
+        forwarded = forwarded + 1
+    end
+end
+return forwarded
+"""
+
+# Acknowledges written documents and counts them against their sync
+COMPLETE_SCRIPT = """
+for i = 3, #ARGV, 2 do
+    if redis.call('XACK', KEYS[1], ARGV[1], ARGV[i]) == 1 then
+        redis.call('XDEL', KEYS[1], ARGV[i])
+        local pending_key = ARGV[2] .. ':' .. ARGV[i + 1] .. ':pending'
+        if redis.call('EXISTS', pending_key) == 1 then
+            redis.call('DECR', pending_key)
+        end
+    end
+end
+return 0
+"""
+
+
+class StreamConsumer(ABC):
+    """Consumes batches of messages from a stream as part of a consumer group.
+
+    Messages are acknowledged only once processed, so delivery is at least
+    once: messages left unacknowledged by a consumer that died are claimed by
+    another after `CLAIM_IDLE_TIME`, and given up on after `MAX_DELIVERIES`.
+    """
+
+    stream: str
+    group: str
+
+    def __init__(
+        self,
+        *,
+        redis_client: RedisClient,
+        streams: IngestionStreams,
+        name: str,
+        batch_size: int,
+    ):
+        self.redis_client = redis_client
+        self.streams = streams
+        self.name = name
+        self.batch_size = batch_size
+
+    def run(self, stop_event: threading.Event | None = None) -> None:
+        self.streams.ensure_groups()
+        logger.info(f"Consumer {self.name} reading from {self.stream}")
+        while not (stop_event and stop_event.is_set()):
+            self.consume_once()
+
+    def consume_once(self) -> None:
+        claimed = self._claim_idle_messages()
+        if claimed:
+            self._process_messages(claimed, redelivered=True)
+            return
+
+        response = self.redis_client.xreadgroup(
+            self.group,
+            self.name,
+            {self.stream: ">"},
+            count=self.batch_size,
+            block=BLOCK_TIME,
+        )
+        messages = [
+            message for _, stream_messages in response for message in stream_messages
+        ]
+        if messages:
+            self._process_messages(messages, redelivered=False)
+
+    def _claim_idle_messages(self) -> list[Message]:
+        _, claimed, _ = self.redis_client.xautoclaim(
+            self.stream,
+            self.group,
+            self.name,
+            min_idle_time=CLAIM_IDLE_TIME,
+            count=self.batch_size,
+        )
+        messages: list[Message] = []
+        for message_id, fields in claimed:
+            if not fields:
+                # Deleted from the stream while pending
+                self.redis_client.xack(self.stream, self.group, message_id)
+                continue
+            if self._get_delivery_count(message_id) > MAX_DELIVERIES:
+                self._give_up(message_id, fields)
+                continue
+            messages.append((message_id, fields))
+        return messages
+
+    def _get_delivery_count(self, message_id: str) -> int:
+        pending = self.redis_client.xpending_range(
+            self.stream, self.group, min=message_id, max=message_id, count=1
+        )
+        return pending[0]["times_delivered"] if pending else 0
+
+    def _give_up(self, message_id: str, fields: dict[str, str]) -> None:
+        logger.error(
+            f"Giving up on message {message_id} of sync {fields['sync_id']} "
+            f"after {MAX_DELIVERIES} deliveries"
+        )
+        self.streams.fail_sync(
+            fields["sync_id"],
+            f"Documents of source {fields['source']} could not be processed",
+        )
+        pipeline = self.redis_client.pipeline()
+        pipeline.xack(self.stream, self.group, message_id)
+        pipeline.xdel(self.stream, message_id)
+        pipeline.execute()
+
+    def _process_messages(self, messages: list[Message], redelivered: bool) -> None:
+        try:
+            self.process(messages, redelivered)
+        except Exception:
+            # Left unacknowledged, to be claimed again after `CLAIM_IDLE_TIME`
+            logger.exception(
+                f"Consumer {self.name} failed to process {len(messages)} messages"
+            )
+
+    @abstractmethod
+    def process(self, messages: list[Message], redelivered: bool) -> None:
+        """Process and acknowledge a batch of messages."""
+        pass
+
+
+class EmbedConsumer(StreamConsumer):
+    """Embeds documents and forwards them to the write stream."""
+
+    stream = CHUNKS_STREAM
+    group = EMBED_GROUP
+
+    def __init__(
+        self,
+        *,
+        document_store: DocumentStoreBackend,
+        requests_per_minute: int | None = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.document_store = document_store
+        self.request_interval = 60 / requests_per_minute if requests_per_minute else 0
+        self.next_request_at = 0.0
+        self.forward = self.redis_client.register_script(FORWARD_SCRIPT)
+
+    def process(self, messages: list[Message], redelivered: bool) -> None:
+        delay = self.next_request_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_request_at = time.monotonic() + self.request_interval
+
+        documents = [
+            Document.model_validate_json(fields["document"]) for _, fields in messages
+        ]
+        embeddings = self.document_store.embed_documents(documents)
+
+        args: list[str] = [self.group]
+        for (message_id, fields), embedding in zip(messages, embeddings):
+            args.extend(
+                [
+                    message_id,
+                    fields["sync_id"],
+                    fields["source"],
+                    fields["document"],
+                    json.dumps(embedding),
+                ]
+            )
+        self.forward(keys=[CHUNKS_STREAM, EMBEDDED_STREAM], args=args)
+
+
+class WriteConsumer(StreamConsumer):
+    """Bulk-loads embedded documents into the document store."""
+
+    stream = EMBEDDED_STREAM
+    group = WRITE_GROUP
+
+    def __init__(self, *, document_store: DocumentStoreBackend, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.document_store = document_store
+        self.complete = self.redis_client.register_script(COMPLETE_SCRIPT)
+
+    def process(self, messages: list[Message], redelivered: bool) -> None:
+        failed_sync_ids = self.streams.get_failed_sync_ids(
+            {fields["sync_id"] for _, fields in messages}
+        )
+        by_source: dict[str, list[tuple[Document, list[float]]]] = defaultdict(list)
+        for _, fields in messages:
+            # Written outside of their sync, they could be added after the sync
+            # failed or the source was deleted
+            if fields["sync_id"] in failed_sync_ids:
+                continue
+            by_source[fields["source"]].append(
+                (
+                    Document.model_validate_json(fields["document"]),
+                    json.loads(fields["embedding"]),
+                )
+            )
+
+        for source_name, items in by_source.items():
+            documents = [doc for doc, _ in items]
+            if redelivered:
+                # The documents may have been written before the consumer that
+                # first received them died, so replace rather than duplicate
+                self.document_store.delete_documents(
+                    source_name, [doc.id for doc in documents]
+                )
+            self.document_store.add_embedded_documents(
+                source_name, documents, [embedding for _, embedding in items]
+            )
+            logger.info(f"Wrote {len(documents)} documents to source {source_name}")
+
+        if failed_sync_ids:
+            logger.warning(
+                f"Dropped the documents of failed syncs {', '.join(sorted(failed_sync_ids))}"
+            )
+
+        args: list[str] = [self.group, INGEST_SYNC_KEY_PREFIX]
+        for message_id, fields in messages:
+            args.extend([message_id, fields["sync_id"]])
+        self.complete(keys=[EMBEDDED_STREAM], args=args)
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from typing import Iterable
+
+from redis.exceptions import ResponseError
+
+from src.common.redis import RedisClient
+from src.document_store.schemas import Document
+from src.sources.exceptions import SyncSourceException
+
+logger = logging.getLogger(__name__)
+
+CHUNKS_STREAM = "ingest:chunks"
+EMBEDDED_STREAM = "ingest:embedded"
+EMBED_GROUP = "embedders"
+WRITE_GROUP = "writers"
+INGEST_SYNC_KEY_PREFIX = "ingest_sync"
+INGEST_SYNC_STATE_TTL = 86400  # Seconds
+# Seconds between checks while a sync waits for the consumers
+POLL_INTERVAL = 1.0
+
+
+def get_pending_key(sync_id: str) -> str:
+    return f"{INGEST_SYNC_KEY_PREFIX}:{sync_id}:pending"
+
+
+def get_failed_key(sync_id: str) -> str:
+    return f"{INGEST_SYNC_KEY_PREFIX}:{sync_id}:failed"
+
+
+class StallDetector:
+    """Tracks a count of outstanding work that consumers should bring down."""
+
+    def __init__(self, timeout: float | None):
+        self.timeout = timeout
+        self.count: int | None = None
+        self.progressed_at = time.monotonic()
+
+    def is_stalled(self, count: int) -> bool:
+        """Record the current count, returning whether it hasn't gone down
+        for longer than the timeout."""
+        now = time.monotonic()
+        if self.count is None or count < self.count:
+            self.progressed_at = now
+        self.count = count
+        return self.timeout is not None and now - self.progressed_at > self.timeout
+
+
+class IngestionStreams:
+    """Publishes the documents of a sync to the ingestion streams.
+
+    Documents go to `CHUNKS_STREAM` to be embedded by the embed consumers,
+    which forward them to `EMBEDDED_STREAM` for the write consumers to store.
+    Each sync counts its documents that are not written yet, so it can wait
+    for them before completing. A sync fails if the consumers make no progress
+    for `stall_timeout` seconds, as when none are running.
+
+    Failed syncs are recorded until their state expires, and the documents
+    they left in the streams are dropped rather than written, since the sync
+    no longer holds the source lock.
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        *,
+        max_stream_length: int,
+        stall_timeout: float | None = None,
+    ):
+        self.redis_client = redis_client
+        self.max_stream_length = max_stream_length
+        self.stall_timeout = stall_timeout
+
+    def ensure_groups(self) -> None:
+        for stream, group in (
+            (CHUNKS_STREAM, EMBED_GROUP),
+            (EMBEDDED_STREAM, WRITE_GROUP),
+        ):
+            try:
+                self.redis_client.xgroup_create(stream, group, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def publish(
+        self, sync_id: str, source_name: str, documents: list[Document]
+    ) -> None:
+        """Queue documents for embedding, waiting while the stream is full."""
+        progress = StallDetector(self.stall_timeout)
+        while (
+            length := self.redis_client.xlen(CHUNKS_STREAM)
+        ) >= self.max_stream_length:
+            if progress.is_stalled(length):
+                raise SyncSourceException(
+                    f"No documents were taken from the ingestion stream for "
+                    f"{self.stall_timeout} seconds. Check that the embed "
+                    "consumers are running."
+                )
+            await asyncio.sleep(POLL_INTERVAL)
+
+        pipeline = self.redis_client.pipeline(transaction=True)
+        pipeline.incrby(get_pending_key(sync_id), len(documents))
+        pipeline.expire(get_pending_key(sync_id), INGEST_SYNC_STATE_TTL)
+        for doc in documents:
+            pipeline.xadd(
+                CHUNKS_STREAM,
+                {
+                    "sync_id": sync_id,
+                    "source": source_name,
+                    "document": doc.model_dump_json(),
+                },
+            )
+        pipeline.execute()
+
+    def fail_sync(self, sync_id: str, error: str) -> None:
+        # The first error is kept, as the one that failed the sync
+        self.redis_client.set(
+            get_failed_key(sync_id), error, ex=INGEST_SYNC_STATE_TTL, nx=True
+        )
+
+    def get_failed_sync_ids(self, sync_ids: Iterable[str]) -> set[str]:
+        sync_ids = list(sync_ids)
+        if not sync_ids:
+            return set()
+        errors = self.redis_client.mget(
+            [get_failed_key(sync_id) for sync_id in sync_ids]
+        )
+        return {sync_id for sync_id, error in zip(sync_ids, errors) if error}
+
+    async def wait_for_sync(self, sync_id: str) -> None:
+        """Wait until every document published for the sync has been written."""
+        progress = StallDetector(self.stall_timeout)
+        try:
+            while True:
+                error = self.redis_client.get(get_failed_key(sync_id))
+                if error:
+                    raise SyncSourceException(f"Failed to ingest documents: {error}")
+                pending = int(self.redis_client.get(get_pending_key(sync_id)) or 0)
+                if pending <= 0:
+                    return
+                if progress.is_stalled(pending):
+                    error = (
+                        f"No documents were written for {self.stall_timeout} "
+                        f"seconds, with {pending} left. Check that the ingestion "
+                        "consumers are running."
+                    )
+                    self.fail_sync(sync_id, error)
+                    raise SyncSourceException(error)
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            # The failed key is kept, so consumers drop the sync's documents
+            self.redis_client.delete(get_pending_key(sync_id))
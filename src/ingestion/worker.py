@@ -0,0 +1,84 @@
+"""Run a consumer of the ingestion streams.
+
+    python -m src.ingestion.worker embed
+    python -m src.ingestion.worker write
+
+Run as many of each as needed. Consumers only take part in syncs when
+`INGEST_MODE` is "streams".
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+from typing import Any
+
+from src.common.redis import create_redis_client
+from src.config import get_settings
+from src.document_store.backend import get_document_store_backend
+from src.ingestion.consumers import EmbedConsumer, StreamConsumer, WriteConsumer
+from src.ingestion.streams import IngestionStreams
+from src.llm_providers.client import get_embedding_openai_client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("stage", choices=["embed", "write"])
+    parser.add_argument(
+        "--name",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Consumer name, unique within the stage",
+    )
+    args = parser.parse_args()
+
+    settings = get_settings()
+    logging.basicConfig(level=settings.LOG_LEVEL)
+
+    redis_client = create_redis_client(settings.REDIS_URL)
+    document_store = get_document_store_backend(
+        redis_client=redis_client,
+        openai_client=get_embedding_openai_client(settings=settings),
+        settings=settings,
+    )
+    streams = IngestionStreams(
+        redis_client, max_stream_length=settings.INGEST_MAX_STREAM_LENGTH
+    )
+
+    consumer: StreamConsumer
+    if args.stage == "embed":
+        consumer = EmbedConsumer(
+            redis_client=redis_client,
+            streams=streams,
+            name=args.name,
+            batch_size=settings.INGEST_EMBED_BATCH_SIZE,
+            document_store=document_store,
+            requests_per_minute=settings.INGEST_EMBED_REQUESTS_PER_MINUTE,
+        )
+    else:
+        consumer = WriteConsumer(
+            redis_client=redis_client,
+            streams=streams,
+            name=args.name,
+            batch_size=settings.INGEST_WRITE_BATCH_SIZE,
+            document_store=document_store,
+        )
+
+    stop_event = threading.Event()
+
+    def stop(*_: Any) -> None:
+        # The current batch is finished before the consumer stops
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    try:
+        consumer.run(stop_event)
+    finally:
+        redis_client.close()
+
+
+if __name__ == "__main__":
+    main()
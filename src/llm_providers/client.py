@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Literal, Optional
 from fastapi import Depends
 from openai import OpenAI
+from src.common.deadline import Deadline
 from src.config import (
     Settings,
     get_settings,
@@ -20,6 +21,17 @@ def create_client(config: OpenAIConfig) -> OpenAI:
     return OpenAI(api_key=config.api_key, base_url=config.base_url)
 
 
+def with_deadline(client: OpenAI, deadline: Deadline | None) -> OpenAI:
+    """Bound the requests of a client by a deadline.
+
+    Retries are disabled under a deadline, since each retry would otherwise
+    get the whole remaining time.
+    """
+    if deadline is None:
+        return client
+    return client.with_options(max_retries=0, timeout=deadline.remaining())
+
+
 def get_openai_config(
     type: Literal["chat", "embedding"],
     provider: ChatProvider | EmbeddingProvider,
@@ -1,5 +1,5 @@
 import logging
-from openai import APIError
+from openai import APIError, APITimeoutError
 
 from src.common.exceptions import (
     KnownException,
@@ -11,6 +11,12 @@ logger = logging.getLogger(__name__)
 
 
 def handle_openai_client_error(e: APIError, model: str) -> None:
+    # Request deadline reached while waiting for the model
+    if isinstance(e, APITimeoutError):
+        raise KnownException(
+            f"Model '{model}' did not respond within the time limit for this request."
+        )
+
     # OpenAI Model Not Found
     if e.code == "model_not_found":
         raise ResourceNotFoundException(
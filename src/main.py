@@ -27,6 +27,7 @@ from src.common.postgres import dispose_postgres_engine
 from src.common.redis import create_redis_client
 from src.config import get_settings
 from src.sources.router import router as source_router
+from src.sources.routing import SourceProfileStore, SourceRouter
 from src.chat.router import router as chat_router
 from src.tasks.router import router as tasks_router
 from src.healthcheck.router import router as health_router
@@ -45,6 +46,10 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     app.state.redis_client = create_redis_client(settings.REDIS_URL)
     app.state.celery_app = celery_app
+    app.state.source_router = SourceRouter(
+        SourceProfileStore(app.state.redis_client),
+        ttl_seconds=settings.SOURCE_ROUTING_PROFILE_TTL,
+    )
     yield
     dispose_postgres_engine()
     app.state.redis_client.close()
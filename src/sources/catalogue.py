@@ -0,0 +1,38 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Callable
+
+from src.config import get_settings
+from src.sources.metadata.schemas import SourceMetadata
+
+
+class SourceCatalogue:
+    """In-process cache of source metadata, sorted by source name.
+
+    Source changes made through this process invalidate the cache directly;
+    the TTL bounds staleness for changes made by other API processes.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._sources: list[SourceMetadata] | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, loader: Callable[[], list[SourceMetadata]]) -> list[SourceMetadata]:
+        with self._lock:
+            if self._sources is None or time.monotonic() >= self._expires_at:
+                self._sources = sorted(loader(), key=lambda source: source.name)
+                self._expires_at = time.monotonic() + self.ttl_seconds
+
+            return list(self._sources)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._sources = None
+
+
+@lru_cache
+def get_source_catalogue() -> SourceCatalogue:
+    return SourceCatalogue(ttl_seconds=get_settings().SOURCE_CATALOGUE_TTL)
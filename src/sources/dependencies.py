@@ -1,11 +1,13 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 
 from src.document_store.base import DocumentStoreBackend
 from src.document_store.dependencies import get_document_store
 from src.lock.dependencies import get_lock_service
 from src.lock.service import LockService
+from src.sources.catalogue import SourceCatalogue, get_source_catalogue
 from src.sources.metadata.base import SourceMetadataStore
 from src.sources.metadata.dependencies import get_metadata_store
+from src.sources.routing import SourceRouter
 from src.sources.service import SourceService
 
 
@@ -13,9 +15,15 @@ def get_source_service(
     metadata_store: SourceMetadataStore = Depends(get_metadata_store),
     document_store: DocumentStoreBackend = Depends(get_document_store),
     lock_service: LockService = Depends(get_lock_service),
+    catalogue: SourceCatalogue = Depends(get_source_catalogue),
 ) -> SourceService:
     return SourceService(
         metadata_store=metadata_store,
         document_store=document_store,
         lock_service=lock_service,
+        catalogue=catalogue,
     )
+
+
+def get_source_router(request: Request) -> SourceRouter:
+    return request.app.state.source_router
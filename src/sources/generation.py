@@ -0,0 +1,23 @@
+from src.common.redis import RedisClient
+
+SOURCE_GENERATION_KEY_PREFIX = "source_generation:"
+
+
+def bump_source_generation(redis_client: RedisClient, source_name: str) -> None:
+    """Increment a source's generation after its documents change."""
+    redis_client.incr(f"{SOURCE_GENERATION_KEY_PREFIX}{source_name}")
+
+
+def get_source_generations(
+    redis_client: RedisClient, source_names: list[str]
+) -> dict[str, int]:
+    """Return the current generation of each source, 0 if never synced."""
+    if not source_names:
+        return {}
+
+    values = redis_client.mget(
+        [f"{SOURCE_GENERATION_KEY_PREFIX}{name}" for name in source_names]
+    )
+    return {
+        name: int(value) if value else 0 for name, value in zip(source_names, values)
+    }
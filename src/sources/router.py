@@ -1,4 +1,6 @@
+from datetime import datetime
 from fastapi import APIRouter, status, Depends
+from fastapi.responses import StreamingResponse
 
 from src.common.exceptions import (
     ResourceType,
@@ -6,11 +8,13 @@ from src.common.exceptions import (
     resource_locked_response,
     resource_not_found_response,
 )
-from src.document_store.schemas import Document
+from src.document_store.schemas import Document, DocumentFilter
 from src.common.workers_enabled_check import workers_enabled_check
+from src.config import Settings, get_settings
 from src.sources.dependencies import get_source_service
 from src.sources.metadata.schemas import SourceMetadata
 from src.sources.schemas import (
+    BatchSearchRequest,
     CreateSourceRequest,
     SourceTask,
     UpdateSourceRequest,
@@ -44,6 +48,31 @@ def create_source(
     return source_service.create_source(source_input)
 
 
+@router.post(
+    "/search/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Search results streamed as newline-delimited JSON, one line per query, with an error instead of documents for queries that failed",
+            "content": {"application/x-ndjson": {}},
+        },
+        **resource_not_found_response(ResourceType.SOURCE),
+    },
+)
+def batch_search_sources(
+    search_input: BatchSearchRequest,
+    source_service: SourceService = Depends(get_source_service),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    results = source_service.batch_search_sources(
+        search_input.queries, settings.BATCH_SEARCH_CONCURRENCY
+    )
+    return StreamingResponse(
+        (result.model_dump_json() + "\n" for result in results),
+        media_type="application/x-ndjson",
+    )
+
+
 @router.get(
     "/{source_name}", responses={**resource_not_found_response(ResourceType.SOURCE)}
 )
@@ -106,6 +135,9 @@ def search_source(
     source_name: str,
     query: str,
     top_k: int = 10,
+    url_prefix: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
     source_service: SourceService = Depends(get_source_service),
 ) -> list[Document]:
     return source_service.search_source(
@@ -113,4 +145,9 @@ def search_source(
         semantic_query=query,
         full_text_query=query,
         top_k=top_k,
+        filters=DocumentFilter(
+            url_prefix=url_prefix,
+            created_after=created_after,
+            created_before=created_before,
+        ),
     )
@@ -0,0 +1,175 @@
+import json
+import time
+from typing import Iterable
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.common.redis import RedisClient
+
+
+class SourceProfile(BaseModel):
+    source_name: str
+    centroid: list[float]
+    representatives: list[list[float]]
+    num_vectors: int
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _kmeans(
+    vectors: np.ndarray, k: int, iterations: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Spherical k-means over normalized vectors, returning normalized centres."""
+    centres = vectors[rng.choice(len(vectors), size=k, replace=False)]
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centres.T, axis=1)
+        for cluster in range(k):
+            members = vectors[assignments == cluster]
+            if len(members):
+                centres[cluster] = members.sum(axis=0)
+        centres = _normalize(centres)
+    return centres
+
+
+def build_source_profile(
+    source_name: str,
+    embedding_batches: Iterable[list[list[float]]],
+    *,
+    max_representatives: int,
+    sample_size: int,
+    kmeans_iterations: int = 10,
+    seed: int = 0,
+) -> SourceProfile | None:
+    """Build a source profile in one pass over its stored embeddings.
+
+    The centroid is a running mean of the normalized vectors. Cluster
+    representatives come from k-means over a reservoir sample, so memory
+    stays bounded regardless of source size.
+    """
+    rng = np.random.default_rng(seed)
+    total: np.ndarray | None = None
+    sample: np.ndarray | None = None
+    count = 0
+
+    for batch in embedding_batches:
+        if not batch:
+            continue
+
+        vectors = _normalize(np.asarray(batch, dtype=np.float32))
+        if total is None:
+            total = np.zeros(vectors.shape[1], dtype=np.float64)
+            sample = np.empty((sample_size, vectors.shape[1]), dtype=np.float32)
+        assert sample is not None
+
+        total += vectors.sum(axis=0)
+
+        # Reservoir sampling keeps a uniform sample of every vector seen so far
+        for vector in vectors:
+            if count < sample_size:
+                sample[count] = vector
+            else:
+                slot = rng.integers(0, count + 1)
+                if slot < sample_size:
+                    sample[slot] = vector
+            count += 1
+
+    if total is None or sample is None or count == 0:
+        return None
+
+    sample = sample[: min(count, sample_size)]
+    representatives = _kmeans(
+        sample, min(max_representatives, len(sample)), kmeans_iterations, rng
+    )
+
+    return SourceProfile(
+        source_name=source_name,
+        centroid=_normalize(total / count).tolist(),
+        representatives=representatives.tolist(),
+        num_vectors=count,
+    )
+
+
+class SourceProfileStore:
+    key_prefix = "source_profile:"
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+
+    def save_profile(self, profile: SourceProfile) -> None:
+        self.redis_client.set(
+            f"{self.key_prefix}{profile.source_name}", profile.model_dump_json()
+        )
+
+    def delete_profile(self, source_name: str) -> None:
+        self.redis_client.delete(f"{self.key_prefix}{source_name}")
+
+    def profile_exists(self, source_name: str) -> bool:
+        return self.redis_client.exists(f"{self.key_prefix}{source_name}") == 1
+
+    def get_profiles(self, source_names: list[str]) -> list[SourceProfile]:
+        if not source_names:
+            return []
+
+        values = self.redis_client.mget(
+            [f"{self.key_prefix}{name}" for name in source_names]
+        )
+        return [
+            SourceProfile(**json.loads(value)) for value in values if value is not None
+        ]
+
+
+class SourceRouter:
+    """Ranks sources for a query embedding by similarity to their profiles.
+
+    Profiles are held in memory as normalized matrices and refreshed from
+    Redis after the TTL, so ranking is a handful of small matrix products.
+    """
+
+    def __init__(self, profile_store: SourceProfileStore, ttl_seconds: float):
+        self.profile_store = profile_store
+        self.ttl_seconds = ttl_seconds
+        self._profiles: dict[str, tuple[np.ndarray, float]] = {}
+
+    def _get_profile_matrices(self, source_names: list[str]) -> dict[str, np.ndarray]:
+        now = time.monotonic()
+        missing = [
+            name
+            for name in source_names
+            if name not in self._profiles or self._profiles[name][1] <= now
+        ]
+
+        if missing:
+            for name in missing:
+                self._profiles.pop(name, None)
+            for profile in self.profile_store.get_profiles(missing):
+                matrix = _normalize(
+                    np.asarray(
+                        [profile.centroid, *profile.representatives], dtype=np.float32
+                    )
+                )
+                self._profiles[profile.source_name] = (matrix, now + self.ttl_seconds)
+
+        return {
+            name: self._profiles[name][0]
+            for name in source_names
+            if name in self._profiles
+        }
+
+    def rank(
+        self, query_embedding: list[float], source_names: list[str]
+    ) -> list[tuple[str, float]]:
+        """Return profiled sources with their scores, most similar first.
+
+        A source's score is its best cosine similarity across the centroid and
+        cluster representatives. Sources without a profile are omitted.
+        """
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        scores = [
+            (name, float(np.max(matrix @ query)))
+            for name, matrix in self._get_profile_matrices(source_names).items()
+        ]
+        return sorted(scores, key=lambda item: item[1], reverse=True)
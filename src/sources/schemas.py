@@ -1,9 +1,14 @@
 from pydantic import BaseModel, Field, field_validator
 import re
 
+from src.config import get_settings
+from src.connectors.common.http_cache import HttpCacheStats
 from src.connectors.registry import ConnectorConfig
+from src.document_store.schemas import Document, DocumentFilter
 from src.sources.metadata.schemas import SourceMetadata
 
+settings = get_settings()
+
 
 class CreateSourceRequest(BaseModel):
     name: str = Field(..., min_length=3, max_length=50)
@@ -35,3 +40,26 @@ class SyncSourceOutput(BaseModel):
     source: SourceMetadata
     docs_added: int
     docs_removed: int
+    http_cache: HttpCacheStats | None = None
+
+
+class BatchSearchQuery(BaseModel):
+    source: str
+    query: str
+    top_k: int = Field(10, ge=1)
+    filters: DocumentFilter | None = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[BatchSearchQuery] = Field(
+        ..., min_length=1, max_length=settings.BATCH_SEARCH_MAX_QUERIES
+    )
+
+
+class BatchSearchResult(BaseModel):
+    index: int
+    source: str
+    query: str
+    documents: list[Document] = Field(default_factory=list)
+    # Set instead of documents when the search of this query failed
+    error: str | None = None
@@ -1,16 +1,25 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
 from uuid import uuid4
 
+from src.common.deadline import Deadline
 from src.common.exceptions import (
+    KnownException,
     ResourceAlreadyExistsException,
     ResourceLockedException,
     ResourceNotFoundException,
     ResourceType,
 )
 from src.document_store.base import DocumentStoreBackend
+from src.document_store.schemas import DocumentFilter
 from src.lock.service import LockService
+from src.sources.catalogue import SourceCatalogue
 from src.sources.metadata.base import SourceMetadataStore
 from src.sources.metadata.schemas import MetadataUpdate, SourceMetadata
 from src.sources.schemas import (
+    BatchSearchQuery,
+    BatchSearchResult,
     CreateSourceRequest,
     SourceTask,
     UpdateSourceRequest,
@@ -18,6 +27,8 @@ from src.sources.schemas import (
 from src.tasks.sync_source import sync_source_documents_task
 from src.common.current_datetime import get_current_datetime
 
+logger = logging.getLogger(__name__)
+
 
 class SourceService:
     def __init__(
@@ -25,14 +36,32 @@ class SourceService:
         metadata_store: SourceMetadataStore,
         document_store: DocumentStoreBackend,
         lock_service: LockService,
+        catalogue: SourceCatalogue | None = None,
     ):
         self.document_store = document_store
         self.metadata_store = metadata_store
         self.lock_service = lock_service
+        self.catalogue = catalogue
 
     def list_sources(self):
         return self.metadata_store.list_metadata()
 
+    def get_catalogue(self) -> list[SourceMetadata]:
+        """Return all sources sorted by name, served from the catalogue cache."""
+        if self.catalogue is None:
+            return sorted(self.list_sources(), key=lambda source: source.name)
+
+        return self.catalogue.get(self.metadata_store.list_metadata)
+
+    def embed_queries(
+        self, queries: list[str], deadline: Deadline | None = None
+    ) -> list[list[float]]:
+        return self.document_store.embed_queries(queries, deadline)
+
+    def _invalidate_catalogue(self) -> None:
+        if self.catalogue is not None:
+            self.catalogue.invalidate()
+
     def create_source(self, source_input: CreateSourceRequest) -> SourceTask:
         if self.metadata_store.metadata_exists(source_input.name):
             raise ResourceAlreadyExistsException(ResourceType.SOURCE, source_input.name)
@@ -46,6 +75,7 @@ class SourceService:
             connector=source_input.connector,
             timestamp=timestamp,
         )
+        self._invalidate_catalogue()
 
         connector_config_dict = source_input.connector.model_dump()
 
@@ -118,6 +148,7 @@ class SourceService:
             ),
             timestamp=get_current_datetime(),
         )
+        self._invalidate_catalogue()
 
         message = (
             "Source updated. Syncing documents..." if task_id else "Source updated."
@@ -138,6 +169,7 @@ class SourceService:
 
         self.document_store.delete_all_documents(source_name)
         self.metadata_store.delete_metadata(source_name)
+        self._invalidate_catalogue()
 
     def get_source_documents(self, source_name: str, limit: int, offset: int):
         if not self.metadata_store.metadata_exists(source_name):
@@ -146,7 +178,14 @@ class SourceService:
         return self.document_store.get_documents(source_name, limit, offset)
 
     def search_source(
-        self, *, source_name: str, semantic_query: str, full_text_query: str, top_k: int
+        self,
+        *,
+        source_name: str,
+        semantic_query: str,
+        full_text_query: str,
+        top_k: int,
+        filters: DocumentFilter | None = None,
+        deadline: Deadline | None = None,
     ):
         if not self.metadata_store.metadata_exists(source_name):
             raise ResourceNotFoundException(ResourceType.SOURCE, source_name)
@@ -156,4 +195,78 @@ class SourceService:
             semantic_query=semantic_query,
             full_text_query=full_text_query,
             top_k=top_k,
+            filters=filters,
+            deadline=deadline,
         )
+
+    def batch_search_sources(
+        self, queries: list[BatchSearchQuery], concurrency: int
+    ) -> Iterator[BatchSearchResult]:
+        # Validate sources and embed queries up front so errors are raised
+        # before any results are streamed.
+        for source_name in sorted({query.source for query in queries}):
+            if not self.metadata_store.metadata_exists(source_name):
+                raise ResourceNotFoundException(ResourceType.SOURCE, source_name)
+
+        query_embeddings = self.document_store.embed_queries(
+            [query.query for query in queries]
+        )
+
+        return self._run_batch_search(queries, query_embeddings, concurrency)
+
+    def _run_batch_search(
+        self,
+        queries: list[BatchSearchQuery],
+        query_embeddings: list[list[float]],
+        concurrency: int,
+    ) -> Iterator[BatchSearchResult]:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            futures = {
+                executor.submit(
+                    self.document_store.hybrid_search,
+                    source_name=query.source,
+                    semantic_query=query.query,
+                    full_text_query=query.query,
+                    top_k=query.top_k,
+                    query_embedding=query_embedding,
+                    filters=query.filters,
+                ): index
+                for index, (query, query_embedding) in enumerate(
+                    zip(queries, query_embeddings)
+                )
+            }
+
+            for future in as_completed(futures):
+                index = futures[future]
+                query = queries[index]
+                # The response has already started, so a failed query is
+                # reported in its own line rather than ending the stream
+                try:
+                    documents = future.result()
+                except (KnownException, ResourceNotFoundException) as e:
+                    yield BatchSearchResult(
+                        index=index,
+                        source=query.source,
+                        query=query.query,
+                        error=str(e),
+                    )
+                except Exception:
+                    logger.exception(
+                        f"Failed to search source {query.source} in batch search"
+                    )
+                    yield BatchSearchResult(
+                        index=index,
+                        source=query.source,
+                        query=query.query,
+                        error="An unexpected error occurred",
+                    )
+                else:
+                    yield BatchSearchResult(
+                        index=index,
+                        source=query.source,
+                        query=query.query,
+                        documents=documents,
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
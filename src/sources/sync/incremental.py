@@ -0,0 +1,117 @@
+import json
+from datetime import datetime, timedelta
+from typing import Mapping
+
+from redis.client import Pipeline
+
+from src.common.redis import RedisClient
+
+INCREMENTAL_SYNC_KEY_PREFIX = "incremental_sync"
+# Items updated shortly before a sync started are extracted again by the next
+# one, in case the clock of the origin is behind
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def encode_doc_ids(doc_ids: set[str]) -> str:
+    return json.dumps(sorted(doc_ids))
+
+
+class IncrementalSyncState:
+    """Watermark and document IDs of a source that is synced incrementally.
+
+    A full sync records the IDs of the documents extracted from each parent
+    item, such as an issue, along with the time it started. Later syncs only
+    extract the items updated since the previous sync, and replace the
+    documents of just those items.
+
+    The state expires `full_sync_interval` seconds after the full sync, so the
+    items deleted at the origin, which incremental syncs can't see, are
+    removed by a full sync at least that often. It is keyed by the ID of the
+    source and its connector config, so a recreated or reconfigured source
+    starts with a full sync.
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        *,
+        source_id: str,
+        config_key: str,
+        full_sync_interval: int,
+    ):
+        self.redis_client = redis_client
+        self.full_sync_interval = full_sync_interval
+        self.key = f"{INCREMENTAL_SYNC_KEY_PREFIX}:{source_id}:{config_key}"
+        self.parents_key = f"{self.key}:parents"
+
+    def get_watermark(self) -> datetime | None:
+        watermark = self.redis_client.hget(self.key, "watermark")
+        return datetime.fromisoformat(watermark) if watermark else None
+
+    def get_doc_ids(self, parent_ids: list[str]) -> dict[str, set[str]]:
+        """Return the IDs of the documents last extracted from each parent."""
+        if not parent_ids:
+            return {}
+        values = self.redis_client.hmget(self.parents_key, parent_ids)
+        return {
+            parent_id: set(json.loads(value))
+            for parent_id, value in zip(parent_ids, values)
+            if value
+        }
+
+    def complete_full_sync(
+        self, parent_doc_ids: Mapping[str, set[str]], sync_started_at: datetime
+    ) -> None:
+        pipeline = self.redis_client.pipeline()
+        pipeline.delete(self.key, self.parents_key)
+        if parent_doc_ids:
+            pipeline.hset(
+                self.parents_key,
+                mapping={
+                    parent_id: encode_doc_ids(doc_ids)
+                    for parent_id, doc_ids in parent_doc_ids.items()
+                },
+            )
+        self._set_watermark(pipeline, sync_started_at)
+        pipeline.expire(self.key, self.full_sync_interval)
+        pipeline.expire(self.parents_key, self.full_sync_interval)
+        pipeline.execute()
+
+    def complete_sharded_full_sync(
+        self, parents_key: str, sync_started_at: datetime
+    ) -> None:
+        """Complete a full sync whose shards recorded parents at `parents_key`."""
+        pipeline = self.redis_client.pipeline()
+        pipeline.delete(self.key, self.parents_key)
+        if self.redis_client.exists(parents_key):
+            pipeline.rename(parents_key, self.parents_key)
+        self._set_watermark(pipeline, sync_started_at)
+        pipeline.expire(self.key, self.full_sync_interval)
+        pipeline.expire(self.parents_key, self.full_sync_interval)
+        pipeline.execute()
+
+    def complete_incremental_sync(
+        self, parent_doc_ids: Mapping[str, set[str]], sync_started_at: datetime
+    ) -> None:
+        # The state expired during the sync, so the next sync is a full one
+        if not self.redis_client.exists(self.key):
+            return
+
+        pipeline = self.redis_client.pipeline()
+        if parent_doc_ids:
+            pipeline.hset(
+                self.parents_key,
+                mapping={
+                    parent_id: encode_doc_ids(doc_ids)
+                    for parent_id, doc_ids in parent_doc_ids.items()
+                },
+            )
+        self._set_watermark(pipeline, sync_started_at)
+        pipeline.execute()
+
+    def clear(self) -> None:
+        self.redis_client.delete(self.key, self.parents_key)
+
+    def _set_watermark(self, pipeline: Pipeline, sync_started_at: datetime) -> None:
+        watermark = sync_started_at - WATERMARK_OVERLAP
+        pipeline.hset(self.key, "watermark", watermark.isoformat())
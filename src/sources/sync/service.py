@@ -1,21 +1,36 @@
+import asyncio
+import hashlib
 import logging
-from uuid import UUID, uuid5
+from collections import defaultdict
+from datetime import datetime
+from uuid import UUID, uuid4, uuid5
 
 from src.llm_providers.client import get_embedding_openai_client
 from src.common.redis import RedisClient
 from src.config import Settings
+from src.connectors.common.http_cache import HttpCacheStats, get_http_cache
+from src.connectors.common.sharding import Shard
+from src.connectors.common.schemas import ExtractedDocument
 from src.connectors.service import ConnectorService
 from src.document_store.backend import get_document_store_backend
 from src.sources.exceptions import SyncSourceException
+from src.sources.generation import bump_source_generation
+from src.sources.routing import SourceProfileStore, build_source_profile
 from src.document_store.schemas import Document
+from src.ingestion.streams import IngestionStreams
 from src.connectors.registry import ConnectorConfig
 from src.sources.metadata.schemas import MetadataUpdate
 from src.sources.metadata.backend import get_metadata_store_backend
 from src.sources.schemas import SyncSourceOutput
+from src.sources.sync.incremental import IncrementalSyncState
+from src.sources.sync.shards import ShardedSync
 from src.common.current_datetime import get_current_datetime
 
 logger = logging.getLogger(__name__)
 
+# Seconds between checks for shards still being synced by other tasks
+SHARD_POLL_INTERVAL = 5
+
 
 class SourceSyncService:
     """Class to handle the syncing of documents for a particular source."""
@@ -43,11 +58,34 @@ class SourceSyncService:
             redis_client=self.redis_client,
             settings=self.settings,
         )
-        self.connector_service = ConnectorService(self.settings)
+        self.profile_store = SourceProfileStore(self.redis_client)
+        self.http_cache = get_http_cache(self.redis_client, self.settings)
+        self.connector_service = ConnectorService(
+            self.settings, self.http_cache, self.source_name
+        )
         self.batch_size = self.settings.DOCUMENT_SYNC_BATCH_SIZE
+        self.ingestion_streams = (
+            IngestionStreams(
+                self.redis_client,
+                max_stream_length=self.settings.INGEST_MAX_STREAM_LENGTH,
+                stall_timeout=self.settings.INGEST_STALL_TIMEOUT,
+            )
+            if self.settings.INGEST_MODE == "streams"
+            else None
+        )
 
     async def sync_documents(self) -> SyncSourceOutput:
         """Main entry point for syncing documents for a source."""
+        sync_started_at = get_current_datetime()
+        incremental_sync_state = self._get_incremental_sync_state()
+        watermark = (
+            incremental_sync_state.get_watermark() if incremental_sync_state else None
+        )
+        if incremental_sync_state and watermark:
+            return await self._sync_updated_documents(
+                incremental_sync_state, watermark, sync_started_at
+            )
+
         logger.info(f"Syncing documents for source {self.source_name}")
 
         existing_doc_ids: set[str] = set(
@@ -56,23 +94,21 @@ class SourceSyncService:
         current_doc_ids: set[str] = set()
         docs_to_add: list[Document] = []
         added_doc_ids: set[str] = set()
+        parent_doc_ids: dict[str, set[str]] = defaultdict(set)
+        sync_id = str(uuid4())
 
         try:
+            if incremental_sync_state:
+                # Synced incrementally again only once this full sync completes
+                incremental_sync_state.clear()
+
             # Extract and sync documents
             async for extracted_doc in self.connector_service.extract_documents(
                 self.connector_config
             ):
-                stable_id = self._generate_stable_id(
-                    title=extracted_doc.title,
-                    content=extracted_doc.content,
-                )
-                doc = Document(
-                    id=stable_id,
-                    url=extracted_doc.url,
-                    title=extracted_doc.title,
-                    content=extracted_doc.content,
-                    created_at=get_current_datetime(),
-                )
+                doc = self._create_document(extracted_doc)
+                if extracted_doc.parent_id:
+                    parent_doc_ids[extracted_doc.parent_id].add(doc.id)
                 if doc.id in current_doc_ids:
                     continue
 
@@ -85,42 +121,375 @@ class SourceSyncService:
 
                     # If we have reached batch size, add the batch
                     if len(docs_to_add) >= self.batch_size:
-                        self._add_documents_batch(docs_to_add, len(current_doc_ids))
+                        await self._write_documents(
+                            sync_id, docs_to_add, len(current_doc_ids)
+                        )
                         docs_to_add = []
 
             # Add any remaining documents in the last batch
             if docs_to_add:
-                self._add_documents_batch(docs_to_add, len(current_doc_ids))
+                await self._write_documents(sync_id, docs_to_add, len(current_doc_ids))
+
+            await self._wait_for_writes(sync_id)
 
             # Remove documents that exist in the store but not in the current sync
             doc_ids_to_remove = existing_doc_ids - current_doc_ids
             if doc_ids_to_remove:
                 self._remove_stale_documents(doc_ids_to_remove, len(current_doc_ids))
 
-            # Mark source as COMPLETED
-            updated_source = self.metadata_store.update_metadata(
-                name=self.source_name,
-                updates=MetadataUpdate(
-                    num_docs=len(current_doc_ids),
-                ),
-                timestamp=get_current_datetime(),
+            if incremental_sync_state:
+                incremental_sync_state.complete_full_sync(
+                    parent_doc_ids, sync_started_at
+                )
+
+            return self._complete_sync(
+                num_docs=len(current_doc_ids),
+                docs_added=len(added_doc_ids),
+                docs_removed=len(doc_ids_to_remove),
+                http_cache_stats=self.http_cache.stats if self.http_cache else None,
+            )
+
+        except Exception as e:
+            logger.exception(f"Failed to sync documents for source {self.source_name}")
+            self._abort_writes(sync_id, str(e))
+            raise e
+
+    async def _sync_updated_documents(
+        self,
+        incremental_sync_state: IncrementalSyncState,
+        watermark: datetime,
+        sync_started_at: datetime,
+    ) -> SyncSourceOutput:
+        """Replace the documents of the items updated since the watermark.
+
+        The documents of other items are left as they are.
+        """
+        logger.info(
+            f"Syncing documents for source {self.source_name} "
+            f"updated since {watermark.isoformat()}"
+        )
+
+        existing_doc_ids: set[str] = set(
+            self.document_store.get_document_ids(self.source_name)
+        )
+        docs_to_add: list[Document] = []
+        added_doc_ids: set[str] = set()
+        parent_doc_ids: dict[str, set[str]] = defaultdict(set)
+        sync_id = str(uuid4())
+
+        try:
+            async for extracted_doc in self.connector_service.extract_documents(
+                self.connector_config, since=watermark
+            ):
+                doc = self._create_document(extracted_doc)
+                if extracted_doc.parent_id:
+                    parent_doc_ids[extracted_doc.parent_id].add(doc.id)
+                if doc.id in existing_doc_ids or doc.id in added_doc_ids:
+                    continue
+
+                docs_to_add.append(doc)
+                added_doc_ids.add(doc.id)
+                if len(docs_to_add) >= self.batch_size:
+                    await self._write_documents(
+                        sync_id, docs_to_add, len(existing_doc_ids | added_doc_ids)
+                    )
+                    docs_to_add = []
+
+            if docs_to_add:
+                await self._write_documents(
+                    sync_id, docs_to_add, len(existing_doc_ids | added_doc_ids)
+                )
+
+            await self._wait_for_writes(sync_id)
+
+            # Remove the previous documents of the updated items
+            current_doc_ids = set().union(*parent_doc_ids.values())
+            previous_doc_ids = set().union(
+                *incremental_sync_state.get_doc_ids(list(parent_doc_ids)).values()
+            )
+            doc_ids_to_remove = (previous_doc_ids - current_doc_ids) & existing_doc_ids
+            num_docs = len((existing_doc_ids | added_doc_ids) - doc_ids_to_remove)
+            if doc_ids_to_remove:
+                self._remove_stale_documents(doc_ids_to_remove, num_docs)
+
+            incremental_sync_state.complete_incremental_sync(
+                parent_doc_ids, sync_started_at
             )
 
-            return SyncSourceOutput(
-                source=updated_source,
+            return self._complete_sync(
+                num_docs=num_docs,
                 docs_added=len(added_doc_ids),
                 docs_removed=len(doc_ids_to_remove),
+                http_cache_stats=self.http_cache.stats if self.http_cache else None,
+            )
+
+        except Exception as e:
+            logger.exception(f"Failed to sync documents for source {self.source_name}")
+            self._abort_writes(sync_id, str(e))
+            raise e
+
+    def _get_incremental_sync_state(self) -> IncrementalSyncState | None:
+        if not (
+            self.settings.INCREMENTAL_SYNC_FULL_INTERVAL > 0
+            and self.connector_service.supports_incremental_sync(self.connector_config)
+        ):
+            return None
+
+        source = self.metadata_store.get_metadata(self.source_name)
+        config_key = hashlib.sha256(
+            self.connector_config.model_dump_json().encode()
+        ).hexdigest()
+        return IncrementalSyncState(
+            self.redis_client,
+            source_id=source.id,
+            config_key=config_key,
+            full_sync_interval=self.settings.INCREMENTAL_SYNC_FULL_INTERVAL,
+        )
+
+    def can_shard(self) -> bool:
+        """Whether the sync can be split into shards synced by separate tasks."""
+        if not (
+            self.settings.SYNC_SHARDS > 1
+            and self.connector_service.supports_sharding(self.connector_config)
+        ):
+            return False
+
+        # Syncs of only the updated items are small enough for a single task
+        incremental_sync_state = self._get_incremental_sync_state()
+        return not (incremental_sync_state and incremental_sync_state.get_watermark())
+
+    def start_sharded_sync(self, sync_id: str) -> ShardedSync:
+        logger.info(
+            f"Syncing documents for source {self.source_name} "
+            f"in {self.settings.SYNC_SHARDS} shards"
+        )
+        sharded_sync = ShardedSync(
+            self.redis_client, sync_id=sync_id, shard_count=self.settings.SYNC_SHARDS
+        )
+        sharded_sync.start(
+            self.document_store.get_document_ids(self.source_name), self.batch_size
+        )
+        incremental_sync_state = self._get_incremental_sync_state()
+        if incremental_sync_state:
+            incremental_sync_state.clear()
+        return sharded_sync
+
+    async def sync_shards(self, sharded_sync: ShardedSync) -> None:
+        """Sync shards of a sharded sync until there are none left to claim."""
+        if not sharded_sync.is_active():
+            logger.info(
+                f"Sharded sync {sharded_sync.sync_id} of source {self.source_name} "
+                "has already finished"
+            )
+            return
+
+        await self._sync_claimed_shards(sharded_sync)
+        if self.http_cache:
+            sharded_sync.record_http_cache_stats(self.http_cache.stats)
+
+    async def finish_sharded_sync(self, sharded_sync: ShardedSync) -> SyncSourceOutput:
+        """Sync shards alongside the shard tasks, then remove stale documents.
+
+        Stale documents are only removed once every shard has succeeded, since
+        the documents of a failed shard would otherwise look stale.
+        """
+        try:
+            await self._sync_claimed_shards(sharded_sync)
+            while not sharded_sync.is_finished():
+                # Shards of tasks that died are claimable once their lock expires
+                await asyncio.sleep(SHARD_POLL_INTERVAL)
+                await self._sync_claimed_shards(sharded_sync)
+
+            await self._wait_for_writes(sharded_sync.sync_id)
+
+            failures = sharded_sync.get_failures()
+            if failures:
+                raise SyncSourceException(
+                    f"Failed to sync {len(failures)} of {sharded_sync.shard_count} "
+                    f"shards of source {self.source_name}: "
+                    f"{next(iter(failures.values()))}"
+                )
+
+            num_docs = sharded_sync.get_num_docs()
+            docs_removed = 0
+            for doc_ids in sharded_sync.iter_stale_doc_ids(self.batch_size):
+                self._remove_stale_documents(set(doc_ids), num_docs)
+                docs_removed += len(doc_ids)
+
+            incremental_sync_state = self._get_incremental_sync_state()
+            if incremental_sync_state:
+                incremental_sync_state.complete_sharded_full_sync(
+                    sharded_sync.parents_key, sharded_sync.get_started_at()
+                )
+
+            http_cache_stats: HttpCacheStats | None = None
+            if self.http_cache:
+                sharded_sync.record_http_cache_stats(self.http_cache.stats)
+                http_cache_stats = sharded_sync.get_http_cache_stats()
+
+            return self._complete_sync(
+                num_docs=num_docs,
+                docs_added=sharded_sync.get_docs_added(),
+                docs_removed=docs_removed,
+                http_cache_stats=http_cache_stats,
             )
 
         except Exception as e:
             logger.exception(f"Failed to sync documents for source {self.source_name}")
+            self._abort_writes(sharded_sync.sync_id, str(e))
             raise e
 
+        finally:
+            sharded_sync.clear()
+
+    async def _sync_claimed_shards(self, sharded_sync: ShardedSync) -> None:
+        while claimed := sharded_sync.claim_shard():
+            index, lock = claimed
+            lock_renewal_task = asyncio.create_task(
+                sharded_sync.lock_service.renew_lock(lock)
+            )
+            try:
+                docs_added = await self._sync_shard(
+                    sharded_sync, Shard(index=index, count=sharded_sync.shard_count)
+                )
+            except Exception as e:
+                logger.exception(
+                    f"Failed to sync shard {index} of source {self.source_name}"
+                )
+                sharded_sync.fail_shard(index, lock, str(e))
+            else:
+                sharded_sync.complete_shard(index, lock, docs_added)
+            finally:
+                lock_renewal_task.cancel()
+
+    async def _sync_shard(self, sharded_sync: ShardedSync, shard: Shard) -> int:
+        """Add the new documents of a shard, returning how many were added."""
+        logger.info(f"Syncing shard {shard.index} of source {self.source_name}")
+
+        docs: dict[str, Document] = {}
+        docs_added = 0
+        parent_doc_ids: dict[str, set[str]] = defaultdict(set)
+        async for extracted_doc in self.connector_service.extract_documents(
+            self.connector_config, shard
+        ):
+            doc = self._create_document(extracted_doc)
+            if extracted_doc.parent_id:
+                parent_doc_ids[extracted_doc.parent_id].add(doc.id)
+            docs[doc.id] = doc
+            if len(docs) >= self.batch_size:
+                docs_added += await self._add_reported_documents(
+                    sharded_sync, shard, docs
+                )
+                docs = {}
+
+        if docs:
+            docs_added += await self._add_reported_documents(sharded_sync, shard, docs)
+        sharded_sync.report_parents(parent_doc_ids)
+        return docs_added
+
+    async def _add_reported_documents(
+        self, sharded_sync: ShardedSync, shard: Shard, docs: dict[str, Document]
+    ) -> int:
+        new_doc_ids = sharded_sync.report_documents(shard.index, list(docs))
+        if new_doc_ids:
+            await self._write_documents(
+                sharded_sync.sync_id,
+                [docs[doc_id] for doc_id in new_doc_ids],
+                sharded_sync.get_num_docs() + len(new_doc_ids),
+            )
+            sharded_sync.record_documents(new_doc_ids)
+        return len(new_doc_ids)
+
+    def _complete_sync(
+        self,
+        *,
+        num_docs: int,
+        docs_added: int,
+        docs_removed: int,
+        http_cache_stats: HttpCacheStats | None,
+    ) -> SyncSourceOutput:
+        # Mark source as COMPLETED
+        updated_source = self.metadata_store.update_metadata(
+            name=self.source_name,
+            updates=MetadataUpdate(
+                num_docs=num_docs,
+            ),
+            timestamp=get_current_datetime(),
+        )
+
+        # Invalidate cached answers that were based on the previous documents
+        if docs_added or docs_removed:
+            bump_source_generation(self.redis_client, self.source_name)
+
+        if (
+            docs_added
+            or docs_removed
+            or not self.profile_store.profile_exists(self.source_name)
+        ):
+            self._update_source_profile()
+
+        return SyncSourceOutput(
+            source=updated_source,
+            docs_added=docs_added,
+            docs_removed=docs_removed,
+            http_cache=http_cache_stats,
+        )
+
+    def _update_source_profile(self) -> None:
+        """Rebuild the routing profile of the source from its stored embeddings."""
+        try:
+            profile = build_source_profile(
+                self.source_name,
+                self.document_store.iter_embeddings(self.source_name, self.batch_size),
+                max_representatives=self.settings.SOURCE_PROFILE_REPRESENTATIVES,
+                sample_size=self.settings.SOURCE_PROFILE_SAMPLE_SIZE,
+            )
+            if profile:
+                self.profile_store.save_profile(profile)
+            else:
+                self.profile_store.delete_profile(self.source_name)
+        except Exception:
+            # Routing falls back to the full source list without a profile
+            logger.exception(f"Failed to update profile for source {self.source_name}")
+
+    def _create_document(self, extracted_doc: ExtractedDocument) -> Document:
+        return Document(
+            id=self._generate_stable_id(
+                title=extracted_doc.title,
+                content=extracted_doc.content,
+            ),
+            url=extracted_doc.url,
+            title=extracted_doc.title,
+            content=extracted_doc.content,
+            created_at=get_current_datetime(),
+        )
+
     def _generate_stable_id(self, title: str, content: str) -> str:
         """Generates a stable ID for a document."""
         namespace = UUID(self.settings.DOCUMENT_UUID_NAMESPACE)
         return str(uuid5(namespace, f"{self.source_name}:{title}:{content}"))
 
+    async def _write_documents(
+        self, sync_id: str, docs: list[Document], current_doc_count: int
+    ) -> None:
+        """Add documents to the store, or hand them to the ingestion streams."""
+        if self.ingestion_streams:
+            await self.ingestion_streams.publish(sync_id, self.source_name, docs)
+        else:
+            self._add_documents_batch(docs, current_doc_count)
+
+    async def _wait_for_writes(self, sync_id: str) -> None:
+        if self.ingestion_streams:
+            logger.info(
+                f"Waiting for documents of source {self.source_name} to be written"
+            )
+            await self.ingestion_streams.wait_for_sync(sync_id)
+
+    def _abort_writes(self, sync_id: str, error: str) -> None:
+        """Stop the ingestion consumers from writing documents of a failed sync."""
+        if self.ingestion_streams:
+            self.ingestion_streams.fail_sync(sync_id, error)
+
     def _add_documents_batch(
         self, docs: list[Document], current_doc_count: int
     ) -> None:
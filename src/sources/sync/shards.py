@@ -0,0 +1,231 @@
+from datetime import datetime
+from typing import Iterator, Mapping
+
+from redis.lock import Lock
+
+from src.common.current_datetime import get_current_datetime
+from src.common.exceptions import ResourceLockedException
+from src.common.redis import RedisClient
+from src.connectors.common.http_cache import HttpCacheStats
+from src.lock.service import LockService
+from src.sources.sync.incremental import encode_doc_ids
+
+SHARDED_SYNC_KEY_PREFIX = "sharded_sync"
+SHARDED_SYNC_STATE_TTL = 86400  # Seconds
+
+
+class ShardedSync:
+    """Shared state of a source sync that is split into shards.
+
+    Shards are claimed with a lock, so each is synced by one task at a time,
+    and a shard whose task dies can be claimed again once its lock expires.
+    Shards record the IDs of the documents they extract to a Redis set, which
+    is compared with the IDs in the store before the sync to find the stale
+    documents once every shard is done. New documents are only recorded once
+    they are written, and are claimed by a shard until then, so if its task
+    dies the task that claims the shard again writes them instead.
+
+    The sync is active from `start` until `clear`, or until its state expires.
+    Shards are only claimed while it is active, since its state is gone once
+    it has finished and every shard would look unclaimed.
+    """
+
+    def __init__(self, redis_client: RedisClient, *, sync_id: str, shard_count: int):
+        self.redis_client = redis_client
+        self.lock_service = LockService(redis_client)
+        self.sync_id = sync_id
+        self.shard_count = shard_count
+        self.key = f"{SHARDED_SYNC_KEY_PREFIX}:{sync_id}"
+        self.active_key = f"{self.key}:active"
+        self.existing_key = f"{self.key}:existing"
+        self.current_key = f"{self.key}:current"
+        self.stale_key = f"{self.key}:stale"
+        self.done_key = f"{self.key}:done"
+        self.failed_key = f"{self.key}:failed"
+        self.stats_key = f"{self.key}:stats"
+        self.parents_key = f"{self.key}:parents"
+        self.claims_key = f"{self.key}:claims"
+
+    def start(self, existing_doc_ids: list[str], batch_size: int) -> None:
+        """Reset the state and record the IDs of the documents already stored."""
+        self.clear()
+        pipeline = self.redis_client.pipeline()
+        pipeline.set(self.active_key, 1, ex=SHARDED_SYNC_STATE_TTL)
+        for start in range(0, len(existing_doc_ids), batch_size):
+            pipeline.sadd(
+                self.existing_key, *existing_doc_ids[start : start + batch_size]
+            )
+        pipeline.expire(self.existing_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.hset(self.stats_key, "started_at", get_current_datetime().isoformat())
+        pipeline.expire(self.stats_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.execute()
+
+    def is_active(self) -> bool:
+        return bool(self.redis_client.exists(self.active_key))
+
+    def claim_shard(self) -> tuple[int, Lock] | None:
+        """Claim a shard that is neither done nor claimed by another task, if
+        the sync is still active.
+        """
+        if not self.is_active():
+            return None
+
+        done = self.redis_client.smembers(self.done_key)
+        for index in range(self.shard_count):
+            if str(index) in done:
+                continue
+            try:
+                lock = self.lock_service.acquire_lock(f"{self.key}:{index}")
+            except ResourceLockedException:
+                continue
+            # Another task may have finished the shard, or the sync may have
+            # finished, since they were checked. The sync can't finish while
+            # this shard is claimed and not done.
+            pipeline = self.redis_client.pipeline()
+            pipeline.sismember(self.done_key, str(index))
+            pipeline.exists(self.active_key)
+            is_done, is_active = pipeline.execute()
+            if not is_active:
+                self.lock_service.release_lock(lock)
+                return None
+            if is_done:
+                self.lock_service.release_lock(lock)
+                continue
+            return index, lock
+        return None
+
+    def report_documents(self, index: int, doc_ids: list[str]) -> list[str]:
+        """Report documents extracted by a shard, returning the IDs it needs to
+        add and record with `record_documents` once they are written.
+
+        Documents stored before the sync are recorded right away. Documents
+        already written, or claimed by another shard, are left out, so each
+        new document is added once.
+        """
+        if not doc_ids:
+            return []
+
+        pipeline = self.redis_client.pipeline()
+        pipeline.smismember(self.existing_key, doc_ids)
+        pipeline.smismember(self.current_key, doc_ids)
+        for doc_id in doc_ids:
+            pipeline.hsetnx(self.claims_key, doc_id, str(index))
+        pipeline.hmget(self.claims_key, doc_ids)
+        pipeline.expire(self.claims_key, SHARDED_SYNC_STATE_TTL)
+        results = pipeline.execute()
+
+        existing, written, owners = results[0], results[1], results[-2]
+        self.record_documents(
+            [doc_id for doc_id, exists in zip(doc_ids, existing) if exists]
+        )
+        return [
+            doc_id
+            for doc_id, exists, is_written, owner in zip(
+                doc_ids, existing, written, owners
+            )
+            if not exists and not is_written and owner == str(index)
+        ]
+
+    def record_documents(self, doc_ids: list[str]) -> None:
+        """Record documents that are in the store, or have been written."""
+        if not doc_ids:
+            return
+        pipeline = self.redis_client.pipeline()
+        pipeline.sadd(self.current_key, *doc_ids)
+        pipeline.expire(self.current_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.execute()
+
+    def report_parents(self, parent_doc_ids: Mapping[str, set[str]]) -> None:
+        """Record the documents extracted from each parent item of a shard."""
+        if not parent_doc_ids:
+            return
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(
+            self.parents_key,
+            mapping={
+                parent_id: encode_doc_ids(doc_ids)
+                for parent_id, doc_ids in parent_doc_ids.items()
+            },
+        )
+        pipeline.expire(self.parents_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.execute()
+
+    def complete_shard(self, index: int, lock: Lock, docs_added: int) -> None:
+        pipeline = self.redis_client.pipeline()
+        pipeline.hincrby(self.stats_key, "docs_added", docs_added)
+        pipeline.sadd(self.done_key, str(index))
+        pipeline.expire(self.stats_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.expire(self.done_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.execute()
+        self.lock_service.release_lock(lock)
+
+    def fail_shard(self, index: int, lock: Lock, error: str) -> None:
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(self.failed_key, str(index), error)
+        pipeline.sadd(self.done_key, str(index))
+        pipeline.expire(self.failed_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.expire(self.done_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.execute()
+        self.lock_service.release_lock(lock)
+
+    def record_http_cache_stats(self, stats: HttpCacheStats) -> None:
+        pipeline = self.redis_client.pipeline()
+        pipeline.hincrby(self.stats_key, "hits", stats.hits)
+        pipeline.hincrby(self.stats_key, "misses", stats.misses)
+        pipeline.hincrby(self.stats_key, "bytes_saved", stats.bytes_saved)
+        pipeline.expire(self.stats_key, SHARDED_SYNC_STATE_TTL)
+        pipeline.execute()
+
+    def is_finished(self) -> bool:
+        return self.redis_client.scard(self.done_key) >= self.shard_count
+
+    def get_failures(self) -> dict[str, str]:
+        return self.redis_client.hgetall(self.failed_key)
+
+    def get_num_docs(self) -> int:
+        return self.redis_client.scard(self.current_key)
+
+    def get_started_at(self) -> datetime:
+        return datetime.fromisoformat(
+            self.redis_client.hget(self.stats_key, "started_at")
+        )
+
+    def get_docs_added(self) -> int:
+        return int(self.redis_client.hget(self.stats_key, "docs_added") or 0)
+
+    def get_http_cache_stats(self) -> HttpCacheStats:
+        stats = self.redis_client.hgetall(self.stats_key)
+        return HttpCacheStats(
+            hits=int(stats.get("hits", 0)),
+            misses=int(stats.get("misses", 0)),
+            bytes_saved=int(stats.get("bytes_saved", 0)),
+        )
+
+    def iter_stale_doc_ids(self, batch_size: int) -> Iterator[list[str]]:
+        """Yield batches of IDs that were stored but not extracted by any shard."""
+        self.redis_client.sdiffstore(
+            self.stale_key, [self.existing_key, self.current_key]
+        )
+        self.redis_client.expire(self.stale_key, SHARDED_SYNC_STATE_TTL)
+
+        batch: list[str] = []
+        for doc_id in self.redis_client.sscan_iter(self.stale_key, count=batch_size):
+            batch.append(doc_id)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def clear(self) -> None:
+        self.redis_client.delete(
+            self.active_key,
+            self.existing_key,
+            self.current_key,
+            self.stale_key,
+            self.done_key,
+            self.failed_key,
+            self.stats_key,
+            self.parents_key,
+            self.claims_key,
+        )
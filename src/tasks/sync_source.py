@@ -10,9 +10,22 @@ from src.config import get_settings
 from src.sources.exceptions import SyncSourceException
 from src.lock.service import LockService
 from src.celery import celery_app
-from src.connectors.registry import get_connector_config_schema
+from src.connectors.registry import ConnectorConfig, get_connector_config_schema
 from src.connectors.connector_type import ConnectorType
 from src.sources.sync.service import SourceSyncService
+from src.sources.sync.shards import ShardedSync
+
+
+def parse_connector_config(connector_config_dict: dict[str, Any]) -> ConnectorConfig:
+    try:
+        connector_type = connector_config_dict.get("type")
+        if not connector_type:
+            raise SyncSourceException("Connector type not found in config.")
+
+        config_schema = get_connector_config_schema(ConnectorType(connector_type))
+        return config_schema(**connector_config_dict)
+    except ValueError as e:
+        raise SyncSourceException(f"Invalid connector config: {e}")
 
 
 @celery_app.task(name="Sync Source Documents")
@@ -45,17 +58,7 @@ def sync_source_documents_task(
         async def task_with_lock_renewal() -> dict[str, Any]:
             lock_renewal_task = asyncio.create_task(lock_service.renew_lock(lock))
             try:
-                try:
-                    connector_type = connector_config_dict.get("type")
-                    if not connector_type:
-                        raise SyncSourceException("Connector type not found in config.")
-
-                    config_schema = get_connector_config_schema(
-                        ConnectorType(connector_type)
-                    )
-                    connector_config = config_schema(**connector_config_dict)
-                except ValueError as e:
-                    raise SyncSourceException(f"Invalid connector config: {e}")
+                connector_config = parse_connector_config(connector_config_dict)
 
                 sync_service = SourceSyncService(
                     redis_client=redis_client,
@@ -63,13 +66,30 @@ def sync_source_documents_task(
                     connector_config=connector_config,
                     settings=settings,
                 )
-                synced_source = await sync_service.sync_documents()
+                if sync_service.can_shard():
+                    # This task syncs shards too, so the sync completes even
+                    # when no other worker is free to pick up the shard tasks
+                    sharded_sync = sync_service.start_sharded_sync(
+                        sync_id=current_task.request.id
+                    )
+                    for _ in range(sharded_sync.shard_count - 1):
+                        sync_source_shard_task.delay(
+                            source_name=source_name,
+                            connector_config_dict=connector_config_dict,
+                            sync_id=sharded_sync.sync_id,
+                            shard_count=sharded_sync.shard_count,
+                        )
+                    synced_source = await sync_service.finish_sharded_sync(sharded_sync)
+                else:
+                    synced_source = await sync_service.sync_documents()
                 result: dict[str, Any] = {
                     "source": source_name,
                     "message": "Documents synced successfully.",
                     "docs_added": synced_source.docs_added,
                     "docs_removed": synced_source.docs_removed,
                 }
+                if synced_source.http_cache:
+                    result["http_cache"] = synced_source.http_cache.model_dump()
                 return result
             finally:
                 lock_renewal_task.cancel()
@@ -95,3 +115,44 @@ def sync_source_documents_task(
         if lock:
             lock_service.release_lock(lock)
         redis_client.close()
+
+
+@celery_app.task(name="Sync Source Shard", ignore_result=True)
+def sync_source_shard_task(
+    source_name: str,
+    connector_config_dict: dict[str, Any],
+    sync_id: str,
+    shard_count: int,
+) -> None:
+    """Celery task to sync shards of a sharded source sync.
+
+    Syncs whichever shards are left to claim, so the task does nothing if the
+    sync task and other shard tasks have already claimed them all, or if the
+    sync has already finished.
+    """
+    settings = get_settings()
+    redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    loop: asyncio.AbstractEventLoop | None = None
+
+    try:
+        sync_service = SourceSyncService(
+            redis_client=redis_client,
+            source_name=source_name,
+            connector_config=parse_connector_config(connector_config_dict),
+            settings=settings,
+        )
+        sharded_sync = ShardedSync(
+            redis_client, sync_id=sync_id, shard_count=shard_count
+        )
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(sync_service.sync_shards(sharded_sync))
+    except Exception:
+        logging.exception(f"Failed to sync shards of source {source_name}.")
+        raise
+
+    finally:
+        if loop:
+            loop.close()
+        redis_client.close()
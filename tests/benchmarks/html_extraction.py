@@ -0,0 +1,86 @@
+"""Benchmark markdown extraction against the saved pages in `corpus/`.
+
+Compares `extract_markdown_page` with the reference BeautifulSoup
+implementation it replaced, reporting throughput and output parity:
+
+    python -m tests.benchmarks.html_extraction --rounds 50
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable
+
+import html2text
+from bs4 import BeautifulSoup
+
+from src.connectors.common.markdown import UNWANTED_TAGS, extract_markdown_page
+from src.connectors.common.schemas import MarkdownPage
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+Extractor = Callable[[str, bytes], MarkdownPage]
+
+
+def reference_extract_markdown_page(url: str, content: bytes) -> MarkdownPage:
+    soup = BeautifulSoup(content, "html.parser")
+    title = soup.title.string if soup.title and soup.title.string else url
+
+    main_content = soup.main or soup.body
+
+    content_to_process = main_content if main_content else soup
+    for unwanted in content_to_process.find_all(list(UNWANTED_TAGS)):
+        unwanted.decompose()
+
+    markdown_content = html2text.html2text(str(content_to_process))
+
+    return MarkdownPage(url=url, title=title, content=markdown_content)
+
+
+def load_corpus(corpus_dir: Path = CORPUS_DIR) -> list[tuple[str, bytes]]:
+    return [
+        (path.as_uri(), path.read_bytes()) for path in sorted(corpus_dir.glob("*.html"))
+    ]
+
+
+def get_mismatched_pages(corpus: list[tuple[str, bytes]]) -> list[str]:
+    return [
+        url
+        for url, content in corpus
+        if extract_markdown_page(url, content)
+        != reference_extract_markdown_page(url, content)
+    ]
+
+
+def measure_throughput(
+    extractor: Extractor, corpus: list[tuple[str, bytes]], rounds: int
+) -> float:
+    """Pages extracted per second over `rounds` passes of the corpus."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for url, content in corpus:
+            extractor(url, content)
+    return rounds * len(corpus) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=CORPUS_DIR)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    mismatched = get_mismatched_pages(corpus)
+    reference = measure_throughput(reference_extract_markdown_page, corpus, args.rounds)
+    current = measure_throughput(extract_markdown_page, corpus, args.rounds)
+
+    print(f"Pages: {len(corpus)}, rounds: {args.rounds}")
+    print(f"Reference:  {reference:8.1f} pages/sec")
+    print(f"Current:    {current:8.1f} pages/sec ({current / reference:.1f}x)")
+    print(f"Parity:     {len(corpus) - len(mismatched)}/{len(corpus)} pages match")
+    for url in mismatched:
+        print(f"  mismatch: {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import base64
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from pytest_mock import MockerFixture
+
+from src.chat.answer_cache import AnswerCache, CacheableQuestion
+from src.common.redis import RedisClient
+
+
+@pytest.fixture
+def mock_redis_client(mocker: MockerFixture) -> Mock:
+    return mocker.Mock(spec=RedisClient)
+
+
+@pytest.fixture
+def answer_cache(mock_redis_client: Mock) -> AnswerCache:
+    return AnswerCache(
+        redis_client=mock_redis_client,
+        similarity_threshold=0.9,
+        ttl=3600,
+        max_entries=2,
+    )
+
+
+def create_question(embedding: list[float]) -> CacheableQuestion:
+    return CacheableQuestion(
+        model="test-model",
+        source_names=["source2", "source1"],
+        question="How do I install it?",
+        embedding=embedding,
+    )
+
+
+def encode_embedding(embedding: list[float]) -> str:
+    return base64.b64encode(np.array(embedding, dtype=np.float32).tobytes()).decode()
+
+
+def test_lookup_returns_most_similar_answer(
+    answer_cache: AnswerCache, mock_redis_client: Mock
+) -> None:
+    mock_redis_client.mget.return_value = ["1", None]
+    mock_redis_client.zrevrangebyscore.return_value = ["entry-1", "entry-2"]
+    mock_redis_client.hmget.return_value = [
+        encode_embedding([1.0, 0.0]),
+        encode_embedding([0.0, 1.0]),
+    ]
+    mock_redis_client.hget.return_value = json.dumps(
+        {"question": "How do I install it?", "answer": "Install with pip"}
+    )
+
+    answer = answer_cache.lookup(create_question([0.99, 0.05]))
+
+    assert answer == "Install with pip"
+    mock_redis_client.mget.assert_called_once_with(
+        ["source_generation:source1", "source_generation:source2"]
+    )
+    key = mock_redis_client.hget.call_args.args[0].removesuffix(":entries")
+    mock_redis_client.hget.assert_called_once_with(f"{key}:entries", "entry-1")
+    # Only the newest live entries are compared
+    assert mock_redis_client.zrevrangebyscore.call_args.kwargs == {
+        "start": 0,
+        "num": 2,
+    }
+
+
+def test_lookup_ignores_dissimilar_entries(
+    answer_cache: AnswerCache, mock_redis_client: Mock
+) -> None:
+    mock_redis_client.mget.return_value = ["1", "0"]
+    mock_redis_client.zrevrangebyscore.return_value = ["entry-1"]
+    mock_redis_client.hmget.return_value = [encode_embedding([0.0, 1.0])]
+
+    assert answer_cache.lookup(create_question([1.0, 0.0])) is None
+    mock_redis_client.hget.assert_not_called()
+
+
+def test_lookup_is_keyed_by_source_generations(
+    answer_cache: AnswerCache, mock_redis_client: Mock
+) -> None:
+    mock_redis_client.zrevrangebyscore.return_value = []
+
+    mock_redis_client.mget.return_value = ["1", "0"]
+    assert answer_cache.lookup(create_question([1.0, 0.0])) is None
+    mock_redis_client.mget.return_value = ["2", "0"]
+    assert answer_cache.lookup(create_question([1.0, 0.0])) is None
+
+    # Entries answered before source1 was synced again are never read
+    first_key, second_key = [
+        call.args[0] for call in mock_redis_client.zrevrangebyscore.call_args_list
+    ]
+    assert first_key != second_key
+    mock_redis_client.hmget.assert_not_called()
+
+
+def test_store_evicts_oldest_entry_when_full(
+    answer_cache: AnswerCache, mock_redis_client: Mock, mocker: MockerFixture
+) -> None:
+    mock_redis_client.mget.return_value = [None, None]
+    read_pipeline = mocker.Mock()
+    read_pipeline.execute.return_value = [2, 0]
+    write_pipeline = mocker.Mock()
+    mock_redis_client.pipeline.side_effect = [read_pipeline, write_pipeline]
+    mock_redis_client.zrange.return_value = ["entry-old"]
+
+    answer_cache.store(create_question([1.0, 0.0]), "Install with pip")
+
+    ids_key = read_pipeline.zcard.call_args.args[0]
+    key = ids_key.removesuffix(":ids")
+    mock_redis_client.zrange.assert_called_once_with(ids_key, 0, 0)
+    write_pipeline.zrem.assert_called_once_with(ids_key, "entry-old")
+    write_pipeline.hdel.assert_any_call(f"{key}:embeddings", "entry-old")
+    write_pipeline.hdel.assert_any_call(f"{key}:entries", "entry-old")
+
+    entry_id = next(iter(write_pipeline.zadd.call_args.args[1]))
+    embedding_call, entry_call = write_pipeline.hset.call_args_list
+    assert embedding_call.args == (
+        f"{key}:embeddings",
+        entry_id,
+        encode_embedding([1.0, 0.0]),
+    )
+    assert entry_call.args[:2] == (f"{key}:entries", entry_id)
+    assert json.loads(entry_call.args[2])["answer"] == "Install with pip"
+    write_pipeline.expire.assert_any_call(ids_key, 3600)
+    write_pipeline.execute.assert_called_once()
+
+
+def test_store_removes_expired_entries(
+    answer_cache: AnswerCache, mock_redis_client: Mock, mocker: MockerFixture
+) -> None:
+    mock_redis_client.mget.return_value = [None, None]
+    read_pipeline = mocker.Mock()
+    read_pipeline.execute.return_value = [1, 1]
+    write_pipeline = mocker.Mock()
+    mock_redis_client.pipeline.side_effect = [read_pipeline, write_pipeline]
+    mock_redis_client.zrange.return_value = ["entry-expired"]
+
+    answer_cache.store(create_question([1.0, 0.0]), "Install with pip")
+
+    ids_key = read_pipeline.zcard.call_args.args[0]
+    write_pipeline.zrem.assert_called_once_with(ids_key, "entry-expired")
@@ -1,19 +1,36 @@
+import json
+import threading
+from typing import Any
 from datetime import datetime
 import pytest
 from pytest_mock import MockerFixture
-from openai import APIError, OpenAI
+from openai import APIError, OpenAI, omit
 from openai.types.chat import (
     ChatCompletion,
+    ChatCompletionChunk,
     ChatCompletionMessage,
     ChatCompletionMessageToolCall,
 )
 from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import (
+    Choice as ChunkChoice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
 from openai.types.chat.chat_completion_message_tool_call import Function
 
-from src.chat.service import ChatService
+from src.chat.answer_cache import AnswerCache
+from src.chat.conversations import ConversationStore, StoredMessage
+from src.chat.prompts import get_system_prompt
+from src.chat.service import RETRIEVAL_SKIPPED_MESSAGE, ChatService
 from src.chat.schemas import ChatMessage, ChatResponse, CreateChatRequest
 from src.common.exceptions import ResourceNotFoundException, ResourceType
+from src.connectors.connector_type import ConnectorType
+from src.connectors.sitemap.config import SitemapConfig
 from src.document_store.schemas import Document
+from src.sources.metadata.schemas import SourceMetadata
+from src.sources.routing import SourceRouter
 from src.sources.service import SourceService
 
 
@@ -38,8 +55,34 @@ def sample_documents() -> list[Document]:
 
 
 @pytest.fixture
-def mock_source_service(mocker: MockerFixture) -> SourceService:
-    return mocker.Mock(spec=SourceService)
+def sample_sources() -> list[SourceMetadata]:
+    return [
+        SourceMetadata(
+            id=f"id-{name}",
+            name=name,
+            description=f"Description of {name}",
+            num_docs=0,
+            last_task_id="task-id",
+            created_at=datetime(2024, 1, 1, 0, 0, 0),
+            updated_at=datetime(2024, 1, 1, 0, 0, 0),
+            connector=SitemapConfig(
+                type=ConnectorType.SITEMAP,
+                sitemap_url="https://example.com/sitemap.xml",
+            ),
+        )
+        for name in ["source2", "source1"]
+    ]
+
+
+@pytest.fixture
+def mock_source_service(
+    mocker: MockerFixture, sample_sources: list[SourceMetadata]
+) -> SourceService:
+    service = mocker.Mock(spec=SourceService)
+    service.get_catalogue.return_value = sorted(
+        sample_sources, key=lambda source: source.name
+    )
+    return service
 
 
 @pytest.fixture
@@ -47,6 +90,7 @@ def mock_openai_client(mocker: MockerFixture) -> OpenAI:
     client = mocker.Mock(spec=OpenAI)
     client.chat = mocker.Mock()
     client.chat.completions = mocker.Mock()
+    client.with_options.return_value = client
     return client
 
 
@@ -63,8 +107,11 @@ def chat_service(
         base_system_prompt="You are a helpful assistant.",
         tool_definitions=[],
         chat_history_limit=10,
+        chat_history_max_tokens=1000,
         max_iterations=3,
         retrieval_top_k=5,
+        retrieval_max_tokens=1000,
+        retrieval_conversation_max_tokens=4000,
     )
 
 
@@ -193,6 +240,7 @@ def test_generate_response_with_tool_calls(
         semantic_query="test semantic query",
         full_text_query="test full text query",
         top_k=5,
+        deadline=None,
     )
 
 
@@ -276,3 +324,614 @@ def test_generate_response_model_not_found(
 
     assert exc_info.value.resource_type == ResourceType.MODEL
     assert exc_info.value.identifier == sample_chat_input.model
+
+
+def create_chunk(
+    content: str | None = None,
+    tool_calls: list[ChoiceDeltaToolCall] | None = None,
+) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id="test-id",
+        choices=[
+            ChunkChoice(
+                index=0,
+                delta=ChoiceDelta(content=content, tool_calls=tool_calls),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion.chunk",
+    )
+
+
+def test_stream_response_with_tool_calls(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    mock_source_service: SourceService,
+    sample_chat_input: CreateChatRequest,
+    sample_documents: list[Document],
+    mocker: MockerFixture,
+) -> None:
+    tool_call_chunks = [
+        create_chunk(
+            tool_calls=[
+                ChoiceDeltaToolCall(
+                    index=0,
+                    id="call-1",
+                    type="function",
+                    function=ChoiceDeltaToolCallFunction(
+                        name="retrieve_documents",
+                        arguments='{"source_name": "source1", ',
+                    ),
+                )
+            ]
+        ),
+        create_chunk(
+            tool_calls=[
+                ChoiceDeltaToolCall(
+                    index=0,
+                    function=ChoiceDeltaToolCallFunction(
+                        arguments='"semantic_query": "test semantic query", "full_text_query": "test full text query"}'
+                    ),
+                )
+            ]
+        ),
+    ]
+    answer_chunks = [
+        create_chunk(content="Here is "),
+        create_chunk(content="the answer"),
+    ]
+    mock_create_completion = mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        side_effect=[iter(tool_call_chunks), iter(answer_chunks)],
+    )
+    mock_search_source = mocker.patch.object(
+        mock_source_service,
+        "search_source",
+        return_value=sample_documents,
+    )
+
+    events = list(chat_service.stream_response(sample_chat_input))
+
+    assert [event.event for event in events] == [
+        "tool_call_start",
+        "tool_call_end",
+        "token",
+        "token",
+        "done",
+    ]
+    assert events[1].data == {
+        "id": "call-1",
+        "source": "source1",
+        "urls": ["test.com"],
+    }
+    assert events[-1].data == {
+        "message": "Here is the answer",
+        "conversation_id": None,
+    }
+    assert mock_create_completion.call_count == 2
+    assert mock_create_completion.call_args.kwargs["stream"] is True
+    assistant_message = mock_create_completion.call_args.kwargs["messages"][-2]
+    assert assistant_message["tool_calls"][0]["function"]["arguments"] == (
+        '{"source_name": "source1", "semantic_query": "test semantic query", '
+        '"full_text_query": "test full text query"}'
+    )
+    mock_search_source.assert_called_once_with(
+        source_name="source1",
+        semantic_query="test semantic query",
+        full_text_query="test full text query",
+        top_k=5,
+        deadline=None,
+    )
+
+
+def test_stream_response_model_not_found(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    sample_chat_input: CreateChatRequest,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        side_effect=APIError(
+            request=mocker.Mock(),
+            message="Model not found",
+            body={"code": "model_not_found", "param": "model", "type": "not_found"},
+        ),
+    )
+
+    events = list(chat_service.stream_response(sample_chat_input))
+
+    assert [event.event for event in events] == ["error"]
+    assert sample_chat_input.model in events[0].data["message"]
+
+
+def test_stream_response_unexpected_error(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    sample_chat_input: CreateChatRequest,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        side_effect=RuntimeError("Connection reset"),
+    )
+
+    events = list(chat_service.stream_response(sample_chat_input))
+
+    # The stream ends with an error event instead of being cut off
+    assert [event.event for event in events] == ["error"]
+    assert events[0].data == {"message": "An unexpected error occurred"}
+
+
+def test_generate_response_runs_tool_calls_concurrently(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    mock_source_service: SourceService,
+    sample_chat_input: CreateChatRequest,
+    mocker: MockerFixture,
+) -> None:
+    source_names = ["source1", "source2", "source3"]
+    tool_call_completion = ChatCompletion(
+        id="test-id-1",
+        choices=[
+            Choice(
+                finish_reason="tool_calls",
+                index=0,
+                message=ChatCompletionMessage(
+                    content=None,
+                    role="assistant",
+                    tool_calls=[
+                        ChatCompletionMessageToolCall(
+                            id=f"call-{source_name}",
+                            type="function",
+                            function=Function(
+                                name="retrieve_documents",
+                                arguments=f'{{"source_name": "{source_name}", "semantic_query": "query", "full_text_query": "query"}}',
+                            ),
+                        )
+                        for source_name in source_names
+                    ],
+                ),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+    )
+    final_completion = ChatCompletion(
+        id="test-id-2",
+        choices=[
+            Choice(
+                finish_reason="stop",
+                index=0,
+                message=ChatCompletionMessage(content="Answer", role="assistant"),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+    )
+    mock_create_completion = mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        side_effect=[tool_call_completion, final_completion],
+    )
+
+    # Each search blocks until all three are in flight, so sequential
+    # execution would time out the barrier
+    barrier = threading.Barrier(len(source_names), timeout=5)
+
+    def search_source(source_name: str, **kwargs: Any) -> list[Document]:
+        barrier.wait()
+        return [
+            Document(
+                id=source_name,
+                url=f"{source_name}.com",
+                title=source_name,
+                content=f"Content from {source_name}",
+                created_at=datetime(2024, 1, 1, 0, 0, 0),
+            )
+        ]
+
+    mocker.patch.object(mock_source_service, "search_source", side_effect=search_source)
+    chat_service.tool_call_concurrency = len(source_names)
+
+    response = chat_service.generate_response(sample_chat_input)
+
+    assert response.message == "Answer"
+    tool_messages = mock_create_completion.call_args.kwargs["messages"][-4:-1]
+    assert [message["tool_call_id"] for message in tool_messages] == [
+        f"call-{source_name}" for source_name in source_names
+    ]
+    assert [json.loads(message["content"])[0]["url"] for message in tool_messages] == [
+        f"{source_name}.com" for source_name in source_names
+    ]
+
+
+def test_get_sources_uses_catalogue(
+    chat_service: ChatService,
+    mock_source_service: SourceService,
+    sample_sources: list[SourceMetadata],
+    mocker: MockerFixture,
+) -> None:
+    mock_get_source = mocker.patch.object(mock_source_service, "get_source")
+
+    sources = chat_service._get_sources(["source2", "source1", "source2"])
+
+    assert [source.name for source in sources] == ["source1", "source2"]
+    mock_get_source.assert_not_called()
+
+
+def test_system_prompt_is_deterministic(sample_sources: list[SourceMetadata]) -> None:
+    prompts = [
+        get_system_prompt(
+            project_name="Test Project",
+            project_description="This is a test project.",
+            base_prompt="You are a helpful assistant.",
+            sources=sources,
+            max_attempts=3,
+        )
+        for sources in [sample_sources, list(reversed(sample_sources))]
+    ]
+
+    assert prompts[0] == prompts[1]
+    assert prompts[0].index('"name": "source1"') < prompts[0].index('"name": "source2"')
+
+
+def test_generate_response_uses_answer_cache(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    mock_source_service: SourceService,
+    mocker: MockerFixture,
+) -> None:
+    mock_answer_cache = mocker.Mock(spec=AnswerCache)
+    mock_answer_cache.lookup.return_value = "Cached answer"
+    chat_service.answer_cache = mock_answer_cache
+    mocker.patch.object(
+        mock_source_service, "embed_queries", return_value=[[0.1, 0.2, 0.3]]
+    )
+    mock_create_completion = mocker.patch.object(
+        mock_openai_client.chat.completions, "create"
+    )
+
+    response = chat_service.generate_response(
+        CreateChatRequest(
+            messages=[ChatMessage(role="user", content="How do I install it?")],
+            model="test-model",
+        )
+    )
+
+    assert response.message == "Cached answer"
+    mock_create_completion.assert_not_called()
+    question = mock_answer_cache.lookup.call_args.args[0]
+    assert question.source_names == ["source1", "source2"]
+    assert question.embedding == [0.1, 0.2, 0.3]
+
+
+@pytest.mark.parametrize(
+    "semantic_query,expected_searches",
+    [("what is the weather", 1), ("forecast for tomorrow in london", 2)],
+)
+def test_generate_response_reuses_speculative_retrieval(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    mock_source_service: SourceService,
+    sample_chat_input: CreateChatRequest,
+    sample_documents: list[Document],
+    semantic_query: str,
+    expected_searches: int,
+    mocker: MockerFixture,
+) -> None:
+    tool_call_completion = ChatCompletion(
+        id="test-id-1",
+        choices=[
+            Choice(
+                finish_reason="tool_calls",
+                index=0,
+                message=ChatCompletionMessage(
+                    content=None,
+                    role="assistant",
+                    tool_calls=[
+                        ChatCompletionMessageToolCall(
+                            id="call-1",
+                            type="function",
+                            function=Function(
+                                name="retrieve_documents",
+                                arguments=json.dumps(
+                                    {
+                                        "source_name": "source1",
+                                        "semantic_query": semantic_query,
+                                        "full_text_query": "weather",
+                                    }
+                                ),
+                            ),
+                        )
+                    ],
+                ),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+    )
+    final_completion = ChatCompletion(
+        id="test-id-2",
+        choices=[
+            Choice(
+                finish_reason="stop",
+                index=0,
+                message=ChatCompletionMessage(content="Sunny", role="assistant"),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+    )
+    mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        side_effect=[tool_call_completion, final_completion],
+    )
+    mock_search_source = mocker.patch.object(
+        mock_source_service, "search_source", return_value=sample_documents
+    )
+    chat_service.speculative_retrieval = True
+    sample_chat_input.sources = ["source1"]
+
+    response = chat_service.generate_response(sample_chat_input)
+
+    assert response.message == "Sunny"
+    assert mock_search_source.call_count == expected_searches
+    mock_search_source.assert_any_call(
+        source_name="source1",
+        semantic_query="What is the weather?",
+        full_text_query="What is the weather?",
+        top_k=5,
+        deadline=None,
+    )
+
+
+def test_generate_response_routes_sources(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    mock_source_service: SourceService,
+    sample_documents: list[Document],
+    mocker: MockerFixture,
+) -> None:
+    mock_source_router = mocker.Mock(spec=SourceRouter)
+    mock_source_router.rank.return_value = [("source2", 0.9), ("source1", 0.2)]
+    chat_service.source_router = mock_source_router
+    chat_service.routing_max_sources = 1
+    mocker.patch.object(
+        mock_source_service, "embed_queries", return_value=[[0.1, 0.2, 0.3]]
+    )
+    tool_call_completion = ChatCompletion(
+        id="test-id-1",
+        choices=[
+            Choice(
+                finish_reason="tool_calls",
+                index=0,
+                message=ChatCompletionMessage(
+                    content=None,
+                    role="assistant",
+                    tool_calls=[
+                        ChatCompletionMessageToolCall(
+                            id="call-1",
+                            type="function",
+                            function=Function(
+                                name="retrieve_documents",
+                                arguments='{"source_name": "unknown", "semantic_query": "query", "full_text_query": "query"}',
+                            ),
+                        )
+                    ],
+                ),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+    )
+    final_completion = ChatCompletion(
+        id="test-id-2",
+        choices=[
+            Choice(
+                finish_reason="stop",
+                index=0,
+                message=ChatCompletionMessage(content="Answer", role="assistant"),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+    )
+    mock_create_completion = mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        side_effect=[tool_call_completion, final_completion],
+    )
+    mock_search_source = mocker.patch.object(
+        mock_source_service, "search_source", return_value=sample_documents
+    )
+
+    response = chat_service.generate_response(
+        CreateChatRequest(
+            messages=[ChatMessage(role="user", content="How do I install it?")],
+            model="test-model",
+        )
+    )
+
+    assert response.message == "Answer"
+    mock_source_router.rank.assert_called_once_with(
+        [0.1, 0.2, 0.3], ["source1", "source2"]
+    )
+    system_prompt = mock_create_completion.call_args.kwargs["messages"][0]["content"]
+    assert '"name": "source2"' in system_prompt
+    assert '"name": "source1"' not in system_prompt
+    assert mock_search_source.call_args.kwargs["source_name"] == "source2"
+
+
+def test_generate_response_with_conversation(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    mocker: MockerFixture,
+) -> None:
+    mock_conversation_store = mocker.Mock(spec=ConversationStore)
+    mock_conversation_store.get_messages.return_value = [
+        StoredMessage(role="user", content="Hello", encoding="unknown", tokens=1),
+        StoredMessage(
+            role="assistant", content="Hi there!", encoding="unknown", tokens=1
+        ),
+    ]
+    mock_conversation_store.get_retrieved_doc_ids.return_value = {"doc1"}
+    chat_service.conversation_store = mock_conversation_store
+    mock_create_completion = mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        return_value=ChatCompletion(
+            id="test-id",
+            choices=[
+                Choice(
+                    finish_reason="stop",
+                    index=0,
+                    message=ChatCompletionMessage(
+                        content="It is sunny", role="assistant"
+                    ),
+                )
+            ],
+            created=1234567890,
+            model="gpt-4",
+            object="chat.completion",
+        ),
+    )
+
+    response = chat_service.generate_response(
+        CreateChatRequest(
+            messages=[ChatMessage(role="user", content="What is the weather?")],
+            model="test-model",
+            conversation_id="conversation-1",
+        )
+    )
+
+    assert response.conversation_id == "conversation-1"
+    messages = mock_create_completion.call_args.kwargs["messages"]
+    assert [message["content"] for message in messages[1:4]] == [
+        "Hello",
+        "Hi there!",
+        "What is the weather?",
+    ]
+    conversation_id, stored_messages, retrieved_doc_ids = (
+        mock_conversation_store.append_turn.call_args.args
+    )
+    assert conversation_id == "conversation-1"
+    assert [(message.role, message.content) for message in stored_messages] == [
+        ("user", "What is the weather?"),
+        ("assistant", "It is sunny"),
+    ]
+    assert retrieved_doc_ids == {"doc1"}
+
+
+def test_generate_response_degrades_as_deadline_approaches(
+    chat_service: ChatService,
+    mock_openai_client: OpenAI,
+    mock_source_service: SourceService,
+    sample_chat_input: CreateChatRequest,
+    sample_documents: list[Document],
+    mocker: MockerFixture,
+) -> None:
+    clock = [0.0]
+    mocker.patch("src.common.deadline.time.monotonic", side_effect=lambda: clock[0])
+
+    def create_tool_call_completion(call_id: str) -> ChatCompletion:
+        return ChatCompletion(
+            id=call_id,
+            choices=[
+                Choice(
+                    finish_reason="tool_calls",
+                    index=0,
+                    message=ChatCompletionMessage(
+                        content=None,
+                        role="assistant",
+                        tool_calls=[
+                            ChatCompletionMessageToolCall(
+                                id=call_id,
+                                type="function",
+                                function=Function(
+                                    name="retrieve_documents",
+                                    arguments='{"source_name": "source1", "semantic_query": "weather", "full_text_query": "weather"}',
+                                ),
+                            )
+                        ],
+                    ),
+                )
+            ],
+            created=1234567890,
+            model="gpt-4",
+            object="chat.completion",
+        )
+
+    final_completion = ChatCompletion(
+        id="test-id-3",
+        choices=[
+            Choice(
+                finish_reason="stop",
+                index=0,
+                message=ChatCompletionMessage(content="Sunny", role="assistant"),
+            )
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+    )
+    mock_create_completion = mocker.patch.object(
+        mock_openai_client.chat.completions,
+        "create",
+        side_effect=[
+            create_tool_call_completion("call-1"),
+            create_tool_call_completion("call-2"),
+            final_completion,
+        ],
+    )
+
+    def search_source(**kwargs: Any) -> list[Document]:
+        clock[0] += 10
+        return sample_documents
+
+    mock_search_source = mocker.patch.object(
+        mock_source_service, "search_source", side_effect=search_source
+    )
+    mock_with_options = mocker.patch.object(
+        mock_openai_client, "with_options", return_value=mock_openai_client
+    )
+    chat_service.deadline_seconds = 10
+    chat_service.max_deadline_seconds = 30
+    chat_service.deadline_answer_reserve = 15
+    chat_service.deadline_min_retrieval = 6
+
+    # The override is capped at the configured maximum
+    response = chat_service.generate_response(sample_chat_input, deadline_seconds=60)
+
+    assert response.message == "Sunny"
+    calls = mock_create_completion.call_args_list
+    # The SDK's retries are disabled, as they would each get the remaining time
+    assert mock_with_options.call_args_list == [
+        mocker.call(max_retries=0, timeout=30),
+        mocker.call(max_retries=0, timeout=20),
+        mocker.call(max_retries=0, timeout=20),
+    ]
+    assert [call.kwargs["tool_choice"] for call in calls] == [
+        omit,
+        "none",
+        "none",
+    ]
+    # Retrieval requested after the budget ran out is skipped
+    mock_search_source.assert_called_once()
+    tool_messages = [
+        message
+        for message in calls[-1].kwargs["messages"]
+        if isinstance(message, dict) and message["role"] == "tool"
+    ]
+    assert tool_messages[-1]["content"] == RETRIEVAL_SKIPPED_MESSAGE
@@ -0,0 +1,135 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from src.chat.context import ContextPacker, merge_overlapping_text
+from src.chat.tokens import get_token_encoding
+from src.document_store.schemas import Document
+
+
+def create_document(
+    id: str, content: str, url: str = "test.com", score: float | None = None
+) -> Document:
+    return Document(
+        id=id,
+        url=url,
+        title=f"Test title {id}",
+        content=content,
+        created_at=datetime(2024, 1, 1, 0, 0, 0),
+        score=score,
+    )
+
+
+@pytest.fixture
+def context_packer() -> ContextPacker:
+    return ContextPacker(
+        encoding=get_token_encoding("gpt-4o"),
+        call_token_budget=1000,
+        conversation_token_budget=4000,
+    )
+
+
+def test_merge_overlapping_text() -> None:
+    first = "The quick brown fox jumps over the lazy dog near the river bank"
+    second = "over the lazy dog near the river bank and swims to the other side"
+
+    merged = merge_overlapping_text(first, second)
+
+    assert merged == (
+        "The quick brown fox jumps over the lazy dog near the river bank"
+        " and swims to the other side"
+    )
+    assert merge_overlapping_text(first, "Completely unrelated content here") is None
+
+
+def test_pack_merges_adjacent_chunks_from_same_url(
+    context_packer: ContextPacker,
+) -> None:
+    documents = [
+        create_document(
+            "2", "over the lazy dog near the river bank and swims to the other side"
+        ),
+        create_document(
+            "1", "The quick brown fox jumps over the lazy dog near the river bank"
+        ),
+        create_document("3", "Unrelated content from another page", url="other.com"),
+    ]
+
+    packed = json.loads(context_packer.pack(documents))
+
+    assert packed == [
+        {
+            "url": "test.com",
+            "content": "The quick brown fox jumps over the lazy dog near the river bank"
+            " and swims to the other side",
+        },
+        {"url": "other.com", "content": "Unrelated content from another page"},
+    ]
+    assert context_packer.seen_doc_ids == {"1", "2", "3"}
+
+
+def test_pack_skips_previously_seen_documents(
+    context_packer: ContextPacker,
+) -> None:
+    context_packer.pack([create_document("1", "First content")])
+
+    packed = json.loads(
+        context_packer.pack(
+            [create_document("1", "First content"), create_document("2", "Second")]
+        )
+    )
+
+    assert packed == [{"url": "test.com", "content": "Second"}]
+
+
+def test_pack_applies_min_score(context_packer: ContextPacker) -> None:
+    context_packer.min_score = 0.02
+
+    packed = json.loads(
+        context_packer.pack(
+            [
+                create_document("1", "Relevant content", score=0.03),
+                create_document("2", "Irrelevant content", score=0.01),
+            ]
+        )
+    )
+
+    assert packed == [{"url": "test.com", "content": "Relevant content"}]
+
+
+def test_pack_skips_documents_seen_in_earlier_turns() -> None:
+    context_packer = ContextPacker(
+        encoding=get_token_encoding("gpt-4o"),
+        call_token_budget=1000,
+        conversation_token_budget=4000,
+        seen_doc_ids={"1"},
+    )
+    documents = [
+        create_document("1", "Earlier content", url="a.com"),
+        create_document("2", "New content", url="b.com"),
+    ]
+
+    packed = json.loads(context_packer.pack(documents))
+
+    assert packed == [{"url": "b.com", "content": "New content"}]
+    assert context_packer.seen_doc_ids == {"1", "2"}
+
+
+def test_pack_enforces_token_budgets() -> None:
+    context_packer = ContextPacker(
+        encoding=get_token_encoding("gpt-4o"),
+        call_token_budget=30,
+        conversation_token_budget=40,
+    )
+    documents = [
+        create_document("1", "alpha " * 10, url="a.com"),
+        create_document("2", "beta " * 10, url="b.com"),
+    ]
+
+    first_call = json.loads(context_packer.pack(documents))
+    second_call = json.loads(context_packer.pack(documents))
+
+    assert [entry["url"] for entry in first_call] == ["a.com"]
+    assert second_call == []
+    assert context_packer.tokens_used <= 40
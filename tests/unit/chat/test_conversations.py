@@ -0,0 +1,94 @@
+from unittest.mock import Mock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from src.chat.conversations import ConversationStore, StoredMessage
+from src.chat.schemas import ChatMessage
+from src.common.exceptions import ResourceNotFoundException
+from src.common.redis import RedisClient
+
+CONVERSATION_ID = "conversation-1"
+KEY = f"conversation:{CONVERSATION_ID}"
+
+
+@pytest.fixture
+def mock_redis_client(mocker: MockerFixture) -> Mock:
+    return mocker.Mock(spec=RedisClient)
+
+
+@pytest.fixture
+def conversation_store(mock_redis_client: Mock) -> ConversationStore:
+    return ConversationStore(redis_client=mock_redis_client, ttl=3600)
+
+
+def create_stored_message(role: str, content: str) -> StoredMessage:
+    return StoredMessage.model_validate(
+        {"role": role, "content": content, "encoding": "o200k_base", "tokens": 5}
+    )
+
+
+def test_create_conversation(
+    conversation_store: ConversationStore, mock_redis_client: Mock
+) -> None:
+    conversation_id = conversation_store.create_conversation()
+
+    key = f"conversation:{conversation_id}"
+    assert mock_redis_client.hset.call_args.args == (key,)
+    assert "created_at" in mock_redis_client.hset.call_args.kwargs["mapping"]
+    mock_redis_client.expire.assert_called_once_with(key, 3600)
+
+
+def test_get_conversation(
+    conversation_store: ConversationStore, mock_redis_client: Mock
+) -> None:
+    mock_redis_client.exists.return_value = 1
+    mock_redis_client.lrange.return_value = [
+        create_stored_message("user", "Hello").model_dump_json(),
+        create_stored_message("assistant", "Hi there!").model_dump_json(),
+    ]
+    mock_redis_client.smembers.return_value = {"doc2", "doc1"}
+
+    conversation = conversation_store.get_conversation(CONVERSATION_ID)
+
+    mock_redis_client.lrange.assert_called_once_with(f"{KEY}:messages", 0, -1)
+    assert conversation.id == CONVERSATION_ID
+    assert conversation.messages == [
+        ChatMessage(role="user", content="Hello"),
+        ChatMessage(role="assistant", content="Hi there!"),
+    ]
+    assert conversation.retrieved_doc_ids == ["doc1", "doc2"]
+
+
+def test_get_messages_not_found(
+    conversation_store: ConversationStore, mock_redis_client: Mock
+) -> None:
+    mock_redis_client.exists.return_value = 0
+
+    with pytest.raises(ResourceNotFoundException):
+        conversation_store.get_messages(CONVERSATION_ID)
+
+    mock_redis_client.lrange.assert_not_called()
+
+
+def test_append_turn_refreshes_ttl(
+    conversation_store: ConversationStore, mock_redis_client: Mock
+) -> None:
+    messages = [
+        create_stored_message("user", "How do I install it?"),
+        create_stored_message("assistant", "Use pip."),
+    ]
+
+    conversation_store.append_turn(CONVERSATION_ID, messages, {"doc1"})
+
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.rpush.assert_called_once_with(
+        f"{KEY}:messages", *[message.model_dump_json() for message in messages]
+    )
+    pipeline.sadd.assert_called_once_with(f"{KEY}:retrieved", "doc1")
+    assert [call.args for call in pipeline.expire.call_args_list] == [
+        (KEY, 3600),
+        (f"{KEY}:messages", 3600),
+        (f"{KEY}:retrieved", 3600),
+    ]
+    pipeline.execute.assert_called_once()
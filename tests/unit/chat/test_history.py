@@ -0,0 +1,157 @@
+from unittest.mock import Mock
+
+import pytest
+from openai import APIConnectionError, OpenAI
+from pytest_mock import MockerFixture
+from redis.exceptions import RedisError
+
+from src.chat.history import (
+    HistorySummarizer,
+    count_message_tokens,
+    truncate_chat_history,
+)
+from src.chat.schemas import ChatMessage
+from src.chat.tokens import get_token_encoding
+from src.common.deadline import Deadline
+from src.common.redis import RedisClient
+
+ENCODING = get_token_encoding("gpt-4o")
+
+
+@pytest.fixture
+def messages() -> list[ChatMessage]:
+    return [
+        ChatMessage(role="user", content="Traceback: " + "error line " * 200),
+        ChatMessage(role="assistant", content="That looks like a missing import."),
+        ChatMessage(role="user", content="How do I fix it?"),
+        ChatMessage(role="assistant", content="Install the package."),
+    ]
+
+
+@pytest.fixture
+def mock_redis_client(mocker: MockerFixture) -> Mock:
+    return mocker.Mock(spec=RedisClient)
+
+
+@pytest.fixture
+def mock_openai_client(mocker: MockerFixture) -> Mock:
+    client = mocker.Mock(spec=OpenAI)
+    client.chat = mocker.Mock()
+    client.chat.completions = mocker.Mock()
+    client.chat.completions.create.return_value.choices = [
+        mocker.Mock(message=mocker.Mock(content="New summary"))
+    ]
+    client.with_options.return_value = client
+    return client
+
+
+@pytest.fixture
+def summarizer(mock_redis_client: Mock, mock_openai_client: Mock) -> HistorySummarizer:
+    return HistorySummarizer(
+        redis_client=mock_redis_client,
+        openai_client=mock_openai_client,
+        ttl=3600,
+    )
+
+
+def test_truncate_chat_history_keeps_newest_within_budget(
+    messages: list[ChatMessage],
+) -> None:
+    recent_tokens = sum(count_message_tokens(ENCODING, msg) for msg in messages[1:])
+
+    kept, dropped = truncate_chat_history(
+        messages, encoding=ENCODING, max_messages=10, max_tokens=recent_tokens
+    )
+
+    assert kept == messages[1:]
+    assert dropped == messages[:1]
+
+
+def test_truncate_chat_history_applies_message_limit(
+    messages: list[ChatMessage],
+) -> None:
+    kept, dropped = truncate_chat_history(
+        messages, encoding=ENCODING, max_messages=2, max_tokens=10000
+    )
+
+    assert kept == messages[2:]
+    assert dropped == messages[:2]
+
+
+def test_summarize_reuses_longest_cached_prefix(
+    summarizer: HistorySummarizer,
+    mock_redis_client: Mock,
+    mock_openai_client: Mock,
+    messages: list[ChatMessage],
+) -> None:
+    mock_redis_client.mget.return_value = [None, "Earlier summary", None]
+
+    summary = summarizer.summarize(messages[:3], "test-model")
+
+    assert summary == "New summary"
+    prompt = mock_openai_client.chat.completions.create.call_args.kwargs["messages"]
+    assert "Earlier summary" in prompt[1]["content"]
+    assert "How do I fix it?" in prompt[1]["content"]
+    assert "Traceback" not in prompt[1]["content"]
+    prefix_keys = mock_redis_client.mget.call_args.args[0]
+    mock_redis_client.set.assert_called_once_with(
+        prefix_keys[-1], "New summary", ex=3600
+    )
+
+
+def test_summarize_returns_cached_summary(
+    summarizer: HistorySummarizer,
+    mock_redis_client: Mock,
+    mock_openai_client: Mock,
+    messages: list[ChatMessage],
+) -> None:
+    mock_redis_client.mget.return_value = [None, "Cached summary"]
+
+    summary = summarizer.summarize(messages[:2], "test-model")
+
+    assert summary == "Cached summary"
+    mock_openai_client.chat.completions.create.assert_not_called()
+    mock_redis_client.set.assert_not_called()
+
+
+def test_summarize_is_bounded_by_deadline(
+    summarizer: HistorySummarizer,
+    mock_redis_client: Mock,
+    mock_openai_client: Mock,
+    messages: list[ChatMessage],
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch("src.common.deadline.time.monotonic", return_value=0.0)
+    mock_redis_client.mget.return_value = [None, None]
+
+    summarizer.summarize(messages[:2], "test-model", Deadline(expires_at=5.0))
+
+    mock_openai_client.with_options.assert_called_once_with(max_retries=0, timeout=5.0)
+
+
+def test_summarize_returns_none_when_model_fails(
+    summarizer: HistorySummarizer,
+    mock_redis_client: Mock,
+    mock_openai_client: Mock,
+    messages: list[ChatMessage],
+    mocker: MockerFixture,
+) -> None:
+    mock_redis_client.mget.return_value = [None, None]
+    mock_openai_client.chat.completions.create.side_effect = APIConnectionError(
+        request=mocker.Mock()
+    )
+
+    assert summarizer.summarize(messages[:2], "test-model") is None
+    mock_redis_client.set.assert_not_called()
+
+
+def test_summarize_without_redis(
+    summarizer: HistorySummarizer,
+    mock_redis_client: Mock,
+    messages: list[ChatMessage],
+) -> None:
+    mock_redis_client.mget.side_effect = RedisError()
+    mock_redis_client.set.side_effect = RedisError()
+
+    # The summary is generated from scratch and returned, just not cached
+    assert summarizer.summarize(messages[:2], "test-model") == "New summary"
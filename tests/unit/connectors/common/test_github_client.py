@@ -1,8 +1,12 @@
 import datetime
+import io
+from pathlib import Path
+
 import pytest
 from aiohttp import ClientError, ClientResponse, ClientSession
 from pytest_mock import MockerFixture
 
+from src.connectors.common.http_cache import HttpCache, LocalHttpCacheStorage
 from src.connectors.exceptions import ConnectorException
 from src.connectors.common.github_client import GitHubClient
 
@@ -136,3 +140,130 @@ async def test_request_unexpected_error(
 
     with pytest.raises(ConnectorException, match="Unexpected error"):
         await github_client.request("GET", "https://api.github.com/test")
+
+
+async def test_graphql_success(
+    github_client: GitHubClient, mocker: MockerFixture
+) -> None:
+    mock_request = mocker.patch.object(github_client, "request")
+    mock_request.return_value = ({"data": {"repository": {}}}, {})
+
+    data = await github_client.graphql("query { viewer }", {"owner": "test"})
+    assert data == {"repository": {}}
+    mock_request.assert_called_once_with(
+        "POST",
+        "https://api.github.com/graphql",
+        json_body={"query": "query { viewer }", "variables": {"owner": "test"}},
+    )
+
+
+async def test_graphql_rate_limited(
+    github_client: GitHubClient, mocker: MockerFixture
+) -> None:
+    mock_request = mocker.patch.object(github_client, "request")
+    mock_request.side_effect = [
+        (
+            {"errors": [{"type": "RATE_LIMITED", "message": "API rate limit"}]},
+            {"X-RateLimit-Reset": "0"},
+        ),
+        ({"data": {"repository": {}}}, {}),
+    ]
+
+    data = await github_client.graphql("query { viewer }", {})
+    assert data == {"repository": {}}
+    assert mock_request.call_count == 2
+
+
+async def test_graphql_errors(
+    github_client: GitHubClient, mocker: MockerFixture
+) -> None:
+    mock_request = mocker.patch.object(github_client, "request")
+    mock_request.return_value = (
+        {"data": None, "errors": [{"type": "NOT_FOUND", "message": "Not found"}]},
+        {},
+    )
+
+    with pytest.raises(ConnectorException, match="Not found"):
+        await github_client.graphql("query { viewer }", {})
+
+
+async def test_request_revalidates_cached_response(
+    github_client: GitHubClient, mocker: MockerFixture, tmp_path: Path
+) -> None:
+    http_cache = HttpCache(
+        LocalHttpCacheStorage(str(tmp_path), ttl=60), max_entry_size=1024
+    )
+    github_client.http_cache = http_cache
+    link = '<https://api.github.com/test?page=2>; rel="next"'
+
+    success_response = mocker.Mock(spec=ClientResponse)
+    success_response.status = 200
+    success_response.json.return_value = {"key": "value"}
+    success_response.headers = {"ETag": '"abc"', "Link": link}
+
+    not_modified_response = mocker.Mock(spec=ClientResponse)
+    not_modified_response.status = 304
+    not_modified_response.headers = {"ETag": '"abc"'}
+
+    mock_session = mocker.patch.object(github_client.session, "request")
+    mock_session.return_value.__aenter__.side_effect = [
+        success_response,
+        not_modified_response,
+    ]
+
+    for _ in range(2):
+        data, headers = await github_client.request(
+            "GET", "https://api.github.com/test", params={"per_page": "100"}
+        )
+        assert data == {"key": "value"}
+        assert headers is not None
+        assert headers["Link"] == link
+
+    assert mock_session.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+    assert http_cache.stats.hits == 1
+    assert http_cache.stats.misses == 1
+
+
+async def test_request_uses_fresh_cached_response(
+    github_client: GitHubClient, mocker: MockerFixture, tmp_path: Path
+) -> None:
+    github_client.http_cache = HttpCache(
+        LocalHttpCacheStorage(str(tmp_path), ttl=60), max_entry_size=1024
+    )
+
+    mock_response = mocker.Mock(spec=ClientResponse)
+    mock_response.status = 200
+    mock_response.json.return_value = {"key": "value"}
+    mock_response.headers = {"Cache-Control": "private, max-age=60"}
+
+    mock_session = mocker.patch.object(github_client.session, "request")
+    mock_session.return_value.__aenter__.return_value = mock_response
+
+    for _ in range(2):
+        data, _ = await github_client.request("GET", "https://api.github.com/test")
+        assert data == {"key": "value"}
+
+    assert mock_session.call_count == 1
+
+
+async def test_download_streams_body_to_file(
+    github_client: GitHubClient, mocker: MockerFixture
+) -> None:
+    async def iter_chunked(_: int):
+        for chunk in (b"%PDF-", b"content"):
+            yield chunk
+
+    mock_response = mocker.Mock(spec=ClientResponse)
+    mock_response.status = 200
+    mock_response.content.iter_chunked = iter_chunked
+
+    mock_get = mocker.patch.object(github_client.session, "get")
+    mock_get.return_value.__aenter__.return_value = mock_response
+
+    file = io.BytesIO()
+    assert await github_client.download("https://api.github.com/blob", file)
+    assert file.read() == b"%PDF-content"
+    mock_get.assert_called_once_with(
+        "https://api.github.com/blob",
+        headers={"Accept": "application/vnd.github.raw+json"},
+    )
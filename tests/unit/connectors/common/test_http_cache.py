@@ -0,0 +1,125 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from src.connectors.common.http_cache import (
+    HttpCache,
+    LocalHttpCacheStorage,
+    cached_get,
+    get_freshness_lifetime,
+)
+
+URL = "https://example.com/page"
+BODY = b"<html>content</html>"
+
+
+@pytest.fixture
+def http_cache(tmp_path: Path) -> HttpCache:
+    return HttpCache(LocalHttpCacheStorage(str(tmp_path), ttl=60), max_entry_size=1024)
+
+
+def create_session(
+    mocker: MockerFixture, status: int, headers: dict[str, str], body: bytes = BODY
+) -> Mock:
+    response = AsyncMock()
+    response.status = status
+    response.ok = status < 400
+    response.headers = headers
+    response.read.return_value = body
+
+    session = mocker.MagicMock()
+    session.get.return_value.__aenter__.return_value = response
+    return session
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"Cache-Control": "no-store"}, None),
+        ({"Cache-Control": "no-cache, max-age=60"}, 0.0),
+        ({"Cache-Control": "public, max-age=60", "Age": "20"}, 40),
+        (
+            {
+                "Date": "Mon, 01 Jan 2024 00:00:00 GMT",
+                "Expires": "Mon, 01 Jan 2024 00:05:00 GMT",
+            },
+            300,
+        ),
+        ({"Expires": "0"}, 0.0),
+        ({}, 0.0),
+    ],
+)
+def test_get_freshness_lifetime(
+    headers: dict[str, str], expected: float | None
+) -> None:
+    assert get_freshness_lifetime(headers) == expected
+
+
+async def test_cached_get_revalidates_stale_entry(
+    mocker: MockerFixture, http_cache: HttpCache
+) -> None:
+    session = create_session(mocker, 200, {"ETag": '"v1"'})
+    assert await cached_get(session, URL, http_cache) == (200, BODY)
+
+    session = create_session(mocker, 304, {"ETag": '"v1"'}, body=b"")
+    assert await cached_get(session, URL, http_cache) == (200, BODY)
+
+    session.get.assert_called_once_with(URL, headers={"If-None-Match": '"v1"'})
+    session.get.return_value.__aenter__.return_value.read.assert_not_called()
+    assert http_cache.stats.hits == 1
+    assert http_cache.stats.misses == 1
+    assert http_cache.stats.bytes_saved == len(BODY)
+    assert http_cache.stats.hit_ratio == 0.5
+
+
+async def test_cached_get_reuses_fresh_entry(
+    mocker: MockerFixture, http_cache: HttpCache
+) -> None:
+    session = create_session(mocker, 200, {"Cache-Control": "max-age=60"})
+    await cached_get(session, URL, http_cache)
+    session.get.reset_mock()
+
+    assert await cached_get(session, URL, http_cache) == (200, BODY)
+
+    session.get.assert_not_called()
+    assert http_cache.stats.hits == 1
+
+
+async def test_cached_get_keys_entries_by_request_headers(
+    mocker: MockerFixture, http_cache: HttpCache
+) -> None:
+    session = create_session(mocker, 200, {"Cache-Control": "max-age=60"})
+    await cached_get(session, URL, http_cache, headers={"Authorization": "a"})
+
+    assert http_cache.lookup(URL, {"Authorization": "a"}) is not None
+    assert http_cache.lookup(URL, {"Authorization": "b"}) is None
+
+
+@pytest.mark.parametrize(
+    "headers, body",
+    [
+        ({"Cache-Control": "no-store", "ETag": '"v1"'}, BODY),
+        ({}, BODY),
+        ({"ETag": '"v1"'}, b"x" * 2048),
+    ],
+    ids=["no-store", "no-validators", "too-large"],
+)
+async def test_cached_get_skips_uncacheable_responses(
+    mocker: MockerFixture, http_cache: HttpCache, headers: dict[str, str], body: bytes
+) -> None:
+    session = create_session(mocker, 200, headers, body=body)
+
+    assert await cached_get(session, URL, http_cache) == (200, body)
+
+    assert http_cache.lookup(URL) is None
+    assert http_cache.stats.misses == 1
+
+
+def test_local_storage_expires_entries(tmp_path: Path) -> None:
+    storage = LocalHttpCacheStorage(str(tmp_path), ttl=-1)
+    storage.set("abcdef", b"value")
+
+    assert storage.get("abcdef") is None
+    assert not (tmp_path / "ab" / "abcdef").exists()
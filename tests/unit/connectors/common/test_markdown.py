@@ -0,0 +1,49 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from src.connectors.common.markdown import extract_markdown_page
+from tests.benchmarks.html_extraction import (
+    get_mismatched_pages,
+    load_corpus,
+    reference_extract_markdown_page,
+)
+
+
+def test_extract_markdown_page_matches_reference_on_corpus() -> None:
+    corpus = load_corpus()
+
+    assert corpus
+    assert get_mismatched_pages(corpus) == []
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"",
+        b"<!-- only a comment -->",
+        b"text without tags & <b>bold</b>",
+        b"<p>unclosed<p>paragraphs",
+        b"<title></title><main><p>1. not a list</p><pre>  x\n</pre></main>",
+    ],
+    ids=["empty", "comment", "no-tags", "unclosed", "escaping"],
+)
+def test_extract_markdown_page_matches_reference_on_edge_cases(content: bytes) -> None:
+    url = "https://example.com/page"
+
+    assert extract_markdown_page(url, content) == reference_extract_markdown_page(
+        url, content
+    )
+
+
+def test_extract_markdown_page_returns_empty_page_for_undecodable_content(
+    mocker: MockerFixture,
+) -> None:
+    url = "https://example.com/page"
+    mocker.patch(
+        "src.connectors.common.markdown.UnicodeDammit"
+    ).return_value.unicode_markup = None
+
+    page = extract_markdown_page(url, b"\xff")
+
+    assert page.title == url
+    assert page.content.strip() == ""
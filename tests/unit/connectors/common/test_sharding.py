@@ -0,0 +1,19 @@
+from src.connectors.common.sharding import Shard
+
+
+def test_shards_partition_keys() -> None:
+    shards = [Shard(index=index, count=4) for index in range(4)]
+    keys = [f"https://example.com/page{i}" for i in range(200)]
+
+    owners = [[shard.index for shard in shards if shard.owns(key)] for key in keys]
+
+    assert all(len(owner) == 1 for owner in owners)
+    assert {owner[0] for owner in owners} == {0, 1, 2, 3}
+
+
+def test_shard_ownership_is_stable() -> None:
+    shard = Shard(index=1, count=3)
+
+    assert [shard.owns(f"issue-{i}") for i in range(20)] == [
+        Shard(index=1, count=3).owns(f"issue-{i}") for i in range(20)
+    ]
@@ -1,11 +1,14 @@
 from unittest.mock import call
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from pytest_mock import MockerFixture
 
 from src.connectors.common.github_client import GitHubClient
-from src.connectors.github_issues.fetcher import GitHubIssuesFetcher
+from src.connectors.github_issues.fetcher import (
+    COMMENTS_PER_ISSUE,
+    GitHubIssuesFetcher,
+)
 from src.connectors.github_issues.schemas import GithubIssue
 
 
@@ -64,23 +67,50 @@ async def test_fetch_comments(
     )
 
 
+def make_issue_node(
+    issue_id: int,
+    *,
+    labels: list[str] | None = None,
+    comments: list[dict[str, Any]] | None = None,
+    total_comments: int | None = None,
+) -> dict[str, Any]:
+    comments = comments or []
+    return {
+        "databaseId": issue_id,
+        "number": issue_id,
+        "url": f"url{issue_id}",
+        "title": f"Issue {issue_id}",
+        "body": f"Body {issue_id}",
+        "labels": {"nodes": [{"name": label} for label in labels or []]},
+        "comments": {
+            "totalCount": len(comments) if total_comments is None else total_comments,
+            "nodes": comments,
+        },
+    }
+
+
+def make_issues_page(
+    nodes: list[dict[str, Any]], end_cursor: str | None = None
+) -> dict[str, Any]:
+    return {
+        "repository": {
+            "issues": {
+                "pageInfo": {
+                    "hasNextPage": end_cursor is not None,
+                    "endCursor": end_cursor,
+                },
+                "nodes": nodes,
+            }
+        }
+    }
+
+
 async def test_fetch_issues_basic(
     github_issue_fetcher: GitHubIssuesFetcher,
     mocker: MockerFixture,
 ) -> None:
-    mock_issues: list[dict[str, Any]] = [
-        {
-            "id": 1,
-            "html_url": "url1",
-            "title": "Issue 1",
-            "body": "Body 1",
-            "comments": 0,
-            "labels": [],
-        },
-    ]
-
-    mock_request = mocker.patch.object(github_issue_fetcher.client, "request")
-    mock_request.return_value = (mock_issues, {})
+    mock_graphql = mocker.patch.object(github_issue_fetcher.client, "graphql")
+    mock_graphql.return_value = make_issues_page([make_issue_node(1)])
 
     issues = [
         issue
@@ -93,36 +123,33 @@ async def test_fetch_issues_basic(
     assert len(issues) == 1
     assert isinstance(issues[0], GithubIssue)
     assert issues[0].id == "1"
+    assert issues[0].url == "url1"
     assert issues[0].title == "Issue 1"
     assert issues[0].body == "Body 1"
     assert len(issues[0].comments) == 0
 
+    variables = mock_graphql.call_args.args[1]
+    assert variables["owner"] == "test"
+    assert variables["name"] == "repo"
+    assert variables["states"] is None
+    assert variables["since"] is None
+
 
 async def test_fetch_issues_with_comments(
     github_issue_fetcher: GitHubIssuesFetcher,
     mocker: MockerFixture,
 ) -> None:
-    mock_issue: dict[str, Any] = {
-        "id": 1,
-        "html_url": "url1",
-        "title": "Issue 1",
-        "body": "Body 1",
-        "comments": 1,
-        "comments_url": "https://api.github.com/repos/test/repo/issues/1/comments",
-        "labels": [],
-    }
-
     mock_comment: dict[str, Any] = {
-        "id": 100,
-        "html_url": "comment_url1",
+        "databaseId": 100,
+        "url": "comment_url1",
         "body": "Comment 1",
     }
 
+    mock_graphql = mocker.patch.object(github_issue_fetcher.client, "graphql")
+    mock_graphql.return_value = make_issues_page(
+        [make_issue_node(1, comments=[mock_comment])]
+    )
     mock_request = mocker.patch.object(github_issue_fetcher.client, "request")
-    mock_request.side_effect = [
-        ([mock_issue], {}),
-        ([mock_comment], {}),
-    ]
 
     issues = [
         issue
@@ -134,37 +161,64 @@ async def test_fetch_issues_with_comments(
 
     assert len(issues) == 1
     assert len(issues[0].comments) == 1
-    assert issues[0].id == "1"
-    assert issues[0].title == "Issue 1"
     assert issues[0].comments[0].id == "100"
+    assert issues[0].comments[0].url == "comment_url1"
     assert issues[0].comments[0].body == "Comment 1"
+    # Comments that fit in the GraphQL response need no REST requests
+    mock_request.assert_not_called()
 
 
-async def test_fetch_issues_with_label_filtering(
+async def test_fetch_issues_with_comment_overflow(
     github_issue_fetcher: GitHubIssuesFetcher,
     mocker: MockerFixture,
 ) -> None:
-    mock_issues: list[dict[str, Any]] = [
-        {
-            "id": 1,
-            "html_url": "url1",
-            "title": "Issue 1",
-            "body": "Body 1",
-            "comments": 0,
-            "labels": [{"name": "bug"}],
-        },
-        {
-            "id": 2,
-            "html_url": "url2",
-            "title": "Issue 2",
-            "body": "Body 2",
-            "comments": 0,
-            "labels": [{"name": "feature"}],
-        },
+    first_comments = [
+        {"databaseId": i, "url": f"comment_url{i}", "body": f"Comment {i}"}
+        for i in range(COMMENTS_PER_ISSUE)
+    ]
+    all_comments = [
+        {"id": i, "html_url": f"comment_url{i}", "body": f"Comment {i}"}
+        for i in range(COMMENTS_PER_ISSUE + 1)
     ]
 
+    mock_graphql = mocker.patch.object(github_issue_fetcher.client, "graphql")
+    mock_graphql.return_value = make_issues_page(
+        [
+            make_issue_node(
+                7, comments=first_comments, total_comments=COMMENTS_PER_ISSUE + 1
+            )
+        ]
+    )
     mock_request = mocker.patch.object(github_issue_fetcher.client, "request")
-    mock_request.return_value = (mock_issues, {})
+    mock_request.return_value = (all_comments, {})
+
+    issues = [
+        issue
+        async for issue in github_issue_fetcher.fetch_issues(
+            repo_owner="test",
+            repo_name="repo",
+        )
+    ]
+
+    assert len(issues[0].comments) == COMMENTS_PER_ISSUE + 1
+    mock_request.assert_called_once_with(
+        "GET",
+        "https://api.github.com/repos/test/repo/issues/7/comments",
+        params={"per_page": "100"},
+    )
+
+
+async def test_fetch_issues_with_label_filtering(
+    github_issue_fetcher: GitHubIssuesFetcher,
+    mocker: MockerFixture,
+) -> None:
+    mock_graphql = mocker.patch.object(github_issue_fetcher.client, "graphql")
+    mock_graphql.return_value = make_issues_page(
+        [
+            make_issue_node(1, labels=["bug"]),
+            make_issue_node(2, labels=["feature"]),
+        ]
+    )
 
     # Test include_labels
     issues = [
@@ -177,6 +231,7 @@ async def test_fetch_issues_with_label_filtering(
     ]
     assert len(issues) == 1
     assert issues[0].id == "1"
+    assert mock_graphql.call_args.args[1]["labels"] == ["bug"]
 
     # Test exclude_labels
     issues = [
@@ -195,56 +250,36 @@ async def test_fetch_issues_with_issue_age_limit(
     github_issue_fetcher: GitHubIssuesFetcher,
     mocker: MockerFixture,
 ) -> None:
-    mock_request = mocker.patch.object(github_issue_fetcher.client, "request")
-    mock_request.return_value = ([], {})
+    mock_graphql = mocker.patch.object(github_issue_fetcher.client, "graphql")
+    mock_graphql.return_value = make_issues_page([])
 
     _ = [
         issue
         async for issue in github_issue_fetcher.fetch_issues(
             repo_owner="test",
             repo_name="repo",
+            state="open",
             issue_age_limit=30,
         )
     ]
 
-    # Verify that the since parameter was included in the request
-    call_args = mock_request.call_args
-    assert call_args is not None
-    _, kwargs = call_args
-    params = kwargs.get("params", {})
-    assert "since" in params
-    # Verify the since parameter is a date 30 days ago
-    cutoff_date = datetime.now() - timedelta(days=30)
-    assert params["since"] == cutoff_date.strftime("%Y-%m-%d")
+    variables = mock_graphql.call_args.args[1]
+    assert variables["states"] == ["OPEN"]
+    # Verify the since variable is the start of the day 30 days ago
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=30)
+    assert variables["since"] == cutoff_date.strftime("%Y-%m-%dT00:00:00Z")
 
 
-async def test_fetch_issues_skip_pull_requests(
+async def test_fetch_issues_multiple_pages(
     github_issue_fetcher: GitHubIssuesFetcher,
     mocker: MockerFixture,
 ) -> None:
-    mock_issues: list[dict[str, Any]] = [
-        {
-            "id": 1,
-            "html_url": "url1",
-            "title": "Issue 1",
-            "body": "Body 1",
-            "comments": 0,
-            "labels": [],
-        },
-        {
-            "id": 2,
-            "html_url": "url2",
-            "title": "PR 1",
-            "body": "Body 2",
-            "comments": 0,
-            "labels": [],
-            "pull_request": {"url": "pr_url"},
-        },
+    mock_graphql = mocker.patch.object(github_issue_fetcher.client, "graphql")
+    mock_graphql.side_effect = [
+        make_issues_page([make_issue_node(1)], end_cursor="cursor1"),
+        make_issues_page([make_issue_node(2)]),
     ]
 
-    mock_request = mocker.patch.object(github_issue_fetcher.client, "request")
-    mock_request.return_value = (mock_issues, {})
-
     issues = [
         issue
         async for issue in github_issue_fetcher.fetch_issues(
@@ -253,78 +288,31 @@ async def test_fetch_issues_skip_pull_requests(
         )
     ]
 
-    assert len(issues) == 1
+    assert len(issues) == 2
     assert issues[0].id == "1"
-    assert issues[0].title == "Issue 1"
+    assert issues[1].id == "2"
+    assert mock_graphql.call_count == 2
+    assert mock_graphql.call_args_list[1].args[1]["after"] == "cursor1"
 
 
-async def test_fetch_issues_multiple_pages(
+async def test_fetch_issues_updated_since(
     github_issue_fetcher: GitHubIssuesFetcher,
     mocker: MockerFixture,
 ) -> None:
-    mock_responses: list[tuple[list[dict[str, Any]], dict[str, str]]] = [
-        # First page with 1 issue and a link to the next page
-        (
-            [
-                {
-                    "id": 1,
-                    "html_url": "url1",
-                    "title": "Issue 1",
-                    "body": "Body 1",
-                    "comments": 0,
-                    "labels": [],
-                }
-            ],
-            {
-                "Link": '<https://api.github.com/repos/test/repo/issues?page=2&per_page=100&state=all&sort=updated&direction=desc>; rel="next"'
-            },
-        ),
-        (
-            [
-                {
-                    "id": 2,
-                    "html_url": "url2",
-                    "title": "Issue 2",
-                    "body": "Body 2",
-                    "comments": 0,
-                    "labels": [],
-                }
-            ],
-            {},
-        ),
-    ]
+    mock_graphql = mocker.patch.object(github_issue_fetcher.client, "graphql")
+    mock_graphql.return_value = make_issues_page([])
+    updated_since = datetime.now(timezone.utc) - timedelta(hours=1)
 
-    mock_request = mocker.patch.object(github_issue_fetcher.client, "request")
-    mock_request.side_effect = mock_responses
-
-    issues = [
+    _ = [
         issue
         async for issue in github_issue_fetcher.fetch_issues(
             repo_owner="test",
             repo_name="repo",
+            issue_age_limit=30,
+            updated_since=updated_since,
         )
     ]
 
-    assert len(issues) == 2
-    assert issues[0].id == "1"
-    assert issues[1].id == "2"
-    mock_request.assert_has_calls(
-        [
-            call(
-                "GET",
-                "https://api.github.com/repos/test/repo/issues",
-                params={
-                    "per_page": "100",
-                    "state": "all",
-                    "sort": "updated",
-                    "direction": "desc",
-                },
-            ),
-            # All subsequent requests don't need params as they are included in the URL from the Link header
-            call(
-                "GET",
-                "https://api.github.com/repos/test/repo/issues?page=2&per_page=100&state=all&sort=updated&direction=desc",
-                params=None,
-            ),
-        ]
-    )
+    # The later of the watermark and the age limit applies
+    variables = mock_graphql.call_args.args[1]
+    assert variables["since"] == updated_since.strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -1,13 +1,13 @@
-import base64
-from unittest.mock import call
+from unittest.mock import Mock, call
 import pytest
-from typing import Any
+from typing import IO, Any
 from pytest_mock import MockerFixture
 
 from src.connectors.exceptions import ConnectorException
 from src.connectors.common.github_client import GitHubClient
 from src.connectors.github_pdf.fetcher import GitHubPdfFetcher
 from src.connectors.github_pdf.schemas import PdfDocument
+from src.connectors.github_pdf.text_cache import PdfTextCache
 
 
 # Simple PDF with "Hello PDF" text
@@ -58,6 +58,17 @@ async def github_pdf_fetcher(
     return GitHubPdfFetcher(github_client=github_client)
 
 
+def mock_downloads(
+    mocker: MockerFixture, fetcher: GitHubPdfFetcher, contents: dict[str, bytes]
+) -> Mock:
+    async def download(url: str, file: IO[bytes]) -> bool:
+        file.write(contents[url])
+        file.seek(0)
+        return True
+
+    return mocker.patch.object(fetcher.client, "download", side_effect=download)
+
+
 async def test_fetch_pdfs_success(
     github_pdf_fetcher: GitHubPdfFetcher,
     mocker: MockerFixture,
@@ -102,26 +113,21 @@ async def test_fetch_pdfs_success(
         ]
     }
 
-    # Mock blob responses for PDFs
-    blob_response_1 = {
-        "content": base64.b64encode(SAMPLE_PDF_BYTES).decode("utf-8"),
-        "encoding": "base64"
-    }
-
-    blob_response_2 = {
-        "content": base64.b64encode(SAMPLE_PDF_BYTES).decode("utf-8"),
-        "encoding": "base64"
-    }
-
     mock_request = mocker.patch.object(github_pdf_fetcher.client, "request")
     mock_request.side_effect = [
         (repo_response, {}),
         (ref_response, {}),
         (commit_response, {}),
         (tree_response, {}),
-        (blob_response_1, {}),
-        (blob_response_2, {}),
     ]
+    mock_download = mock_downloads(
+        mocker,
+        github_pdf_fetcher,
+        {
+            "https://api.github.com/repos/test/repo/git/blobs/blob123": SAMPLE_PDF_BYTES,
+            "https://api.github.com/repos/test/repo/git/blobs/blob789": SAMPLE_PDF_BYTES,
+        },
+    )
 
     pdf_docs = [
         doc
@@ -137,6 +143,7 @@ async def test_fetch_pdfs_success(
     assert pdf_docs[0].url == "https://github.com/test/repo/blob/main/docs/schematic.pdf"
     assert "Hello PDF" in pdf_docs[0].content
     assert pdf_docs[1].path == "hardware/datasheet.PDF"
+    assert mock_download.call_count == 2
 
 
 async def test_fetch_pdfs_with_path_filter(
@@ -162,19 +169,18 @@ async def test_fetch_pdfs_with_path_filter(
         ]
     }
 
-    blob_response = {
-        "content": base64.b64encode(SAMPLE_PDF_BYTES).decode("utf-8"),
-        "encoding": "base64"
-    }
-
     mock_request = mocker.patch.object(github_pdf_fetcher.client, "request")
     mock_request.side_effect = [
         (repo_response, {}),
         (ref_response, {}),
         (commit_response, {}),
         (tree_response, {}),
-        (blob_response, {}),
     ]
+    mock_downloads(
+        mocker,
+        github_pdf_fetcher,
+        {"https://api.github.com/repos/test/repo/git/blobs/blob123": SAMPLE_PDF_BYTES},
+    )
 
     pdf_docs = [
         doc
@@ -295,20 +301,19 @@ async def test_fetch_pdfs_invalid_pdf(
         ]
     }
 
-    # Invalid PDF content
-    blob_response = {
-        "content": base64.b64encode(b"Not a valid PDF").decode("utf-8"),
-        "encoding": "base64"
-    }
-
     mock_request = mocker.patch.object(github_pdf_fetcher.client, "request")
     mock_request.side_effect = [
         (repo_response, {}),
         (ref_response, {}),
         (commit_response, {}),
         (tree_response, {}),
-        (blob_response, {}),
     ]
+    # Invalid PDF content
+    mock_downloads(
+        mocker,
+        github_pdf_fetcher,
+        {"https://api.github.com/repos/test/repo/git/blobs/blob123": b"Not a valid PDF"},
+    )
 
     # Should skip invalid PDFs and not yield them
     pdf_docs = [
@@ -320,3 +325,59 @@ async def test_fetch_pdfs_invalid_pdf(
     ]
 
     assert len(pdf_docs) == 0
+
+
+async def test_fetch_pdfs_skips_unchanged_blobs(
+    github_client: GitHubClient,
+    mocker: MockerFixture,
+) -> None:
+    text_cache = mocker.Mock(spec=PdfTextCache)
+    text_cache.get.side_effect = lambda sha: "Cached text" if sha == "sha1" else None
+    github_pdf_fetcher = GitHubPdfFetcher(
+        github_client=github_client, text_cache=text_cache
+    )
+
+    tree_response = {
+        "tree": [
+            {
+                "path": "unchanged.pdf",
+                "type": "blob",
+                "sha": "sha1",
+                "url": "https://api.github.com/repos/test/repo/git/blobs/sha1"
+            },
+            {
+                "path": "changed.pdf",
+                "type": "blob",
+                "sha": "sha2",
+                "url": "https://api.github.com/repos/test/repo/git/blobs/sha2"
+            }
+        ]
+    }
+
+    mock_request = mocker.patch.object(github_pdf_fetcher.client, "request")
+    mock_request.side_effect = [
+        ({"object": {"sha": "commit123"}}, {}),
+        ({"tree": {"sha": "tree123"}}, {}),
+        (tree_response, {}),
+    ]
+    mock_download = mock_downloads(
+        mocker,
+        github_pdf_fetcher,
+        {"https://api.github.com/repos/test/repo/git/blobs/sha2": SAMPLE_PDF_BYTES},
+    )
+
+    pdf_docs = [
+        doc
+        async for doc in github_pdf_fetcher.fetch_pdfs(
+            repo_owner="test",
+            repo_name="repo",
+            ref="main"
+        )
+    ]
+
+    assert [doc.path for doc in pdf_docs] == ["unchanged.pdf", "changed.pdf"]
+    assert pdf_docs[0].content == "Cached text"
+    # Only the changed blob is downloaded, and its text cached
+    mock_download.assert_called_once()
+    assert mock_download.call_args.args[0] == "https://api.github.com/repos/test/repo/git/blobs/sha2"
+    text_cache.set.assert_called_once_with("sha2", pdf_docs[1].content)
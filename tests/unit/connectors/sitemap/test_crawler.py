@@ -1,12 +1,24 @@
+import asyncio
+import gzip
+from contextlib import asynccontextmanager
+from pathlib import Path
 import pytest
 from pytest_mock import MockerFixture
 from unittest.mock import AsyncMock, Mock
-from typing import AsyncGenerator
-from urllib.robotparser import RobotFileParser
+from typing import Any, AsyncGenerator
 
 from src.connectors.exceptions import ConnectorException
 from src.connectors.common.schemas import MarkdownPage
-from src.connectors.sitemap.crawler import SitemapCrawler, extract_markdown_page
+from src.connectors.common.http_cache import HttpCache, LocalHttpCacheStorage
+from src.connectors.common.markdown import (
+    extract_markdown_page,
+    extract_markdown_page_with_links,
+)
+from src.connectors.sitemap.crawler import (
+    SITEMAP_QUEUE_SIZE,
+    RetryableFetchError,
+    SitemapCrawler,
+)
 
 
 @pytest.fixture
@@ -45,6 +57,18 @@ def robots_txt() -> str:
     """
 
 
+def create_sitemap_response(sitemap: bytes) -> AsyncMock:
+    async def iter_chunked(chunk_size: int) -> AsyncGenerator[bytes, None]:
+        for start in range(0, len(sitemap), 16):
+            yield sitemap[start : start + 16]
+
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.content.iter_chunked = iter_chunked
+    mock_response.raise_for_status = Mock()
+    return mock_response
+
+
 @pytest.fixture
 async def sitemap_client() -> AsyncGenerator[SitemapCrawler, None]:
     async with SitemapCrawler(concurrent_requests=2, user_agent="test-bot") as client:
@@ -94,10 +118,7 @@ async def test_fetch_robots_txt_not_found(
 async def test_parse_sitemap_success(
     mocker: MockerFixture, sitemap_client: SitemapCrawler, sample_sitemap_xml: str
 ) -> None:
-    mock_response = AsyncMock()
-    mock_response.status = 200
-    mock_response.text.return_value = sample_sitemap_xml
-    mock_response.raise_for_status = Mock()
+    mock_response = create_sitemap_response(sample_sitemap_xml.encode())
 
     mock_session = mocker.patch.object(sitemap_client.session, "get")
     mock_session.return_value.__aenter__.return_value = mock_response
@@ -106,6 +127,52 @@ async def test_parse_sitemap_success(
     assert urls == ["https://example.com/page1", "https://example.com/page2"]
 
 
+async def test_parse_sitemap_index_with_gzipped_sitemaps(
+    mocker: MockerFixture, sitemap_client: SitemapCrawler
+) -> None:
+    sitemap_index = b"""<?xml version="1.0" encoding="UTF-8"?>
+    <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <sitemap><loc>https://example.com/sitemap-1.xml.gz</loc></sitemap>
+        <sitemap><loc>https://example.com/sitemap-2.xml.gz</loc></sitemap>
+    </sitemapindex>"""
+    nested_sitemaps = {
+        f"https://example.com/sitemap-{index}.xml.gz": gzip.compress(
+            f"""<?xml version="1.0" encoding="UTF-8"?>
+            <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+                <url><loc>https://example.com/{index}/a</loc></url>
+                <url><loc>https://example.com/{index}/b</loc></url>
+            </urlset>""".encode()
+        )
+        for index in [1, 2]
+    }
+    in_flight: list[str] = []
+    max_in_flight = 0
+
+    @asynccontextmanager
+    async def get(url: str, **kwargs: Any) -> AsyncGenerator[AsyncMock, None]:
+        nonlocal max_in_flight
+        in_flight.append(url)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        try:
+            yield create_sitemap_response(nested_sitemaps.get(url, sitemap_index))
+        finally:
+            in_flight.remove(url)
+
+    mocker.patch.object(sitemap_client.session, "get", side_effect=get)
+
+    urls = await sitemap_client.parse_sitemap("https://example.com/sitemap.xml")
+
+    assert sorted(urls) == [
+        "https://example.com/1/a",
+        "https://example.com/1/b",
+        "https://example.com/2/a",
+        "https://example.com/2/b",
+    ]
+    # Sitemaps are fetched concurrently, up to MAX_CONCURRENT_SITEMAPS
+    assert max_in_flight == 2
+
+
 async def test_parse_sitemap_not_found(
     mocker: MockerFixture, sitemap_client: SitemapCrawler
 ) -> None:
@@ -119,7 +186,7 @@ async def test_parse_sitemap_not_found(
         await sitemap_client.parse_sitemap("https://example.com/sitemap.xml")
 
 
-async def test_fetch_page_success(
+async def test_fetch_pages_success(
     mocker: MockerFixture, sitemap_client: SitemapCrawler, sample_html: bytes
 ) -> None:
     mock_response = AsyncMock()
@@ -128,24 +195,77 @@ async def test_fetch_page_success(
 
     mock_session = mocker.patch.object(sitemap_client.session, "get")
     mock_session.return_value.__aenter__.return_value = mock_response
+    mocker.patch.object(sitemap_client, "fetch_robots_txt", return_value="")
 
-    robots_parser = RobotFileParser()
-    mocker.patch.object(robots_parser, "can_fetch", return_value=True)
+    async def iter_urls() -> AsyncGenerator[str, None]:
+        yield "https://example.com/page1"
 
-    page = await sitemap_client.fetch_page("https://example.com/page1", robots_parser)
-    assert isinstance(page, MarkdownPage)
-    assert page.url == "https://example.com/page1"
-    assert "Test Page" in page.title
+    pages = [page async for page in sitemap_client.fetch_pages(iter_urls())]
 
+    assert len(pages) == 1
+    assert pages[0].url == "https://example.com/page1"
+    assert "Test Page" in pages[0].title
 
-async def test_fetch_page_disallowed_by_robots(
-    mocker: MockerFixture, sitemap_client: SitemapCrawler
+
+async def test_fetch_pages_disallowed_by_robots(
+    mocker: MockerFixture, sitemap_client: SitemapCrawler, robots_txt: str
+) -> None:
+    mock_attempt_fetch = mocker.patch.object(sitemap_client, "_attempt_fetch")
+    mocker.patch.object(sitemap_client, "fetch_robots_txt", return_value=robots_txt)
+    on_done = AsyncMock()
+
+    async def iter_urls() -> AsyncGenerator[str, None]:
+        yield "https://example.com/page2"
+
+    pages = [page async for page in sitemap_client.fetch_pages(iter_urls(), on_done)]
+
+    assert pages == []
+    mock_attempt_fetch.assert_not_called()
+    # Disallowed URLs are still finished with
+    on_done.assert_awaited_once_with("https://example.com/page2")
+
+
+async def test_fetch_pages_reuses_extracted_page_when_unchanged(
+    mocker: MockerFixture, sample_html: bytes, tmp_path: Path
 ) -> None:
-    robots_parser = RobotFileParser()
-    mocker.patch.object(robots_parser, "can_fetch", return_value=False)
+    http_cache = HttpCache(
+        LocalHttpCacheStorage(str(tmp_path), ttl=60), max_entry_size=1024 * 1024
+    )
+    ok_response = AsyncMock()
+    ok_response.status = 200
+    ok_response.headers = {"ETag": '"v1"', "Cache-Control": "no-cache"}
+    ok_response.read.return_value = sample_html
+    not_modified_response = AsyncMock()
+    not_modified_response.status = 304
+    not_modified_response.headers = {"ETag": '"v1"', "Cache-Control": "no-cache"}
+    mock_extract = mocker.patch(
+        "src.connectors.sitemap.crawler.extract_markdown_page_with_links",
+        wraps=extract_markdown_page_with_links,
+    )
 
-    page = await sitemap_client.fetch_page("https://example.com/page2", robots_parser)
-    assert page is None
+    async def iter_urls() -> AsyncGenerator[str, None]:
+        yield "https://example.com/page1"
+
+    async with SitemapCrawler(
+        concurrent_requests=1, user_agent="test-bot", http_cache=http_cache
+    ) as client:
+        mock_session = mocker.patch.object(client.session, "get")
+        mock_session.return_value.__aenter__.side_effect = [
+            ok_response,
+            not_modified_response,
+        ]
+        mocker.patch.object(client, "fetch_robots_txt", return_value="")
+
+        first = [page async for page in client.fetch_pages(iter_urls())]
+        second = [page async for page in client.fetch_pages(iter_urls())]
+
+    assert second == first
+    assert "Test Page" in second[0].title
+    # The 304 is answered with the cached page, which isn't parsed again
+    mock_extract.assert_called_once()
+    assert mock_session.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert http_cache.stats.hits == 1
+    assert http_cache.stats.misses == 1
 
 
 async def test_fetch_sitemap_pages_with_filters(
@@ -155,10 +275,7 @@ async def test_fetch_sitemap_pages_with_filters(
     mocker: MockerFixture,
 ) -> None:
     # Mock sitemap response
-    mock_sitemap_response = AsyncMock()
-    mock_sitemap_response.status = 200
-    mock_sitemap_response.text.return_value = sample_sitemap_xml
-    mock_sitemap_response.raise_for_status = Mock()
+    mock_sitemap_response = create_sitemap_response(sample_sitemap_xml.encode())
 
     # Mock page response
     mock_page_response = AsyncMock()
@@ -198,16 +315,157 @@ async def test_fetch_sitemap_pages_with_filters(
 async def test_fetch_sitemap_pages_no_matching_urls(
     mocker: MockerFixture, sitemap_client: SitemapCrawler, sample_sitemap_xml: str
 ) -> None:
-    mock_response = AsyncMock()
-    mock_response.status = 200
-    mock_response.text.return_value = sample_sitemap_xml
-    mock_response.raise_for_status = Mock()
+    mock_response = create_sitemap_response(sample_sitemap_xml.encode())
 
     mock_session = mocker.patch.object(sitemap_client.session, "get")
     mock_session.return_value.__aenter__.return_value = mock_response
+    mocker.patch.object(sitemap_client, "fetch_robots_txt", return_value="")
 
     with pytest.raises(ConnectorException):
         async for _ in sitemap_client.fetch_sitemap_pages(
             "https://example.com/sitemap.xml", include_pattern="page3"
         ):
             pass
+
+
+async def test_fetch_pages_bounds_pending_urls(
+    mocker: MockerFixture, sitemap_client: SitemapCrawler
+) -> None:
+    num_pulled = 0
+
+    async def iter_urls() -> AsyncGenerator[str, None]:
+        nonlocal num_pulled
+        for index in range(100):
+            num_pulled += 1
+            yield f"https://example.com/page{index}"
+
+    async def attempt_fetch(url: str) -> MarkdownPage:
+        await asyncio.sleep(0)
+        return MarkdownPage(url=url, title=url, content="content")
+
+    mocker.patch.object(sitemap_client, "_attempt_fetch", side_effect=attempt_fetch)
+    mocker.patch.object(sitemap_client, "fetch_robots_txt", return_value="")
+
+    pages = sitemap_client.fetch_pages(iter_urls())
+    first_page = await anext(pages)
+    pulled_before_consuming = num_pulled
+    remaining_pages = [page async for page in pages]
+
+    assert first_page.url.startswith("https://example.com/page")
+    # 2 workers with 4 pending URLs each, plus the URL waiting for capacity
+    assert pulled_before_consuming <= 9
+    assert len(remaining_pages) == 99
+
+
+async def test_fetch_pages_retries_without_blocking_workers(
+    mocker: MockerFixture,
+) -> None:
+    attempts: list[str] = []
+
+    async def attempt_fetch(url: str) -> MarkdownPage:
+        attempts.append(url)
+        if attempts.count(url) == 1 and url.endswith("rate-limited"):
+            raise RetryableFetchError(f"Rate limit exceeded when fetching {url}")
+        return MarkdownPage(url=url, title=url, content="content")
+
+    async def iter_urls() -> AsyncGenerator[str, None]:
+        yield "https://example.com/rate-limited"
+        yield "https://example.com/page"
+
+    mocker.patch("src.connectors.sitemap.crawler.get_retry_backoff", return_value=0.05)
+    mocker.patch("src.connectors.sitemap.scheduler.MAX_HOST_PAUSE", 0.01)
+
+    async with SitemapCrawler(concurrent_requests=1, user_agent="test-bot") as client:
+        mocker.patch.object(client, "_attempt_fetch", side_effect=attempt_fetch)
+        mocker.patch.object(client, "fetch_robots_txt", return_value="")
+        pages = [page async for page in client.fetch_pages(iter_urls())]
+
+    # The only worker moves on while the rate-limited page waits to retry
+    assert [page.url for page in pages] == [
+        "https://example.com/page",
+        "https://example.com/rate-limited",
+    ]
+    assert attempts == [
+        "https://example.com/rate-limited",
+        "https://example.com/page",
+        "https://example.com/rate-limited",
+    ]
+
+
+async def test_fetch_pages_raises_when_on_done_fails(
+    mocker: MockerFixture, sitemap_client: SitemapCrawler
+) -> None:
+    async def iter_urls() -> AsyncGenerator[str, None]:
+        yield "https://example.com/page"
+
+    async def attempt_fetch(url: str) -> MarkdownPage:
+        return MarkdownPage(url=url, title=url, content="content")
+
+    async def on_done(url: str) -> None:
+        raise ConnectionError("Redis is unavailable")
+
+    mocker.patch.object(sitemap_client, "_attempt_fetch", side_effect=attempt_fetch)
+    mocker.patch.object(sitemap_client, "fetch_robots_txt", return_value="")
+
+    async def consume() -> list[MarkdownPage]:
+        return [page async for page in sitemap_client.fetch_pages(iter_urls(), on_done)]
+
+    # The crawl ends with the error instead of waiting for the URL to finish
+    with pytest.raises(ConnectionError, match="Redis is unavailable"):
+        await asyncio.wait_for(consume(), timeout=5)
+
+
+async def test_fetch_sitemap_pages_with_large_nested_sitemaps(
+    mocker: MockerFixture,
+) -> None:
+    # More nested sitemaps than concurrent requests, each with more URLs than
+    # fit in the sitemap queue, so sitemaps wait on the queue mid-stream
+    num_sitemaps = 3
+    urls_per_sitemap = SITEMAP_QUEUE_SIZE + 500
+    sitemap_index = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + "".join(
+            f"<sitemap><loc>https://example.com/sitemap-{index}.xml</loc></sitemap>"
+            for index in range(num_sitemaps)
+        )
+        + "</sitemapindex>"
+    ).encode()
+    nested_sitemaps = {
+        f"https://example.com/sitemap-{index}.xml": (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + "".join(
+                f"<url><loc>https://example.com/{index}/{page}</loc></url>"
+                for page in range(urls_per_sitemap)
+            )
+            + "</urlset>"
+        ).encode()
+        for index in range(num_sitemaps)
+    }
+
+    @asynccontextmanager
+    async def get(url: str, **kwargs: Any) -> AsyncGenerator[AsyncMock, None]:
+        await asyncio.sleep(0)
+        yield create_sitemap_response(nested_sitemaps.get(url, sitemap_index))
+
+    async def attempt_fetch(url: str) -> MarkdownPage:
+        await asyncio.sleep(0)
+        return MarkdownPage(url=url, title=url, content="content")
+
+    async with SitemapCrawler(concurrent_requests=2, user_agent="test-bot") as client:
+        mocker.patch.object(client.session, "get", side_effect=get)
+        mocker.patch.object(client, "_attempt_fetch", side_effect=attempt_fetch)
+        mocker.patch.object(client, "fetch_robots_txt", return_value="")
+
+        async def fetch_all() -> list[MarkdownPage]:
+            return [
+                page
+                async for page in client.fetch_sitemap_pages(
+                    "https://example.com/sitemap.xml"
+                )
+            ]
+
+        pages = await asyncio.wait_for(fetch_all(), timeout=30)
+
+    assert len(pages) == num_sitemaps * urls_per_sitemap
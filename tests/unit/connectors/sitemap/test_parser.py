@@ -0,0 +1,64 @@
+import gzip
+
+import pytest
+
+from src.connectors.sitemap.parser import SitemapParser
+from src.connectors.sitemap.schemas import SitemapEntry
+
+SITEMAP_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+    <url>
+        <loc> https://example.com/page1 </loc>
+        <lastmod>2024-01-01</lastmod>
+    </url>
+    <url><loc>https://example.com/page2</loc></url>
+</urlset>"""
+
+
+def parse_in_chunks(
+    data: bytes, chunk_size: int
+) -> tuple[SitemapParser, list[SitemapEntry]]:
+    parser = SitemapParser()
+    entries: list[SitemapEntry] = []
+    for start in range(0, len(data), chunk_size):
+        entries.extend(parser.feed(data[start : start + chunk_size]))
+    entries.extend(parser.close())
+    return parser, entries
+
+
+@pytest.mark.parametrize("data", [SITEMAP_XML, gzip.compress(SITEMAP_XML)])
+def test_parse_sitemap_in_chunks(data: bytes) -> None:
+    parser, entries = parse_in_chunks(data, chunk_size=10)
+
+    assert parser.is_index is False
+    assert entries == [
+        SitemapEntry(loc="https://example.com/page1", lastmod="2024-01-01"),
+        SitemapEntry(loc="https://example.com/page2"),
+    ]
+
+
+def test_parse_sitemap_index() -> None:
+    data = b"".join(
+        [
+            b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+            *(
+                f"<sitemap><loc>https://example.com/{index}.xml</loc></sitemap>".encode()
+                for index in range(100)
+            ),
+            b"</sitemapindex>",
+        ]
+    )
+
+    parser, entries = parse_in_chunks(data, chunk_size=64)
+
+    assert parser.is_index is True
+    assert [entry.loc for entry in entries] == [
+        f"https://example.com/{index}.xml" for index in range(100)
+    ]
+
+
+def test_parse_empty_sitemap() -> None:
+    parser, entries = parse_in_chunks(b"", chunk_size=10)
+
+    assert entries == []
+    assert parser.is_index is None
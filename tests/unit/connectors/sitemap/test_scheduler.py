@@ -0,0 +1,110 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from src.connectors.sitemap.crawler import SitemapCrawler
+from src.connectors.sitemap.scheduler import HostLimiter, HostScheduler
+
+URL = "https://example.com/page"
+
+
+class CongestionError(Exception):
+    pass
+
+
+@pytest.fixture
+def scheduler() -> HostScheduler:
+    return HostScheduler(max_host_concurrency=8, congestion_errors=(CongestionError,))
+
+
+async def test_host_limiter_adapts_limit_aimd() -> None:
+    limiter = HostLimiter(max_concurrency=8)
+    assert limiter.limit == 2
+
+    for _ in range(4):
+        await limiter.acquire()
+        await limiter.release(latency=0.1, congested=False)
+    assert 3 < limiter.limit < 4
+
+    await limiter.acquire()
+    await limiter.release(latency=None, congested=True)
+    assert 1.5 < limiter.limit < 2
+    assert limiter.next_start > 0
+
+
+async def test_host_limiter_decreases_when_latency_rises() -> None:
+    limiter = HostLimiter(max_concurrency=8)
+    limiter.limit = 4.0
+
+    for latency in [0.2, 2.0, 2.0, 2.0]:
+        await limiter.acquire()
+        await limiter.release(latency=latency, congested=False)
+
+    assert limiter.limit < 4
+
+
+async def test_host_limiter_spaces_requests_by_interval() -> None:
+    limiter = HostLimiter(max_concurrency=8, interval=5.0)
+
+    first_delay = await limiter.acquire()
+    second_delay = await limiter.acquire()
+
+    assert first_delay == 0
+    assert second_delay == pytest.approx(5.0, abs=0.1)
+
+
+async def test_scheduler_slot_tracks_hosts_separately(
+    scheduler: HostScheduler,
+) -> None:
+    with pytest.raises(CongestionError):
+        async with scheduler.slot(URL):
+            raise CongestionError()
+    async with scheduler.slot("https://other.example.com/page"):
+        pass
+
+    assert scheduler.get_limiter(URL).consecutive_failures == 1
+    assert scheduler.get_limiter(URL).in_flight == 0
+    assert scheduler.get_limiter("https://other.example.com/").limit > 2
+
+
+async def test_scheduler_slot_ignores_other_errors(scheduler: HostScheduler) -> None:
+    with pytest.raises(ValueError):
+        async with scheduler.slot(URL):
+            raise ValueError()
+
+    limiter = scheduler.get_limiter(URL)
+    assert limiter.limit == 2
+    assert limiter.consecutive_failures == 0
+    assert limiter.in_flight == 0
+
+
+async def test_scheduler_pace_doesnt_hold_a_slot(scheduler: HostScheduler) -> None:
+    scheduler.set_interval(URL, 0.05)
+
+    await scheduler.pace(URL)
+    await scheduler.pace(URL)
+
+    limiter = scheduler.get_limiter(URL)
+    assert limiter.in_flight == 0
+    assert limiter.limit == 2
+    # The next request still waits for its turn after the paced ones
+    assert await limiter.acquire() > 0
+
+
+async def test_crawler_caches_robots_txt_per_host(mocker: MockerFixture) -> None:
+    async with SitemapCrawler(concurrent_requests=2, user_agent="test-bot") as client:
+        fetch_robots_txt = mocker.patch.object(
+            client,
+            "fetch_robots_txt",
+            return_value="User-agent: *\nCrawl-delay: 3\nDisallow: /private",
+        )
+
+        robots_parser = await client.get_robots_parser(URL)
+        await client.get_robots_parser("https://example.com/other")
+        await client.get_robots_parser("https://docs.example.com/page")
+
+    assert not robots_parser.can_fetch("test-bot", "https://example.com/private")
+    assert [call.args for call in fetch_robots_txt.call_args_list] == [
+        ("https://example.com",),
+        ("https://docs.example.com",),
+    ]
+    assert client.scheduler.get_limiter(URL).interval == 3.0
@@ -0,0 +1,93 @@
+from typing import Any
+
+import pytest
+
+from src.connectors.web_crawl.frontier import CrawlFrontier
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands used by `CrawlFrontier`."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+        self.ttls: dict[str, int] = {}
+
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def exists(self, key: str) -> int:
+        return int(key in self.data)
+
+    def expire(self, key: str, ttl: int) -> bool:
+        self.ttls[key] = ttl
+        return key in self.data
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def sadd(self, key: str, value: str) -> int:
+        members = self.data.setdefault(key, set())
+        added = value not in members
+        members.add(value)
+        return int(added)
+
+    def rpush(self, key: str, *values: str) -> int:
+        self.data.setdefault(key, []).extend(values)
+        return len(self.data[key])
+
+    def lpush(self, key: str, *values: str) -> int:
+        self.data[key] = list(reversed(values)) + self.data.get(key, [])
+        return len(self.data[key])
+
+    def lpop(self, key: str) -> str | None:
+        values = self.data.get(key)
+        if not values:
+            return None
+        value = values.pop(0)
+        if not values:
+            del self.data[key]
+        return value
+
+    def hset(self, key: str, field: str, value: Any) -> int:
+        self.data.setdefault(key, {})[field] = str(value)
+        return 1
+
+    def hdel(self, key: str, field: str) -> int:
+        removed = self.data.get(key, {}).pop(field, None) is not None
+        if key in self.data and not self.data[key]:
+            del self.data[key]
+        return int(removed)
+
+    def hgetall(self, key: str) -> dict[str, str]:
+        return dict(self.data.get(key, {}))
+
+    def hlen(self, key: str) -> int:
+        return len(self.data.get(key, {}))
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...]]] = []
+
+    def __getattr__(self, name: str) -> Any:
+        def queue(*args: Any) -> "FakePipeline":
+            self.commands.append((name, args))
+            return self
+
+        return queue
+
+    def execute(self) -> list[Any]:
+        results = [getattr(self.redis, name)(*args) for name, args in self.commands]
+        self.commands = []
+        return results
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
+
+
+@pytest.fixture
+def frontier(fake_redis: FakeRedis) -> CrawlFrontier:
+    return CrawlFrontier(fake_redis, crawl_id="test", ttl=60)  # type: ignore[arg-type]
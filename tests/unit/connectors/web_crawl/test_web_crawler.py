@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any, AsyncGenerator
+
+import pytest
+from pytest_mock import MockerFixture
+
+from src.connectors.exceptions import ConnectorException
+from src.connectors.web_crawl.crawler import WebCrawler, is_html_url
+from src.connectors.web_crawl.frontier import CrawlFrontier
+
+SITE = {
+    "https://example.com/": [
+        "/a",
+        "/a#section",
+        "b",
+        "/private",
+        "/files/guide.pdf",
+        "https://docs.example.com/",
+        "https://other.com/",
+    ],
+    "https://example.com/a": ["/c"],
+    "https://example.com/b": [],
+    "https://example.com/c": ["/d"],
+    "https://example.com/d": [],
+    "https://example.com/private": [],
+    "https://docs.example.com/": [],
+}
+
+
+def render_page(links: list[str]) -> bytes:
+    anchors = "".join(f'<a href="{link}">link</a>' for link in links)
+    return f"<html><body><main><p>{anchors}</p></main></body></html>".encode()
+
+
+@pytest.fixture
+async def web_crawler(
+    mocker: MockerFixture, frontier: CrawlFrontier
+) -> AsyncGenerator[WebCrawler, None]:
+    async def fake_cached_get(session: Any, url: str, http_cache: Any) -> Any:
+        if url not in SITE:
+            return 404, b""
+        return 200, render_page(SITE[url])
+
+    mocker.patch(
+        "src.connectors.sitemap.crawler.cached_get", side_effect=fake_cached_get
+    )
+    async with WebCrawler(
+        frontier=frontier, concurrent_requests=2, user_agent="test-bot"
+    ) as crawler:
+        mocker.patch.object(crawler, "fetch_robots_txt", return_value="")
+        yield crawler
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/docs/", True),
+        ("https://example.com/docs/v1.2", True),
+        ("https://example.com/guide.PDF", False),
+        ("https://example.com/logo.png?size=2", False),
+    ],
+)
+def test_is_html_url(url: str, expected: bool) -> None:
+    assert is_html_url(url) == expected
+
+
+async def test_crawl_follows_links_in_scope(
+    web_crawler: WebCrawler, fake_redis: Any
+) -> None:
+    pages = [
+        page
+        async for page in web_crawler.crawl(
+            ["https://example.com"], max_depth=2, exclude_pattern="private"
+        )
+    ]
+
+    assert sorted(page.url for page in pages) == [
+        "https://docs.example.com/",
+        "https://example.com/",
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://example.com/c",
+    ]
+    assert not fake_redis.data
+
+
+async def test_crawl_limits_indexed_pages(web_crawler: WebCrawler) -> None:
+    pages = [
+        page
+        async for page in web_crawler.crawl(
+            ["https://example.com/"],
+            max_depth=3,
+            max_pages=2,
+            include_pattern=r"/[a-d]$",
+        )
+    ]
+
+    assert len(pages) == 2
+    assert all(page.url != "https://example.com/" for page in pages)
+
+
+async def test_crawl_resumes_interrupted_crawl(
+    web_crawler: WebCrawler, frontier: CrawlFrontier
+) -> None:
+    frontier.start(["https://example.com/"])
+    frontier.complete(*frontier.pop())  # type: ignore[misc]
+    frontier.add(["https://example.com/b"], 1)
+
+    pages = [
+        page async for page in web_crawler.crawl(["https://example.com/"], max_depth=0)
+    ]
+
+    # The seed was already crawled, so its links aren't followed again
+    assert sorted(page.url for page in pages) == [
+        "https://example.com/",
+        "https://example.com/b",
+    ]
+
+
+async def test_crawl_without_pages_raises(web_crawler: WebCrawler) -> None:
+    with pytest.raises(ConnectorException):
+        async for _ in web_crawler.crawl(["https://example.com/missing"], max_depth=1):
+            pass
+
+
+async def test_crawl_raises_when_frontier_fails(
+    web_crawler: WebCrawler, frontier: CrawlFrontier, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(
+        frontier, "complete", side_effect=ConnectionError("Redis is unavailable")
+    )
+
+    async def crawl() -> None:
+        async for _ in web_crawler.crawl(["https://example.com/"], max_depth=1):
+            pass
+
+    # The crawl ends with the error instead of waiting for the URL to finish
+    with pytest.raises(ConnectionError, match="Redis is unavailable"):
+        await asyncio.wait_for(crawl(), timeout=5)
@@ -0,0 +1,319 @@
+import multiprocessing
+import sqlite3
+import numpy as np
+import pytest
+from pathlib import Path
+from pytest_mock import MockerFixture
+from unittest.mock import Mock
+from datetime import datetime
+from typing import Any
+from openai.types.embedding import Embedding
+from openai.types.create_embedding_response import Usage, CreateEmbeddingResponse
+
+from src.document_store.local.store import LocalDocumentStore
+from src.document_store.schemas import Document, DocumentFilter
+
+TEST_SOURCE = "test_source"
+EMBEDDING_MODEL = "test-embedding-model"
+EMBEDDING_DIMENSIONS = 3
+TOP_K = 2
+
+EMBEDDINGS = {
+    "Python packaging guide": [1.0, 0.0, 0.0],
+    "Installing with pip": [0.9, 0.1, 0.0],
+    "Deploying to production": [0.0, 1.0, 0.0],
+}
+
+
+def create_embeddings(input: str | list[str], **kwargs: Any) -> CreateEmbeddingResponse:
+    inputs = [input] if isinstance(input, str) else input
+    return CreateEmbeddingResponse(
+        data=[
+            Embedding(embedding=EMBEDDINGS[text], index=index, object="embedding")
+            for index, text in enumerate(inputs)
+        ],
+        model=EMBEDDING_MODEL,
+        usage=Usage(prompt_tokens=0, total_tokens=0),
+        object="list",
+    )
+
+
+@pytest.fixture
+def sample_documents() -> list[Document]:
+    return [
+        Document(
+            id="doc1",
+            content="Python packaging guide",
+            title="Packaging",
+            url="http://test1.com",
+            created_at=datetime(2024, 1, 1, 0, 0, 0),
+        ),
+        Document(
+            id="doc2",
+            content="Installing with pip",
+            title="Installation",
+            url="http://test2.com",
+            created_at=datetime(2024, 1, 2, 0, 0, 0),
+        ),
+        Document(
+            id="doc3",
+            content="Deploying to production",
+            title="Deployment",
+            url="http://test3.com",
+            created_at=datetime(2024, 1, 3, 0, 0, 0),
+        ),
+    ]
+
+
+@pytest.fixture
+def mock_openai_client(mocker: MockerFixture) -> Mock:
+    client = mocker.Mock()
+    client.embeddings.create.side_effect = create_embeddings
+    return client
+
+
+@pytest.fixture
+def document_store(tmp_path: Path, mock_openai_client: Mock) -> LocalDocumentStore:
+    return LocalDocumentStore(
+        data_dir=str(tmp_path),
+        namespace="test_namespace",
+        openai_client=mock_openai_client,
+        embedding_model=EMBEDDING_MODEL,
+        embedding_dimensions=EMBEDDING_DIMENSIONS,
+    )
+
+
+def add_documents_in_process(data_dir: str, worker: int) -> None:
+    document_store = LocalDocumentStore(
+        data_dir=data_dir,
+        namespace="test_namespace",
+        openai_client=Mock(),
+        embedding_model=EMBEDDING_MODEL,
+        embedding_dimensions=EMBEDDING_DIMENSIONS,
+    )
+    for batch in range(10):
+        documents = [
+            Document(
+                id=f"doc-{worker}-{batch}-{index}",
+                content="content",
+                title="title",
+                url=f"http://test.com/{worker}",
+                created_at=datetime(2024, 1, 1, 0, 0, 0),
+            )
+            for index in range(5)
+        ]
+        embeddings = [[float(worker), float(batch), float(index)] for index in range(5)]
+        document_store.add_embedded_documents(TEST_SOURCE, documents, embeddings)
+
+
+def test_add_and_get_documents(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+
+    documents = document_store.get_documents(TEST_SOURCE, limit=2, offset=1)
+
+    assert documents == sample_documents[1:]
+    assert sorted(document_store.get_document_ids(TEST_SOURCE)) == [
+        "doc1",
+        "doc2",
+        "doc3",
+    ]
+    assert document_store.get_document_ids("other_source") == []
+
+
+def test_semantic_search(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+
+    results = document_store.semantic_search(
+        TEST_SOURCE, "Python packaging guide", TOP_K
+    )
+
+    assert [doc.id for doc in results] == ["doc1", "doc2"]
+
+
+def test_full_text_search(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+
+    results = document_store.full_text_search(TEST_SOURCE, "production: deploy?", TOP_K)
+
+    assert [doc.id for doc in results] == ["doc3"]
+
+
+def test_hybrid_search_with_query_embedding(
+    document_store: LocalDocumentStore,
+    sample_documents: list[Document],
+    mock_openai_client: Mock,
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+    mock_openai_client.embeddings.create.reset_mock()
+
+    results = document_store.hybrid_search(
+        source_name=TEST_SOURCE,
+        semantic_query="installing",
+        full_text_query="pip",
+        top_k=TOP_K,
+        query_embedding=[0.9, 0.1, 0.0],
+    )
+
+    mock_openai_client.embeddings.create.assert_not_called()
+    assert results[0].id == "doc2"
+
+
+def test_search_with_filters(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+
+    url_results = document_store.semantic_search(
+        TEST_SOURCE,
+        "Python packaging guide",
+        TOP_K,
+        filters=DocumentFilter(url_prefix="http://test3"),
+    )
+    date_results = document_store.full_text_search(
+        TEST_SOURCE,
+        "packaging pip production",
+        TOP_K,
+        filters=DocumentFilter(created_after=datetime(2024, 1, 2, 0, 0, 0)),
+    )
+
+    assert [doc.id for doc in url_results] == ["doc3"]
+    assert sorted(doc.id for doc in date_results) == ["doc2", "doc3"]
+
+
+def test_iter_embeddings(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+
+    batches = list(document_store.iter_embeddings(TEST_SOURCE, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    np.testing.assert_allclose(
+        sorted(vector for batch in batches for vector in batch),
+        sorted(EMBEDDINGS.values()),
+        rtol=1e-6,
+    )
+    assert list(document_store.iter_embeddings("other_source", batch_size=2)) == []
+
+
+def test_delete_documents_compacts_vectors(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+
+    document_store.delete_documents(TEST_SOURCE, ["doc1"])
+
+    assert sorted(document_store.get_document_ids(TEST_SOURCE)) == ["doc2", "doc3"]
+    results = document_store.semantic_search(
+        TEST_SOURCE, "Python packaging guide", TOP_K
+    )
+    assert [doc.id for doc in results] == ["doc2", "doc3"]
+    assert document_store.full_text_search(TEST_SOURCE, "packaging", TOP_K) == []
+
+
+def test_delete_all_documents(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents)
+
+    document_store.delete_all_documents(TEST_SOURCE)
+
+    assert document_store.get_document_ids(TEST_SOURCE) == []
+    assert (
+        document_store.semantic_search(TEST_SOURCE, "Python packaging guide", TOP_K)
+        == []
+    )
+
+
+def test_add_documents_from_several_processes(tmp_path: Path) -> None:
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=add_documents_in_process, args=(str(tmp_path), worker))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    document_store = LocalDocumentStore(
+        data_dir=str(tmp_path),
+        namespace="test_namespace",
+        openai_client=Mock(),
+        embedding_model=EMBEDDING_MODEL,
+        embedding_dimensions=EMBEDDING_DIMENSIONS,
+    )
+    vectors = document_store._load_vectors(TEST_SOURCE)
+    assert vectors is not None
+    with sqlite3.connect(document_store.db_path) as conn:
+        rows = conn.execute("SELECT id, vector_index FROM documents").fetchall()
+
+    # Each document references its own vector
+    assert len(rows) == len(vectors) == 200
+    for doc_id, vector_index in rows:
+        _, worker, batch, index = doc_id.split("-")
+        assert vectors[vector_index].tolist() == [
+            float(worker),
+            float(batch),
+            float(index),
+        ]
+
+
+def test_add_documents_failure_drops_vectors(
+    document_store: LocalDocumentStore,
+    sample_documents: list[Document],
+    mocker: MockerFixture,
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents[:1])
+    mocker.patch.object(
+        document_store, "_insert_documents", side_effect=sqlite3.OperationalError()
+    )
+
+    with pytest.raises(sqlite3.OperationalError):
+        document_store.add_documents(TEST_SOURCE, sample_documents[1:])
+
+    vectors = document_store._load_vectors(TEST_SOURCE)
+    assert vectors is not None
+    assert len(vectors) == 1
+
+
+def test_semantic_search_skips_unreferenced_vectors(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents[1:])
+    # Vectors appended by a write whose rows were never committed
+    with open(document_store._get_vectors_path(TEST_SOURCE), "ab") as vectors_file:
+        vectors_file.write(np.array([[1.0, 0.0, 0.0]] * 2, dtype=np.float32).tobytes())
+
+    results = document_store.semantic_search(
+        TEST_SOURCE, "Python packaging guide", TOP_K
+    )
+
+    assert [doc.id for doc in results] == ["doc2", "doc3"]
+
+
+def test_semantic_search_caches_vector_rows(
+    document_store: LocalDocumentStore, sample_documents: list[Document]
+) -> None:
+    document_store.add_documents(TEST_SOURCE, sample_documents[1:])
+
+    document_store.semantic_search(TEST_SOURCE, "Python packaging guide", TOP_K)
+    _, row_ids, _ = document_store._vector_rows_cache[TEST_SOURCE]
+    document_store.semantic_search(TEST_SOURCE, "Python packaging guide", TOP_K)
+
+    # Unfiltered searches reuse the rows until the source is written
+    assert document_store._vector_rows_cache[TEST_SOURCE][1] is row_ids
+    document_store.add_documents(TEST_SOURCE, sample_documents[:1])
+    assert TEST_SOURCE not in document_store._vector_rows_cache
+    results = document_store.semantic_search(
+        TEST_SOURCE, "Python packaging guide", TOP_K
+    )
+    assert [doc.id for doc in results] == ["doc1", "doc2"]
+    assert len(document_store._vector_rows_cache[TEST_SOURCE][1]) == 3
@@ -336,9 +336,11 @@ def test_hybrid_search(
     )
 
     mock_semantic_search.assert_called_once_with(
-        TEST_SOURCE, TEST_SEMANTIC_QUERY, TOP_K
+        TEST_SOURCE, TEST_SEMANTIC_QUERY, TOP_K, filters=None, deadline=None
+    )
+    mock_text_search.assert_called_once_with(
+        TEST_SOURCE, TEST_FULL_TEXT_QUERY, TOP_K, filters=None, deadline=None
     )
-    mock_text_search.assert_called_once_with(TEST_SOURCE, TEST_FULL_TEXT_QUERY, TOP_K)
 
     assert len(combined_results) == TOP_K
     # hybrid_search uses a reciprocal rank fusion algorithm to combine results
@@ -7,7 +7,7 @@ from openai.types.create_embedding_response import Usage, CreateEmbeddingRespons
 from redis.commands.search.document import Document as RedisDocument
 
 from src.document_store.redis.store import RedisDocumentStore
-from src.document_store.schemas import Document
+from src.document_store.schemas import Document, DocumentFilter
 
 TEST_INDEX_NAME = "test_index"
 TEST_SOURCE = "test_source"
@@ -61,6 +61,9 @@ def document_store(
     mock_index: Mock,
 ) -> RedisDocumentStore:
     mocker.patch("src.document_store.redis.store.SearchIndex", return_value=mock_index)
+    mock_redis_client.ft.return_value.info.return_value = {
+        "attributes": [["identifier", "created_at_ts", "type", "NUMERIC"]]
+    }
     return RedisDocumentStore(
         index_name=TEST_INDEX_NAME,
         redis_client=mock_redis_client,
@@ -70,6 +73,56 @@ def document_store(
     )
 
 
+def test_add_missing_index_fields(
+    document_store: RedisDocumentStore, mock_redis_client: Mock
+) -> None:
+    ft_mock = mock_redis_client.ft.return_value
+    ft_mock.info.return_value = {"attributes": [["identifier", "id", "type", "TAG"]]}
+    mock_redis_client.scan_iter.return_value = iter([])
+
+    document_store._add_missing_index_fields()
+
+    ft_mock.alter_schema_add.assert_called_once()
+    fields = ft_mock.alter_schema_add.call_args[0][0]
+    assert [field.name for field in fields] == ["created_at_ts"]
+
+
+def test_add_missing_index_fields_backfills_stored_documents(
+    document_store: RedisDocumentStore, mock_redis_client: Mock
+) -> None:
+    ft_mock = mock_redis_client.ft.return_value
+    ft_mock.info.return_value = {"attributes": [["identifier", "id", "type", "TAG"]]}
+    keys = [
+        f"{TEST_INDEX_NAME}:sources:{TEST_SOURCE}:doc1",
+        f"{TEST_INDEX_NAME}:sources:{TEST_SOURCE}:doc2",
+    ]
+    mock_redis_client.scan_iter.return_value = iter(keys)
+    pipeline = mock_redis_client.pipeline.return_value
+    pipeline.execute.side_effect = [["2024-01-01T00:00:00+00:00", None], []]
+
+    document_store._add_missing_index_fields()
+
+    mock_redis_client.scan_iter.assert_called_once_with(
+        f"{TEST_INDEX_NAME}:sources:*", count=1000
+    )
+    pipeline.hset.assert_called_once_with(keys[0], "created_at_ts", 1704067200.0)
+
+
+def test_build_filter_query(document_store: RedisDocumentStore) -> None:
+    filters = DocumentFilter(
+        url_prefix="https://example.com/v2/",
+        created_after=datetime.fromisoformat("2024-01-01T00:00:00+00:00"),
+    )
+
+    filter_query = document_store._build_filter_query(TEST_SOURCE, filters)
+
+    assert filter_query == (
+        "@source:{test_source} "
+        "@url:{https\\:\\/\\/example\\.com\\/v2\\/*} "
+        "@created_at_ts:[1704067200.0 +inf]"
+    )
+
+
 def test_add_documents(
     document_store: RedisDocumentStore,
     sample_documents: list[Document],
@@ -288,6 +341,19 @@ def test_full_text_search(
     assert results[1].content == "Test content 2"
 
 
+def test_full_text_search_without_terms(
+    mocker: MockerFixture, document_store: RedisDocumentStore
+) -> None:
+    ft_mock: Mock = mocker.Mock()
+    ft_mock.search.return_value.docs = []
+    mocker.patch.object(document_store.client, "ft", return_value=ft_mock)
+
+    document_store.full_text_search(TEST_SOURCE, "  ", TOP_K)
+
+    query = ft_mock.search.call_args[0][0]
+    assert query.query_string() == "@source:{test_source}"
+
+
 def test_hybrid_search(
     mocker: MockerFixture, document_store: RedisDocumentStore
 ) -> None:
@@ -353,8 +419,12 @@ def test_hybrid_search(
         top_k=TOP_K,
     )
 
-    mock_vector_search.assert_called_once_with(TEST_SOURCE, TEST_SEMANTIC_QUERY, TOP_K)
-    mock_text_search.assert_called_once_with(TEST_SOURCE, TEST_FULL_TEXT_QUERY, TOP_K)
+    mock_vector_search.assert_called_once_with(
+        TEST_SOURCE, TEST_SEMANTIC_QUERY, TOP_K, filters=None, deadline=None
+    )
+    mock_text_search.assert_called_once_with(
+        TEST_SOURCE, TEST_FULL_TEXT_QUERY, TOP_K, filters=None, deadline=None
+    )
 
     assert len(combined_results) == TOP_K
     # hybrid_search uses a reciprocal rank fusion algorithm to combine results
@@ -0,0 +1,235 @@
+import json
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from src.common.redis import RedisClient
+from src.document_store.base import DocumentStoreBackend
+from src.document_store.schemas import Document
+from src.ingestion.consumers import (
+    MAX_DELIVERIES,
+    EmbedConsumer,
+    Message,
+    WriteConsumer,
+)
+from src.ingestion.streams import (
+    CHUNKS_STREAM,
+    EMBEDDED_STREAM,
+    IngestionStreams,
+)
+from src.sources.exceptions import SyncSourceException
+
+
+@pytest.fixture
+def mock_redis_client(mocker: MockerFixture) -> Mock:
+    return mocker.Mock(spec=RedisClient)
+
+
+@pytest.fixture
+def mock_document_store(mocker: MockerFixture) -> Mock:
+    document_store = mocker.Mock(spec=DocumentStoreBackend)
+    document_store.embed_documents.side_effect = lambda docs: [
+        [float(i)] for i, _ in enumerate(docs)
+    ]
+    return document_store
+
+
+@pytest.fixture
+def streams(mock_redis_client: Mock) -> IngestionStreams:
+    return IngestionStreams(mock_redis_client, max_stream_length=10)
+
+
+def create_document(doc_id: str) -> Document:
+    return Document(
+        id=doc_id,
+        content=f"Content {doc_id}",
+        title=f"Title {doc_id}",
+        url=f"https://example.com/{doc_id}",
+        created_at=datetime(2024, 1, 1),
+    )
+
+
+def create_message(message_id: str, source: str, doc_id: str) -> Message:
+    return (
+        message_id,
+        {
+            "sync_id": "sync-1",
+            "source": source,
+            "document": create_document(doc_id).model_dump_json(),
+            "embedding": json.dumps([0.5]),
+        },
+    )
+
+
+def test_embed_consumer_forwards_embedded_documents(
+    mock_redis_client: Mock, mock_document_store: Mock, streams: IngestionStreams
+) -> None:
+    consumer = EmbedConsumer(
+        redis_client=mock_redis_client,
+        streams=streams,
+        name="embedder",
+        batch_size=10,
+        document_store=mock_document_store,
+    )
+    messages = [create_message("1-0", "docs", "a"), create_message("2-0", "docs", "b")]
+
+    consumer.process(messages, redelivered=False)
+
+    embedded = mock_document_store.embed_documents.call_args.args[0]
+    assert [doc.id for doc in embedded] == ["a", "b"]
+    forward = mock_redis_client.register_script.return_value
+    args = forward.call_args.kwargs["args"]
+    assert forward.call_args.kwargs["keys"] == [CHUNKS_STREAM, EMBEDDED_STREAM]
+    assert args[1:3] == ["1-0", "sync-1"]
+    assert args[5] == json.dumps([0.0])
+    assert args[6] == "2-0"
+
+
+def test_write_consumer_stores_documents_by_source(
+    mock_redis_client: Mock, mock_document_store: Mock, streams: IngestionStreams
+) -> None:
+    consumer = WriteConsumer(
+        redis_client=mock_redis_client,
+        streams=streams,
+        name="writer",
+        batch_size=10,
+        document_store=mock_document_store,
+    )
+    messages = [
+        create_message("1-0", "docs", "a"),
+        create_message("2-0", "blog", "b"),
+        create_message("3-0", "docs", "c"),
+    ]
+    mock_redis_client.mget.return_value = [None]
+
+    consumer.process(messages, redelivered=True)
+
+    stored = {
+        call.args[0]: [doc.id for doc in call.args[1]]
+        for call in mock_document_store.add_embedded_documents.call_args_list
+    }
+    assert stored == {"docs": ["a", "c"], "blog": ["b"]}
+    # Redelivered documents replace any written by the previous attempt
+    mock_document_store.delete_documents.assert_any_call("docs", ["a", "c"])
+    complete = mock_redis_client.register_script.return_value
+    assert complete.call_args.kwargs["args"][2:] == [
+        "1-0",
+        "sync-1",
+        "2-0",
+        "sync-1",
+        "3-0",
+        "sync-1",
+    ]
+
+
+def test_write_consumer_drops_documents_of_failed_syncs(
+    mock_redis_client: Mock, mock_document_store: Mock, streams: IngestionStreams
+) -> None:
+    consumer = WriteConsumer(
+        redis_client=mock_redis_client,
+        streams=streams,
+        name="writer",
+        batch_size=10,
+        document_store=mock_document_store,
+    )
+    failed_message = create_message("1-0", "docs", "a")
+    failed_message[1]["sync_id"] = "sync-2"
+    messages = [failed_message, create_message("2-0", "docs", "b")]
+    mock_redis_client.mget.side_effect = lambda keys: [
+        "Stalled" if "sync-2" in key else None for key in keys
+    ]
+
+    consumer.process(messages, redelivered=False)
+
+    stored = [
+        doc.id
+        for call in mock_document_store.add_embedded_documents.call_args_list
+        for doc in call.args[1]
+    ]
+    assert stored == ["b"]
+    # Dropped messages are still acknowledged
+    complete = mock_redis_client.register_script.return_value
+    assert complete.call_args.kwargs["args"][2:] == ["1-0", "sync-2", "2-0", "sync-1"]
+
+
+def test_consumer_gives_up_on_repeatedly_failing_messages(
+    mock_redis_client: Mock, mock_document_store: Mock, streams: IngestionStreams
+) -> None:
+    consumer = WriteConsumer(
+        redis_client=mock_redis_client,
+        streams=streams,
+        name="writer",
+        batch_size=10,
+        document_store=mock_document_store,
+    )
+    mock_redis_client.xautoclaim.return_value = [
+        "0-0",
+        [create_message("1-0", "docs", "a")],
+        [],
+    ]
+    mock_redis_client.xpending_range.return_value = [
+        {"times_delivered": MAX_DELIVERIES + 1}
+    ]
+    mock_redis_client.xreadgroup.return_value = []
+
+    consumer.consume_once()
+
+    mock_document_store.add_embedded_documents.assert_not_called()
+    mock_redis_client.set.assert_called_once()
+    assert "docs" in mock_redis_client.set.call_args.args[1]
+
+
+async def test_wait_for_sync_raises_on_failure(
+    mock_redis_client: Mock, streams: IngestionStreams
+) -> None:
+    mock_redis_client.get.side_effect = ["Could not embed", None]
+
+    with pytest.raises(SyncSourceException):
+        await streams.wait_for_sync("sync-1")
+
+    mock_redis_client.delete.assert_called_once()
+
+
+async def test_wait_for_sync_returns_when_documents_are_written(
+    mocker: MockerFixture, mock_redis_client: Mock, streams: IngestionStreams
+) -> None:
+    mocker.patch("src.ingestion.streams.POLL_INTERVAL", 0)
+    mock_redis_client.get.side_effect = [None, "2", None, "0"]
+
+    await streams.wait_for_sync("sync-1")
+
+    assert mock_redis_client.get.call_count == 4
+
+
+async def test_wait_for_sync_fails_without_progress(
+    mocker: MockerFixture, mock_redis_client: Mock
+) -> None:
+    mocker.patch("src.ingestion.streams.POLL_INTERVAL", 0)
+    mock_redis_client.get.side_effect = [None, "2", None, "1", None, "1"]
+    streams = IngestionStreams(mock_redis_client, max_stream_length=10, stall_timeout=0)
+
+    # The pending count stops going down, as when no consumers are running
+    with pytest.raises(SyncSourceException, match="No documents were written"):
+        await streams.wait_for_sync("sync-1")
+
+    assert mock_redis_client.get.call_count == 6
+    # The sync is recorded as failed, so its documents are dropped
+    mock_redis_client.set.assert_called_once_with(
+        "ingest_sync:sync-1:failed", mocker.ANY, ex=86400, nx=True
+    )
+    mock_redis_client.delete.assert_called_once_with("ingest_sync:sync-1:pending")
+
+
+async def test_publish_fails_while_stream_stays_full(
+    mocker: MockerFixture, mock_redis_client: Mock
+) -> None:
+    mocker.patch("src.ingestion.streams.POLL_INTERVAL", 0)
+    mock_redis_client.xlen.return_value = 10
+    streams = IngestionStreams(mock_redis_client, max_stream_length=10, stall_timeout=0)
+
+    with pytest.raises(SyncSourceException):
+        await streams.publish("sync-1", "source1", [create_document("doc1")])
+
+    mock_redis_client.pipeline.assert_not_called()
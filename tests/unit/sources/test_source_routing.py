@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import Mock
+
+from src.sources.routing import (
+    SourceProfile,
+    SourceProfileStore,
+    SourceRouter,
+    build_source_profile,
+)
+
+
+@pytest.fixture
+def mock_profile_store(mocker: MockerFixture) -> Mock:
+    return mocker.Mock(spec=SourceProfileStore)
+
+
+@pytest.fixture
+def source_router(mock_profile_store: Mock) -> SourceRouter:
+    return SourceRouter(mock_profile_store, ttl_seconds=60)
+
+
+def test_build_source_profile() -> None:
+    batches = [
+        [[1.0, 0.0, 0.0], [2.0, 0.0, 0.0]],
+        [[0.0, 3.0, 0.0]],
+        [],
+        [[0.0, 1.0, 0.0]],
+    ]
+
+    profile = build_source_profile(
+        "test-source", iter(batches), max_representatives=2, sample_size=10
+    )
+
+    assert profile is not None
+    assert profile.num_vectors == 4
+    assert profile.centroid == pytest.approx([2**-0.5, 2**-0.5, 0.0])
+    np.testing.assert_allclose(
+        sorted(profile.representatives), [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0]]
+    )
+
+
+def test_build_source_profile_without_embeddings() -> None:
+    profile = build_source_profile(
+        "test-source", iter([]), max_representatives=2, sample_size=10
+    )
+
+    assert profile is None
+
+
+def test_rank_sources(source_router: SourceRouter, mock_profile_store: Mock) -> None:
+    mock_profile_store.get_profiles.return_value = [
+        SourceProfile(
+            source_name="docs",
+            centroid=[1.0, 0.0],
+            representatives=[[1.0, 0.0]],
+            num_vectors=10,
+        ),
+        SourceProfile(
+            source_name="issues",
+            centroid=[0.0, 1.0],
+            representatives=[[0.6, 0.8]],
+            num_vectors=10,
+        ),
+    ]
+
+    ranked = source_router.rank([0.0, 2.0], ["docs", "issues", "unprofiled"])
+    ranked_again = source_router.rank([2.0, 0.0], ["docs", "issues"])
+
+    assert [name for name, _ in ranked] == ["issues", "docs"]
+    assert ranked[0][1] == pytest.approx(1.0)
+    assert [name for name, _ in ranked_again] == ["docs", "issues"]
+    assert ranked_again[1][1] == pytest.approx(0.6)
+    # Profiles are cached in memory after the first lookup
+    mock_profile_store.get_profiles.assert_called_once_with(
+        ["docs", "issues", "unprofiled"]
+    )
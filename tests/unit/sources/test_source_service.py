@@ -13,10 +13,13 @@ from src.connectors.connector_type import ConnectorType
 from src.connectors.sitemap.config import SitemapConfig
 from src.sources.metadata.schemas import MetadataUpdate, SourceMetadata
 from src.sources.schemas import (
+    BatchSearchQuery,
+    BatchSearchResult,
     CreateSourceRequest,
     SourceTask,
     UpdateSourceRequest,
 )
+from src.sources.catalogue import SourceCatalogue
 from src.sources.service import SourceService
 from src.sources.metadata.base import SourceMetadataStore
 from src.document_store.base import DocumentStoreBackend
@@ -426,9 +429,124 @@ async def test_search_source_success(
         semantic_query="test semantic query",
         full_text_query="test full text query",
         top_k=2,
+        filters=None,
+        deadline=None,
     )
 
 
+async def test_batch_search_sources_success(
+    source_service: SourceService,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        source_service.metadata_store, "metadata_exists", return_value=True
+    )
+    mock_embed_queries = mocker.patch.object(
+        source_service.document_store,
+        "embed_queries",
+        return_value=[[0.1], [0.2]],
+    )
+    mock_hybrid_search = mocker.patch.object(
+        source_service.document_store, "hybrid_search", return_value=[]
+    )
+
+    queries = [
+        BatchSearchQuery(source="source-1", query="first query", top_k=2),
+        BatchSearchQuery(source="source-2", query="second query", top_k=3),
+    ]
+
+    results = list(source_service.batch_search_sources(queries, concurrency=2))
+
+    mock_embed_queries.assert_called_once_with(["first query", "second query"])
+    assert mock_hybrid_search.call_count == 2
+    mock_hybrid_search.assert_any_call(
+        source_name="source-1",
+        semantic_query="first query",
+        full_text_query="first query",
+        top_k=2,
+        query_embedding=[0.1],
+        filters=None,
+    )
+    mock_hybrid_search.assert_any_call(
+        source_name="source-2",
+        semantic_query="second query",
+        full_text_query="second query",
+        top_k=3,
+        query_embedding=[0.2],
+        filters=None,
+    )
+    assert sorted(results, key=lambda result: result.index) == [
+        BatchSearchResult(
+            index=0, source="source-1", query="first query", documents=[]
+        ),
+        BatchSearchResult(
+            index=1, source="source-2", query="second query", documents=[]
+        ),
+    ]
+
+
+async def test_batch_search_sources_reports_failed_queries(
+    source_service: SourceService,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        source_service.metadata_store, "metadata_exists", return_value=True
+    )
+    mocker.patch.object(
+        source_service.document_store, "embed_queries", return_value=[[0.1], [0.2]]
+    )
+
+    def hybrid_search(**kwargs: object) -> list:
+        if kwargs["source_name"] == "source-2":
+            raise RuntimeError("Connection reset")
+        return []
+
+    mocker.patch.object(
+        source_service.document_store, "hybrid_search", side_effect=hybrid_search
+    )
+
+    queries = [
+        BatchSearchQuery(source="source-1", query="first query"),
+        BatchSearchQuery(source="source-2", query="second query"),
+    ]
+
+    results = list(source_service.batch_search_sources(queries, concurrency=2))
+
+    # The failed query gets an error line and the other results still stream
+    assert sorted(results, key=lambda result: result.index) == [
+        BatchSearchResult(
+            index=0, source="source-1", query="first query", documents=[]
+        ),
+        BatchSearchResult(
+            index=1,
+            source="source-2",
+            query="second query",
+            error="An unexpected error occurred",
+        ),
+    ]
+
+
+async def test_batch_search_sources_not_found(
+    source_service: SourceService,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        source_service.metadata_store, "metadata_exists", return_value=False
+    )
+    mock_embed_queries = mocker.patch.object(
+        source_service.document_store, "embed_queries"
+    )
+
+    with pytest.raises(ResourceNotFoundException) as exc:
+        source_service.batch_search_sources(
+            [BatchSearchQuery(source="missing-source", query="query")],
+            concurrency=2,
+        )
+
+    assert exc.value.identifier == "missing-source"
+    mock_embed_queries.assert_not_called()
+
+
 async def test_delete_source_success(
     source_service: SourceService,
     mocker: MockerFixture,
@@ -448,3 +566,33 @@ async def test_delete_source_success(
 
     mock_delete_metadata.assert_called_once_with("test-source")
     mock_delete_documents.assert_called_once_with("test-source")
+
+
+def test_get_catalogue_is_cached_until_invalidated(
+    mock_metadata_store: SourceMetadataStore,
+    mock_document_store: DocumentStoreBackend,
+    mock_lock_service: LockService,
+    sample_source_metadata: SourceMetadata,
+    mocker: MockerFixture,
+) -> None:
+    source_service = SourceService(
+        metadata_store=mock_metadata_store,
+        document_store=mock_document_store,
+        lock_service=mock_lock_service,
+        catalogue=SourceCatalogue(ttl_seconds=60),
+    )
+    mock_list_metadata = mocker.patch.object(
+        mock_metadata_store, "list_metadata", return_value=[sample_source_metadata]
+    )
+    mocker.patch.object(mock_metadata_store, "metadata_exists", return_value=True)
+    mocker.patch.object(mock_lock_service, "lock_exists", return_value=False)
+
+    assert source_service.get_catalogue() == [sample_source_metadata]
+    assert source_service.get_catalogue() == [sample_source_metadata]
+    assert mock_list_metadata.call_count == 1
+
+    source_service.delete_source("test-source")
+    mock_list_metadata.return_value = []
+
+    assert source_service.get_catalogue() == []
+    assert mock_list_metadata.call_count == 2
@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, Mock
 from openai import OpenAI
 import pytest
 from datetime import datetime
@@ -9,6 +9,7 @@ from src.common.redis import RedisClient
 from src.document_store.schemas import Document
 from src.config import Settings
 from src.connectors.common.schemas import ExtractedDocument
+from src.connectors.common.sharding import Shard
 from src.document_store.base import DocumentStoreBackend
 from src.sources.exceptions import SyncSourceException
 from src.connectors.service import ConnectorService
@@ -18,7 +19,10 @@ from src.connectors.sitemap.config import SitemapConfig
 from src.sources.metadata.base import SourceMetadataStore
 from src.sources.metadata.schemas import MetadataUpdate, SourceMetadata
 from src.sources.schemas import SyncSourceOutput
+from src.sources.sync.incremental import IncrementalSyncState
 from src.sources.sync.service import SourceSyncService
+from src.sources.sync.shards import ShardedSync
+from src.ingestion.streams import IngestionStreams
 
 
 @pytest.fixture
@@ -36,6 +40,9 @@ def mock_settings(mocker: MockerFixture) -> Settings:
     settings.DOCUMENT_SYNC_BATCH_SIZE = 2
     settings.OLLAMA_BASE_URL = None
     settings.DOCUMENT_UUID_NAMESPACE = "ee747eb2-fd0f-4650-9785-a2e9ae036ff2"
+    settings.HTTP_CACHE_ENABLED = False
+    settings.INGEST_MODE = "inline"
+    settings.INCREMENTAL_SYNC_FULL_INTERVAL = 86400
     return settings
 
 
@@ -61,7 +68,9 @@ def mock_metadata_store(mocker: MockerFixture) -> SourceMetadataStore:
 
 @pytest.fixture
 def mock_connector_service(mocker: MockerFixture) -> ConnectorService:
-    return mocker.Mock(spec=ConnectorService)
+    connector_service = mocker.Mock(spec=ConnectorService)
+    connector_service.supports_incremental_sync.return_value = False
+    return connector_service
 
 
 @pytest.fixture
@@ -445,3 +454,385 @@ async def test_remove_stale_documents_failure(
         await source_sync_service._remove_stale_documents(doc_ids_to_remove, 0)  # type: ignore
 
     assert str(exc.value) == "Failed to remove documents from source test-source"
+
+
+@pytest.fixture
+def mock_sharded_sync(mocker: MockerFixture) -> Mock:
+    sharded_sync = mocker.Mock(spec=ShardedSync)
+    sharded_sync.sync_id = "sync-1"
+    sharded_sync.shard_count = 2
+    sharded_sync.lock_service = mocker.Mock(renew_lock=AsyncMock())
+    sharded_sync.claim_shard.side_effect = [(1, mocker.Mock()), None]
+    sharded_sync.is_finished.return_value = True
+    sharded_sync.get_failures.return_value = {}
+    sharded_sync.get_num_docs.return_value = 3
+    sharded_sync.get_docs_added.return_value = 2
+    return sharded_sync
+
+
+async def test_finish_sharded_sync_success(
+    source_sync_service: SourceSyncService,
+    sample_extracted_documents: list[ExtractedDocument],
+    sample_documents: list[Document],
+    mock_sharded_sync: Mock,
+    mock_current_datetime: datetime,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch(
+        "src.sources.sync.service.get_current_datetime",
+        return_value=mock_current_datetime,
+    )
+
+    async def extract_shard(
+        _: ConnectorConfig, shard: Shard
+    ) -> AsyncIterator[ExtractedDocument]:
+        assert shard == Shard(index=1, count=2)
+        for doc in sample_extracted_documents:
+            yield doc
+
+    mocker.patch.object(
+        source_sync_service.connector_service,
+        "extract_documents",
+        side_effect=extract_shard,
+    )
+    # The first document was already stored, or reported by another shard
+    mock_sharded_sync.report_documents.side_effect = lambda index, doc_ids: [
+        doc_id for doc_id in doc_ids if doc_id != sample_documents[0].id
+    ]
+    mock_sharded_sync.iter_stale_doc_ids.return_value = iter([["stale1"]])
+    mocker.patch.object(
+        source_sync_service.metadata_store,
+        "update_metadata",
+        return_value=SourceMetadata(
+            id="test-id",
+            name="test-source",
+            description="Test description",
+            last_task_id="test-task-id",
+            connector=source_sync_service.connector_config,
+            num_docs=3,
+            created_at=mock_current_datetime,
+            updated_at=mock_current_datetime,
+        ),
+    )
+    mock_add_documents_batch = mocker.patch.object(
+        source_sync_service, "_add_documents_batch"
+    )
+    mock_remove_stale_documents = mocker.patch.object(
+        source_sync_service, "_remove_stale_documents"
+    )
+
+    result = await source_sync_service.finish_sharded_sync(mock_sharded_sync)
+
+    assert result.docs_added == 2
+    assert result.docs_removed == 1
+    added_docs = [
+        doc for call in mock_add_documents_batch.call_args_list for doc in call.args[0]
+    ]
+    assert [doc.id for doc in added_docs] == [doc.id for doc in sample_documents[1:]]
+    recorded_doc_ids = [
+        doc_id
+        for call in mock_sharded_sync.record_documents.call_args_list
+        for doc_id in call.args[0]
+    ]
+    assert recorded_doc_ids == [doc.id for doc in sample_documents[1:]]
+    mock_sharded_sync.complete_shard.assert_called_once_with(1, mocker.ANY, 2)
+    mock_remove_stale_documents.assert_called_once_with({"stale1"}, 3)
+    mock_sharded_sync.clear.assert_called_once()
+
+
+async def test_finish_sharded_sync_keeps_documents_on_shard_failure(
+    source_sync_service: SourceSyncService,
+    mock_sharded_sync: Mock,
+    mocker: MockerFixture,
+) -> None:
+    mock_extract = AsyncMock()
+    mock_extract.__aiter__.side_effect = Exception("Extraction failed")
+    mocker.patch.object(
+        source_sync_service.connector_service,
+        "extract_documents",
+        return_value=mock_extract,
+    )
+    mock_sharded_sync.get_failures.return_value = {"1": "Extraction failed"}
+    mock_remove_stale_documents = mocker.patch.object(
+        source_sync_service, "_remove_stale_documents"
+    )
+
+    with pytest.raises(SyncSourceException) as exc:
+        await source_sync_service.finish_sharded_sync(mock_sharded_sync)
+
+    assert "Failed to sync 1 of 2 shards" in str(exc.value)
+    mock_sharded_sync.fail_shard.assert_called_once_with(
+        1, mocker.ANY, "Extraction failed"
+    )
+    mock_sharded_sync.iter_stale_doc_ids.assert_not_called()
+    mock_remove_stale_documents.assert_not_called()
+    mock_sharded_sync.clear.assert_called_once()
+
+
+async def test_finish_sharded_sync_doesnt_record_unwritten_documents(
+    source_sync_service: SourceSyncService,
+    sample_extracted_documents: list[ExtractedDocument],
+    mock_sharded_sync: Mock,
+    mocker: MockerFixture,
+) -> None:
+    async def extract_shard(
+        _: ConnectorConfig, shard: Shard
+    ) -> AsyncIterator[ExtractedDocument]:
+        for doc in sample_extracted_documents:
+            yield doc
+
+    mocker.patch.object(
+        source_sync_service.connector_service,
+        "extract_documents",
+        side_effect=extract_shard,
+    )
+    mock_sharded_sync.report_documents.side_effect = lambda index, doc_ids: doc_ids
+    mock_sharded_sync.get_failures.return_value = {"1": "Failed to add batch"}
+    mocker.patch.object(
+        source_sync_service,
+        "_add_documents_batch",
+        side_effect=SyncSourceException("Failed to add batch"),
+    )
+
+    with pytest.raises(SyncSourceException):
+        await source_sync_service.finish_sharded_sync(mock_sharded_sync)
+
+    # The shard claims the documents again when it is retried
+    mock_sharded_sync.record_documents.assert_not_called()
+    mock_sharded_sync.fail_shard.assert_called_once_with(
+        1, mocker.ANY, "Failed to add batch"
+    )
+
+
+async def test_sync_shards_after_sync_finished(
+    source_sync_service: SourceSyncService,
+    mock_redis_client: Mock,
+    mocker: MockerFixture,
+) -> None:
+    sharded_sync = ShardedSync(mock_redis_client, sync_id="sync-1", shard_count=2)
+    mock_acquire_lock = mocker.patch.object(sharded_sync.lock_service, "acquire_lock")
+    mock_extract = mocker.patch.object(
+        source_sync_service.connector_service, "extract_documents"
+    )
+    # A shard task that runs after finish_sharded_sync cleared the state
+    sharded_sync.clear()
+    mock_redis_client.exists.return_value = 0
+    mock_redis_client.smembers.return_value = set()
+
+    await source_sync_service.sync_shards(sharded_sync)
+
+    assert sharded_sync.claim_shard() is None
+    mock_acquire_lock.assert_not_called()
+    mock_extract.assert_not_called()
+    source_sync_service.document_store.add_documents.assert_not_called()
+
+
+def test_claim_shard_releases_lock_when_sync_finishes(
+    mock_redis_client: Mock, mocker: MockerFixture
+) -> None:
+    sharded_sync = ShardedSync(mock_redis_client, sync_id="sync-1", shard_count=2)
+    lock = mocker.Mock()
+    mocker.patch.object(sharded_sync.lock_service, "acquire_lock", return_value=lock)
+    mock_release_lock = mocker.patch.object(sharded_sync.lock_service, "release_lock")
+    mock_redis_client.exists.return_value = 1
+    mock_redis_client.smembers.return_value = set()
+    # The sync finished between the first check and the shard's lock
+    mock_redis_client.pipeline.return_value.execute.return_value = [False, 0]
+
+    assert sharded_sync.claim_shard() is None
+    mock_release_lock.assert_called_once_with(lock)
+
+
+async def test_sync_documents_publishes_to_ingestion_streams(
+    source_sync_service: SourceSyncService,
+    sample_extracted_documents: list[ExtractedDocument],
+    patch_extract_documents: AsyncMock,
+    mock_current_datetime: datetime,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        source_sync_service.document_store, "get_document_ids", return_value=[]
+    )
+    await patch_extract_documents(source_sync_service, sample_extracted_documents)
+    mocker.patch.object(
+        source_sync_service.metadata_store,
+        "update_metadata",
+        return_value=SourceMetadata(
+            id="test-id",
+            name="test-source",
+            description="Test description",
+            last_task_id="test-task-id",
+            connector=source_sync_service.connector_config,
+            num_docs=3,
+            created_at=mock_current_datetime,
+            updated_at=mock_current_datetime,
+        ),
+    )
+    mock_streams = mocker.Mock(spec=IngestionStreams)
+    source_sync_service.ingestion_streams = mock_streams
+    mock_add_documents_batch = mocker.patch.object(
+        source_sync_service, "_add_documents_batch"
+    )
+
+    result = await source_sync_service.sync_documents()
+
+    assert result.docs_added == 3
+    mock_add_documents_batch.assert_not_called()
+    published = [
+        doc for call in mock_streams.publish.call_args_list for doc in call.args[2]
+    ]
+    assert len(published) == 3
+    sync_id = mock_streams.publish.call_args.args[0]
+    mock_streams.wait_for_sync.assert_awaited_once_with(sync_id)
+
+
+async def test_sync_documents_fails_published_documents_on_error(
+    source_sync_service: SourceSyncService,
+    sample_extracted_documents: list[ExtractedDocument],
+    patch_extract_documents: AsyncMock,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        source_sync_service.document_store, "get_document_ids", return_value=[]
+    )
+    await patch_extract_documents(source_sync_service, sample_extracted_documents)
+    mock_streams = mocker.Mock(spec=IngestionStreams)
+    mock_streams.wait_for_sync.side_effect = SyncSourceException("Stalled")
+    source_sync_service.ingestion_streams = mock_streams
+
+    with pytest.raises(SyncSourceException):
+        await source_sync_service.sync_documents()
+
+    # The consumers drop the documents still in the streams
+    sync_id = mock_streams.publish.call_args.args[0]
+    mock_streams.fail_sync.assert_called_once_with(sync_id, "Stalled")
+
+
+@pytest.fixture
+def mock_incremental_sync_state(
+    source_sync_service: SourceSyncService,
+    mock_current_datetime: datetime,
+    mocker: MockerFixture,
+) -> Mock:
+    source_metadata = SourceMetadata(
+        id="test-id",
+        name="test-source",
+        description="Test description",
+        last_task_id="test-task-id",
+        connector=source_sync_service.connector_config,
+        num_docs=3,
+        created_at=mock_current_datetime,
+        updated_at=mock_current_datetime,
+    )
+    source_sync_service.connector_service.supports_incremental_sync.return_value = True  # type: ignore
+    mocker.patch.object(
+        source_sync_service.metadata_store,
+        "get_metadata",
+        return_value=source_metadata,
+    )
+    mocker.patch.object(
+        source_sync_service.metadata_store,
+        "update_metadata",
+        return_value=source_metadata,
+    )
+    mocker.patch(
+        "src.sources.sync.service.get_current_datetime",
+        return_value=mock_current_datetime,
+    )
+    incremental_sync_state = mocker.Mock(spec=IncrementalSyncState)
+    mocker.patch(
+        "src.sources.sync.service.IncrementalSyncState",
+        return_value=incremental_sync_state,
+    )
+    return incremental_sync_state
+
+
+async def test_sync_documents_replaces_documents_of_updated_items(
+    source_sync_service: SourceSyncService,
+    sample_extracted_documents: list[ExtractedDocument],
+    sample_documents: list[Document],
+    mock_incremental_sync_state: Mock,
+    mocker: MockerFixture,
+) -> None:
+    watermark = datetime(2024, 1, 1, 11, 0, 0)
+    mock_incremental_sync_state.get_watermark.return_value = watermark
+    # Issue 1 was edited: its first document is unchanged, its second is new
+    mock_incremental_sync_state.get_doc_ids.return_value = {
+        "1": {sample_documents[0].id, "old-chunk"}
+    }
+    mocker.patch.object(
+        source_sync_service.document_store,
+        "get_document_ids",
+        return_value=[sample_documents[0].id, "old-chunk", "other-issue-chunk"],
+    )
+    updated_docs = [
+        doc.model_copy(update={"parent_id": "1"})
+        for doc in sample_extracted_documents[:2]
+    ]
+
+    async def extract_updated(
+        _: ConnectorConfig, since: datetime
+    ) -> AsyncIterator[ExtractedDocument]:
+        assert since == watermark
+        for doc in updated_docs:
+            yield doc
+
+    mocker.patch.object(
+        source_sync_service.connector_service,
+        "extract_documents",
+        side_effect=extract_updated,
+    )
+    mock_add_documents_batch = mocker.patch.object(
+        source_sync_service, "_add_documents_batch"
+    )
+    mock_remove_stale_documents = mocker.patch.object(
+        source_sync_service, "_remove_stale_documents"
+    )
+
+    result = await source_sync_service.sync_documents()
+
+    assert result.docs_added == 1
+    assert result.docs_removed == 1
+    assert [doc.id for doc in mock_add_documents_batch.call_args.args[0]] == [
+        sample_documents[1].id
+    ]
+    # Documents of items that weren't updated are kept
+    mock_remove_stale_documents.assert_called_once_with({"old-chunk"}, 3)
+    mock_incremental_sync_state.complete_incremental_sync.assert_called_once_with(
+        {"1": {sample_documents[0].id, sample_documents[1].id}},
+        datetime(2024, 1, 1, 12, 0, 0),
+    )
+
+
+async def test_sync_documents_records_items_of_full_sync(
+    source_sync_service: SourceSyncService,
+    sample_extracted_documents: list[ExtractedDocument],
+    sample_documents: list[Document],
+    patch_extract_documents: AsyncMock,
+    mock_incremental_sync_state: Mock,
+    mocker: MockerFixture,
+) -> None:
+    mock_incremental_sync_state.get_watermark.return_value = None
+    mocker.patch.object(
+        source_sync_service.document_store, "get_document_ids", return_value=[]
+    )
+    await patch_extract_documents(
+        source_sync_service,
+        [
+            doc.model_copy(update={"parent_id": str(i // 2)})
+            for i, doc in enumerate(sample_extracted_documents)
+        ],
+    )
+    mocker.patch.object(source_sync_service, "_add_documents_batch")
+
+    result = await source_sync_service.sync_documents()
+
+    assert result.docs_added == 3
+    mock_incremental_sync_state.clear.assert_called_once()
+    mock_incremental_sync_state.complete_full_sync.assert_called_once_with(
+        {
+            "0": {sample_documents[0].id, sample_documents[1].id},
+            "1": {sample_documents[2].id},
+        },
+        datetime(2024, 1, 1, 12, 0, 0),
+    )